@@ -90,6 +90,8 @@ export class AppState {
       ctxWhatIfIncome: DOM_ELEMENTS.whatIf.canvases.income.getContext("2d"),
       ctxWhatIfWait: DOM_ELEMENTS.whatIf.canvases.wait.getContext("2d"),
       ctxWhatIfPlatform: DOM_ELEMENTS.whatIf.canvases.platform.getContext("2d"),
+      // Set when a sweep starts: see WhatIfTab.showSweepChart
+      ctxWhatIfSweep: null,
       chartType: CHART_TYPES.WHAT_IF,
       settingsTable: DOM_ELEMENTS.whatIf.settingsTable,
       measuresTable: DOM_ELEMENTS.whatIf.measuresTable,
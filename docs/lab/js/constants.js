@@ -15,6 +15,12 @@ export const SimulationActions = {
   // Sent main-thread -> worker after a frame has been rendered (or dropped),
   // so the worker can produce the next one. See webworker.js for why.
   FrameAck: "frameAck",
+  // Sent to a sweep pool worker (see js/sweep-pool.js) to run a whole
+  // simulation and post only its final results.
+  RunToCompletion: "runToCompletion",
+  // Ask for an estimate of the steady state from the package's precomputed
+  // atlas (see ridehail/atlas.py), to show while a simulation runs
+  EstimateSteadyState: "estimateSteadyState",
 };
 
 export const CHART_TYPES = {
@@ -102,6 +102,8 @@ export const DOM_ELEMENTS = {
     comparisonFabButton: document.getElementById(
       "what-if-comparison-fab-button",
     ),
+    sweepButton: document.getElementById("what-if-sweep-button"),
+    sweepCanvasParent: document.getElementById("what-if-sweep-canvas-parent"),
     setComparisonButtons: document.querySelectorAll(
       ".what-if-set-comparison button, .what-if-set-comparison input",
     ),
@@ -24,6 +24,7 @@ import {
   plotWhatIfPlatformChart,
   fillWhatIfSettingsTable,
   fillWhatIfMeasuresTable,
+  showWhatIfEstimate,
 } from "../modules/whatif.js";
 
 export class MessageHandler {
@@ -48,7 +49,12 @@ export class MessageHandler {
     // to them here with w.onmessage, which provides
     // an event
     if (typeof w === "undefined") {
-      window.w = new Worker("webworker.js", { type: "module" });
+      // ?engine=native (set by the CLI's web_native_engine option) runs the
+      // simulation in the CLI's Python process instead of in Pyodide
+      const engine = new URLSearchParams(window.location.search).get("engine");
+      const workerUrl =
+        engine === "native" ? "webworker.js?engine=native" : "webworker.js";
+      window.w = new Worker(workerUrl, { type: "module" });
     }
     w.onmessage = (event) => this.handleMessage(event);
   }
@@ -69,6 +75,12 @@ export class MessageHandler {
         return;
       }
 
+      // An estimate of a What If run's steady state, sent before its frames
+      if (results.get("action") === "steadyStateEstimate") {
+        showWhatIfEstimate(event.data.name, event.data.estimate);
+        return;
+      }
+
       // The "Pyodide loaded" message also carries a "version" field (see
       // webworker.js), so it's no longer guaranteed to be size 1 - match on
       // "text" explicitly rather than tightening the implicit size<=1 rule.
@@ -0,0 +1,160 @@
+/*
+ * Sweep Pool
+ * Runs the simulations of a What If sweep side by side, one per core.
+ *
+ * The lab's own worker (window.w, see message-handler.js) runs one
+ * simulation at a time, frame by frame, so that it can be animated. The runs
+ * of a sweep are independent and are only shown once they are complete, so
+ * the pool instead keeps a set of webworker.js workers, each of which loads
+ * Pyodide and worker.py once and then runs one whole simulation after
+ * another (the RunToCompletion action), posting only the final results.
+ *
+ * Pool workers always run the simulation in Pyodide, even when the lab uses
+ * the CLI's native engine, which runs a single simulation at a time.
+ */
+
+import { SimulationActions } from "./constants.js";
+
+// Each worker holds its own Pyodide runtime and ridehail install (tens of
+// MB), so even the largest machines get no more than this many
+const MAX_SWEEP_WORKERS = 8;
+
+/**
+ * One worker per core, leaving a core for the page and the lab's own worker
+ * @returns {number} the number of workers in a pool
+ */
+export function defaultPoolSize() {
+  const cores = navigator.hardwareConcurrency || 2;
+  return Math.max(1, Math.min(MAX_SWEEP_WORKERS, cores - 1));
+}
+
+export class SweepPool {
+  constructor(size = defaultPoolSize()) {
+    this.size = size;
+    // Each slot is {worker, job}: the job is null while the worker is idle
+    this.slots = [];
+    this.queue = [];
+    this.sweep = null;
+  }
+
+  /**
+   * Run a sweep, cancelling any sweep that is still running: its queued
+   * runs are dropped, and the results of its running runs are ignored.
+   * @param {Object[]} settingsList - the simulation settings of each run
+   * @param {Function} onResult - called with (index, results) as each run
+   *   completes, in order of completion, not of index
+   * @param {Function} onError - called with (index, message) if a run fails
+   * @returns {Promise<boolean>} resolves when every run has completed or
+   *   failed (true), or when the sweep is cancelled (false)
+   */
+  run(settingsList, onResult, onError) {
+    this.cancel();
+    return new Promise((resolve) => {
+      const sweep = {
+        remaining: settingsList.length,
+        onResult: onResult,
+        onError: onError,
+        resolve: resolve,
+      };
+      this.sweep = sweep;
+      if (sweep.remaining == 0) {
+        this.finishSweep(true);
+        return;
+      }
+      settingsList.forEach((settings, index) => {
+        this.queue.push({
+          sweep: sweep,
+          index: index,
+          settings: Object.assign({}, settings, {
+            action: SimulationActions.RunToCompletion,
+            sweepIndex: index,
+            frameIndex: 0,
+          }),
+        });
+      });
+      this.dispatch();
+    });
+  }
+
+  /**
+   * Cancel the running sweep, if any. Runs already under way can't be
+   * interrupted, so their workers finish them before taking the next sweep.
+   */
+  cancel() {
+    this.queue = [];
+    if (this.sweep !== null) {
+      this.finishSweep(false);
+    }
+  }
+
+  /**
+   * Remove the pool's workers, e.g. when the page no longer needs them
+   */
+  terminate() {
+    this.cancel();
+    this.slots.forEach((slot) => slot.worker.terminate());
+    this.slots = [];
+  }
+
+  finishSweep(completed) {
+    const sweep = this.sweep;
+    this.sweep = null;
+    sweep.resolve(completed);
+  }
+
+  /**
+   * Give queued runs to idle workers, starting new workers (which are then
+   * kept for later sweeps) until the pool is full
+   */
+  dispatch() {
+    while (this.queue.length > 0) {
+      let slot = this.slots.find((s) => s.job === null);
+      if (slot === undefined) {
+        if (this.slots.length >= this.size) {
+          return;
+        }
+        slot = this.addWorker();
+      }
+      slot.job = this.queue.shift();
+      // A worker that is still loading Pyodide holds the message until it
+      // is ready (see self.onmessage in webworker.js)
+      slot.worker.postMessage(slot.job.settings);
+    }
+  }
+
+  addWorker() {
+    const slot = {
+      worker: new Worker("webworker.js", { type: "module" }),
+      job: null,
+    };
+    slot.worker.onmessage = (event) => this.handleMessage(slot, event.data);
+    this.slots.push(slot);
+    return slot;
+  }
+
+  handleMessage(slot, data) {
+    if (data.text !== undefined) {
+      // "Pyodide loaded"
+      return;
+    }
+    if (data.error == "initialization") {
+      // The run the worker was given fails with its own error message
+      console.warn("Sweep worker failed to load:", data.message);
+      return;
+    }
+    const job = slot.job;
+    slot.job = null;
+    if (job !== null && job.sweep === this.sweep) {
+      if (data.error !== undefined) {
+        job.sweep.onError(job.index, data.message);
+      } else {
+        job.sweep.onResult(job.index, data.results);
+      }
+      job.sweep.remaining -= 1;
+      if (job.sweep.remaining == 0) {
+        this.finishSweep(true);
+      }
+    }
+    this.dispatch();
+  }
+}
@@ -548,6 +548,125 @@ export function plotWhatIfPlatformChart(baselineData, eventData) {
   window.whatIfPlatformChart.update();
 }
 
+// The measures of the sweep chart, as percentages, with their colors
+const sweepMeasures = [
+  { name: "VEHICLE_FRACTION_P1", label: "P1", color: colors.get("IDLE") },
+  { name: "VEHICLE_FRACTION_P2", label: "P2", color: colors.get("DISPATCHED") },
+  { name: "VEHICLE_FRACTION_P3", label: "P3", color: colors.get("WITH_RIDER") },
+  {
+    name: "TRIP_MEAN_WAIT_FRACTION",
+    label: "Wait / ride",
+    color: WAITING_RIDER_COLOR,
+  },
+];
+
+export function initWhatIfSweepChart(uiSettings, xAxisTitle) {
+  const config = {
+    type: "line",
+    plugins: [chartBackgroundPlugin],
+    data: {
+      datasets: sweepMeasures.map((measure) => ({
+        label: measure.label,
+        data: [],
+        borderColor: measure.color,
+        backgroundColor: measure.color,
+        borderWidth: 2,
+      })),
+    },
+    options: {
+      responsive: true,
+      maintainAspectRatio: false,
+      // Points arrive out of order, as the runs of the sweep complete
+      animation: false,
+      scales: {
+        x: {
+          type: "linear",
+          title: { display: true, text: xAxisTitle },
+        },
+        y: {
+          min: 0.0,
+          suggestedMax: 100.0,
+          title: { display: true, text: "%" },
+        },
+      },
+      plugins: {
+        legend: { position: "top" },
+        datalabels: { display: false },
+      },
+    },
+  };
+  if (window.whatIfSweepChart instanceof Chart) {
+    window.whatIfSweepChart.destroy();
+  }
+  window.whatIfSweepChart = new Chart(uiSettings.ctxWhatIfSweep, config);
+}
+
+export function plotWhatIfSweepPoint(x, eventData) {
+  window.whatIfSweepChart.data.datasets.forEach((dataset, i) => {
+    const value = eventData.get(sweepMeasures[i].name);
+    const point = { x: x, y: value == null ? null : 100.0 * value };
+    // Keep the points in order of x, so the lines join neighbours
+    const at = dataset.data.findIndex((p) => p.x > x);
+    if (at == -1) {
+      dataset.data.push(point);
+    } else {
+      dataset.data.splice(at, 0, point);
+    }
+  });
+  window.whatIfSweepChart.update();
+}
+
+// Precomputed estimates of the steady state of each run (see
+// ridehail/atlas.py), keyed by the run's settings name
+const whatIfEstimates = new Map();
+const WHAT_IF_RUN_LABELS = {
+  whatIfSimSettingsBaseline: "Baseline",
+  whatIfSimSettingsComparison: "Comparison",
+};
+
+/**
+ * Show the estimate of a run's steady state, or remove it if there is none
+ * (the atlas only covers the presets, and settings near them)
+ * @param {string} name - the name of the run's SimSettings
+ * @param {Object|null} estimate - measure name to estimated value
+ */
+export function showWhatIfEstimate(name, estimate) {
+  if (estimate) {
+    whatIfEstimates.set(name, estimate);
+  } else {
+    whatIfEstimates.delete(name);
+  }
+  const element = document.getElementById("what-if-estimate");
+  const percent = (value) =>
+    value == null ? "-" : `${Math.round(100 * value)}%`;
+  const lines = [];
+  for (const [runName, label] of Object.entries(WHAT_IF_RUN_LABELS)) {
+    const e = whatIfEstimates.get(runName);
+    if (e) {
+      lines.push(
+        `${label}: ${Math.round(e.VEHICLE_MEAN_COUNT)} vehicles, ` +
+          `${percent(e.VEHICLE_FRACTION_P3)} of vehicle time with riders, ` +
+          `${percent(e.TRIP_MEAN_WAIT_FRACTION_TOTAL)} of trip time waiting`,
+      );
+    }
+  }
+  element.replaceChildren(
+    ...lines.map((line) => {
+      const div = document.createElement("div");
+      div.textContent = line;
+      return div;
+    }),
+  );
+  element.hidden = lines.length == 0;
+}
+
+export function clearWhatIfEstimates() {
+  whatIfEstimates.clear();
+  const element = document.getElementById("what-if-estimate");
+  element.replaceChildren();
+  element.hidden = true;
+}
+
 export function initWhatIfTables() {
   document.getElementById("what-if-table-settings-body").replaceChildren();
   document.getElementById("what-if-table-measures-body").replaceChildren();
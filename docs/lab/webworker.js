@@ -3,6 +3,11 @@
  *
  * This worker loads Pyodide and runs Python simulation code,
  * communicating results back to the main thread via postMessage.
+ *
+ * When created as webworker.js?engine=native (by the CLI's
+ * web_native_engine option), the simulation instead runs in the CLI's
+ * Python process, and this worker only relays messages: see the native
+ * engine transport below, and ridehail/animation/lab_server.py.
  */
 
 import {
@@ -79,6 +84,61 @@ let activeRunId = 0;
 let frameDurationByParity = [0, 0];
 let lastFrameParity = 0;
 
+// Native engine transport. The server runs the same play loop as this
+// worker (getNextFrame/scheduleNextFrame), on the same messages, with the
+// same FrameAck backpressure, and streams the same frames as server-sent
+// events; this worker posts the UI's messages to it and the frames back.
+const NATIVE_ENGINE =
+  new URL(self.location.href).searchParams.get("engine") === "native";
+const NATIVE_EVENTS_URL = "./native/events";
+const NATIVE_MESSAGE_URL = "./native/message";
+// Messages are posted one at a time, in order: parallel fetches could
+// reach the server out of order, e.g. a FrameAck ahead of the Play it acks.
+let nativeMessageQueue = Promise.resolve();
+
+function startNativeTransport() {
+  const events = new EventSource(NATIVE_EVENTS_URL);
+  let connected = false;
+  events.onopen = () => {
+    connected = true;
+  };
+  events.onmessage = (event) => {
+    self.postMessage(JSON.parse(event.data));
+  };
+  events.onerror = () => {
+    // Don't let EventSource reconnect: a new stream would restart the
+    // session under a UI that is partway through a run.
+    events.close();
+    self.postMessage({
+      error: connected ? "simulation" : "initialization",
+      message: "Lost connection to the native simulation engine",
+    });
+  };
+}
+
+function postToNativeEngine(message) {
+  nativeMessageQueue = nativeMessageQueue
+    .then(() =>
+      fetch(NATIVE_MESSAGE_URL, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(message),
+      })
+    )
+    .then((response) => {
+      if (!response.ok) {
+        throw new Error(`Native engine message failed: ${response.status}`);
+      }
+    })
+    .catch((error) => {
+      self.postMessage({
+        error: "simulation",
+        message: error.message,
+        stack: error.stack,
+      });
+    });
+}
+
 /**
  * Attempt to load Pyodide from a given source
  * @param {string} indexURL - URL to load Pyodide from
@@ -188,7 +248,10 @@ async function loadPyodideAndPackages() {
   }
 }
 
-const pyodideReadyPromise = loadPyodideAndPackages();
+// The native engine needs no Pyodide: the server sends the ready message
+const pyodideReadyPromise = NATIVE_ENGINE
+  ? Promise.resolve(null)
+  : loadPyodideAndPackages();
 
 /**
  * Convert a Pyodide PyProxy result (a Python dict) into a plain,
@@ -406,7 +469,11 @@ async function handlePyodideReady() {
     presetValues: presetValues,
   });
 }
-handlePyodideReady();
+if (NATIVE_ENGINE) {
+  startNativeTransport();
+} else {
+  handlePyodideReady();
+}
 
 self.onmessage = async (event) => {
   /*
@@ -417,6 +484,10 @@ self.onmessage = async (event) => {
    * to the message-handler.js, for example after each step of the
    * simulation
    */
+  if (NATIVE_ENGINE) {
+    postToNativeEngine(event.data);
+    return;
+  }
   try {
     // ensure that Pyodide is ready before passing anything on
     await pyodideReadyPromise;
@@ -479,6 +550,32 @@ self.onmessage = async (event) => {
       simSettings.action == SimulationActions.Done
     ) {
       resetSimulation(simSettings);
+    } else if (simSettings.action == SimulationActions.RunToCompletion) {
+      // One run of a What If sweep. Only sweep pool workers (see
+      // js/sweep-pool.js) get this action: they run nothing else, so
+      // replacing the global simulation here interrupts no play loop.
+      workerPackage.init_simulation(simSettings);
+      const pyResults = workerPackage.sim.run_to_completion();
+      const results = pyResultToJs(pyResults);
+      pyResults.destroy();
+      self.postMessage({
+        action: "sweepResult",
+        sweepIndex: simSettings.sweepIndex,
+        results: results,
+      });
+    } else if (simSettings.action == SimulationActions.EstimateSteadyState) {
+      // Answered at once, between frames of any run in progress
+      const pyEstimate = workerPackage.estimate_steady_state(simSettings);
+      let estimate = null;
+      if (pyEstimate) {
+        estimate = pyResultToJs(pyEstimate);
+        pyEstimate.destroy();
+      }
+      self.postMessage({
+        action: "steadyStateEstimate",
+        name: simSettings.name,
+        estimate: estimate,
+      });
     } else if (simSettings.action == SimulationActions.GetResults) {
       // Get simulation results for config download
       const pyResults = workerPackage.sim.get_simulation_results();
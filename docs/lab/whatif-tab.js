@@ -11,13 +11,18 @@ import {
   initWhatIfNChart,
   initWhatIfDemandChart,
   initWhatIfPlatformChart,
+  initWhatIfSweepChart,
   initWhatIfTables,
+  plotWhatIfSweepPoint,
+  clearWhatIfEstimates,
 } from "./modules/whatif.js";
 import { DOM_ELEMENTS } from "./js/dom-elements.js";
 import { colors } from "./js/constants.js";
 import { SimulationActions, CHART_TYPES } from "./js/config.js";
 import { WhatIfSimSettingsDefault } from "./js/sim-settings.js";
 import { appState } from "./js/app-state.js";
+import { SweepPool } from "./js/sweep-pool.js";
+import { showError } from "./js/toast.js";
 import {
   addDoubleClickHandler,
   addMobileTouchHandlers,
@@ -34,10 +39,37 @@ const whatIfCanvasIDList = [
   "what-if-platform-chart-canvas",
 ];
 
+// A sweep runs this many simulations, at settings evenly spaced from the
+// baseline to the comparison
+const SWEEP_POINT_COUNT = 8;
+
+// The settings a sweep can move, with their sweep chart axis titles. Which
+// prices and costs the simulation uses depends on useCostsAndIncomes: the
+// others are kept only for display (see loadBaselineFromExperiment).
+const SWEEP_PARAMETERS = {
+  platformCommission: "Commission",
+  requestRate: "Request rate",
+  vehicleCount: "Vehicles",
+  inhomogeneity: "Inhomogeneity",
+  meanTripDistance: "Mean trip distance",
+};
+const SWEEP_PRICE_PARAMETERS = {
+  price: "Price",
+  reservationWage: "Reservation wage",
+};
+const SWEEP_COST_PARAMETERS = {
+  perMinutePrice: "Price per minute",
+  perKmPrice: "Price per km",
+  perHourOpportunityCost: "Opportunity cost per hour",
+};
+const SWEEP_INTEGER_PARAMETERS = ["vehicleCount", "meanTripDistance"];
+
 export class WhatIfTab {
   constructor(app, fullScreenManager) {
     this.app = app;
     this.fullScreenManager = fullScreenManager;
+    // Created on the first sweep, as each of its workers loads Pyodide
+    this.sweepPool = null;
   }
 
   /**
@@ -211,6 +243,10 @@ export class WhatIfTab {
       }),
     );
 
+    DOM_ELEMENTS.whatIf.sweepButton.addEventListener("click", () =>
+      this.clickSweepButton(),
+    );
+
     this.setupStepperInputs();
     this.setupTotalBlocksInput();
   }
@@ -437,6 +473,7 @@ export class WhatIfTab {
       (radio) => (radio.disabled = false),
     );
     DOM_ELEMENTS.whatIf.totalBlocksInput.disabled = false;
+    DOM_ELEMENTS.whatIf.sweepButton.setAttribute("disabled", "");
   }
 
   setButtonsBaselineRunning() {
@@ -463,6 +500,7 @@ export class WhatIfTab {
       (radio) => (radio.disabled = true),
     );
     DOM_ELEMENTS.whatIf.totalBlocksInput.disabled = true;
+    DOM_ELEMENTS.whatIf.sweepButton.setAttribute("disabled", "");
   }
 
   setButtonsBaselinePaused() {
@@ -489,6 +527,7 @@ export class WhatIfTab {
       (radio) => (radio.disabled = false),
     );
     DOM_ELEMENTS.whatIf.totalBlocksInput.disabled = false;
+    DOM_ELEMENTS.whatIf.sweepButton.setAttribute("disabled", "");
   }
 
   setButtonsBaselineComplete() {
@@ -520,6 +559,7 @@ export class WhatIfTab {
       el.removeAttribute("disabled"),
     );
     DOM_ELEMENTS.whatIf.totalBlocksInput.disabled = false;
+    DOM_ELEMENTS.whatIf.sweepButton.removeAttribute("disabled");
   }
 
   setButtonsComparisonRunning() {
@@ -545,6 +585,7 @@ export class WhatIfTab {
       el.setAttribute("disabled", ""),
     );
     DOM_ELEMENTS.whatIf.totalBlocksInput.disabled = true;
+    DOM_ELEMENTS.whatIf.sweepButton.setAttribute("disabled", "");
   }
 
   setButtonsComparisonPaused() {
@@ -570,6 +611,7 @@ export class WhatIfTab {
       el.removeAttribute("disabled"),
     );
     DOM_ELEMENTS.whatIf.totalBlocksInput.disabled = false;
+    DOM_ELEMENTS.whatIf.sweepButton.removeAttribute("disabled");
   }
 
   setButtonsComparisonComplete() {
@@ -595,6 +637,7 @@ export class WhatIfTab {
       el.removeAttribute("disabled"),
     );
     DOM_ELEMENTS.whatIf.totalBlocksInput.disabled = false;
+    DOM_ELEMENTS.whatIf.sweepButton.removeAttribute("disabled");
   }
 
   /**
@@ -613,6 +656,18 @@ export class WhatIfTab {
     if (icon.innerHTML == SimulationActions.Play) {
       // If the button is showing "Play", then the action to take is play
       simSettings.action = SimulationActions.Play;
+      if (
+        simSettings.frameIndex == 0 ||
+        simSettings.frameIndex >= simSettings.timeBlocks
+      ) {
+        // A new run: show the precomputed estimate, if there is one, while
+        // the simulation works towards its steady state
+        w.postMessage(
+          Object.assign({}, simSettings, {
+            action: SimulationActions.EstimateSteadyState,
+          }),
+        );
+      }
 
       // For comparison button, check if we need to reset from a completed state
       if (button == DOM_ELEMENTS.whatIf.comparisonFabButton) {
@@ -643,6 +698,87 @@ export class WhatIfTab {
     w.postMessage(simSettings);
   }
 
+  /**
+   * Run simulations at settings evenly spaced from the baseline to the
+   * comparison, side by side in a pool of workers (see js/sweep-pool.js),
+   * and plot the final results of each on the sweep chart as it completes.
+   * Starting a sweep cancels any sweep still running.
+   */
+  clickSweepButton() {
+    const baseline = appState.whatIfSimSettingsBaseline;
+    const comparison = appState.whatIfSimSettingsComparison;
+    const parameters = Object.assign(
+      {},
+      SWEEP_PARAMETERS,
+      baseline.useCostsAndIncomes
+        ? SWEEP_COST_PARAMETERS
+        : SWEEP_PRICE_PARAMETERS,
+    );
+    const changed = Object.keys(parameters).filter(
+      (key) => Number(baseline[key]) != Number(comparison[key]),
+    );
+    if (changed.length == 0) {
+      showError("Change a comparison setting to sweep towards it");
+      return;
+    }
+    // Plot against the setting if only one has changed, and otherwise
+    // against the fraction of the way from the baseline to the comparison
+    const axisKey = changed.length == 1 ? changed[0] : null;
+    const settingsList = [];
+    const xValues = [];
+    for (let i = 0; i < SWEEP_POINT_COUNT; i++) {
+      const fraction = i / (SWEEP_POINT_COUNT - 1);
+      const settings = Object.assign({}, baseline, {
+        name: "whatIfSweep",
+        timeBlocks: appState.whatIfTotalBlocks,
+        animationDelay: 0,
+      });
+      changed.forEach((key) => {
+        const start = Number(baseline[key]);
+        let value = start + fraction * (Number(comparison[key]) - start);
+        if (SWEEP_INTEGER_PARAMETERS.includes(key)) {
+          value = Math.round(value);
+        }
+        settings[key] = value;
+      });
+      const x = axisKey === null ? fraction : settings[axisKey];
+      // Rounding can give a whole-number setting the same value twice
+      if (!xValues.includes(x)) {
+        settingsList.push(settings);
+        xValues.push(x);
+      }
+    }
+    this.showSweepChart(
+      axisKey === null ? "Baseline (0) to comparison (1)" : parameters[axisKey],
+    );
+    if (this.sweepPool === null) {
+      this.sweepPool = new SweepPool();
+    }
+    this.sweepPool.run(
+      settingsList,
+      (index, results) =>
+        plotWhatIfSweepPoint(xValues[index], new Map(Object.entries(results))),
+      (index, message) =>
+        showError(`Sweep run ${index + 1} failed: ${message}`),
+    );
+  }
+
+  /**
+   * Show a new, empty sweep chart
+   * @param {string} xAxisTitle - what the runs of the sweep are plotted against
+   */
+  showSweepChart(xAxisTitle) {
+    const parent = DOM_ELEMENTS.whatIf.sweepCanvasParent;
+    parent.replaceChildren();
+    const canvas = document.createElement("canvas");
+    canvas.setAttribute("class", "what-if-chart-canvas");
+    canvas.setAttribute("id", "what-if-sweep-chart-canvas");
+    parent.appendChild(canvas);
+    parent.hidden = false;
+    appState.whatIfUISettings.ctxWhatIfSweep = canvas.getContext("2d");
+    initWhatIfSweepChart(appState.whatIfUISettings, xAxisTitle);
+  }
+
   /**
    * Reset UI and simulation to initial state
    */
@@ -660,6 +796,13 @@ export class WhatIfTab {
     this.updateControlVisibility();
     this.updateTopControlValues();
 
+    // A sweep belongs to the baseline it started from
+    if (this.sweepPool !== null) {
+      this.sweepPool.cancel();
+    }
+    DOM_ELEMENTS.whatIf.sweepCanvasParent.hidden = true;
+    clearWhatIfEstimates();
+
     // Charts
     // Remove the canvases
     document
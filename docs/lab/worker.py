@@ -33,7 +33,7 @@ Usage:
 """
 
 from ridehail import __version__
-from ridehail.config import RideHailConfig
+from ridehail.config import ConfigSnapshot, RideHailConfig
 from ridehail.simulation import RideHailSimulation
 from ridehail.results import RideHailSimulationResults
 from ridehail.atom import Measure, Equilibration, TripDistribution
@@ -179,6 +179,121 @@ def get_presets():
     return result
 
 
+def web_config_values(web_config):
+    """
+    Map the web UI's settings to ridehail config values.
+
+    Args:
+        web_config: dict of settings from the web UI (camelCase keys), as
+            converted from the Pyodide proxy with to_py()
+
+    Returns:
+        dict: config parameter name (snake_case) to value, ready for
+            ConfigSnapshot.from_mapping()
+    """
+    values = {}
+    values["city_size"] = int(web_config["citySize"])
+    values["vehicle_count"] = int(web_config["vehicleCount"])
+    values["base_demand"] = float(web_config["requestRate"])
+    # Handle null/None values for optional parameters
+    # JavaScript null becomes JsNull in Pyodide, not Python None, so use try-except
+    try:
+        values["mean_trip_distance"] = int(web_config["meanTripDistance"])
+    except (TypeError, ValueError):
+        values["mean_trip_distance"] = None
+    values["min_trip_distance"] = web_config.get("minTripDistance", 0)
+    values["inhomogeneity"] = float(web_config["inhomogeneity"])
+    values["inhomogeneous_destinations"] = bool(web_config["inhomogeneousDestinations"])
+    values["idle_vehicles_moving"] = float(web_config.get("idleVehiclesMoving", 1.0))
+    # Handle null/None for random_number_seed (None means non-deterministic random)
+    # JavaScript null becomes JsNull in Pyodide, not Python None, so use try-except
+    try:
+        values["random_number_seed"] = int(web_config["randomNumberSeed"])
+    except (TypeError, ValueError):
+        values["random_number_seed"] = None
+    values["verbosity"] = int(web_config["verbosity"])
+    values["run_sequence"] = False
+    values["animation"] = "none"
+    values["interpolate"] = 0
+    # Handle equilibration: web config provides both "equilibrate" boolean (legacy)
+    # and "equilibration" string. Priority: equilibration string > equilibrate boolean
+    equilibration_str = web_config.get("equilibration")
+    if equilibration_str:
+        # Use explicit equilibration method if provided
+        # Convert to uppercase to match enum member names (NONE, PRICE, SUPPLY, etc.)
+        try:
+            values["equilibration"] = Equilibration[equilibration_str.upper()]
+        except KeyError:
+            # Invalid equilibration value - default to NONE for safety
+            values["equilibration"] = Equilibration.NONE
+    else:
+        # Fall back to equilibrate boolean for backward compatibility
+        if bool(web_config.get("equilibrate", False)):
+            values["equilibration"] = Equilibration.PRICE
+        else:
+            values["equilibration"] = Equilibration.NONE
+    values["equilibration_interval"] = int(web_config["equilibrationInterval"])
+    values["demand_elasticity"] = float(web_config["demandElasticity"])
+    values["use_city_scale"] = bool(web_config["useCostsAndIncomes"])
+    values["mean_vehicle_speed"] = float(web_config["meanVehicleSpeed"])
+    values["minutes_per_block"] = float(web_config["minutesPerBlock"])
+    values["reservation_wage"] = float(web_config["reservationWage"])
+    values["platform_commission"] = float(web_config["platformCommission"])
+    values["price"] = float(web_config["price"])
+    values["per_km_price"] = float(web_config["perKmPrice"])
+    values["per_minute_price"] = float(web_config["perMinutePrice"])
+    # base_fare added late; default 0.0 for older saved sessions/configs
+    values["base_fare"] = float(web_config.get("baseFare", 0.0) or 0.0)
+    values["per_km_ops_cost"] = float(web_config["perKmOpsCost"])
+    values["per_hour_opportunity_cost"] = float(web_config["perHourOpportunityCost"])
+    values["time_blocks"] = int(web_config["timeBlocks"])
+    values["smoothing_window"] = int(web_config["smoothingWindow"])
+    # results_window should match smoothing_window for consistent calculations
+    # (desktop typically uses larger results_window, but for web we use smoothing_window)
+    values["results_window"] = int(web_config["smoothingWindow"])
+    # Convert animationDelay from milliseconds (web) to seconds (Python config)
+    values["animation_delay"] = float(web_config["animationDelay"]) / 1000.0
+    # Pickup time configuration (default 1 if not present for backward compatibility)
+    values["pickup_time"] = int(web_config.get("pickupTime", 1))
+    # Trip distance distribution — not exposed in web UI but honoured when
+    # a .config file containing the setting is uploaded
+    tdd_str = web_config.get("tripDistanceDistribution")
+    if tdd_str:
+        try:
+            values["trip_distance_distribution"] = TripDistribution[tdd_str.upper()]
+        except KeyError:
+            values["trip_distance_distribution"] = TripDistribution.UNIFORM
+    else:
+        values["trip_distance_distribution"] = TripDistribution.UNIFORM
+    # User-editable scenario title (blank/missing means no title, matching
+    # the desktop config's default)
+    values["title"] = web_config.get("title") or None
+    return values
+
+
+def estimate_steady_state(settings):
+    """
+    Estimate the steady state of a simulation from the package's precomputed
+    atlas, without running it.
+
+    Args:
+        settings: Pyodide proxy object with simulation parameters from web UI
+
+    Returns:
+        dict | None: Measure name to estimated value, or None if the atlas
+            does not cover these settings (it covers the presets, and settings
+            near them: see ridehail/atlas.py)
+
+    Note:
+        Called from webworker.js when the What If tab starts a run, so that it
+        can show the estimate while the simulation settles
+    """
+    from ridehail.atlas import estimate
+
+    config = ConfigSnapshot.from_mapping(web_config_values(settings.to_py()))
+    return estimate(config.as_dict())
+
+
 def init_simulation(settings):
     """
     Initialize a new simulation with settings from the web UI.
@@ -252,91 +367,10 @@ class Simulation:
             - Interpolation handled by this wrapper, not core simulation
         """
         web_config = settings.to_py()
-        config = RideHailConfig()
-        config.city_size.value = int(web_config["citySize"])
-        config.vehicle_count.value = int(web_config["vehicleCount"])
-        config.base_demand.value = float(web_config["requestRate"])
-        # Handle null/None values for optional parameters
-        # JavaScript null becomes JsNull in Pyodide, not Python None, so use try-except
-        try:
-            config.mean_trip_distance.value = int(web_config["meanTripDistance"])
-        except (TypeError, ValueError):
-            config.mean_trip_distance.value = None
-        config.min_trip_distance.value = web_config.get("minTripDistance", 0)
-        config.inhomogeneity.value = float(web_config["inhomogeneity"])
-        config.inhomogeneous_destinations.value = bool(
-            web_config["inhomogeneousDestinations"]
-        )
-        config.idle_vehicles_moving.value = float(
-            web_config.get("idleVehiclesMoving", 1.0)
-        )
-        # Handle null/None for random_number_seed (None means non-deterministic random)
-        # JavaScript null becomes JsNull in Pyodide, not Python None, so use try-except
-        try:
-            config.random_number_seed.value = int(web_config["randomNumberSeed"])
-        except (TypeError, ValueError):
-            config.random_number_seed.value = None
-        config.verbosity.value = int(web_config["verbosity"])
-        config.run_sequence.value = False
-        config.animation.value = "none"
-        config.interpolate.value = 0
-        # Handle equilibration: web config provides both "equilibrate" boolean (legacy)
-        # and "equilibration" string. Priority: equilibration string > equilibrate boolean
-        equilibration_str = web_config.get("equilibration")
-        if equilibration_str:
-            # Use explicit equilibration method if provided
-            # Convert to uppercase to match enum member names (NONE, PRICE, SUPPLY, etc.)
-            try:
-                config.equilibration.value = Equilibration[equilibration_str.upper()]
-            except KeyError:
-                # Invalid equilibration value - default to NONE for safety
-                config.equilibration.value = Equilibration.NONE
-        else:
-            # Fall back to equilibrate boolean for backward compatibility
-            if bool(web_config.get("equilibrate", False)):
-                config.equilibration.value = Equilibration.PRICE
-            else:
-                config.equilibration.value = Equilibration.NONE
-        config.equilibration_interval.value = int(web_config["equilibrationInterval"])
-        config.demand_elasticity.value = float(web_config["demandElasticity"])
-        config.use_city_scale.value = bool(web_config["useCostsAndIncomes"])
-        config.mean_vehicle_speed.value = float(web_config["meanVehicleSpeed"])
-        config.minutes_per_block.value = float(web_config["minutesPerBlock"])
-        config.reservation_wage.value = float(web_config["reservationWage"])
-        config.platform_commission.value = float(web_config["platformCommission"])
-        config.price.value = float(web_config["price"])
-        config.per_km_price.value = float(web_config["perKmPrice"])
-        config.per_minute_price.value = float(web_config["perMinutePrice"])
-        # base_fare added late; default 0.0 for older saved sessions/configs
-        config.base_fare.value = float(web_config.get("baseFare", 0.0) or 0.0)
-        config.per_km_ops_cost.value = float(web_config["perKmOpsCost"])
-        config.per_hour_opportunity_cost.value = float(
-            web_config["perHourOpportunityCost"]
-        )
-        config.time_blocks.value = int(web_config["timeBlocks"])
-        config.smoothing_window.value = int(web_config["smoothingWindow"])
-        # results_window should match smoothing_window for consistent calculations
-        # (desktop typically uses larger results_window, but for web we use smoothing_window)
-        config.results_window.value = int(web_config["smoothingWindow"])
-        # Convert animationDelay from milliseconds (web) to seconds (Python config)
-        config.animation_delay.value = float(web_config["animationDelay"]) / 1000.0
-        # Pickup time configuration (default 1 if not present for backward compatibility)
-        config.pickup_time.value = int(web_config.get("pickupTime", 1))
-        # Trip distance distribution — not exposed in web UI but honoured when
-        # a .config file containing the setting is uploaded
-        tdd_str = web_config.get("tripDistanceDistribution")
-        if tdd_str:
-            try:
-                config.trip_distance_distribution.value = TripDistribution[
-                    tdd_str.upper()
-                ]
-            except KeyError:
-                config.trip_distance_distribution.value = TripDistribution.UNIFORM
-        else:
-            config.trip_distance_distribution.value = TripDistribution.UNIFORM
-        # User-editable scenario title (blank/missing means no title, matching
-        # the desktop config's default)
-        config.title.value = web_config.get("title") or None
+        # Build an immutable ConfigSnapshot from a plain mapping: this skips
+        # RideHailConfig's command-line parsing and whole-config validation,
+        # which serve no purpose here.
+        config = ConfigSnapshot.from_mapping(web_config_values(web_config))
 
         self.sim = RideHailSimulation(config)
         self.plot_buffers = {}
@@ -572,6 +606,23 @@ class Simulation:
         self.frame_index += 1
         return results
 
+    def run_to_completion(self):
+        """
+        Run every remaining block of the simulation, with no frames in between.
+
+        Returns:
+            dict: The statistics results of the final block, as returned by
+                 next_block_stats()
+
+        Note:
+            Called from webworker.js for the runs of a What If sweep, which
+            are shown only once they are complete (see js/sweep-pool.js)
+        """
+        results = self.next_block_stats()
+        while self.frame_index < self.sim.time_blocks:
+            results = self.next_block_stats()
+        return results
+
     def update_options(self, message_from_ui):
         """
         Update simulation parameters during runtime.
@@ -2,10 +2,11 @@
 
 import os
 import sys
-import json
 import matplotlib.pyplot as plt
 import matplotlib as mpl
+import numpy as np
 import seaborn as sns
+from ridehail.output_reader import read_columns
 
 mpl.rcParams["figure.dpi"] = 90
 mpl.rcParams["savefig.dpi"] = 100
@@ -29,23 +30,24 @@ def main():
             "\n\twith run_sequence=False and -l <log_file>"
         )
         exit(-1)
-    with open(input_file) as f:
-        lines = f.readlines()
-
-    periods = []
-    for line in lines:
-        try:
-            periods.append(json.loads(line))
-        except json.decoder.JSONDecodeError:
-            pass
-
-    x = [period["block"] for period in periods if "block" in period]
-    supply = [period["Vehicle count"] for period in periods if "block" in period]
-    demand = [period["Request rate"] for period in periods if "block" in period]
-    p3_fraction = [period["Vehicle P3 time"] for period in periods if "block" in period]
-    wait_fraction = [
-        period["Trip wait fraction"] for period in periods if "block" in period
-    ]
+    columns = read_columns(
+        input_file,
+        [
+            "block",
+            "Vehicle count",
+            "Request rate",
+            "Vehicle P3 time",
+            "Trip wait fraction",
+        ],
+        cache=True,
+    )
+    # Only the periods (lines with a block) are plotted
+    periods = ~np.isnan(columns["block"].astype(float))
+    x = columns["block"][periods]
+    supply = columns["Vehicle count"][periods]
+    demand = columns["Request rate"][periods]
+    p3_fraction = columns["Vehicle P3 time"][periods]
+    wait_fraction = columns["Trip wait fraction"][periods]
 
     fig = plt.figure(figsize=(16, 12))
     gridspec = fig.add_gridspec(3, 1)
@@ -2,7 +2,6 @@
 
 import sys
 import os
-import json
 import matplotlib.pyplot as plt
 import matplotlib as mpl
 import logging
@@ -14,6 +13,7 @@ import seaborn as sns
 from datetime import datetime
 from scipy.optimize import curve_fit
 import numpy as np
+from ridehail.output_reader import iter_records, read_columns
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
 mpl.rcParams["figure.dpi"] = 90
@@ -53,92 +53,69 @@ def fit_function_wait(x, a, b, c):
 
 
 class Plot:
-    sequence = []
-
     def __init__(self, input_file):
         """
-        Read the jsonl input file into a list of dictionaries.
-        Each line is a json document starting with a "type" field.
-        Each simulation has three lines: metadata, config, and end_state.
+        Keep the first record of the jsonl input file, which holds the
+        settings shared by the simulations of the sequence. Each line is a
+        json document, with the config and end_state of one simulation.
+        The rest of the file is read column by column in construct_arrays().
         """
         self.input_file = input_file
-        with open(input_file) as f:
-            lines = f.readlines()
-        for line in lines:
-            self.sequence.append(json.loads(line))
+        self.first_sim = next(iter_records(input_file))
 
     def construct_arrays(self):
         """
-        Build arrays from the list of json documents (dictionaries) in the
-        sequence output file (one for each simulation).
+        Build arrays from the json documents in the sequence output file
+        (one for each simulation), reading only the fields that are plotted.
         Some of these are configuration options that are the same for each
         simulation, but this function builds arrays anyway and we'll deal
         with that later.
         """
-        self.city_size = []
-        self.time_blocks = []
-        self.request_rate = []
-        self.inhomogeneity = []
-        self.commission = []
-        self.min_trip_distance = []
-        self.max_trip_distance = []
-        self.idle_vehicles_moving = []
-        self.dispatch_method = []
-        self.results_window = []
-        self.reservation_wage = []
-        self.vehicle_count = []
-        self.p1 = []
-        self.p2 = []
-        self.p3 = []
-        self.mean_vehicle_count = []
-        self.trip_wait_fraction = []
-        self.trip_wait_time = []
-        self.trip_distance = []
+        config = self.first_sim["config"]
         self.equilibration = False
-        if "equilibration" in self.sequence[0]["config"]:
+        if "equilibration" in config:
             self.equilibration = True
-            self.equilibration_type = self.sequence[0]["config"]["equilibration"][
-                "equilibration"
-            ]
-        if self.sequence[0]["config"]["dispatch_method"] != "default":
-            self.forward_dispatch_fraction = []
-            self.forward_dispatch_bias = self.sequence[0]["config"][
-                "forward_dispatch_bias"
-            ]
-        for sim in self.sequence:
-            self.city_size.append(sim["config"]["city_size"])
-            self.time_blocks.append(sim["config"]["time_blocks"])
-            self.request_rate.append(sim["config"]["base_demand"])
-            self.inhomogeneity.append(sim["config"]["inhomogeneity"])
-            self.min_trip_distance.append(sim["config"]["min_trip_distance"])
-            self.max_trip_distance.append(sim["config"]["max_trip_distance"])
-            self.idle_vehicles_moving.append(sim["config"]["idle_vehicles_moving"])
-            self.results_window.append(sim["config"]["results_window"])
-            self.dispatch_method.append(sim["config"]["dispatch_method"])
-            if self.equilibration:
-                self.reservation_wage.append(
-                    sim["config"]["equilibration"]["reservation_wage"]
-                )
-                self.commission.append(
-                    sim["config"]["equilibration"]["platform_commission"]
-                )
-            self.vehicle_count.append(sim["config"]["vehicle_count"])
-            self.p1.append(sim["end_state"]["vehicle_fraction_p1"])
-            self.p2.append(sim["end_state"]["vehicle_fraction_p2"])
-            self.p3.append(sim["end_state"]["vehicle_fraction_p3"])
-            if self.dispatch_method[0] != "default":
-                self.forward_dispatch_fraction.append(
-                    sim["end_state"]["forward_dispatch_fraction"]
-                )
-            self.mean_vehicle_count.append(sim["end_state"]["mean_vehicle_count"])
-            self.trip_wait_fraction.append(sim["end_state"]["mean_trip_wait_fraction"])
-            self.trip_wait_time.append(
-                sim["end_state"]["mean_trip_wait_time"]
-                / sim["end_state"]["mean_trip_distance"]
-            )
-            self.trip_distance.append(
-                sim["end_state"]["mean_trip_distance"] / self.city_size[0]
+            self.equilibration_type = config["equilibration"]["equilibration"]
+        attributes = {
+            "city_size": "config.city_size",
+            "time_blocks": "config.time_blocks",
+            "request_rate": "config.base_demand",
+            "inhomogeneity": "config.inhomogeneity",
+            "min_trip_distance": "config.min_trip_distance",
+            "max_trip_distance": "config.max_trip_distance",
+            "idle_vehicles_moving": "config.idle_vehicles_moving",
+            "results_window": "config.results_window",
+            "dispatch_method": "config.dispatch_method",
+            "vehicle_count": "config.vehicle_count",
+            "p1": "end_state.vehicle_fraction_p1",
+            "p2": "end_state.vehicle_fraction_p2",
+            "p3": "end_state.vehicle_fraction_p3",
+            "mean_vehicle_count": "end_state.mean_vehicle_count",
+            "trip_wait_fraction": "end_state.mean_trip_wait_fraction",
+        }
+        if self.equilibration:
+            attributes["reservation_wage"] = "config.equilibration.reservation_wage"
+            attributes["commission"] = "config.equilibration.platform_commission"
+        if config["dispatch_method"] != "default":
+            attributes["forward_dispatch_fraction"] = (
+                "end_state.forward_dispatch_fraction"
             )
+            self.forward_dispatch_bias = config["forward_dispatch_bias"]
+        fields = list(attributes.values()) + [
+            "end_state.mean_trip_wait_time",
+            "end_state.mean_trip_distance",
+        ]
+        columns = read_columns(self.input_file, fields, cache=True)
+        for attribute, field in attributes.items():
+            setattr(self, attribute, columns[field].tolist())
+        if not self.equilibration:
+            self.reservation_wage = []
+            self.commission = []
+        trip_distance = columns["end_state.mean_trip_distance"]
+        self.trip_wait_time = (
+            columns["end_state.mean_trip_wait_time"] / trip_distance
+        ).tolist()
+        self.trip_distance = (trip_distance / self.city_size[0]).tolist()
         return ()
 
     def set_x_axis(self):
@@ -490,8 +467,8 @@ class Plot:
         ax.minorticks_on()
         ax.set_xlabel(self.x_label)
         ax.set_ylabel("Fraction")
-        if "title" in self.sequence[0]["config"]:
-            title = [sim["config"]["title"] for sim in self.sequence][0]
+        if "title" in self.first_sim["config"]:
+            title = self.first_sim["config"]["title"]
         else:
             title = (
                 "Ridehail simulation sequence: "
@@ -15,6 +15,8 @@ from .animation import create_animation
 from .config import RideHailConfig, ConfigItem
 from .simulation import RideHailSimulation
 from .sequence import RideHailSimulationSequence
+from .replicates import RideHailSimulationReplicates
+from .calibration import RideHailCalibration
 
 logging.config.dictConfig(
     {
@@ -42,6 +44,16 @@ def main():
         ):
             seq = RideHailSimulationSequence(ridehail_config)
             seq.run_sequence(ridehail_config)
+        elif ridehail_config.calibrate.value:
+            try:
+                calibration = RideHailCalibration(ridehail_config)
+            except ValueError as error:
+                logging.error(f"Calibration error: {error}")
+                return -1
+            calibration.run_calibration()
+        elif ridehail_config.replicates.value > 1:
+            replicates = RideHailSimulationReplicates(ridehail_config)
+            replicates.run_replicates()
         else:
             sim = RideHailSimulation(ridehail_config)
             if ridehail_config.animation.value in (Animation.NONE, "none"):
@@ -7,7 +7,8 @@ import enum
 import numpy as np
 import sys
 
-from ridehail.atom import Animation, Measure
+from ridehail.atom import Animation, DispatchMethod, Equilibration, Measure
+from .utils import CHART_X_RANGE
 
 
 def _get_color_palette():
@@ -35,11 +36,63 @@ def _get_color_palette():
         ]
 
 
+def stats_measures(sim):
+    """
+    The Measures drawn as lines in the stats chart, which depend on the
+    equilibration and dispatch method of the simulation.
+    """
+    measures = [
+        Measure.VEHICLE_FRACTION_P1,
+        Measure.VEHICLE_FRACTION_P2,
+        Measure.VEHICLE_FRACTION_P3,
+        Measure.TRIP_MEAN_WAIT_FRACTION,
+        Measure.TRIP_DISTANCE_FRACTION,
+    ]
+    if sim.equilibration == Equilibration.PRICE:
+        measures.append(Measure.VEHICLE_MEAN_SURPLUS)
+    if sim.dispatch_method == DispatchMethod.FORWARD_DISPATCH:
+        measures.append(Measure.TRIP_FORWARD_DISPATCH_FRACTION)
+    return measures
+
+
 class HistogramArray(enum.Enum):
     HIST_TRIP_WAIT_TIME = "Wait time"
     HIST_TRIP_DISTANCE = "Trip distance"
 
 
+class PlotSeries:
+    """
+    Per-block values of one plotted Measure, held in a fixed-length ring
+    and indexed by block number.
+
+    Only the most recent `capacity` blocks are kept, so memory does not
+    grow with time_blocks and runs with time_blocks=0 can be plotted
+    indefinitely. Slices (series[lower:upper]) return a copy in block order.
+    """
+
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._values = np.zeros(capacity)
+
+    def __len__(self):
+        return self._capacity
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start = 0 if key.start is None else key.start
+            stop = key.stop
+            if stop - start > self._capacity:
+                raise IndexError(
+                    f"slice of {stop - start} blocks exceeds the "
+                    f"{self._capacity}-block plot series"
+                )
+            return self._values.take(range(start, stop), mode="wrap")
+        return self._values[key % self._capacity]
+
+    def __setitem__(self, block, value):
+        self._values[block % self._capacity] = value
+
+
 class RideHailAnimation:
     """Base class for all ridehail animations"""
 
@@ -66,9 +119,14 @@ class RideHailAnimation:
         self.pause_plot = False
         self.axes = []
         self.in_jupyter = False
+        # Plots only ever show the last CHART_X_RANGE blocks, so there is
+        # no need to hold the whole run
+        plot_series_length = CHART_X_RANGE + 1
+        if sim.time_blocks > 0:
+            plot_series_length = min(plot_series_length, sim.time_blocks + 1)
         self.plot_arrays = {}
         for plot_array in list(Measure):
-            self.plot_arrays[plot_array] = np.zeros(sim.time_blocks + 1)
+            self.plot_arrays[plot_array] = PlotSeries(plot_series_length)
         self.histograms = {}
         for histogram in list(HistogramArray):
             self.histograms[histogram] = np.zeros(sim.city.city_size + 1)
@@ -0,0 +1,608 @@
+"""
+The web lab's local server: cache-friendly static files, and a native
+simulation engine.
+
+Static files
+------------
+The lab loads several large files: the Pyodide runtime (./pyodide/, many
+MB of WebAssembly and zipped standard library), the ridehail wheel
+(./dist/) and its own scripts. Over SSH port forwarding a cold load took
+tens of seconds, mostly multi-MB transfers made one at a time.
+LabRequestHandler serves them
+
+- compressed, when the browser accepts it: from a precompressed sibling
+  (file.br or file.gz, if newer than the file), or else gzipped here, once,
+  and kept in memory;
+- with strong ETags and Last-Modified, answering conditional requests
+  with 304 Not Modified;
+- with a year-long, immutable Cache-Control for files whose content never
+  changes under the same URL (the Pyodide runtime and the version-named
+  wheel), and "no-cache" (always revalidate) for everything else;
+- in byte ranges, for Range requests;
+
+and the server (see ReusableTCPServer in web_browser.py) handles requests
+in parallel threads.
+
+Native engine
+-------------
+
+By default the lab (docs/lab/) runs the simulation in the browser, in
+Pyodide, inside its web worker. For large cities that is too slow to keep up
+with the animation, while the machine running the CLI sits idle. With
+web_native_engine set, the simulation runs here instead, in CPython, and the
+web worker becomes a relay:
+
+Architecture:
+    Lab UI (app.js)
+        ↕ postMessage (unchanged)
+    Web Worker (webworker.js, native transport)
+        ↓ POST /native/message      (Play, Pause, Update, FrameAck, ...)
+        ↑ GET /native/events        (server-sent events: frames, results)
+    NativeLabSession (this module, in the CLI process)
+        ↓ worker.py, loaded from the lab directory
+    RideHailSimulation
+
+The session runs the same play loop as webworker.js, on the same messages,
+and sends the same frames, so the lab UI cannot tell the two engines apart.
+It keeps the same backpressure: after sending a frame it computes nothing
+more until the UI acknowledges it with a FrameAck, so the simulation never
+runs more than one frame ahead of the renderer, however fast it is.
+"""
+
+import email.utils
+import gzip
+import http.server
+import importlib.util
+import io
+import json
+import logging
+import math
+import os
+import queue
+import re
+import threading
+import time
+import traceback
+
+# The lab's message actions and chart types. These must match
+# SimulationActions and CHART_TYPES in docs/lab/js/constants.js - Python
+# can't import a JS module, so this is a deliberate duplicate.
+ACTION_PLAY = "play_arrow"
+ACTION_PAUSE = "pause"  # also SimulationActions.Done
+ACTION_RESET = "reset"
+ACTION_SINGLE_STEP = "single-step"
+ACTION_UPDATE = "update"
+ACTION_UPDATE_DISPLAY = "updateDisplay"
+ACTION_GET_RESULTS = "getResults"
+ACTION_FRAME_ACK = "frameAck"
+ACTION_ESTIMATE_STEADY_STATE = "estimateSteadyState"
+CHART_TYPE_MAP = "map"
+
+EVENTS_PATH = "/native/events"
+MESSAGE_PATH = "/native/message"
+# Seconds between comments sent on an idle event stream, so that proxies and
+# SSH port forwarding do not drop the connection
+KEEPALIVE_INTERVAL = 15
+# Marks the end of an event stream, when another page takes over the session
+_END_OF_STREAM = object()
+
+# Static files whose content never changes under the same URL: the files of
+# a Pyodide release, and the wheel, which is named for its version. Not
+# dist/manifest.json, which names the current wheel.
+IMMUTABLE_PATHS = re.compile(r"^/(pyodide/|dist/ridehail-[^/]*\.whl$)")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Content encodings of precompressed siblings, in order of preference
+PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_TYPES = (
+    "application/javascript",
+    "application/json",
+    "application/wasm",
+    "image/svg+xml",
+    "text/",
+)
+# Smaller files are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class WebSettings(dict):
+    """
+    Settings from the lab UI, in the form worker.py expects: in Pyodide they
+    arrive as a JsProxy, which worker.py converts with to_py().
+    """
+
+    def to_py(self):
+        return dict(self)
+
+
+def load_lab_worker(lab_dir):
+    """Import worker.py from the lab directory, as a module"""
+    spec = importlib.util.spec_from_file_location(
+        "ridehail_lab_worker", lab_dir / "worker.py"
+    )
+    worker = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(worker)
+    return worker
+
+
+def _json_default(value):
+    """Convert numpy scalars and enums, which json cannot serialize"""
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "name"):
+        return value.name
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _finite(message):
+    """
+    JSON has no NaN or infinity, so replace non-finite numbers in message,
+    and in the dictionaries it holds, with None
+    """
+    finite = {}
+    for key, value in message.items():
+        if isinstance(value, dict):
+            value = _finite(value)
+        elif isinstance(value, float) and not math.isfinite(value):
+            value = None
+        finite[key] = value
+    return finite
+
+
+def encode_event(message):
+    """Encode a message for the event stream, with non-finite numbers as null"""
+    return json.dumps(_finite(message), default=_json_default, allow_nan=False)
+
+
+class NativeLabSession:
+    """
+    The lab's simulation loop, run in this process for one page.
+
+    Messages from the UI are queued by post() and handled one at a time by
+    a single thread, as the web worker handles them, so the simulation needs
+    no locks. Outgoing messages go to the event queue of the connected page.
+    """
+
+    def __init__(self, worker):
+        self.worker = worker
+        self._inbox = queue.Queue()
+        self._outbox = None
+        self._outbox_lock = threading.Lock()
+        # The settings of the run whose next frame waits for a FrameAck
+        self._pending_settings = None
+        # The settings and the time.monotonic() due time of the next frame
+        self._scheduled = None
+        # The time each kind of frame (real or interpolated) takes, so that
+        # the wait after an ack can be shortened by the time the next frame
+        # will take to compute (see scheduleNextFrame in webworker.js)
+        self._frame_duration_by_parity = [0.0, 0.0]
+        self._last_frame_parity = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def connect(self):
+        """
+        Start a new event stream for a page, ending any previous one: a
+        reloaded page takes over the session. Returns the queue of messages
+        to send, beginning with the ready message the Pyodide worker sends
+        once it has loaded.
+        """
+        outbox = queue.Queue()
+        with self._outbox_lock:
+            if self._outbox is not None:
+                self._outbox.put(_END_OF_STREAM)
+            self._outbox = outbox
+        self.post({"action": ACTION_PAUSE})
+        outbox.put(
+            {
+                # The UI treats this text as "the engine is ready"
+                "text": "Pyodide loaded",
+                "engine": "native",
+                "version": self.worker.__version__,
+                "sliderHelp": self.worker.get_slider_help(),
+                "sliderConfig": self.worker.get_slider_config(),
+                "presetValues": self.worker.get_presets(),
+            }
+        )
+        return outbox
+
+    def disconnect(self, outbox):
+        """Stop the simulation if outbox belongs to the connected page"""
+        with self._outbox_lock:
+            if self._outbox is not outbox:
+                return
+            self._outbox = None
+        self.post({"action": ACTION_PAUSE})
+
+    def post(self, message):
+        """Queue a message from the UI"""
+        self._inbox.put(WebSettings(message))
+
+    def _send(self, message):
+        with self._outbox_lock:
+            if self._outbox is not None:
+                self._outbox.put(message)
+
+    def _run(self):
+        while True:
+            timeout = None
+            if self._scheduled is not None:
+                timeout = max(0.0, self._scheduled[1] - time.monotonic())
+            try:
+                message = self._inbox.get(timeout=timeout)
+            except queue.Empty:
+                settings, _ = self._scheduled
+                self._scheduled = None
+                self._next_frame(settings)
+                continue
+            try:
+                self._handle(message)
+            except Exception as e:
+                self._send_error(e)
+
+    def _stop_loop(self):
+        self._scheduled = None
+        self._pending_settings = None
+
+    def _handle(self, settings):
+        action = settings.get("action")
+        if action in (ACTION_PLAY, ACTION_SINGLE_STEP):
+            if settings.get("frameIndex") == 0:
+                # A new simulation
+                self._stop_loop()
+                self.worker.init_simulation(settings)
+            self._next_frame(settings)
+        elif action == ACTION_FRAME_ACK:
+            self._schedule_next_frame()
+        elif action == ACTION_PAUSE:
+            self._stop_loop()
+        elif action == ACTION_UPDATE:
+            if self._pending_settings is not None:
+                self._pending_settings["animationDelay"] = settings["animationDelay"]
+            if self._scheduled is not None:
+                self._scheduled[0]["animationDelay"] = settings["animationDelay"]
+            if self.worker.sim is not None:
+                self.worker.sim.update_options(settings)
+        elif action == ACTION_UPDATE_DISPLAY:
+            self._stop_loop()
+            settings["action"] = ACTION_PLAY
+            self._next_frame(settings)
+        elif action == ACTION_RESET:
+            self._stop_loop()
+            self._frame_duration_by_parity = [0.0, 0.0]
+            self._last_frame_parity = 0
+            self.worker.init_simulation(settings)
+        elif action == ACTION_ESTIMATE_STEADY_STATE:
+            self._send(
+                {
+                    "action": "steadyStateEstimate",
+                    "name": settings.get("name"),
+                    "estimate": self.worker.estimate_steady_state(settings),
+                }
+            )
+        elif action == ACTION_GET_RESULTS:
+            self._send(
+                {
+                    "action": "results",
+                    "results": self.worker.sim.get_simulation_results(),
+                }
+            )
+
+    def _next_frame(self, settings):
+        """Compute and send a frame: getNextFrame in webworker.js"""
+        frame_start_time = time.perf_counter()
+        try:
+            chart_type = settings["chartType"]
+            if chart_type == CHART_TYPE_MAP:
+                results = self.worker.sim.next_frame_map()
+            else:
+                results = self.worker.sim.next_block_stats()
+            results["name"] = settings["name"]
+            results["animationDelay"] = settings["animationDelay"]
+            results["chartType"] = chart_type
+            interpolating = (
+                chart_type == CHART_TYPE_MAP
+                and settings["citySize"] <= self.worker.INTERPOLATE_MAX_CITY_SIZE
+            )
+            time_blocks = settings["timeBlocks"]
+            frame_limit = 2 * time_blocks if interpolating else time_blocks
+            action = settings["action"]
+            if (
+                (action == ACTION_PLAY and (results["frame"] < frame_limit))
+                or (action == ACTION_PLAY and time_blocks == 0)
+                or (action == ACTION_SINGLE_STEP and results["frame"] == 0)
+            ):
+                # Wait for the UI to acknowledge this frame
+                self._pending_settings = settings
+            else:
+                self._pending_settings = None
+            self._send(results)
+            self._last_frame_parity = results["frame"] % 2
+            self._frame_duration_by_parity[self._last_frame_parity] = (
+                time.perf_counter() - frame_start_time
+            )
+        except Exception as e:
+            self._stop_loop()
+            self._send_error(e)
+
+    def _schedule_next_frame(self):
+        """Resume the play loop after a FrameAck: scheduleNextFrame in webworker.js"""
+        if self._pending_settings is None:
+            return
+        settings = self._pending_settings
+        self._pending_settings = None
+        next_parity = (self._last_frame_parity + 1) % 2
+        wait = max(
+            0.0,
+            settings["animationDelay"] / 1000.0
+            - self._frame_duration_by_parity[next_parity],
+        )
+        self._scheduled = (settings, time.monotonic() + wait)
+
+    def _send_error(self, error):
+        logging.error(f"Native lab engine: {error}")
+        self._send(
+            {
+                "error": "simulation",
+                "message": str(error),
+                "stack": traceback.format_exc(),
+            }
+        )
+
+
+class LabRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    Serve the lab's static files, and, if session is set, the native
+    engine's endpoints: an event stream of messages for the page, and a
+    POST endpoint for messages from it.
+    """
+
+    session = None
+    extensions_map = {
+        **http.server.SimpleHTTPRequestHandler.extensions_map,
+        # Module workers and scripts must be served as JavaScript
+        ".js": "text/javascript",
+        ".mjs": "text/javascript",
+        ".wasm": "application/wasm",
+    }
+    # gzipped files, by path: (st_mtime_ns, st_size, compressed bytes)
+    _gzip_cache = {}
+    _gzip_cache_lock = threading.Lock()
+
+    def do_GET(self):
+        if self.session is not None and self.path == EVENTS_PATH:
+            self._stream_events()
+        else:
+            super().do_GET()
+
+    def do_POST(self):
+        if self.session is None or self.path != MESSAGE_PATH:
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            message = json.loads(self.rfile.read(length))
+        except ValueError:
+            self.send_error(400, "Message is not JSON")
+            return
+        self.session.post(message)
+        self.send_response(204)
+        self.end_headers()
+
+    def _stream_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        outbox = self.session.connect()
+        try:
+            while True:
+                try:
+                    message = outbox.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+                if message is _END_OF_STREAM:
+                    break
+                self.wfile.write(f"data: {encode_event(message)}\n\n".encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            logging.info("Native lab event stream closed by the browser")
+        finally:
+            self.session.disconnect(outbox)
+
+    def send_head(self):
+        """
+        Send the headers for a static file, and return it open at the
+        start of the body, as SimpleHTTPRequestHandler.send_head() does, or
+        return None if there is no body to send.
+        """
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) or path.endswith("/"):
+            # Directory redirects, index.html and listings
+            return super().send_head()
+        try:
+            source = open(path, "rb")
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+        try:
+            return self._send_file_head(path, source)
+        except Exception:
+            source.close()
+            raise
+
+    def _send_file_head(self, path, source):
+        stat = os.fstat(source.fileno())
+        content_type = self.guess_type(path)
+        url_path = self.path.split("?", 1)[0].split("#", 1)[0]
+        if IMMUTABLE_PATHS.match(url_path):
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            cache_control = REVALIDATE_CACHE_CONTROL
+        compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+        range_header = self.headers.get("Range")
+        if range_header is not None and (
+            # Multiple ranges are not supported: send the whole file
+            not RANGE_PATTERN.match(range_header.strip())
+            # The file has changed since the browser read the rest of it
+            or self.headers.get("If-Range") not in (None, self._etag(stat))
+        ):
+            range_header = None
+        encoding, body = None, source
+        # Ranges are served from the file itself, never a compressed copy
+        if compressible and not range_header:
+            encoding, body = self._compressed(path, stat, source)
+        etag = self._etag(stat, encoding)
+        headers = {
+            "Content-Type": content_type,
+            "ETag": etag,
+            "Last-Modified": self.date_time_string(stat.st_mtime),
+            "Cache-Control": cache_control,
+            "Accept-Ranges": "bytes",
+        }
+        if compressible:
+            headers["Vary"] = "Accept-Encoding"
+        if self._not_modified(etag, stat):
+            if body is not source:
+                body.close()
+            source.close()
+            self._send_headers(304, headers)
+            return None
+        if encoding is not None:
+            source.close()
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(self._length(body))
+            self._send_headers(200, headers)
+            return body
+        if range_header is not None:
+            byte_range = self._byte_range(range_header, stat.st_size)
+            if byte_range is None:
+                source.close()
+                headers["Content-Range"] = f"bytes */{stat.st_size}"
+                self._send_headers(416, headers)
+                return None
+            start, end = byte_range
+            source.seek(start)
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            self._send_headers(206, headers)
+            return _FileSlice(source, end - start + 1)
+        headers["Content-Length"] = str(stat.st_size)
+        self._send_headers(200, headers)
+        return source
+
+    def _send_headers(self, code, headers):
+        self.send_response(code)
+        for keyword, value in headers.items():
+            self.send_header(keyword, value)
+        self.end_headers()
+
+    @staticmethod
+    def _etag(stat, encoding=None):
+        tag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        if encoding is not None:
+            tag += f"-{encoding}"
+        return f'"{tag}"'
+
+    @staticmethod
+    def _length(body):
+        body.seek(0, os.SEEK_END)
+        length = body.tell()
+        body.seek(0)
+        return length
+
+    def _not_modified(self, etag, stat):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return since.timestamp() >= int(stat.st_mtime)
+        return False
+
+    def _accepted_encodings(self):
+        accepted = set()
+        for item in self.headers.get("Accept-Encoding", "").split(","):
+            coding, _, parameter = item.partition(";")
+            name, _, value = parameter.partition("=")
+            try:
+                quality = float(value) if name.strip() == "q" else 1.0
+            except ValueError:
+                quality = 0.0
+            if quality > 0:
+                accepted.add(coding.strip().lower())
+        return accepted
+
+    def _compressed(self, path, stat, source):
+        """
+        The content encoding and an open body for the best compressed form
+        of the file that the browser accepts, or (None, source)
+        """
+        accepted = self._accepted_encodings()
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+            if encoding not in accepted:
+                continue
+            try:
+                compressed_stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            if compressed_stat.st_mtime_ns >= stat.st_mtime_ns:
+                return encoding, open(path + suffix, "rb")
+        if "gzip" not in accepted or stat.st_size < MIN_COMPRESS_SIZE:
+            return None, source
+        with self._gzip_cache_lock:
+            cached = self._gzip_cache.get(path)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            # mtime=0 makes the compressed bytes depend only on the content
+            compressed = gzip.compress(source.read(), mtime=0)
+            source.seek(0)
+            cached = (stat.st_mtime_ns, stat.st_size, compressed)
+            with self._gzip_cache_lock:
+                self._gzip_cache[path] = cached
+        return "gzip", io.BytesIO(cached[2])
+
+    @staticmethod
+    def _byte_range(range_header, size):
+        """
+        The first and last byte of a Range header that matches
+        RANGE_PATTERN, or None if the range cannot be satisfied
+        """
+        first, last = RANGE_PATTERN.match(range_header.strip()).groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        elif last:
+            # The final bytes of the file
+            start = max(0, size - int(last))
+            end = size - 1
+        else:
+            return None
+        if start > end:
+            return None
+        return start, end
+
+
+class _FileSlice:
+    """A file, readable only up to a given number of bytes from its position"""
+
+    def __init__(self, file, length):
+        self._file = file
+        self._remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
@@ -22,13 +22,14 @@ from ridehail.atom import (
     Direction,
     DispatchMethod,
     Equilibration,
-    History,
     Measure,
     TripPhase,
     VehiclePhase,
 )
 from ridehail.config import WritableConfig
-from .base import RideHailAnimation, HistogramArray
+from ridehail.events import LifecycleEvent
+from .base import RideHailAnimation, HistogramArray, stats_measures
+from .pacing import MAX_RENDER_SHARE, FramePacer
 from .utils import CHART_X_RANGE
 
 register_matplotlib_converters()
@@ -42,6 +43,30 @@ class MatplotlibAnimation(RideHailAnimation):
     def __init__(self, sim):
         super().__init__(sim)
         self._set_plotstat_list()
+        # The map alone is drawn with blitting, redrawing only its
+        # persistent artists; other charts rebuild their axes each frame
+        self._blit = self.animation == Animation.MAP
+        self._map_artists = None
+        # The frame timer sets the pace. A saved animation keeps every block
+        self.pacer = FramePacer(
+            wait=self._FRAME_INTERVAL / 1000,
+            max_blocks_per_frame=(
+                1
+                if self.animation_output_file
+                else self.sim.config.max_blocks_per_frame.value
+            ),
+            render_share=(
+                None
+                if self.animation in (Animation.ALL, Animation.MAP)
+                else MAX_RENDER_SHARE
+            ),
+        )
+        self._window_title = None
+        if self.animation == Animation.BAR:
+            # Histograms are filled as trips complete
+            self.sim.events.subscribe(
+                self._update_histogram_arrays, kinds=[LifecycleEvent.TRIP_COMPLETED]
+            )
         # TODO: IMAGEMAGICK_EXE is hardcoded here. Put it in a config file.
         # It is in a config file but I don't think I do anything with it yet.
         # IMAGEMAGICK_DIR = "/Program Files/ImageMagick-7.0.9-Q16"
@@ -111,7 +136,8 @@ class MatplotlibAnimation(RideHailAnimation):
             if hasattr(self.fig_manager.window, "wm_geometry"):
                 # Set window title using matplotlib's method
                 config_name = getattr(self.sim, "config_file_root", "simulation")
-                self.fig_manager.set_window_title(f"Ridehail Animation - {config_name}")
+                self._window_title = f"Ridehail Animation - {config_name}"
+                self.fig_manager.set_window_title(self._window_title)
                 # Optionally set window position (commented out for now)
                 # self.fig_manager.window.wm_geometry("+10+10")
                 # self.fig_manager.full_screen_toggle()
@@ -119,10 +145,12 @@ class MatplotlibAnimation(RideHailAnimation):
                     fig,
                     self._next_frame,
                     frames=(self._FRAME_COUNT_UPPER_LIMIT),
+                    init_func=self._init_frame,
                     fargs=[jsonl_file_handle, csv_file_handle],
                     interval=self._FRAME_INTERVAL,
                     repeat=False,
                     repeat_delay=3000,
+                    blit=self._blit,
                 )
             else:
                 if self.animation in (Animation.ALL, Animation.MAP):
@@ -138,10 +166,12 @@ class MatplotlibAnimation(RideHailAnimation):
                     fig,
                     self._next_frame,
                     frames=frame_count,
+                    init_func=self._init_frame,
                     fargs=[jsonl_file_handle, csv_file_handle],
                     interval=self._FRAME_INTERVAL,
                     repeat=False,
                     repeat_delay=3000,
+                    blit=self._blit,
                 )
         else:
             logging.error(
@@ -203,17 +233,16 @@ class MatplotlibAnimation(RideHailAnimation):
         """
         self.plotstat_list = []
         if self.animation in (Animation.ALL, Animation.STATS):
-            self.plotstat_list.append(Measure.VEHICLE_FRACTION_P1)
-            self.plotstat_list.append(Measure.VEHICLE_FRACTION_P2)
-            self.plotstat_list.append(Measure.VEHICLE_FRACTION_P3)
-            self.plotstat_list.append(Measure.TRIP_MEAN_WAIT_FRACTION)
-            self.plotstat_list.append(Measure.TRIP_DISTANCE_FRACTION)
-            if self.sim.equilibration == Equilibration.PRICE:
-                # self.plotstat_list.append(Measure.VEHICLE_MEAN_COUNT)
-                self.plotstat_list.append(Measure.VEHICLE_MEAN_SURPLUS)
-                # self.plotstat_list.append(Measure.PLATFORM_INCOME)
-            if self.sim.dispatch_method == DispatchMethod.FORWARD_DISPATCH:
-                self.plotstat_list.append(Measure.TRIP_FORWARD_DISPATCH_FRACTION)
+            self.plotstat_list = stats_measures(self.sim)
+
+    def _init_frame(self):
+        """
+        Function called by the animator before the first frame. Set up the
+        map's persistent artists without advancing the simulation.
+        """
+        if self.animation in (Animation.ALL, Animation.MAP):
+            self._plot_map(0, self.axes[0])
+        return self._map_artists or []
 
     def _next_frame(self, ii, *fargs):
         """
@@ -221,6 +250,8 @@ class MatplotlibAnimation(RideHailAnimation):
 
         Ignore ii and handle the frame counter myself through self.frame_index
         to handle pauses.
+
+        Returns the map's artists, which the animator redraws when blitting.
         """
         # Set local variables for frame index and block values
         jsonl_file_handle = fargs[0]
@@ -235,281 +266,267 @@ class MatplotlibAnimation(RideHailAnimation):
                 self._animation.event_source.stop()
             else:
                 plt.close()
-            return
+            return self._map_artists or []
+        first_block = block
         if not self.pause_plot:
             # OK, we are plotting. Increment
             self.frame_index += 1
+            blocks = self.pacer.begin_frame()
+        else:
+            self.pacer.interrupt()
         if self._interpolation(i) == 0 and not self.pause_plot:
             # A "real" time point. Carry out a step of simulation
             # If the plotting is paused, don't compute the next block,
             # just redisplay what we have.
-            # Only change the current interpolation points by at most one
-            self.state_dict = self.sim.next_block(
-                jsonl_file_handle=jsonl_file_handle,
-                csv_file_handle=csv_file_handle,
-            )
+            # If drawing can't keep up, the pacer asks for several blocks,
+            # of which only the last is drawn
+            stepped = 0
+            while stepped < blocks and not (
+                self.sim.block_index > self.sim.time_blocks > 0
+            ):
+                if stepped > 0 and self.animation in (Animation.STATS, Animation.BAR):
+                    self._update_plot_arrays(block)
+                self.state_dict = self.sim.next_block(
+                    jsonl_file_handle=jsonl_file_handle,
+                    csv_file_handle=csv_file_handle,
+                )
+                stepped += 1
+            self.pacer.end_steps(stepped)
+            block = self.sim.block_index - 1
             if self.changed_plotstat_flag or self.sim.changed_plotstat_flag:
                 self._set_plotstat_list()
                 self.changed_plotstat_flag = False
+            # Only change the current interpolation points by at most one
             self.current_interpolation_points = self.interpolation_points
+            if stepped > 1:
+                # Interpolating a jump of several blocks shows nothing real
+                self.frame_index += self.current_interpolation_points
+        elif not self.pause_plot:
+            self.pacer.end_steps(0)
+        if self._window_title and self.pacer.telemetry_due():
+            self.fig_manager.set_window_title(
+                f"{self._window_title} - {self.pacer.telemetry()}"
+            )
         # Now call the plotting functions
         if (
             self.animation == Animation.BAR
             and self.frame_index < self.sim.city.city_size
         ):
-            return
+            return []
         axis_index = 0
         if self.animation in (Animation.ALL, Animation.MAP):
             self._plot_map(i, self.axes[axis_index])
             axis_index += 1
+        update_due = self._update_due(first_block, block)
         if self.animation == Animation.ALL:
-            if block % self.animate_update_period == 0:
+            if update_due:
                 self._plot_stats_bar(i, self.axes[axis_index], fractional=True)
             axis_index += 1
         elif self.animation == Animation.STATS:
             self._update_plot_arrays(block)
-            if block % self.animate_update_period == 0 and self._interpolation(i) == 0:
+            if update_due and self._interpolation(i) == 0:
                 self._plot_stats_line(i, self.axes[axis_index], fractional=True)
             axis_index += 1
         elif self.animation == Animation.STATS_BAR:
-            if block % self.animate_update_period == 0 and self._interpolation(i) == 0:
+            if update_due and self._interpolation(i) == 0:
                 self._plot_stats_bar(i, self.axes[axis_index], fractional=True)
             axis_index += 1
         if self.animation in [Animation.BAR]:
+            self._update_plot_arrays(block)
             histogram_list = [
                 HistogramArray.HIST_TRIP_DISTANCE,
                 HistogramArray.HIST_TRIP_WAIT_TIME,
             ]
-            self._update_histogram_arrays(block, histogram_list)
             self._plot_histograms(block, histogram_list, self.axes[axis_index])
             axis_index += 1
+        return self._map_artists or []
 
-    def _update_histogram_arrays(self, block, histogram_list):
+    def _update_histogram_arrays(self, block, events):
         """
-        On each move, fill in the histograms with data from
-        the completed trips.
+        Subscriber to the simulation's TRIP_COMPLETED events: fill in the
+        histograms with data from the trips completed in this block.
         """
-        for trip in self.sim.trips.values():
-            if trip.phase == TripPhase.COMPLETED:
-                for histogram in histogram_list:
-                    try:
-                        if histogram == HistogramArray.HIST_TRIP_WAIT_TIME:
-                            if (
+        histogram_list = [
+            HistogramArray.HIST_TRIP_DISTANCE,
+            HistogramArray.HIST_TRIP_WAIT_TIME,
+        ]
+        for event in events:
+            trip = event.trip
+            for histogram in histogram_list:
+                try:
+                    if histogram == HistogramArray.HIST_TRIP_WAIT_TIME:
+                        if (
+                            trip.phase_time[TripPhase.WAITING]
+                            < self.sim.city.city_size
+                        ):
+                            # The arrays don't hold very long wait times,
+                            # which may happen when there are few vehicles
+                            self.histograms[histogram][
                                 trip.phase_time[TripPhase.WAITING]
-                                < self.sim.city.city_size
-                            ):
-                                # The arrays don't hold very long wait times,
-                                # which may happen when there are few vehicles
-                                self.histograms[histogram][
-                                    trip.phase_time[TripPhase.WAITING]
-                                ] += 1
-                        elif histogram == HistogramArray.HIST_TRIP_DISTANCE:
-                            self.histograms[histogram][trip.distance] += 1
-                    except IndexError as e:
-                        logging.error(
-                            f"{e}\n"
-                            f"histogram={histogram}\n"
-                            f"histogram_list={histogram_list}\n"
-                            f"trip.phase_time={trip.phase_time}\n"
-                            f"trip.distance={trip.distance}\n"
-                        )
+                            ] += 1
+                    elif histogram == HistogramArray.HIST_TRIP_DISTANCE:
+                        self.histograms[histogram][trip.distance] += 1
+                except IndexError as e:
+                    logging.error(
+                        f"{e}\n"
+                        f"histogram={histogram}\n"
+                        f"histogram_list={histogram_list}\n"
+                        f"trip.phase_time={trip.phase_time}\n"
+                        f"trip.distance={trip.distance}\n"
+                    )
 
     def _update_plot_arrays(self, block):
         """
-        Measure arrays are values computed from the History arrays
-        but smoothed over self.smoothing_window.
+        Record this block's measures in the plot series.
 
-        The list of Measure members to be calculated is set, depending
-        on chart type and options, in self._set_plotstat_list and is held
-        in self.plotstat_list.
+        The measures are the ones the simulation has already computed in
+        next_block (smoothed over smoothing_window by compute_measures, from
+        the running sums held in the History buffers) and returned in
+        self.state_dict, so nothing is recomputed here.
 
-        The arrays themselves are all numpy arrays, one in each
-        of self.plot_arrays. self.sim.history holds the simulation
-        History lists.
-
-        TODO: This function seems to almost duplicate what simulation._update_measures
-        does in the simulation.py module. Remove this redundancy.
+        Only the measures that are drawn are recorded: the ones in
+        self.plotstat_list, plus the mean ride and wait times marked on the
+        histograms. The series themselves are PlotSeries rings, one in each
+        of self.plot_arrays, and are indexed by block.
         """
-        lower_bound = max((block - self.smoothing_window), 0)
-        window_block_count = block - lower_bound
-        window_vehicle_time = self.sim.history_buffer[History.VEHICLE_TIME].sum
-        # vehicle stats
-        if window_vehicle_time > 0:
-            self.plot_arrays[Measure.VEHICLE_FRACTION_P1][block] = (
-                self.sim.history_buffer[History.VEHICLE_TIME_P1].sum
-                / window_vehicle_time
-            )
-            self.plot_arrays[Measure.VEHICLE_FRACTION_P2][block] = (
-                self.sim.history_buffer[History.VEHICLE_TIME_P2].sum
-                / window_vehicle_time
-            )
-            self.plot_arrays[Measure.VEHICLE_FRACTION_P3][block] = (
-                self.sim.history_buffer[History.VEHICLE_TIME_P3].sum
-                / window_vehicle_time
-            )
-
-            # Additional items when equilibrating
-            if self.sim.equilibration != Equilibration.NONE:
-                self.plot_arrays[Measure.VEHICLE_MEAN_COUNT][block] = (
-                    self.sim.history_buffer[History.VEHICLE_TIME].sum
-                ) / window_block_count
-                self.plot_arrays[Measure.TRIP_MEAN_REQUEST_RATE][block] = (
-                    self.sim.history_buffer[History.TRIP_REQUEST_RATE].sum
-                    / window_block_count
-                )
-                self.plot_arrays[Measure.PLATFORM_MEAN_INCOME][block] = (
-                    self.sim.price
-                    * self.sim.platform_commission
-                    * self.sim.history_buffer[History.TRIP_COMPLETED_COUNT].sum
-                    / window_block_count
-                )
-                # take average of average utility. Not sure this is the best
-                # way, but it may do for now
-                utility_list = [
-                    self.sim.vehicle_utility(
-                        self.plot_arrays[Measure.VEHICLE_FRACTION_P3][x]
-                    )
-                    for x in range(lower_bound, block + 1)
-                ]
-                self.plot_arrays[Measure.VEHICLE_MEAN_SURPLUS][block] = sum(
-                    utility_list
-                ) / len(utility_list)
-
-        # trip stats
-        window_request_count = self.sim.history_buffer[History.TRIP_COUNT].sum
-        window_completed_trip_count = self.sim.history_buffer[
-            History.TRIP_COMPLETED_COUNT
-        ].sum
-        window_riding_time = self.sim.history_buffer[History.TRIP_RIDING_TIME].sum
-        if window_request_count > 0 and window_completed_trip_count > 0:
-            self.plot_arrays[Measure.TRIP_MEAN_WAIT_TIME][block] = (
-                self.sim.history_buffer[History.TRIP_WAIT_TIME].sum
-                / window_completed_trip_count
-            )
-            self.plot_arrays[Measure.TRIP_MEAN_RIDE_TIME][block] = (
-                self.sim.history_buffer[History.TRIP_DISTANCE].sum
-                / window_completed_trip_count
-            )
-            self.plot_arrays[Measure.TRIP_DISTANCE_FRACTION][block] = (
-                self.plot_arrays[Measure.TRIP_MEAN_RIDE_TIME][block]
-                / self.sim.city.city_size
-            )
-            self.plot_arrays[Measure.TRIP_MEAN_WAIT_FRACTION][block] = (
-                self.sim.history_buffer[History.TRIP_WAIT_TIME].sum / window_riding_time
-            )
-            self.plot_arrays[Measure.TRIP_SUM_COUNT][block] = (
-                window_request_count / window_block_count
-            )
-            self.plot_arrays[Measure.TRIP_COMPLETED_FRACTION][block] = (
-                window_completed_trip_count / window_request_count
-            )
-            if self.sim.dispatch_method == DispatchMethod.FORWARD_DISPATCH:
-                self.plot_arrays[Measure.TRIP_FORWARD_DISPATCH_FRACTION][block] = (
-                    self.sim.history_buffer[History.TRIP_FORWARD_DISPATCH_COUNT].sum
-                    / window_completed_trip_count
-                )
+        if not self.state_dict:
+            return
+        block = self.state_dict["block"]
+        for measure in self.plotstat_list + [
+            Measure.TRIP_MEAN_RIDE_TIME,
+            Measure.TRIP_MEAN_WAIT_TIME,
+        ]:
+            self.plot_arrays[measure][block] = self.state_dict[measure.name]
 
-    def _plot_map(self, i, ax):
+    def _init_map(self, ax):
         """
-        Draw the map, with vehicles and trips
+        Create the map's artists once: one scatter collection per vehicle
+        direction (each direction has a common marker) and one each for
+        trip requests and trip destinations. _plot_map then only updates
+        their offsets, sizes and colors, so the axes are not rebuilt on
+        every frame.
         """
         ax.clear()
-        if self.title:
-            ax.set_title(self.title)
-        else:
-            ax.set_title(
-                (
-                    f"{self.sim.city.city_size} blocks, "
-                    f"{len(self.sim.vehicles)} vehicles, "
-                    f"{self.sim.request_rate:.02f} requests/block"
-                )
-            )
-        # Get the animation interpolation point: the distance added to the
-        # previous actual block intersection
-        distance_increment = self._interpolation(i) / (
-            self.current_interpolation_points + 1
-        )
-        roadwidth = self._ROADWIDTH_BASE / self.sim.city.city_size
-        # Animate the vehicles: one set of arrays for each direction
-        # as each direction has a common marker
-        x_dict = {}
-        y_dict = {}
-        color = {}
-        size = {}
-        markers = ("^", ">", "v", "<")
-        # vehicles markers:
-        sizes = (20 * roadwidth, 30 * roadwidth, 30 * roadwidth)
-        for direction in list(Direction):
-            x_dict[direction.name] = []
-            y_dict[direction.name] = []
-            color[direction.name] = []
-            size[direction.name] = []
-        locations = [x_dict, y_dict]
-
-        for vehicle in self.sim.vehicles:
-            for i in [0, 1]:
-                # Position, including edge correction
-                x = vehicle.location[i]
-                if vehicle.phase != VehiclePhase.P1 or self.sim.idle_vehicles_moving:
-                    x += distance_increment * vehicle.direction.value[i]
-                x = (
-                    x + self.display_fringe
-                ) % self.sim.city.city_size - self.display_fringe
-                # Make the displayed-position fit on the map, with
-                # fringe display_fringe around the edges
-                locations[i][vehicle.direction.name].append(x)
-            size[vehicle.direction.name].append(sizes[vehicle.phase.value])
-            color[vehicle.direction.name].append(
-                self.color_palette[vehicle.phase.value]
-            )
-        for i, direction in enumerate(list(Direction)):
-            ax.scatter(
-                locations[0][direction.name],
-                locations[1][direction.name],
-                s=size[direction.name],
-                marker=markers[i],
-                color=color[direction.name],
-                alpha=0.8,
-            )
-
-        x_origin = []
-        y_origin = []
-        x_destination = []
-        y_destination = []
-        for trip in self.sim.trips.values():
-            if trip.phase in (TripPhase.UNASSIGNED, TripPhase.WAITING):
-                x_origin.append(trip.origin[0])
-                y_origin.append(trip.origin[1])
-            if trip.phase == TripPhase.RIDING:
-                x_destination.append(trip.destination[0])
-                y_destination.append(trip.destination[1])
-        ax.scatter(
-            x_origin,
-            y_origin,
-            s=30 * roadwidth,
+        self._map_vehicle_scatters = [
+            ax.scatter([], [], marker=marker, alpha=0.8)
+            for marker in ("^", ">", "v", "<")
+        ]
+        self._map_origin_scatter = ax.scatter(
+            [],
+            [],
             marker="o",
             color=self.color_palette[3],
             alpha=0.8,
             label="Trip request",
         )
-        ax.scatter(
-            x_destination,
-            y_destination,
-            s=40 * roadwidth,
+        self._map_destination_scatter = ax.scatter(
+            [],
+            [],
             marker="*",
             color=self.color_palette[4],
             label="Trip destination",
         )
+        self._map_vehicle_colors = np.array(
+            [
+                mpl.colors.to_rgba(self.color_palette[phase.value])
+                for phase in VehiclePhase
+            ]
+        )
+        self._map_city_size = None
+        self._map_artists = [
+            *self._map_vehicle_scatters,
+            self._map_origin_scatter,
+            self._map_destination_scatter,
+        ]
 
+    def _layout_map(self, ax):
+        """
+        Set the parts of the map that change only with the city size: the
+        axis limits, the grid of roads, and the marker sizes.
+        """
+        city_size = self.sim.city.city_size
+        roadwidth = self._ROADWIDTH_BASE / city_size
         # Draw the map: the second term is a bit of wrapping
         # so that the outside road is shown properly
-        ax.set_xlim(-self.display_fringe, self.sim.city.city_size - self.display_fringe)
-        ax.set_ylim(-self.display_fringe, self.sim.city.city_size - self.display_fringe)
+        ax.set_xlim(-self.display_fringe, city_size - self.display_fringe)
+        ax.set_ylim(-self.display_fringe, city_size - self.display_fringe)
         ax.xaxis.set_major_locator(ticker.MultipleLocator(1))
         ax.yaxis.set_major_locator(ticker.MultipleLocator(1))
         ax.grid(True, which="major", axis="both", lw=roadwidth)
         ax.set_xticklabels([])
         ax.set_yticklabels([])
+        # vehicle marker sizes, indexed by phase
+        self._map_vehicle_sizes = np.array(
+            (20 * roadwidth, 30 * roadwidth, 30 * roadwidth)
+        )
+        self._map_origin_scatter.set_sizes([30 * roadwidth])
+        self._map_destination_scatter.set_sizes([40 * roadwidth])
+        self._map_city_size = city_size
+
+    def _plot_map(self, i, ax):
+        """
+        Draw the map, with vehicles and trips
+        """
+        if self._map_artists is None:
+            self._init_map(ax)
+        full_redraw = False
+        if self._map_city_size != self.sim.city.city_size:
+            self._layout_map(ax)
+            full_redraw = True
+        if self.title:
+            title = self.title
+        else:
+            title = (
+                f"{self.sim.city.city_size} blocks, "
+                f"{len(self.sim.vehicles)} vehicles, "
+                f"{self.sim.request_rate:.02f} requests/block"
+            )
+        if title != ax.get_title():
+            ax.set_title(title)
+            full_redraw = True
+        if full_redraw and self._blit:
+            # Blitting only redraws the map's artists: the title, grid
+            # and axes need a full draw of the figure when they change,
+            # done now so that the animator caches the new background
+            ax.figure.canvas.draw()
+        # Get the animation interpolation point: the distance added to the
+        # previous actual block intersection
+        distance_increment = self._interpolation(i) / (
+            self.current_interpolation_points + 1
+        )
+        # Animate the vehicles: one scatter collection for each direction
+        vehicle_count = len(self.sim.vehicles)
+        locations = np.empty((vehicle_count, 2))
+        steps = np.empty((vehicle_count, 2))
+        phases = np.empty(vehicle_count, dtype=int)
+        directions = np.empty(vehicle_count, dtype=object)
+        for index, vehicle in enumerate(self.sim.vehicles):
+            locations[index] = vehicle.location
+            steps[index] = vehicle.direction.value
+            phases[index] = vehicle.phase.value
+            directions[index] = vehicle.direction
+        if not self.sim.idle_vehicles_moving:
+            steps[phases == VehiclePhase.P1.value] = 0
+        # Position, including edge correction: make the displayed position
+        # fit on the map, with fringe display_fringe around the edges
+        positions = (
+            locations + distance_increment * steps + self.display_fringe
+        ) % self.sim.city.city_size - self.display_fringe
+        for direction, scatter in zip(Direction, self._map_vehicle_scatters):
+            in_direction = directions == direction
+            scatter.set_offsets(positions[in_direction])
+            scatter.set_sizes(self._map_vehicle_sizes[phases[in_direction]])
+            scatter.set_facecolors(self._map_vehicle_colors[phases[in_direction]])
+
+        origins = []
+        destinations = []
+        for trip in self.sim.trips.values():
+            if trip.phase in (TripPhase.UNASSIGNED, TripPhase.WAITING):
+                origins.append(trip.origin)
+            elif trip.phase == TripPhase.RIDING:
+                destinations.append(trip.destination)
+        self._map_origin_scatter.set_offsets(np.reshape(origins, (-1, 2)))
+        self._map_destination_scatter.set_offsets(np.reshape(destinations, (-1, 2)))
 
     def _plot_histograms(self, block, histogram_list, ax):
         """
@@ -1001,6 +1018,14 @@ class MatplotlibAnimation(RideHailAnimation):
             # s.set_linewidth = 5
             ax.legend(loc="lower left")
 
+    def _update_due(self, first_block, block):
+        """
+        True if a multiple of animate_update_period is among the blocks
+        first_block to block, which were stepped for this frame.
+        """
+        period = self.animate_update_period
+        return block // period != (first_block - 1) // period
+
     def _interpolation(self, frame_index):
         """
         For plotting, we use interpolation points to give smoother
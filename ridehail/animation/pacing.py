@@ -0,0 +1,221 @@
+"""
+Pacing of animation frames against simulation blocks.
+
+Animations draw frames of a running simulation. If drawing a frame takes
+longer than a block is meant to take, drawing every block slows the whole
+run down to the speed of the display. A FramePacer measures what it costs to
+step a block and to draw a frame, and decides how many blocks to step for
+each frame that is drawn:
+
+- With an animation delay, one block per frame, as long as the display keeps
+  up with the delay; if it does not, enough blocks per frame to keep to the
+  delay's pace of blocks.
+- With no delay, enough blocks per frame that drawing takes no more than
+  MAX_RENDER_SHARE of the run; except for maps, which are there to show
+  movement, and so draw every block unless they have a delay to keep to.
+
+Animations drive a pacer in one of two ways:
+
+- Frame-driven animations (the Textual apps, matplotlib), which are called
+  once per frame by a timer, call begin_frame() for the number of blocks to
+  step, end_steps() when they are stepped, and then draw. The time until the
+  next begin_frame(), less the timer's wait, is the cost of drawing.
+- Block-driven animations (the text animation, whose loop is run by
+  SimulationRunner), call block_stepped() after each block. It returns True
+  when a frame is due, after which they draw it and call end_render().
+
+The pacer also keeps the rates of blocks and frames over the last few
+seconds, for display (see telemetry()).
+"""
+
+import collections
+import math
+import time
+
+# With no animation delay, step enough blocks per frame that drawing takes
+# at most this share of the run
+MAX_RENDER_SHARE = 0.2
+# The weight of each new measurement in the running cost estimates
+SMOOTHING = 0.2
+# An interval longer than this is a pause (or a debugger), not a cost
+STALL_SECONDS = 5.0
+# Rates are measured over the frames of this many seconds
+TELEMETRY_WINDOW = 2.0
+# telemetry_due() is True at most this often, in seconds
+TELEMETRY_PERIOD = 0.5
+
+
+class FramePacer:
+    """
+    Decide how many simulation blocks to step for each frame drawn.
+
+    delay is the time each block is meant to take (the animation delay),
+    and wait is the time the animation itself waits between calls (a timer
+    interval, or a sleep after each block), which is not a cost of
+    stepping or drawing; it defaults to the delay. No more than
+    max_blocks_per_frame blocks are stepped per frame. render_share is the
+    share of the run that drawing may take when there is no delay, or None
+    to draw every block when there is no delay.
+    """
+
+    def __init__(
+        self,
+        delay=0.0,
+        wait=None,
+        max_blocks_per_frame=1,
+        render_share=MAX_RENDER_SHARE,
+        clock=time.perf_counter,
+    ):
+        self.set_delay(delay, wait)
+        self.max_blocks_per_frame = max(1, int(max_blocks_per_frame))
+        self.render_share = render_share
+        self.clock = clock
+        # Running estimates of the seconds to step a block and draw a frame
+        self.step_seconds = None
+        self.render_seconds = None
+        self.blocks_per_frame = 1
+        # When the last steps ended (frame-driven), or the last block was
+        # stepped or frame drawn (block-driven)
+        self._mark = None
+        self._frame_start = None
+        self._pending_blocks = 0
+        # (time, blocks) for each recent frame
+        self._frames = collections.deque()
+        self._telemetry_time = None
+
+    def set_delay(self, delay, wait=None):
+        """Follow a change of the animation delay"""
+        self.delay = max(0.0, delay)
+        self.wait = self.delay if wait is None else max(0.0, wait)
+
+    def begin_frame(self):
+        """
+        Start a frame of a frame-driven animation: returns the number of
+        blocks to step before drawing it.
+        """
+        now = self.clock()
+        if self._mark is not None:
+            self.render_seconds = self._smooth(
+                self.render_seconds, now - self._mark - self.wait
+            )
+        self._mark = None
+        self._frame_start = now
+        return self.blocks_per_frame
+
+    def end_steps(self, blocks):
+        """
+        Record that the blocks of the frame have been stepped (possibly
+        fewer than asked for, at the end of a run, or none, for a frame
+        that only interpolates), and that drawing starts.
+        """
+        now = self.clock()
+        if self._frame_start is not None and blocks > 0:
+            self.step_seconds = self._smooth(
+                self.step_seconds, (now - self._frame_start) / blocks
+            )
+        self._frame_start = None
+        self._mark = now
+        self._record_frame(now, blocks)
+        self._plan()
+
+    def block_stepped(self):
+        """
+        Record a block of a block-driven animation: returns True if a frame
+        should now be drawn, in which case call end_render() once it is.
+        """
+        now = self.clock()
+        if self._mark is not None:
+            self.step_seconds = self._smooth(
+                self.step_seconds, now - self._mark - self.wait
+            )
+        self._mark = now
+        self._pending_blocks += 1
+        if self._pending_blocks < self.blocks_per_frame:
+            return False
+        self._record_frame(now, self._pending_blocks)
+        self._pending_blocks = 0
+        return True
+
+    def end_render(self):
+        """Record that the frame due at the last block_stepped() is drawn"""
+        now = self.clock()
+        if self._mark is not None:
+            self.render_seconds = self._smooth(self.render_seconds, now - self._mark)
+        self._mark = now
+        self._plan()
+
+    def interrupt(self):
+        """
+        Record that the animation is paused, so that the time until it
+        resumes is not taken as a cost of stepping or drawing.
+        """
+        self._mark = None
+        self._frame_start = None
+        self._frames.clear()
+
+    @property
+    def blocks_per_second(self):
+        span = self._telemetry_span()
+        if span == 0:
+            return 0.0
+        # The first frame's blocks were stepped before the span began
+        return sum(blocks for _, blocks in list(self._frames)[1:]) / span
+
+    @property
+    def frames_per_second(self):
+        span = self._telemetry_span()
+        return 0.0 if span == 0 else (len(self._frames) - 1) / span
+
+    def telemetry(self):
+        """A short description of the current rates, for display"""
+        return (
+            f"{self.blocks_per_second:.1f} blocks/s, "
+            f"{self.frames_per_second:.1f} frames/s"
+        )
+
+    def telemetry_due(self):
+        """True if it is time to refresh the displayed telemetry"""
+        now = self.clock()
+        if (
+            self._telemetry_time is not None
+            and now - self._telemetry_time < TELEMETRY_PERIOD
+        ):
+            return False
+        self._telemetry_time = now
+        return True
+
+    def _smooth(self, estimate, seconds):
+        seconds = max(0.0, seconds)
+        if seconds > STALL_SECONDS:
+            return estimate
+        if estimate is None:
+            return seconds
+        return estimate + SMOOTHING * (seconds - estimate)
+
+    def _record_frame(self, now, blocks):
+        self._frames.append((now, blocks))
+        while now - self._frames[0][0] > TELEMETRY_WINDOW:
+            self._frames.popleft()
+
+    def _telemetry_span(self):
+        if len(self._frames) < 2:
+            return 0
+        return self._frames[-1][0] - self._frames[0][0]
+
+    def _plan(self):
+        step, render = self.step_seconds, self.render_seconds
+        if step is None or not render:
+            blocks = 1
+        elif self.delay > 0 and render + step <= self.delay:
+            # The display keeps up
+            blocks = 1
+        elif step < self.delay:
+            # Draw less often, to keep to the pace of one block per delay
+            blocks = math.ceil(render / (self.delay - step))
+        elif self.render_share is None:
+            blocks = 1
+        else:
+            # As fast as possible (or as fast as the simulation can go)
+            share = self.render_share
+            blocks = math.ceil(render * (1 - share) / (share * max(step, 1e-6)))
+        self.blocks_per_frame = min(self.max_blocks_per_frame, max(1, blocks))
@@ -25,6 +25,7 @@ from textual.screen import ModalScreen
 from ridehail.atom import Animation, Equilibration, Measure
 from ridehail.keyboard_mappings import generate_textual_bindings
 from .base import RideHailAnimation
+from .pacing import FramePacer
 
 
 class ProgressPanel(Container):
@@ -452,6 +453,14 @@ class RidehailTextualApp(App):
         self.animation = animation
         self.is_paused = False
         self.simulation_timer: Optional[Timer] = None
+        # Decides how many blocks to step for each frame drawn (see
+        # _advance_blocks), and measures the rates shown in the header
+        self.pacer = FramePacer(
+            delay=sim.animation_delay,
+            max_blocks_per_frame=sim.config.max_blocks_per_frame.value,
+        )
+        self._single_step = False
+        self._results = None
 
         # Set theme for consistent color scheme across all textual animations
         self.theme = "textual-dark"
@@ -523,6 +532,9 @@ class RidehailTextualApp(App):
                     frame_interval = (
                         0.001  # 1ms - effectively immediate but allows UI refresh
                     )
+                self.pacer.set_delay(self.sim.animation_delay, wait=frame_interval)
+                # The time since the timer last ran is not a cost of drawing
+                self.pacer.interrupt()
 
                 self.simulation_timer = self.set_interval(
                     interval=frame_interval, callback=self.simulation_step, repeat=0
@@ -543,14 +555,19 @@ class RidehailTextualApp(App):
         handler = self.sim.get_keyboard_handler()
         # Skip if paused (unless we're doing a single step)
         if self.is_paused and not handler.should_step:
+            self.pacer.interrupt()
             return
         # Reset step flag if we're executing a single step
+        self._single_step = handler.should_step
         if handler.should_step:
             handler.should_step = False
 
         # Call subclass-specific implementation
         self._execute_simulation_step()
 
+        if self.pacer.telemetry_due():
+            self.sub_title = self.pacer.telemetry()
+
         # Check for parameter changes and display toast notifications
         self._check_and_notify_parameter_changes()
 
@@ -560,33 +577,67 @@ class RidehailTextualApp(App):
 
         This is the hook method for the Template Method pattern. Subclasses
         override this to provide custom simulation execution while the base
-        class handles pause/step logic.
+        class handles pause/step logic. This implementation steps a frame's
+        worth of blocks with _advance_block() and then draws the frame with
+        _render_frame(), so most subclasses override those two instead.
         """
         # Increment step counter for debugging
         self._step_count = getattr(self, "_step_count", 0) + 1
 
         try:
-            results = self.sim.next_block(
-                jsonl_file_handle=None,
-                csv_file_handle=None,
-                return_values="stats",
-            )
-
-            # Update progress panel
-            progress_panel = self.query_one("#progress_panel")
-            progress_panel.update_progress(results)
+            self._advance_blocks()
+            self._render_frame()
 
             # Check if simulation is complete
-            if (
-                self.sim.time_blocks > 0
-                and self.sim.block_index >= self.sim.time_blocks
-            ):
+            if self._simulation_complete():
                 self.stop_simulation()
 
         except Exception as e:
             logging.error(f"Simulation step failed: {e}")
             self.stop_simulation()
 
+    def _advance_blocks(self) -> int:
+        """
+        Step the blocks of one frame: one block when single-stepping, and
+        otherwise as many as the pacer asks for, which is more than one when
+        drawing every block would slow the simulation down. Returns the
+        number of blocks stepped.
+        """
+        blocks = self.pacer.begin_frame()
+        if self._single_step:
+            blocks = 1
+        stepped = 0
+        for _ in range(blocks):
+            self._advance_block()
+            stepped += 1
+            if self._simulation_complete():
+                break
+        self.pacer.end_steps(stepped)
+        return stepped
+
+    def _simulation_complete(self) -> bool:
+        return self.sim.time_blocks > 0 and self.sim.block_index >= self.sim.time_blocks
+
+    def _advance_block(self) -> None:
+        """
+        Step the simulation by one block (override in subclasses).
+
+        Called for every block, drawn or not, so subclasses that record
+        each block (e.g. chart series) do so here rather than in
+        _render_frame().
+        """
+        self._results = self.sim.next_block(
+            jsonl_file_handle=None,
+            csv_file_handle=None,
+            return_values="stats",
+        )
+
+    def _render_frame(self) -> None:
+        """Draw the state after the last block stepped (override in subclasses)"""
+        # Update progress panel
+        progress_panel = self.query_one("#progress_panel")
+        progress_panel.update_progress(self._results)
+
     def _check_and_notify_parameter_changes(self) -> None:
         """
         Check for parameter changes and display toast notifications.
@@ -706,29 +706,8 @@ class TextualConsoleApp(RidehailTextualApp):
             yield self.create_config_panel()
         yield Footer()
 
-    def _execute_simulation_step(self) -> None:
-        """Enhanced simulation step with better progress tracking (Template Method hook)"""
-        try:
-            results = self.sim.next_block(
-                jsonl_file_handle=None, csv_file_handle=None, return_values="stats"
-            )
-
-            # self.title = "Ridehail Console"
-
-            # Update enhanced progress panel
-            progress_panel = self.query_one("#progress_panel")
-            progress_panel.update_progress(results)
-
-            # Check if simulation is complete
-            if (
-                self.sim.time_blocks > 0
-                and self.sim.block_index >= self.sim.time_blocks
-            ):
-                self.stop_simulation()
-
-        except Exception as e:
-            print(f"exception: {e}")
-            self.stop_simulation()
+    # Inherits the simulation step from RidehailTextualApp, which updates the
+    # enhanced progress panel (id progress_panel) once for each frame drawn
 
 
 class TextualConsoleAnimation(TextualBasedAnimation):
@@ -187,31 +187,15 @@ class TextualLengthAnimation(TextualBasedAnimation):
 
                 yield Footer()
 
-            def _execute_simulation_step(self) -> None:
+            def _render_frame(self) -> None:
+                """Draw the chart for the last block stepped (Template Method hook)"""
                 try:
-                    self.sim.next_block(
-                        jsonl_file_handle=None,
-                        csv_file_handle=None,
-                        return_values="stats",
+                    chart_container = self.query_one(
+                        "#chart_container", TripLengthChartWidget
                     )
-
-                    try:
-                        chart_container = self.query_one(
-                            "#chart_container", TripLengthChartWidget
-                        )
-                        chart_container.update_chart(self.sim.block_index)
-                    except Exception:
-                        pass
-
-                    if (
-                        self.sim.time_blocks > 0
-                        and self.sim.block_index >= self.sim.time_blocks
-                    ):
-                        self.stop_simulation()
-
-                except Exception as e:
-                    logging.error(f"Simulation step failed: {e}")
-                    self.stop_simulation()
+                    chart_container.update_chart(self.sim.block_index)
+                except Exception:
+                    pass
 
             def key_q(self):
                 self.exit()
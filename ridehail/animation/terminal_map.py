@@ -9,9 +9,12 @@ from textual.widgets import (
     Static,
 )
 from textual.widget import Widget
-from textual.geometry import Offset
+from textual.geometry import Offset, Region
 from textual.reactive import reactive
+from textual.strip import Strip
 from rich.console import RenderResult
+from rich.segment import Segment
+from rich.style import Style
 from rich import print
 
 from .terminal_base import TextualBasedAnimation, RidehailTextualApp
@@ -20,6 +23,14 @@ from .terminal_base import TextualBasedAnimation, RidehailTextualApp
 # Fast epsilon for floating point comparisons (more efficient than math.isclose)
 EPSILON = 1e-9
 
+# Fleets larger than this are drawn by BatchedMapLayer rather than as one
+# widget per vehicle and per trip marker
+BATCHED_MAP_VEHICLE_COUNT = 200
+# A batched map switches back to widgets only when the fleet falls this far
+# below the threshold, so that an equilibrating fleet hovering around it
+# does not rebuild the layers every block
+BATCHED_MAP_HYSTERESIS = 20
+
 # Terminal capability detection - done once at module load
 _TERMINAL_SUPPORTS_EMOJI = None
 
@@ -153,16 +164,10 @@ class StaticMapGrid(Widget):
 
         return horizontal_spacing, vertical_spacing
 
-    def render(self) -> RenderResult:
-        """Render the static map grid (roads and intersections only)"""
-        h_spacing, v_spacing = self._calculate_spacing()
+    def _road_rows(self, h_spacing, v_spacing):
+        """The rows of road and intersection characters, top row first"""
         h_shift = round(0.5 * h_spacing)
         v_shift = round(0.5 * v_spacing)
-
-        # Debug: ensure we always return something visible
-        if h_spacing <= 0 or v_spacing <= 0:
-            return "[red]Grid Error: Invalid spacing[/red]"
-
         map_lines = []
 
         # Use new coordinate range: -0.5 to (city_size-0.5) for easier wrapping
@@ -189,6 +194,17 @@ class StaticMapGrid(Widget):
                 char = self._get_road_character(city_x, city_y)
                 line_chars.append(char)
             map_lines.append("".join(line_chars))
+        return map_lines
+
+    def render(self) -> RenderResult:
+        """Render the static map grid (roads and intersections only)"""
+        h_spacing, v_spacing = self._calculate_spacing()
+
+        # Debug: ensure we always return something visible
+        if h_spacing <= 0 or v_spacing <= 0:
+            return "[red]Grid Error: Invalid spacing[/red]"
+
+        map_lines = self._road_rows(h_spacing, v_spacing)
 
         # Ensure we have content
         if not map_lines:
@@ -197,6 +213,173 @@ class StaticMapGrid(Widget):
         return "\n".join(map_lines)
 
 
+class BatchedMapLayer(StaticMapGrid):
+    """Roads, trip markers and vehicles composited in a single render pass
+
+    Used in place of the grid, trip and vehicle layers for large fleets,
+    where one widget per vehicle and per trip costs too much. Markers are
+    kept as (character, style) cells keyed by display row and column. Each
+    update rebuilds the cells from the simulation, compares them with the
+    previous ones, and refreshes only the cells that changed. Each row is
+    rendered as a Strip of Rich segments and cached until one of its cells
+    changes.
+
+    Vehicles jump between intersections and midpoints rather than being
+    animated between them.
+    """
+
+    # Plain characters: each row is drawn as a single grid-styled segment
+    MAP_CHARS = {
+        "intersection": "┼",
+        "road_horizontal": "─",
+        "road_vertical": "│",
+        "empty_space": " ",
+    }
+    GRID_STYLE = Style(color="grey42")
+    VEHICLE_CHARS = {"north": "⬆", "east": "➡", "south": "⬇", "west": "⬅"}
+    # Same colors as the VehicleWidget and TripMarkerWidget CSS classes
+    # (deepskyblue, gold, lime, yellow, orange)
+    VEHICLE_STYLES = {
+        "P1": Style(color="#00bfff", bold=True),
+        "P2": Style(color="#ffd700", bold=True),
+        "P3": Style(color="#00ff00", bold=True),
+    }
+    PICKUP_CHARACTER = "\u25cf"  # Solid circle
+    PICKUP_STYLE = Style(color="black", bgcolor="#ffff00", bold=True)
+    TRIP_MARKERS = {
+        "origin": ("●", Style(color="#ffa500", bold=True)),
+        "destination": ("★", Style(color="#00ff00", bold=True)),
+    }
+
+    def __init__(self, map_size, **kwargs):
+        super().__init__(map_size, **kwargs)
+        # Markers in city coordinates: (city_x, city_y, character, style)
+        self._vehicle_markers = []
+        self._trip_markers = []
+        # Display row -> {display column -> (character, style)}
+        self._cells = {}
+        self._cell_spacing = None
+        self._road_row_cache = []
+        self._strips = {}
+        # Intersection -> vehicle, for hit testing
+        self._vehicle_index = {}
+
+    def update_markers(self, vehicles, trips, frame_index):
+        """Rebuild the markers for this frame and refresh the changed cells
+
+        Same frame pattern as the widget layers:
+        - Even frames: vehicles at intersections
+        - Odd frames: vehicles at midpoints, unless waiting for a pickup,
+          and trip markers updated
+        """
+        vehicle_markers = []
+        vehicle_index = {}
+        for vehicle in vehicles:
+            x, y = vehicle.location[0], vehicle.location[1]
+            vehicle_index.setdefault((round(x), round(y)), vehicle)
+            waiting_for_pickup = (
+                vehicle.pickup_countdown is not None and vehicle.pickup_countdown > 0
+            )
+            if waiting_for_pickup:
+                char, style = self.PICKUP_CHARACTER, self.PICKUP_STYLE
+            else:
+                char = self.VEHICLE_CHARS[vehicle.direction.name.lower()]
+                style = self.VEHICLE_STYLES[vehicle.phase.name]
+                if frame_index % 2 != 0:
+                    x += 0.5 * vehicle.direction.value[0]
+                    y += 0.5 * vehicle.direction.value[1]
+            vehicle_markers.append((x, y, char, style))
+        self._vehicle_markers = vehicle_markers
+        self._vehicle_index = vehicle_index
+
+        if frame_index % 2 != 0:
+            # interpolation point: change trip marker locations
+            trip_markers = []
+            for trip in trips.values():
+                if trip.phase.name in ("UNASSIGNED", "WAITING"):
+                    char, style = self.TRIP_MARKERS["origin"]
+                    trip_markers.append((trip.origin[0], trip.origin[1], char, style))
+                elif trip.phase.name == "RIDING":
+                    char, style = self.TRIP_MARKERS["destination"]
+                    trip_markers.append(
+                        (trip.destination[0], trip.destination[1], char, style)
+                    )
+            self._trip_markers = trip_markers
+
+        spacing = self._calculate_spacing()
+        if spacing != self._cell_spacing:
+            self._layout(spacing)
+            self.refresh()
+            return
+        cells = self._place_markers(spacing)
+        dirty_regions = []
+        for row in cells.keys() | self._cells.keys():
+            new_row = cells.get(row, {})
+            old_row = self._cells.get(row, {})
+            if new_row == old_row:
+                continue
+            self._strips.pop(row, None)
+            for column in new_row.keys() | old_row.keys():
+                if new_row.get(column) != old_row.get(column):
+                    dirty_regions.append(Region(column, row, 1, 1))
+        self._cells = cells
+        if dirty_regions:
+            self.refresh(*dirty_regions)
+
+    def get_vehicle_at_location(self, city_x, city_y):
+        """Get the vehicle at the intersection nearest to the position"""
+        return self._vehicle_index.get((round(city_x), round(city_y)))
+
+    def get_vehicle_count(self):
+        """Get current number of vehicles in layer"""
+        return len(self._vehicle_markers)
+
+    def _place_markers(self, spacing):
+        """Map the markers to display cells, vehicles drawn over trips"""
+        h_spacing, v_spacing = spacing
+        cells = {}
+        for x, y, char, style in self._trip_markers + self._vehicle_markers:
+            # Wrap onto the torus, in the -0.5 to (city_size-0.5) range
+            x = (x + 0.5) % self.map_size - 0.5
+            y = (y + 0.5) % self.map_size - 0.5
+            offset = location_to_offset(x, y, self.map_size, h_spacing, v_spacing)
+            cells.setdefault(offset.y, {})[offset.x] = (char, style)
+        return cells
+
+    def _layout(self, spacing):
+        """Recompute everything that depends on the spacing"""
+        self._cell_spacing = spacing
+        self._road_row_cache = self._road_rows(*spacing)
+        self._cells = self._place_markers(spacing)
+        self._strips = {}
+
+    def render_line(self, y: int) -> Strip:
+        """Render one display row: the roads, overlaid with markers"""
+        spacing = self._calculate_spacing()
+        if spacing != self._cell_spacing:
+            self._layout(spacing)
+        strip = self._strips.get(y)
+        if strip is None:
+            strip = self._render_row(y)
+            self._strips[y] = strip
+        return strip
+
+    def _render_row(self, y):
+        roads = self._road_row_cache[y] if 0 <= y < len(self._road_row_cache) else ""
+        segments = []
+        position = 0
+        for column, (char, style) in sorted(self._cells.get(y, {}).items()):
+            if not 0 <= column < len(roads):
+                continue
+            if column > position:
+                segments.append(Segment(roads[position:column], self.GRID_STYLE))
+            segments.append(Segment(char, style))
+            position = column + 1
+        if position < len(roads):
+            segments.append(Segment(roads[position:], self.GRID_STYLE))
+        return Strip(segments).extend_cell_length(self.size.width)
+
+
 class VehicleWidget(Widget):
     """Individual vehicle widget"""
 
@@ -781,7 +964,7 @@ class MapContainer(Widget):
             layers: grid trips vehicles;
         }
 
-        StaticMapGrid {
+        StaticMapGrid, BatchedMapLayer {
             height: 100%;
             width: 100%;
             layer: grid;
@@ -851,9 +1034,8 @@ class MapContainer(Widget):
         self.map_size = min(sim.city.city_size, 250)
 
         # Create layer instances
-        self.static_grid = StaticMapGrid(self.map_size)
-        self.trip_layer = TripMarkerLayer(self.map_size, self.static_grid)
-        self.vehicle_layer = VehicleLayer(self.map_size, self.static_grid)
+        self.batched = len(sim.vehicles) > BATCHED_MAP_VEHICLE_COUNT
+        self._create_layers()
 
         # Animation mode control
         self.use_native_animation = True  # Native animation is now the default
@@ -862,11 +1044,43 @@ class MapContainer(Widget):
         self.vehicle_previous_locations = {}
         self.vehicle_current_locations = {}
 
+    def _create_layers(self):
+        if self.batched:
+            self.map_layer = BatchedMapLayer(self.map_size)
+        else:
+            self.static_grid = StaticMapGrid(self.map_size)
+            self.trip_layer = TripMarkerLayer(self.map_size, self.static_grid)
+            self.vehicle_layer = VehicleLayer(self.map_size, self.static_grid)
+
+    def _layers(self):
+        """The map layers for the current mode, in z-order"""
+        if self.batched:
+            return [self.map_layer]
+        return [self.static_grid, self.trip_layer, self.vehicle_layer]
+
     def compose(self) -> ComposeResult:
         """Compose all map layers with proper z-ordering"""
-        yield self.static_grid
-        yield self.trip_layer
-        yield self.vehicle_layer
+        yield from self._layers()
+
+    def _update_mode(self):
+        """
+        Switch between the batched layer and per-vehicle widgets when the
+        fleet size (which equilibration changes) crosses the threshold
+        """
+        vehicle_count = len(self.sim.vehicles)
+        if self.batched:
+            batched = vehicle_count > (
+                BATCHED_MAP_VEHICLE_COUNT - BATCHED_MAP_HYSTERESIS
+            )
+        else:
+            batched = vehicle_count > BATCHED_MAP_VEHICLE_COUNT
+        if batched == self.batched:
+            return
+        for layer in self._layers():
+            layer.remove()
+        self.batched = batched
+        self._create_layers()
+        self.mount(*self._layers())
 
     def update_vehicle_locations(self):
         """Update vehicle position tracking for interpolation (temporary)"""
@@ -893,6 +1107,14 @@ class MapContainer(Widget):
         """Update the map display for the given frame"""
         if update_locations:
             self.update_vehicle_locations()
+        if self.is_mounted:
+            self._update_mode()
+
+        if self.batched:
+            self.map_layer.update_markers(
+                self.sim.vehicles, self.sim.trips, frame_index
+            )
+            return
 
         # Update the vehicle layer with native animation
         animation_delay = self.sim.config.animation_delay.value
@@ -924,6 +1146,8 @@ class TextualMapApp(RidehailTextualApp):
 
     def __init__(self, sim, animation=None, **kwargs):
         super().__init__(sim, animation, **kwargs)
+        # The map shows movement, so it only skips blocks to keep to a delay
+        self.pacer.render_share = None
         self.frame_index = 0
         self.current_step_vehicles = (
             None  # Store vehicle state for both frames of current step
@@ -972,12 +1196,9 @@ class TextualMapApp(RidehailTextualApp):
             map_container = self.query_one("#map_container", expect_type=MapContainer)
 
             if self.frame_index % 2 == 0:
-                # Even frame: Real simulation step - vehicles reach intersections
-                self.sim.next_block(
-                    jsonl_file_handle=None,
-                    csv_file_handle=None,
-                    return_values="stats",
-                )
+                # Even frame: Real simulation step - vehicles reach intersections.
+                # If drawing can't keep up, the pacer asks for several blocks
+                self._advance_blocks()
 
                 # Store current vehicle state for interpolation frame
                 self.current_step_vehicles = list(self.sim.vehicles)
@@ -985,9 +1206,16 @@ class TextualMapApp(RidehailTextualApp):
                 # Update map display - Frame 0: vehicles at intersections
                 map_container.update_map(self.frame_index, update_locations=True)
 
+                # Drop the interpolation frame too while the pacer is
+                # skipping blocks
+                if self.pacer.blocks_per_frame > 1 and not self._single_step:
+                    self.frame_index += 1
+
             else:
                 # Odd frame: Interpolation frame - vehicles at midpoints
                 # Don't advance simulation, just update display with interpolated locations
+                self.pacer.begin_frame()
+                self.pacer.end_steps(0)
                 map_container.update_map(self.frame_index, update_locations=False)
 
             # Increment frame counter (2 frames per simulation step)
@@ -4,7 +4,6 @@ Provides real-time scatter plot visualization of parameter sweep results.
 """
 
 import logging
-import copy
 from typing import Dict
 
 from textual.app import ComposeResult
@@ -425,20 +424,16 @@ class TextualSequenceAnimation(TextualBasedAnimation):
         """Create a simulation config with the specified parameters"""
         from ridehail.atom import Animation
 
-        # Create a copy of the current config
-        sim_config = copy.deepcopy(self.sim.config)
-
-        # Update parameters
-        sim_config.base_demand.value = params["request_rate"]
-        sim_config.vehicle_count.value = int(params["vehicle_count"])
-        sim_config.inhomogeneity.value = params["inhomogeneity"]
-        sim_config.platform_commission.value = params["commission"]
-
-        # CRITICAL: Set animation style to NONE to run simulation completely without animation
-        # This matches the behavior in sequence.py line 226
-        sim_config.animation.value = Animation.NONE
-
-        return sim_config
+        # Derive the config from an immutable snapshot of the current config.
+        # CRITICAL: Set animation style to NONE to run simulation completely
+        # without animation. This matches the behavior in sequence.py _next_sim
+        return self.sim.config.snapshot(
+            base_demand=params["request_rate"],
+            vehicle_count=int(params["vehicle_count"]),
+            inhomogeneity=params["inhomogeneity"],
+            platform_commission=params["commission"],
+            animation=Animation.NONE,
+        )
 
 
 class RidehailSequenceTextualApp(RidehailTextualApp, inherit_bindings=False):
@@ -252,17 +252,24 @@ class StatsChartWidget(Container):
 
         return lines_plotted
 
+    def record_block(self, block: int) -> None:
+        """
+        Record the current simulation data for a block, without drawing it.
+
+        Args:
+            block: Current simulation block number
+        """
+        self._update_plot_arrays(block)
+
     def update_chart(self, block: int) -> None:
         """
-        Update the chart with current simulation data.
+        Draw the chart with the data recorded up to a block (see
+        record_block).
 
         Args:
             block: Current simulation block number
         """
         try:
-            # Update data arrays
-            self._update_plot_arrays(block)
-
             # Only update chart display every update period
             if block % self.animate_update_period != 0:
                 return
@@ -384,37 +391,27 @@ class TextualStatsAnimation(TextualBasedAnimation):
 
                 yield Footer()
 
-            def _execute_simulation_step(self) -> None:
-                """Execute one simulation step and update chart (Template Method hook)"""
-                # Increment step counter for debugging
-                self._step_count = getattr(self, "_step_count", 0) + 1
-
+            def _advance_block(self) -> None:
+                """Step one block and record it in the chart (Template Method hook)"""
+                super()._advance_block()
+                # Record every block, drawn or not, so the lines have no gaps
                 try:
-                    self.sim.next_block(
-                        jsonl_file_handle=None,
-                        csv_file_handle=None,
-                        return_values="stats",
+                    chart_container = self.query_one(
+                        "#chart_container", StatsChartWidget
                     )
+                    chart_container.record_block(self.sim.block_index)
+                except Exception:
+                    pass
 
-                    # Update chart with current block data
-                    try:
-                        chart_container = self.query_one(
-                            "#chart_container", StatsChartWidget
-                        )
-                        chart_container.update_chart(self.sim.block_index)
-                    except Exception as e:
-                        pass
-
-                    # Check if simulation is complete
-                    if (
-                        self.sim.time_blocks > 0
-                        and self.sim.block_index >= self.sim.time_blocks
-                    ):
-                        self.stop_simulation()
-
-                except Exception as e:
-                    logging.error(f"Simulation step failed: {e}")
-                    self.stop_simulation()
+            def _render_frame(self) -> None:
+                """Draw the chart for the last block stepped (Template Method hook)"""
+                try:
+                    chart_container = self.query_one(
+                        "#chart_container", StatsChartWidget
+                    )
+                    chart_container.update_chart(self.sim.block_index)
+                except Exception:
+                    pass
 
             def key_q(self):
                 """Quit the application"""
@@ -428,6 +425,7 @@ class TextualStatsAnimation(TextualBasedAnimation):
                 """Reset chart view"""
                 chart_container = self.query_one("#chart_container", StatsChartWidget)
                 chart_container.chart_data.clear()
+                chart_container.record_block(self.animation.sim.block_index)
                 chart_container.update_chart(self.animation.sim.block_index)
 
         return StatsApp(self.sim, animation=self)
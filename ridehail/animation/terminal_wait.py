@@ -214,34 +214,15 @@ class TextualWaitAnimation(TextualBasedAnimation):
 
                 yield Footer()
 
-            def _execute_simulation_step(self) -> None:
-                """Execute one simulation step and update chart (Template Method hook)"""
+            def _render_frame(self) -> None:
+                """Draw the chart for the last block stepped (Template Method hook)"""
                 try:
-                    self.sim.next_block(
-                        jsonl_file_handle=None,
-                        csv_file_handle=None,
-                        return_values="stats",
+                    chart_container = self.query_one(
+                        "#chart_container", WaitTimeChartWidget
                     )
-
-                    # Update chart with current block data
-                    try:
-                        chart_container = self.query_one(
-                            "#chart_container", WaitTimeChartWidget
-                        )
-                        chart_container.update_chart(self.sim.block_index)
-                    except Exception:
-                        pass
-
-                    # Check if simulation is complete
-                    if (
-                        self.sim.time_blocks > 0
-                        and self.sim.block_index >= self.sim.time_blocks
-                    ):
-                        self.stop_simulation()
-
-                except Exception as e:
-                    logging.error(f"Simulation step failed: {e}")
-                    self.stop_simulation()
+                    chart_container.update_chart(self.sim.block_index)
+                except Exception:
+                    pass
 
             def key_q(self):
                 """Quit the application"""
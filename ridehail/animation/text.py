@@ -2,11 +2,17 @@
 Text-based animation for ridehail simulation.
 
 Provides simple text output to stdout, showing:
-- Current simulation state on each block (single line, updated in place)
+- An estimate of the steady state at the start, if the configuration is one
+  that the precomputed atlas covers (see atlas.py)
+- Current simulation state on each block (single line, updated in place),
+  or on every few blocks if printing can't keep up (see pacing.py)
 - Final results as JSON at completion
 """
 
+import math
+
 from ridehail.animation.base import RideHailAnimation
+from ridehail.animation.pacing import FramePacer
 from ridehail.atom import Measure
 from rich import print
 
@@ -55,16 +61,23 @@ class TextAnimation(RideHailAnimation):
         self._print_results_table = print_results_table
         # Control whether to enable keyboard handling (disabled for sequences)
         self._enable_keyboard = enable_keyboard
+        self.pacer = FramePacer(
+            delay=self.sim.animation_delay,
+            max_blocks_per_frame=self.sim.config.max_blocks_per_frame.value,
+        )
 
     def animate(self):
         """
         Run the simulation with text output.
 
         Prints:
+        - The atlas estimate of the steady state at start (if there is one)
         - Keyboard controls help at start (if keyboard enabled)
         - Current state on each block (updated in place)
         - Final results as JSON at completion (if print_results_table enabled)
         """
+        if self._print_results_table:
+            self._print_estimate()
         if self._enable_keyboard:
             # Run with keyboard handling for interactive use
             simulation_results = self._animate_with_keyboard()
@@ -112,8 +125,14 @@ class TextAnimation(RideHailAnimation):
             self._check_and_print_keyboard_actions(runner.keyboard_handler, block)
 
             # Print current state
-            if state_dict:
-                self._print_state(state_dict, block)
+            self.pacer.set_delay(self.sim.animation_delay)
+            if runner.keyboard_handler.is_paused:
+                # A single step is always shown
+                self.pacer.interrupt()
+                if state_dict:
+                    self._print_state(state_dict, block)
+            elif state_dict:
+                self._print_paced_state(state_dict, block)
 
         # Run simulation with display callback
         runner = SimulationRunner(self.sim)
@@ -131,10 +150,40 @@ class TextAnimation(RideHailAnimation):
         # Run simulation blocks with text output
         for block in range(self.sim.time_blocks):
             state_dict = self.sim.next_block(block=block)
-            self._print_state(state_dict, block)
+            self._print_paced_state(state_dict, block)
 
         return RideHailSimulationResults(self.sim)
 
+    def _print_estimate(self):
+        """
+        Print the steady state estimated from the precomputed atlas, which
+        the simulation then refines, if the atlas covers this configuration.
+        """
+        from ridehail.atlas import estimate
+
+        values = estimate(self.sim.config.as_dict())
+        if values:
+            measures = {
+                measure: math.nan if values[measure.name] is None else values[
+                    measure.name
+                ]
+                for measure in (
+                    Measure.VEHICLE_MEAN_COUNT,
+                    Measure.VEHICLE_FRACTION_P1,
+                    Measure.VEHICLE_FRACTION_P2,
+                    Measure.VEHICLE_FRACTION_P3,
+                    Measure.TRIP_MEAN_WAIT_FRACTION_TOTAL,
+                )
+            }
+            print(
+                "Steady-state estimate (precomputed): "
+                f"N={measures[Measure.VEHICLE_MEAN_COUNT]:.2f}, "
+                f"P1={measures[Measure.VEHICLE_FRACTION_P1]:.2f}, "
+                f"P2={measures[Measure.VEHICLE_FRACTION_P2]:.2f}, "
+                f"P3={measures[Measure.VEHICLE_FRACTION_P3]:.2f}, "
+                f"W={measures[Measure.TRIP_MEAN_WAIT_FRACTION_TOTAL]:.2f}"
+            )
+
     def _print_state(self, state_dict, block):
         """
         Print current simulation state in a compact format.
@@ -144,7 +193,17 @@ class TextAnimation(RideHailAnimation):
             block: Current block number
         """
         s = format_simulation_state(state_dict, block, self.sim.city_size)
-        print(f"{s}", end="\r", flush=True)
+        print(f"{s}, {self.pacer.telemetry()}", end="\r", flush=True)
+
+    def _print_paced_state(self, state_dict, block):
+        """
+        Print the state if the pacer says a frame is due, or if this is the
+        last block, so that the line shows the final state.
+        """
+        frame_due = self.pacer.block_stepped()
+        if frame_due or block == self.sim.time_blocks - 1:
+            self._print_state(state_dict, block)
+            self.pacer.end_render()
 
     def _check_and_print_keyboard_actions(self, keyboard_handler, block):
         """
@@ -135,6 +135,14 @@ def create_animation_factory(animation, sim):
         from .web_browser import WebStatsAnimation
 
         return WebStatsAnimation(sim)
+    elif (
+        animation in (Animation.MAP, Animation.STATS)
+        and sim.config.animation_output_file.value
+        and sim.config.animation_render_processes.value > 0
+    ):
+        from .video import VideoExportAnimation
+
+        return VideoExportAnimation(sim)
     elif animation in (
         Animation.MAP,
         Animation.STATS,
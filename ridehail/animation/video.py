@@ -0,0 +1,367 @@
+"""
+Offline export of map and stats animations to a video file.
+
+The matplotlib animation saves a video by rendering each frame in lockstep
+with the simulation, on a single core. VideoExportAnimation splits the work:
+
+1. The simulation runs at full speed, recording a compact BlockState
+   (vehicle positions, directions and phases, trip markers and the plotted
+   measures) for each block.
+2. The frames are drawn from those records in a pool of worker processes,
+   each with its own Agg figure, and piped in order to ffmpeg as raw RGBA.
+   Each block is sent to a worker once, which draws all of its frames, and
+   only a few blocks are in flight at a time, so memory does not grow with
+   the length of the video.
+"""
+
+import logging
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+from matplotlib import colors, ticker
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from ridehail.atom import Animation, Direction, Measure, TripPhase, VehiclePhase
+from ridehail.simulation_runner import SimulationRunner
+from .base import RideHailAnimation, stats_measures
+from .utils import CHART_X_RANGE
+
+# Same frame rate as the FFMpegFileWriter of the live animation
+FRAMES_PER_SECOND = 10
+# Blocks submitted to the render pool per worker process and not yet written
+BLOCKS_IN_FLIGHT_PER_PROCESS = 4
+_DPI = 100
+_FIGURE_SIZE = {Animation.MAP: (8, 8), Animation.STATS: (16, 8)}
+_VEHICLE_MARKERS = ("^", ">", "v", "<")  # in Direction order
+_ROADWIDTH_BASE = RideHailAnimation._ROADWIDTH_BASE
+_DIRECTION_INDEX = {direction: index for index, direction in enumerate(Direction)}
+
+
+@dataclass
+class BlockState:
+    """Everything needed to draw the frames of one block"""
+
+    block: int
+    city_size: int
+    request_rate: float
+    # (n, 2) vehicle locations, and the direction each vehicle moves in
+    # during the interpolated frames (zero for vehicles standing still)
+    vehicle_locations: np.ndarray
+    vehicle_steps: np.ndarray
+    # (n,) index into Direction, and VehiclePhase value
+    vehicle_directions: np.ndarray
+    vehicle_phases: np.ndarray
+    # (m, 2) origins of unassigned or waiting trips, destinations of riding trips
+    origins: np.ndarray
+    destinations: np.ndarray
+    # values of the plotted measures, in stats_measures order
+    measures: np.ndarray
+
+
+def record_block(sim, measures, state_dict):
+    """Record the current state of the simulation as a BlockState"""
+    vehicle_count = len(sim.vehicles)
+    locations = np.empty((vehicle_count, 2), dtype=np.int16)
+    steps = np.empty((vehicle_count, 2), dtype=np.int8)
+    directions = np.empty(vehicle_count, dtype=np.int8)
+    phases = np.empty(vehicle_count, dtype=np.int8)
+    for index, vehicle in enumerate(sim.vehicles):
+        locations[index] = vehicle.location
+        steps[index] = vehicle.direction.value
+        directions[index] = _DIRECTION_INDEX[vehicle.direction]
+        phases[index] = vehicle.phase.value
+    if not sim.idle_vehicles_moving:
+        steps[phases == VehiclePhase.P1.value] = 0
+    origins = [
+        trip.origin
+        for trip in sim.trips.values()
+        if trip.phase in (TripPhase.UNASSIGNED, TripPhase.WAITING)
+    ]
+    destinations = [
+        trip.destination
+        for trip in sim.trips.values()
+        if trip.phase == TripPhase.RIDING
+    ]
+    return BlockState(
+        block=state_dict["block"],
+        city_size=sim.city.city_size,
+        request_rate=sim.request_rate,
+        vehicle_locations=locations,
+        vehicle_steps=steps,
+        vehicle_directions=directions,
+        vehicle_phases=phases,
+        origins=np.array(origins, dtype=np.int16).reshape(-1, 2),
+        destinations=np.array(destinations, dtype=np.int16).reshape(-1, 2),
+        measures=np.array([state_dict[measure.name] for measure in measures]),
+    )
+
+
+class _MapRenderer:
+    """Draws map frames on an Agg figure, reusing its artists"""
+
+    def __init__(self, title, color_palette, display_fringe, measures):
+        self.title = title
+        self.display_fringe = display_fringe
+        self.figure = Figure(figsize=_FIGURE_SIZE[Animation.MAP], dpi=_DPI)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.subplots()
+        self.vehicle_scatters = [
+            self.ax.scatter([], [], marker=marker, alpha=0.8)
+            for marker in _VEHICLE_MARKERS
+        ]
+        self.origin_scatter = self.ax.scatter(
+            [], [], marker="o", color=color_palette[3], alpha=0.8
+        )
+        self.destination_scatter = self.ax.scatter(
+            [], [], marker="*", color=color_palette[4]
+        )
+        self.vehicle_colors = np.array(
+            [colors.to_rgba(color_palette[phase.value]) for phase in VehiclePhase]
+        )
+        self.city_size = None
+
+    def _layout(self, city_size):
+        roadwidth = _ROADWIDTH_BASE / city_size
+        limits = (-self.display_fringe, city_size - self.display_fringe)
+        self.ax.set_xlim(*limits)
+        self.ax.set_ylim(*limits)
+        self.ax.xaxis.set_major_locator(ticker.MultipleLocator(1))
+        self.ax.yaxis.set_major_locator(ticker.MultipleLocator(1))
+        self.ax.grid(True, which="major", axis="both", lw=roadwidth)
+        self.ax.set_xticklabels([])
+        self.ax.set_yticklabels([])
+        self.vehicle_sizes = np.array((20 * roadwidth, 30 * roadwidth, 30 * roadwidth))
+        self.origin_scatter.set_sizes([30 * roadwidth])
+        self.destination_scatter.set_sizes([40 * roadwidth])
+        self.city_size = city_size
+
+    def render(self, state, fraction):
+        if state.city_size != self.city_size:
+            self._layout(state.city_size)
+        self.ax.set_title(
+            self.title
+            or (
+                f"{state.city_size} blocks, "
+                f"{len(state.vehicle_phases)} vehicles, "
+                f"{state.request_rate:.02f} requests/block"
+            )
+        )
+        positions = (
+            state.vehicle_locations
+            + fraction * state.vehicle_steps
+            + self.display_fringe
+        ) % state.city_size - self.display_fringe
+        for index, scatter in enumerate(self.vehicle_scatters):
+            in_direction = state.vehicle_directions == index
+            phases = state.vehicle_phases[in_direction]
+            scatter.set_offsets(positions[in_direction])
+            scatter.set_sizes(self.vehicle_sizes[phases])
+            scatter.set_facecolors(self.vehicle_colors[phases])
+        self.origin_scatter.set_offsets(state.origins)
+        self.destination_scatter.set_offsets(state.destinations)
+        self.figure.canvas.draw()
+        return bytes(self.figure.canvas.buffer_rgba())
+
+
+class _StatsRenderer:
+    """Draws stats line-chart frames on an Agg figure, reusing its lines"""
+
+    def __init__(self, title, color_palette, display_fringe, measures):
+        self.title = title
+        self.figure = Figure(figsize=_FIGURE_SIZE[Animation.STATS], dpi=_DPI)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.subplots()
+        self.lines = []
+        for index, measure in enumerate(measures):
+            if measure.name.startswith("VEHICLE"):
+                linestyle = "solid"
+            else:
+                linestyle = "dashed"
+            self.lines.append(
+                self.ax.plot(
+                    [],
+                    [],
+                    color=color_palette[index],
+                    label=measure.value,
+                    lw=2,
+                    ls=linestyle,
+                    alpha=0.8,
+                )[0]
+            )
+        ymin, ymax = 0, 1
+        if Measure.VEHICLE_MEAN_SURPLUS in measures:
+            ymin, ymax = -0.25, 1.1
+        self.ax.set_ylim(bottom=ymin, top=ymax)
+        self.ax.set_ylabel("Fractional values")
+        self.ax.legend(loc="lower left")
+
+    def render(self, state, window):
+        """window is a (blocks, measures) array ending at this block"""
+        x_range = np.arange(state.block - len(window) + 1, state.block + 1)
+        for line, y_values in zip(self.lines, window.T):
+            line.set_data(x_range, y_values)
+        self.ax.set_xlim(x_range[0], max(x_range[-1], x_range[0] + 1))
+        self.ax.set_title(
+            self.title
+            or (
+                f"{state.city_size} blocks, "
+                f"{len(state.vehicle_phases)} vehicles, "
+                f"{state.request_rate:.02f} requests/block"
+            )
+        )
+        self.figure.canvas.draw()
+        return bytes(self.figure.canvas.buffer_rgba())
+
+
+# The renderer of each worker process, set up by _start_renderer
+_renderer = None
+
+
+def _start_renderer(animation, *args):
+    global _renderer
+    if animation == Animation.MAP:
+        _renderer = _MapRenderer(*args)
+    else:
+        _renderer = _StatsRenderer(*args)
+
+
+def _render_block(task):
+    """
+    Draw the frames of one block: a map block has one frame per
+    interpolation point, a stats block a single frame
+    """
+    state, frame_arguments = task
+    return [_renderer.render(state, argument) for argument in frame_arguments]
+
+
+def map_bounded(executor, function, arguments, window):
+    """
+    Like executor.map, but with at most window calls submitted and not yet
+    returned, so that the arguments are consumed only as results are used
+    """
+    pending = deque()
+    for argument in arguments:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(function, argument))
+    while pending:
+        yield pending.popleft().result()
+
+
+class VideoExportAnimation(RideHailAnimation):
+    """
+    Record the simulation, then render a map or stats video from the
+    records in animation_render_processes worker processes.
+    """
+
+    def __init__(self, sim):
+        super().__init__(sim)
+        self.render_processes = sim.config.animation_render_processes.value
+        self.imagemagick_dir = sim.config.imagemagick_dir.value
+        self.measures = stats_measures(sim)
+
+    def animate(self):
+        if self.sim.time_blocks <= 0:
+            raise ValueError("Exporting a video needs a fixed number of time_blocks")
+        start_time = time.time()
+        block_states = self.record()
+        logging.info(
+            f"Recorded {len(block_states)} blocks "
+            f"in {time.time() - start_time:.1f}s"
+        )
+        self.render(block_states)
+        return self.sim.results
+
+    def record(self):
+        """Run the simulation at full speed, keeping the state of each block"""
+        block_states = []
+
+        def record_state(state_dict, block):
+            if block < 0:
+                # The simulation restarted
+                block_states.clear()
+            else:
+                block_states.append(record_block(self.sim, self.measures, state_dict))
+
+        self.sim.animation_delay = 0
+        self.sim.results = SimulationRunner(self.sim).run(
+            display_callback=record_state
+        )
+        return block_states
+
+    def block_tasks(self, block_states):
+        """The argument of _render_block for each block, in order"""
+        if self.animation == Animation.MAP:
+            frames_per_block = self.interpolation_points + 1
+            fractions = [point / frames_per_block for point in range(frames_per_block)]
+            for state in block_states:
+                yield (state, fractions)
+        else:
+            measures = np.array([state.measures for state in block_states])
+            for index, state in enumerate(block_states):
+                lower_bound = max(index + 1 - CHART_X_RANGE, 0)
+                yield (state, [measures[lower_bound : index + 1]])
+
+    def render(self, block_states):
+        """Render the frames in worker processes and pipe them to ffmpeg"""
+        start_time = time.time()
+        width, height = (size * _DPI for size in _FIGURE_SIZE[self.animation])
+        ffmpeg = f"{self.imagemagick_dir}/ffmpeg" if self.imagemagick_dir else "ffmpeg"
+        command = [
+            ffmpeg,
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "rgba",
+            "-s",
+            f"{width}x{height}",
+            "-r",
+            str(FRAMES_PER_SECOND),
+            "-i",
+            "-",
+        ]
+        if self.animation_output_file.endswith("mp4"):
+            command += ["-vcodec", "libx264", "-pix_fmt", "yuv420p"]
+        command.append(self.animation_output_file)
+        print(f"Saving animation to {self.animation_output_file}...")
+        try:
+            encoder = subprocess.Popen(command, stdin=subprocess.PIPE)
+        except FileNotFoundError:
+            logging.error(f"Cannot export the animation: {ffmpeg} not found")
+            return
+        frame_count = 0
+        with ProcessPoolExecutor(
+            max_workers=self.render_processes,
+            initializer=_start_renderer,
+            initargs=(
+                self.animation,
+                self.title,
+                self.color_palette,
+                self.display_fringe,
+                self.measures,
+            ),
+        ) as executor:
+            for frames in map_bounded(
+                executor,
+                _render_block,
+                self.block_tasks(block_states),
+                BLOCKS_IN_FLIGHT_PER_PROCESS * self.render_processes,
+            ):
+                for frame in frames:
+                    encoder.stdin.write(frame)
+                frame_count += len(frames)
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            logging.error(f"ffmpeg exited with code {encoder.returncode}")
+        logging.info(
+            f"Rendered {frame_count} frames with {self.render_processes} "
+            f"processes in {time.time() - start_time:.1f}s"
+        )
@@ -16,9 +16,12 @@ Architecture:
 Usage:
     python run.py config.config -a web_map     # Map visualization
     python run.py config.config -a web_stats   # Statistics charts
+    python run.py config.config -a web_map -wne  # Simulate here, not in Pyodide
+
+With web_native_engine (-wne) the simulation runs in this process and the
+server streams its frames to the browser (see lab_server.py).
 """
 
-import http.server
 import socketserver
 import threading
 import webbrowser
@@ -32,19 +35,29 @@ from pathlib import Path
 from contextlib import closing
 
 from ridehail.animation.base import RideHailAnimation
+from ridehail.animation.lab_server import (
+    LabRequestHandler,
+    NativeLabSession,
+    load_lab_worker,
+)
 from ridehail.atom import Equilibration
 
 
-class ReusableTCPServer(socketserver.TCPServer):
+class ReusableTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
     """
-    TCP Server that allows immediate port reuse.
+    Threaded TCP Server that allows immediate port reuse.
 
     Sets SO_REUSEADDR socket option to allow binding to a port that is in
     TIME_WAIT state after a previous server instance closed. This prevents
     "Address already in use" errors when rapidly restarting the server.
+
+    Handles each request in its own thread, so the browser can fetch the
+    lab's files in parallel, and the long-lived event stream of the native
+    engine does not hold up the page's other requests.
     """
 
     allow_reuse_address = True
+    daemon_threads = True
 
 
 class WebBrowserAnimation(RideHailAnimation):
@@ -56,6 +69,8 @@ class WebBrowserAnimation(RideHailAnimation):
 
     Attributes:
         chart_type (str): "map" or "stats" - determines initial view
+        native_engine (bool): run the simulation here, not in Pyodide
+        session (NativeLabSession): the native engine, if native_engine
         port (int): HTTP server port (default 41967, with fallback if in use)
         server (TCPServer): HTTP server instance
         server_thread (Thread): Background thread running the server
@@ -78,6 +93,8 @@ class WebBrowserAnimation(RideHailAnimation):
         """
         super().__init__(sim)
         self.chart_type = chart_type
+        self.native_engine = sim.config.web_native_engine.value
+        self.session = None
         self.port = None
         self.server = None
         self.server_thread = None
@@ -117,9 +134,12 @@ class WebBrowserAnimation(RideHailAnimation):
                 print("=" * 70 + "\n", file=sys.stderr)
                 sys.exit(-1)
 
-        # Check if ridehail wheel exists in dist/
+        # Check if ridehail wheel exists in dist/. The native engine does not
+        # load Pyodide, so does not need it.
         wheel_dir = self.lab_dir / "dist"
-        if not wheel_dir.exists() or not list(wheel_dir.glob("ridehail-*.whl")):
+        if not self.native_engine and (
+            not wheel_dir.exists() or not list(wheel_dir.glob("ridehail-*.whl"))
+        ):
             import sys
             print("\n" + "=" * 70, file=sys.stderr)
             print(
@@ -254,8 +274,9 @@ class WebBrowserAnimation(RideHailAnimation):
         dynamically allocated port. The server runs in a daemon thread so it
         will be automatically terminated when the main program exits.
 
-        The server uses http.server.SimpleHTTPRequestHandler which serves
-        static files and automatically handles MIME types.
+        The server uses LabRequestHandler, which serves static files with
+        compression, validators and cache headers (see lab_server.py), and,
+        for the native engine, the engine's endpoints.
         """
         # Find available port
         self.port = self._find_free_port()
@@ -264,10 +285,15 @@ class WebBrowserAnimation(RideHailAnimation):
         original_dir = os.getcwd()
         os.chdir(self.lab_dir)
 
-        # Create request handler (will be instantiated for each request)
-        handler = http.server.SimpleHTTPRequestHandler
+        # Create request handler (will be instantiated for each request).
+        # A subclass for this server, so the settings below stay local to it.
+        if self.native_engine:
+            self.session = NativeLabSession(load_lab_worker(self.lab_dir))
+        handler = type(
+            "WebLabRequestHandler", (LabRequestHandler,), {"session": self.session}
+        )
 
-        # Suppress SimpleHTTPRequestHandler logging unless in verbose mode
+        # Suppress request logging unless in verbose mode
         if logging.getLogger().level > logging.INFO:
             handler.log_message = lambda *args, **kwargs: None
 
@@ -314,6 +340,8 @@ class WebBrowserAnimation(RideHailAnimation):
             f"?chartType={self.chart_type}"
             f"&autoLoad=cli_config.json"
         )
+        if self.native_engine:
+            url += "&engine=native"
 
         try:
             # Try to open in app mode (Chrome/Chromium)
@@ -382,7 +410,9 @@ class WebBrowserAnimation(RideHailAnimation):
         - Clean up resources on exit
 
         Note: The actual simulation execution happens in the browser via
-        Pyodide. This Python process just serves the static files.
+        Pyodide. This Python process just serves the static files, unless
+        native_engine is set, in which case the simulation runs here and the
+        browser only displays it.
 
         Returns:
             None: The web animation doesn't return simulation results as the
@@ -397,6 +427,8 @@ class WebBrowserAnimation(RideHailAnimation):
                 f"Loading configuration: {self.sim.config.config_file.value or 'default'}"
             )
             print(f"Visualization type: {self.chart_type}")
+            if self.native_engine:
+                print("Simulation engine: native (this process)")
             print()
 
             self.config_file = self._prepare_config()
@@ -426,7 +458,10 @@ class WebBrowserAnimation(RideHailAnimation):
             print(f"  ssh -L {self.port}:localhost:{self.port} user@host")
             print()
 
-            print("The simulation is running in your web browser.")
+            if self.native_engine:
+                print("The simulation is running here, displayed in your browser.")
+            else:
+                print("The simulation is running in your web browser.")
             print("Use the browser controls to interact with the simulation.")
             print()
             print("Press Ctrl+C to stop the server and exit...")
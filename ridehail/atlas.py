@@ -0,0 +1,377 @@
+"""
+A steady-state atlas of the presets: the result measures of each preset,
+simulated in advance over a grid of its main settings and shipped with the
+package, so that the steady state of a preset, or of a setting near it, can
+be estimated in milliseconds instead of simulated in minutes.
+
+An atlas covers one preset (see presets.py) in one regime:
+
+- "fixed_fleet": no equilibration. The axes are vehicle_count and
+  base_demand, the main sliders of the lab's Experiment tab.
+- "free_entry": price equilibration, in which the fleet size follows
+  vehicle earnings. The axes are price, platform_commission and
+  reservation_wage, the settings of the lab's What If tab.
+
+Each axis is sampled at multiples of the preset's value. Every other
+setting that shapes the steady state is fixed at the preset's value, and is
+stored with the table, so that estimate() only answers for configurations
+that an atlas describes: a table built before a preset changed no longer
+matches it, and is ignored until it is rebuilt. Between grid points the
+measures are interpolated linearly along each axis.
+
+All the runs of an atlas share a random number seed, so that neighbouring
+grid points differ by their settings more than by chance, and each run is
+long enough, and averaged over a long enough results window, to reach its
+steady state.
+
+The tables are built offline, and should be rebuilt when the presets or
+the model change:
+
+    python -m ridehail.atlas                         # every preset and regime
+    python -m ridehail.atlas town --regime free_entry
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from pathlib import Path
+
+import numpy as np
+
+from ridehail import __version__
+from ridehail.atom import Animation, Measure
+from ridehail.config import ConfigSnapshot
+from ridehail.presets import PRESET_NAMES, get_preset
+from ridehail.simulation import RideHailSimulation
+
+# Where the atlas tables are shipped, one .npz file per preset and regime
+ATLAS_DIR = Path(__file__).parent / "data" / "atlas"
+ATLAS_SEED = 20260101
+
+# Multiples of the preset's value at which each axis is sampled
+FIXED_FLEET_GRID = (0.25, 0.5, 0.75, 1.0, 1.5, 2.0)
+FREE_ENTRY_GRID = (0.5, 0.75, 1.0, 1.25, 1.5)
+
+REGIMES = {
+    "fixed_fleet": {
+        "settings": {"equilibration": "none"},
+        "axes": {
+            "vehicle_count": FIXED_FLEET_GRID,
+            "base_demand": FIXED_FLEET_GRID,
+        },
+    },
+    "free_entry": {
+        "settings": {"equilibration": "price"},
+        "axes": {
+            "price": FREE_ENTRY_GRID,
+            "platform_commission": FREE_ENTRY_GRID,
+            "reservation_wage": FREE_ENTRY_GRID,
+        },
+    },
+}
+REGIME_NAMES = list(REGIMES)
+
+# The time_blocks and results_window of each run. Small cities have few
+# vehicles, and fluctuate more, so they are averaged over more blocks.
+ATLAS_RUNS = {
+    "village": (3000, 1000),
+    "town": (1500, 750),
+    "city": (800, 400),
+}
+
+# The settings that shape the steady state. A configuration is covered by
+# an atlas only if it has the atlas's value for each of those that are not
+# its axes. Settings of the run itself (time_blocks, seeds, smoothing,
+# equilibration_interval) and of its display are left out.
+STEADY_STATE_PARAMETERS = (
+    "base_demand",
+    "base_fare",
+    "city_size",
+    "demand_elasticity",
+    "dispatch_method",
+    "equilibration",
+    "forward_dispatch_bias",
+    "idle_vehicles_moving",
+    "impulse_list",
+    "inhomogeneity",
+    "inhomogeneous_destinations",
+    "mean_trip_distance",
+    "mean_vehicle_speed",
+    "min_trip_distance",
+    "minutes_per_block",
+    "per_hour_opportunity_cost",
+    "per_km_ops_cost",
+    "per_km_price",
+    "per_minute_price",
+    "pickup_time",
+    "platform_commission",
+    "price",
+    "reservation_wage",
+    "trip_distance_distribution",
+    "use_advanced_dispatch",
+    "use_city_scale",
+    "vehicle_count",
+    "wait_fraction",
+)
+
+# The measures kept in an atlas: the simulation checks (SIM_...) describe a
+# run, not its steady state
+ATLAS_MEASURES = [
+    measure.name for measure in Measure if not measure.name.startswith("SIM_")
+]
+
+
+def _plain(value):
+    """A setting in a form that can be stored as JSON and compared"""
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _same(value, other):
+    if isinstance(value, (int, float)) and isinstance(other, (int, float)):
+        return math.isclose(value, other, rel_tol=1e-6, abs_tol=1e-9)
+    return value == other
+
+
+class SteadyStateAtlas:
+    """
+    The result measures of one preset in one regime, on a grid of settings.
+
+    axes maps each axis parameter to its increasing grid values, settings
+    holds the fixed value of every other steady-state parameter, and values
+    has one dimension for each axis and a last one for the measures.
+    """
+
+    def __init__(self, preset, regime, settings, axes, measures, values, build):
+        self.preset = preset
+        self.regime = regime
+        self.settings = settings
+        self.axes = {name: np.asarray(grid, dtype=float) for name, grid in axes.items()}
+        self.measures = list(measures)
+        self.values = np.asarray(values, dtype=float)
+        self.build = build
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            axis_names = [str(name) for name in data["axis_names"]]
+            return cls(
+                preset=str(data["preset"]),
+                regime=str(data["regime"]),
+                settings=json.loads(str(data["settings"])),
+                axes={
+                    name: data[f"axis_{index}"]
+                    for index, name in enumerate(axis_names)
+                },
+                measures=[str(name) for name in data["measures"]],
+                values=data["values"],
+                build=json.loads(str(data["build"])),
+            )
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        axes = {
+            f"axis_{index}": grid for index, grid in enumerate(self.axes.values())
+        }
+        # float32 is plenty for estimates, and halves the size of the table
+        np.savez_compressed(
+            path,
+            preset=np.array(self.preset),
+            regime=np.array(self.regime),
+            settings=np.array(json.dumps(self.settings)),
+            axis_names=np.array(list(self.axes)),
+            measures=np.array(self.measures),
+            values=self.values.astype(np.float32),
+            build=np.array(json.dumps(self.build)),
+            **axes,
+        )
+
+    def covers(self, params):
+        """
+        True if params (a mapping of config parameter names to values) has
+        this atlas's value for each fixed setting, and each axis value lies
+        within the grid.
+        """
+        for name, value in self.settings.items():
+            if name not in params or not _same(_plain(params[name]), value):
+                return False
+        for name, grid in self.axes.items():
+            value = params.get(name)
+            if not isinstance(value, (int, float)):
+                return False
+            if not grid[0] <= value <= grid[-1]:
+                return False
+        return True
+
+    def estimate(self, params):
+        """
+        The interpolated measures at params, as a dict of measure name to
+        value (None where a neighbouring run could not compute it), or None
+        if this atlas does not cover params.
+        """
+        if not self.covers(params):
+            return None
+        lower, fractions = [], []
+        for name, grid in self.axes.items():
+            index = int(np.searchsorted(grid, params[name], side="right")) - 1
+            index = min(max(index, 0), len(grid) - 2)
+            lower.append(index)
+            fractions.append(
+                (params[name] - grid[index]) / (grid[index + 1] - grid[index])
+            )
+        # Multilinear interpolation: a weighted sum over the corners of the
+        # grid cell that holds params
+        result = np.zeros(len(self.measures))
+        for corner in itertools.product((0, 1), repeat=len(lower)):
+            weight = 1.0
+            for offset, fraction in zip(corner, fractions):
+                weight *= fraction if offset else 1.0 - fraction
+            if weight > 0:
+                index = tuple(low + offset for low, offset in zip(lower, corner))
+                result += weight * self.values[index]
+        return {
+            name: None if np.isnan(value) else float(value)
+            for name, value in zip(self.measures, result)
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def load_atlases(directory=ATLAS_DIR):
+    """The atlases shipped with the package (or in directory), loaded once"""
+    return tuple(
+        SteadyStateAtlas.load(path) for path in sorted(Path(directory).glob("*.npz"))
+    )
+
+
+def estimate(params, directory=ATLAS_DIR):
+    """
+    Estimate the steady state of a configuration from the atlases.
+
+    Args:
+        params: A mapping of config parameter names to values, such as
+            RideHailConfig.as_dict() or ConfigSnapshot.as_dict().
+        directory: Where to find the atlases, if not in the package.
+
+    Returns:
+        A dict of Measure name to estimated value, or None if no atlas
+        covers the configuration.
+    """
+    for atlas in load_atlases(directory):
+        result = atlas.estimate(params)
+        if result is not None:
+            return result
+    return None
+
+
+def _axis_values(name, preset_value, grid):
+    values = [preset_value * multiple for multiple in grid]
+    if isinstance(preset_value, int):
+        values = [round(value) for value in values]
+    if any(low >= high for low, high in zip(values, values[1:])):
+        raise ValueError(f"Atlas axis {name} is not increasing: {values}")
+    return values
+
+
+def _run_point(config):
+    """Run one grid point in a worker process and return its result measures"""
+    results = RideHailSimulation(config).simulate()
+    return results.get_result_measures()
+
+
+def build_atlas(preset, regime, processes=None, seed=ATLAS_SEED):
+    """
+    Simulate every grid point of a preset in a regime, in a process pool,
+    and return the SteadyStateAtlas of their result measures.
+    """
+    time_blocks, results_window = ATLAS_RUNS[preset]
+    base = ConfigSnapshot.from_mapping(
+        {**get_preset(preset), **REGIMES[regime]["settings"]},
+        animation=Animation.NONE,
+        time_blocks=time_blocks,
+        results_window=results_window,
+        random_number_seed=seed,
+    )
+    axes = {
+        name: _axis_values(name, base[name], grid)
+        for name, grid in REGIMES[regime]["axes"].items()
+    }
+    configs = [
+        base.replace(**dict(zip(axes, point)))
+        for point in itertools.product(*axes.values())
+    ]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        point_measures = list(executor.map(_run_point, configs))
+    values = np.array(
+        [
+            [
+                value if isinstance(value, (int, float)) else np.nan
+                for value in (measures.get(name) for name in ATLAS_MEASURES)
+            ]
+            for measures in point_measures
+        ]
+    ).reshape([len(grid) for grid in axes.values()] + [len(ATLAS_MEASURES)])
+    settings = {
+        name: _plain(base[name])
+        for name in STEADY_STATE_PARAMETERS
+        if name not in axes
+    }
+    build = {
+        "version": __version__,
+        "time_blocks": time_blocks,
+        "results_window": results_window,
+        "random_number_seed": seed,
+    }
+    return SteadyStateAtlas(
+        preset, regime, settings, axes, ATLAS_MEASURES, values, build
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ridehail.atlas",
+        description="Build the steady-state atlas of the presets",
+    )
+    parser.add_argument(
+        "presets",
+        nargs="*",
+        metavar="PRESET",
+        help=f"presets to build ({'/'.join(PRESET_NAMES)}; default all)",
+    )
+    parser.add_argument(
+        "--regime",
+        choices=REGIME_NAMES,
+        action="append",
+        help="regimes to build (default all)",
+    )
+    parser.add_argument(
+        "--processes", type=int, default=None, help="worker processes (default all)"
+    )
+    parser.add_argument(
+        "--output-dir", type=Path, default=ATLAS_DIR, help="where to write the tables"
+    )
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.presets) - set(PRESET_NAMES))
+    if unknown:
+        parser.error(f"unknown preset: {', '.join(unknown)}")
+    for preset in args.presets or PRESET_NAMES:
+        for regime in args.regime or REGIME_NAMES:
+            start_time = time.time()
+            atlas = build_atlas(preset, regime, processes=args.processes)
+            path = args.output_dir / f"{preset}-{regime}.npz"
+            atlas.save(path)
+            print(
+                f"{preset}/{regime}: {atlas.values[..., 0].size} runs "
+                f"in {time.time() - start_time:.0f}s -> {path}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
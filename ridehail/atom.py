@@ -3,7 +3,8 @@
 A ridehail simulation is composed of vehicles and trips. These atoms
 are defined here.
 
-Also, some basic types like CircularBuffer
+Also, some basic types like CircularBuffer, the order-statistics structures
+SortedWindow and QuantileSketch, and RandomStreams
 """
 
 import math
@@ -82,6 +83,23 @@ class TripDistribution(enum.Enum):
     RAYLEIGH = "rayleigh"
 
 
+class SequenceDesign(enum.Enum):
+    """
+    The points at which a sequence simulates its swept parameters (see
+    design.py).
+
+    GRID: every combination of the values from each parameter's start to
+    its maximum, in steps of its increment.
+
+    LATIN_HYPERCUBE and SOBOL: sequence_points points spread over the box
+    from each parameter's start to its maximum.
+    """
+
+    GRID = "grid"
+    LATIN_HYPERCUBE = "latin_hypercube"
+    SOBOL = "sobol"
+
+
 class TripPhase(enum.Enum):
     INACTIVE = 0
     UNASSIGNED = 1
@@ -234,9 +252,12 @@ class Trip(Atom):
         trip_distance_distribution=TripDistribution.UNIFORM,
         per_km_price=None,
         per_min_price=None,
+        rng=None,
     ):
         self.index = i
         self.city = city
+        # Origins and destinations are drawn from the demand stream
+        self.rng = rng or city.rng
         if mean_trip_distance is None:
             mean_trip_distance = city.city_size // 2
         self.origin = self.set_origin()
@@ -250,13 +271,16 @@ class Trip(Atom):
         self.phase = TripPhase.INACTIVE
         self.per_km_price = per_km_price
         self.per_min_price = per_min_price
+        # The blocks spent in each phase, filled in as the trip leaves it,
+        # and the block at which it entered its current phase
         self.phase_time = {}
         for phase in list(TripPhase):
             self.phase_time[phase] = 0
+        self.phase_block = None
         self.forward_dispatch = False
 
     def set_origin(self):
-        return self.city.set_location(is_destination=False)
+        return self.city.set_location(is_destination=False, rng=self.rng)
 
     def set_destination(
         self,
@@ -278,10 +302,10 @@ class Trip(Atom):
         effective_max = min(2 * mean_trip_distance, self.city.city_size)
         while True:
             if effective_max >= self.city.city_size:
-                destination = self.city.set_location(is_destination=True)
+                destination = self.city.set_location(is_destination=True, rng=self.rng)
             else:
-                delta_x = random.randint(min_trip_distance, effective_max)
-                delta_y = random.randint(min_trip_distance, effective_max)
+                delta_x = self.rng.randint(min_trip_distance, effective_max)
+                delta_y = self.rng.randint(min_trip_distance, effective_max)
                 destination = [
                     int(
                         (origin[0] - effective_max / 2 + delta_x)
@@ -311,16 +335,16 @@ class Trip(Atom):
         half_city_size = self.city.city_size // 2
         while True:
             if distribution == TripDistribution.EXPONENTIAL:
-                distance = int(random.expovariate(1 / mean_trip_distance))
+                distance = int(self.rng.expovariate(1 / mean_trip_distance))
             elif distribution == TripDistribution.GAMMA:
                 # Gamma(k=2): r·exp(-r) shape; scale = mean/k
-                distance = int(random.gammavariate(2, mean_trip_distance / 2))
+                distance = int(self.rng.gammavariate(2, mean_trip_distance / 2))
             else:
                 # RAYLEIGH: sigma = mean / sqrt(pi/2); sample via two normals
                 sigma = mean_trip_distance / math.sqrt(math.pi / 2)
                 distance = int(
                     math.sqrt(
-                        random.gauss(0, sigma) ** 2 + random.gauss(0, sigma) ** 2
+                        self.rng.gauss(0, sigma) ** 2 + self.rng.gauss(0, sigma) ** 2
                     )
                 )
             if not (min_distance <= distance <= self.city.city_size):
@@ -329,15 +353,15 @@ class Trip(Atom):
             delta_x_high = min(distance, half_city_size)
             if delta_x_low > delta_x_high:
                 continue
-            delta_x = random.randint(delta_x_low, delta_x_high)
+            delta_x = self.rng.randint(delta_x_low, delta_x_high)
             delta_y = distance - delta_x
             destination = [
                 int(
-                    (origin[0] + random.choice((-1, 1)) * delta_x)
+                    (origin[0] + self.rng.choice((-1, 1)) * delta_x)
                     % self.city.city_size
                 ),
                 int(
-                    (origin[1] + random.choice((-1, 1)) * delta_y)
+                    (origin[1] + self.rng.choice((-1, 1)) * delta_y)
                     % self.city.city_size
                 ),
             ]
@@ -377,17 +401,22 @@ class Vehicle(Atom):
         "Vehicle",
     ]
 
-    def __init__(self, i, city, idle_vehicles_moving=0.0, location=[0, 0]):
+    def __init__(
+        self, i, city, idle_vehicles_moving=0.0, location=[0, 0], rng=random
+    ):
         """
         Create a vehicle at a random location.
         Grid has edge self.city.city_size, in blocks spaced 1 apart
         The location is always expressed in blocks
+        rng is the movement stream: it places the vehicle and drives its
+        idle wandering and turns.
         """
         self.index = i
         self.city = city
         self.idle_vehicles_moving = idle_vehicles_moving
-        self.location = self.city.set_location()
-        self.direction = random.choice(list(Direction))
+        self.rng = rng
+        self.location = self.city.set_location(rng=rng)
+        self.direction = rng.choice(list(Direction))
         self.phase = VehiclePhase.P1
         self.trip_index = None
         self.pickup_location = []
@@ -402,6 +431,13 @@ class Vehicle(Atom):
         self.utilization["total"] = 0
         self.forward_dispatches = 0
         self.pickup_countdown = None
+        # Used only by event-driven simulations: the block at which
+        # self.location was last brought up to date, the block at which the
+        # vehicle's next scheduled event is due, and a counter that
+        # invalidates any earlier event scheduled for it
+        self.located_block = None
+        self.event_block = None
+        self.event_token = 0
 
     def assign_forward_dispatch_trip(self, forward_dispatch_trip):
         # Vehicle has been forward-dispatched to a trip, meaning it is still
@@ -466,7 +502,7 @@ class Vehicle(Atom):
         elif self.phase == VehiclePhase.P3:
             new_direction = self._navigate_towards(self.location, self.dropoff_location)
         elif self.phase == VehiclePhase.P1:
-            new_direction = random.choice(list(Direction))
+            new_direction = self.rng.choice(list(Direction))
             # No u turns: is_opposite is -1 for opposite,
             # in which case keep on going
             is_opposite = 0
@@ -476,7 +512,7 @@ class Vehicle(Atom):
                 for i in [0, 1]:
                     is_opposite += new_direction.value[i] * self.direction.value[i]
             if is_opposite == -1:
-                new_direction = random.choice(list(Direction))
+                new_direction = self.rng.choice(list(Direction))
         if not new_direction:
             # arrived at destination (pickup or dropoff)
             new_direction = original_direction
@@ -487,7 +523,7 @@ class Vehicle(Atom):
         Update the vehicle's location. Continue driving in the same direction
         """
         old_location = self.location.copy()
-        if self.phase == VehiclePhase.P1 and random.random() >= self.idle_vehicles_moving:
+        if self.phase == VehiclePhase.P1 and self.rng.random() >= self.idle_vehicles_moving:
             # this vehicle is stationary this block
             pass
         elif self.phase == VehiclePhase.P2 and self.location == self.pickup_location:
@@ -534,12 +570,84 @@ class Vehicle(Atom):
         else:
             candidate_direction.append(Direction.NORTH)
         if len(candidate_direction) > 0:
-            direction = random.choice(candidate_direction)
+            direction = self.rng.choice(candidate_direction)
         else:
             direction = None
         return direction
 
 
+class VehicleRegistry:
+    """
+    The fleet: vehicles keyed by a stable id (vehicle.index) and kept in a
+    dense list for iteration.
+    - Adding a vehicle appends it; removing one moves the last vehicle into
+      its place. Both are O(1), and neither rebuilds the list.
+    - Ids are never reused, so a stale id finds no vehicle rather than the
+      wrong one.
+    - Iteration order is the dense order, which changes when vehicles are
+      removed.
+    """
+
+    def __init__(self, vehicles=()):
+        self._vehicles = []
+        self._position = {}
+        self.next_index = 0
+        for vehicle in vehicles:
+            self.add(vehicle)
+
+    def __len__(self):
+        return len(self._vehicles)
+
+    def __iter__(self):
+        return iter(self._vehicles)
+
+    def __getitem__(self, index):
+        """The vehicle with id index (KeyError if there is none)"""
+        return self._vehicles[self._position[index]]
+
+    def __contains__(self, vehicle):
+        return self._position.get(vehicle.index) is not None and (
+            self[vehicle.index] is vehicle
+        )
+
+    def get(self, index, default=None):
+        position = self._position.get(index)
+        return default if position is None else self._vehicles[position]
+
+    def add(self, vehicle):
+        """Add a vehicle whose index is not already in use"""
+        if vehicle.index in self._position:
+            raise ValueError(f"vehicle id {vehicle.index} is already in use")
+        self._position[vehicle.index] = len(self._vehicles)
+        self._vehicles.append(vehicle)
+        self.next_index = max(self.next_index, vehicle.index + 1)
+
+    def remove(self, vehicle):
+        """Remove a vehicle, filling its place with the last vehicle"""
+        position = self._position.pop(vehicle.index)
+        last = self._vehicles.pop()
+        if last is not vehicle:
+            self._vehicles[position] = last
+            self._position[last.index] = position
+
+    def remove_idle(self, count):
+        """
+        Remove up to count P1 (idle) vehicles, from the end of the dense order.
+        Returns the ids of the vehicles removed.
+        """
+        removed = []
+        position = len(self._vehicles) - 1
+        while len(removed) < count and position >= 0:
+            # Vehicles after position have been checked, so the last vehicle
+            # that fills a removed place need not be checked again
+            vehicle = self._vehicles[position]
+            if vehicle.phase == VehiclePhase.P1:
+                self.remove(vehicle)
+                removed.append(vehicle.index)
+            position -= 1
+        return removed
+
+
 class City:
     """
     Location-specific stuff
@@ -552,26 +660,36 @@ class City:
     MINUTES_PER_HOUR = 60.0
     HOURS_PER_MINUTE = 1.0 / 60.0
 
-    def __init__(self, city_size, inhomogeneity=0.0, inhomogeneous_destinations=False):
+    def __init__(
+        self,
+        city_size,
+        inhomogeneity=0.0,
+        inhomogeneous_destinations=False,
+        rng=random,
+    ):
         self.city_size = city_size
+        # The demand stream, used for trip origins and destinations
+        self.rng = rng
         self.inhomogeneity = inhomogeneity
         self.inhomogeneous_destinations = inhomogeneous_destinations
         self.two_zone_size = int(self.city_size * self.TWO_ZONE_LENGTH)
 
-    def set_location(self, is_destination=False):
+    def set_location(self, is_destination=False, rng=None):
         """
-        Set a location in the city for the beginning or end of a trip
+        Set a location in the city for the beginning or end of a trip,
+        drawn from rng (by default, the city's demand stream)
         """
+        rng = rng or self.rng
         location = [None, None]
         for i in [0, 1]:
-            location[i] = random.randint(0, self.city_size - 1)
+            location[i] = rng.randint(0, self.city_size - 1)
         if self.inhomogeneity > 0.0:
-            two_zone_selector = random.random()
+            two_zone_selector = rng.random()
             if two_zone_selector < self.inhomogeneity:
                 if not is_destination or self.inhomogeneous_destinations:
                     # Set some trip locations inside the city core.
                     for i in [0, 1]:
-                        location[i] = random.randrange(
+                        location[i] = rng.randrange(
                             int((self.city_size - self.two_zone_size) / 2.0),
                             int((self.city_size + self.two_zone_size) / 2.0),
                         )
@@ -662,6 +780,10 @@ class CircularBuffer:
         # the buffer is still filling (push() fills _rec_queue contiguously
         # from index 0, so the real values are always _rec_queue[:_count]).
         self._count: int = 0
+        # Order statistics of the window: built on the first call to
+        # quantile() or median(), then kept up to date by push(), so only
+        # buffers whose medians are used pay for them.
+        self._order_statistics = None
 
     def _enqueue(self, new_data: np.array) -> None:
         # move tail pointer forward then insert at the tail of the queue
@@ -684,18 +806,37 @@ class CircularBuffer:
         self._enqueue(new_data)
         tail = self._get_tail()
         self.sum += tail - head
+        if self._order_statistics is not None:
+            if self._count == self._max_length:
+                self._order_statistics.remove(float(head))
+            self._order_statistics.add(float(tail))
         self._count = min(self._count + 1, self._max_length)
 
-    def median(self) -> float:
+    def quantile(self, q: float) -> float:
         """
-        Median of the values currently in the window. Returns 0.0 if
-        nothing has been pushed yet, matching .sum's default-zero behavior.
+        The q quantile (0 <= q <= 1) of the values currently in the window,
+        interpolated as numpy.quantile does. Returns 0.0 if nothing has
+        been pushed yet, matching .sum's default-zero behavior.
+
+        Windows of SKETCH_MIN_WINDOW or more values use a QuantileSketch,
+        which is approximate; smaller windows use an exact SortedWindow.
         """
         if self._count == 0:
             return 0.0
-        if self._count < self._max_length:
-            return float(np.median(self._rec_queue[: self._count]))
-        return float(np.median(self._rec_queue))
+        if self._order_statistics is None:
+            values = self._rec_queue[: self._count].tolist()
+            if self._max_length >= SKETCH_MIN_WINDOW:
+                self._order_statistics = QuantileSketch(values)
+            else:
+                self._order_statistics = SortedWindow(values)
+        return self._order_statistics.quantile(q)
+
+    def median(self) -> float:
+        """
+        Median of the values currently in the window. Returns 0.0 if
+        nothing has been pushed yet.
+        """
+        return self.quantile(0.5)
 
     def __repr__(self):
         return "tail: " + str(self._queue_tail) + "\narray: " + str(self._rec_queue)
@@ -703,3 +844,310 @@ class CircularBuffer:
     def __str__(self):
         return "tail: " + str(self._queue_tail) + "\narray: " + str(self._rec_queue)
         # return str(self.to_array())
+
+
+# Windows at least this long keep approximate order statistics in a
+# QuantileSketch rather than exact ones in a SortedWindow
+SKETCH_MIN_WINDOW = 50000
+
+
+class _SkipNode:
+    __slots__ = ("value", "next", "width")
+
+    def __init__(self, value, levels):
+        self.value = value
+        self.next = [None] * levels
+        # The number of level-0 steps to the next node at each level
+        self.width = [1] * levels
+
+
+class SortedWindow:
+    """
+    A multiset of numbers in sorted order, for exact order statistics over a
+    sliding window.
+
+    The values are held in an indexable skip list (Pugh, 1990): a sorted
+    linked list in which each node also links forward at a random number
+    of higher levels, and each link records how many values it skips.
+    add(), remove() and quantile() each descend the levels from the top, so
+    they take O(log n) steps on average, however large the window. The
+    levels are drawn from the window's own random number generator, so
+    keeping a window never disturbs a simulation's random streams.
+    """
+
+    _SEED = 0
+
+    def __init__(self, values=()):
+        self._rng = random.Random(self._SEED)
+        self._levels = 1
+        self._end = _SkipNode(math.inf, 0)
+        self._head = _SkipNode(None, self._levels)
+        self._head.next = [self._end]
+        self._len = 0
+        for value in sorted(values):
+            self.add(value)
+
+    def __len__(self):
+        return self._len
+
+    def _predecessors(self, value, strict):
+        """
+        The last node before value at each level (before the first equal
+        value if strict, after the last one otherwise), and the position of
+        each, counted in level-0 steps from the head
+        """
+        chain = [None] * self._levels
+        positions = [0] * self._levels
+        node, position = self._head, 0
+        for level in reversed(range(self._levels)):
+            following = node.next[level]
+            while following is not self._end and (
+                following.value < value if strict else following.value <= value
+            ):
+                position += node.width[level]
+                node = following
+                following = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def add(self, value):
+        if self._len + 1 >= 1 << self._levels:
+            # One more level for each doubling keeps the descent O(log n)
+            self._head.next.append(self._end)
+            self._head.width.append(self._len + 1)
+            self._levels += 1
+        chain, positions = self._predecessors(value, strict=False)
+        levels = 1
+        while levels < self._levels and self._rng.random() < 0.5:
+            levels += 1
+        node = _SkipNode(value, levels)
+        position = positions[0] + 1
+        for level in range(self._levels):
+            previous = chain[level]
+            if level < levels:
+                node.next[level] = previous.next[level]
+                previous.next[level] = node
+                # The node's successor is one step further on than it was
+                following = positions[level] + previous.width[level] + 1
+                node.width[level] = following - position
+                previous.width[level] = position - positions[level]
+            else:
+                previous.width[level] += 1
+        self._len += 1
+
+    def remove(self, value):
+        """Remove one occurrence of value; raise ValueError if there is none"""
+        chain, _ = self._predecessors(value, strict=True)
+        node = chain[0].next[0]
+        if node is self._end or node.value != value:
+            raise ValueError(f"{value} is not in the window")
+        for level in range(self._levels):
+            previous = chain[level]
+            if level < len(node.next):
+                previous.width[level] += node.width[level] - 1
+                previous.next[level] = node.next[level]
+            else:
+                previous.width[level] -= 1
+        self._len -= 1
+
+    def _value_at(self, position):
+        if not 0 <= position < self._len:
+            raise IndexError("position out of range")
+        # Positions are counted in level-0 steps from the head
+        remaining = position + 1
+        node = self._head
+        for level in reversed(range(self._levels)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def quantile(self, q):
+        """The q quantile, interpolated linearly as in numpy.quantile"""
+        if self._len == 0:
+            return 0.0
+        position = q * (self._len - 1)
+        lower = int(position)
+        fraction = position - lower
+        value = self._value_at(lower)
+        if fraction > 0:
+            value += (self._value_at(lower + 1) - value) * fraction
+        return float(value)
+
+    def median(self):
+        return self.quantile(0.5)
+
+
+class _KeyCounts:
+    """
+    Counts by integer key, in a Fenwick (binary indexed) tree over a range
+    of keys that doubles when a key falls outside it. change() and find()
+    are O(log K) for a range of K keys.
+    """
+
+    def __init__(self):
+        self._low = 0
+        self._tree = [0]
+        self._counts = {}
+        self.total = 0
+
+    def change(self, key, change):
+        count = self._counts.get(key, 0) + change
+        if count < 0:
+            raise ValueError(f"no count at key {key}")
+        if count:
+            self._counts[key] = count
+        else:
+            del self._counts[key]
+        self.total += change
+        if not self._low <= key < self._low + len(self._tree) - 1:
+            self._rebuild(key)
+            return
+        index = key - self._low + 1
+        while index < len(self._tree):
+            self._tree[index] += change
+            index += index & -index
+
+    def _rebuild(self, key):
+        """Widen the range to hold key and recount: O(K), amortized away"""
+        low = min(self._low, key)
+        size = max(len(self._tree) - 1, 1)
+        while key >= low + size or self._low + len(self._tree) - 1 > low + size:
+            size *= 2
+        self._low = low
+        self._tree = [0] * (size + 1)
+        for counted_key, count in self._counts.items():
+            index = counted_key - low + 1
+            while index <= size:
+                self._tree[index] += count
+                index += index & -index
+
+    def find(self, rank):
+        """The smallest key whose cumulative count exceeds rank"""
+        index = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            following = index + step
+            if following < len(self._tree) and self._tree[following] <= rank:
+                index = following
+                rank -= self._tree[following]
+            step >>= 1
+        return self._low + index
+
+
+class QuantileSketch:
+    """
+    A streaming quantile sketch for very large windows, after DDSketch
+    (Masson, Rim and Lee, 2019). Each value is counted in a logarithmic
+    bucket, so quantile() is within a factor of (1 +/- relative_accuracy) of
+    the exact value, and memory grows with the logarithm of the range of
+    values rather than with the window. Because the sketch is a set of
+    counts, remove() simply decrements one, which is what a sliding window
+    needs. The counts are kept in Fenwick trees, so add(), remove() and
+    quantile() are O(log K) for K buckets.
+    """
+
+    def __init__(self, values=(), relative_accuracy=0.01):
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._gamma = gamma
+        self._log_gamma = math.log(gamma)
+        # Counts by bucket key for positive values, and by minus the key for
+        # the magnitudes of negative values, so that both run in the order
+        # of the values
+        self._positive = _KeyCounts()
+        self._negative = _KeyCounts()
+        self._zero_count = 0
+        for value in values:
+            self.add(value)
+
+    def __len__(self):
+        return self._negative.total + self._zero_count + self._positive.total
+
+    def _key(self, magnitude):
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _estimate(self, key):
+        # The value whose relative error is smallest over the bucket
+        return 2 * self._gamma**key / (self._gamma + 1)
+
+    def _change_count(self, value, change):
+        try:
+            if value > 0:
+                self._positive.change(self._key(value), change)
+            elif value < 0:
+                self._negative.change(-self._key(-value), change)
+            elif self._zero_count + change < 0:
+                raise ValueError
+            else:
+                self._zero_count += change
+        except ValueError:
+            raise ValueError(f"{value} is not in the sketch") from None
+
+    def add(self, value):
+        self._change_count(value, 1)
+
+    def remove(self, value):
+        self._change_count(value, -1)
+
+    def quantile(self, q):
+        if len(self) == 0:
+            return 0.0
+        rank = int(q * (len(self) - 1))
+        if rank < self._negative.total:
+            return -self._estimate(-self._negative.find(rank))
+        rank -= self._negative.total
+        if rank < self._zero_count:
+            return 0.0
+        return self._estimate(self._positive.find(rank - self._zero_count))
+
+    def median(self):
+        return self.quantile(0.5)
+
+
+class RandomStreams:
+    """
+    Independent, named random number streams for the parts of a simulation:
+    - demand: trip origins and destinations
+    - movement: vehicle placement, idle wandering and turns
+    - dispatch: the order in which requests and vehicles are considered,
+      and tie-breaking between equally close vehicles
+
+    The streams are spawned from one seed with numpy's SeedSequence, so
+    they are statistically independent. Two simulations with the same seed
+    see the same trip requests, even if (say) their vehicle counts differ
+    and so consume the movement and dispatch streams at different rates.
+    This gives common random numbers for comparing configurations.
+
+    The streams are random.Random instances, which are fastest for the
+    scalar draws of the object engine; numpy_generators() gives numpy
+    Generators spawned from the same seed for array code.
+    """
+
+    NAMES = ("demand", "movement", "dispatch")
+
+    def __init__(self, seed=None):
+        for name in self.NAMES:
+            setattr(self, name, random.Random())
+        self.seed(seed)
+
+    @classmethod
+    def _seed_sequences(cls, seed):
+        # A seed of None or 0 (no seed) draws fresh entropy
+        return np.random.SeedSequence(seed or None).spawn(len(cls.NAMES))
+
+    def seed(self, seed=None):
+        """
+        Reseed every stream in place, so that objects holding a stream
+        keep using it
+        """
+        for name, seed_sequence in zip(self.NAMES, self._seed_sequences(seed)):
+            getattr(self, name).seed(int(seed_sequence.generate_state(1)[0]))
+
+    @classmethod
+    def numpy_generators(cls, seed=None):
+        """A dict of numpy Generators, one for each named stream"""
+        return {
+            name: np.random.default_rng(seed_sequence)
+            for name, seed_sequence in zip(cls.NAMES, cls._seed_sequences(seed))
+        }
@@ -0,0 +1,579 @@
+"""
+A batched simulation engine: R replicas of one configuration advanced
+together, block by block.
+
+RideHailSimulation spends most of each block in per-vehicle and per-trip
+Python code, a cost that is roughly constant per object whatever the city
+size. For the small cities that are swept most often (the village and town
+presets), that interpreter overhead dominates, and running replicates one at
+a time multiplies it. BatchedSimulation instead holds every vehicle, trip and
+history quantity in numpy arrays with a leading replica axis, so that moving,
+dispatching and summing over all replicas costs a handful of array operations
+per block.
+
+The batched engine follows the same block sequence as
+RideHailSimulation.next_block, with its own random number stream, so its
+results agree with the object engine statistically rather than draw for draw.
+It supports the common case only: a fixed fleet (no equilibration), default
+dispatch, uniform trip distances and no impulses. Use
+batch_unsupported_reason() to check a configuration first.
+"""
+
+from collections import deque
+
+import numpy as np
+
+from ridehail.atom import (
+    Direction,
+    DispatchMethod,
+    Equilibration,
+    History,
+    Measure,
+    RandomStreams,
+    SortedWindow,
+    TripDistribution,
+    TripPhase,
+    VehiclePhase,
+)
+from ridehail.convergence import DEFAULT_CONVERGENCE_METRICS
+from ridehail.results import RideHailSimulationResults
+
+# Direction steps, indexed in Direction order (NORTH, EAST, SOUTH, WEST):
+# the opposite of direction d is (d + 2) % 4.
+_STEPS = np.array([direction.value for direction in Direction])
+_NORTH, _EAST, _SOUTH, _WEST = range(4)
+_HISTORY_INDEX = {stat: index for index, stat in enumerate(History)}
+_P1, _P2, _P3 = (phase.value for phase in VehiclePhase)
+_INACTIVE = TripPhase.INACTIVE.value
+_UNASSIGNED = TripPhase.UNASSIGNED.value
+_WAITING = TripPhase.WAITING.value
+_RIDING = TripPhase.RIDING.value
+_COMPLETED = TripPhase.COMPLETED.value
+
+
+def batch_unsupported_reason(config):
+    """
+    Return None if the batched engine can run this configuration, or a
+    short description of the setting that it does not support.
+    """
+    if config.equilibration.value != Equilibration.NONE:
+        return "equilibration"
+    if config.dispatch_method.value != DispatchMethod.DEFAULT:
+        return f"dispatch method {config.dispatch_method.value.value}"
+    if config.trip_distance_distribution.value != TripDistribution.UNIFORM:
+        return (
+            f"trip distance distribution {config.trip_distance_distribution.value.value}"
+        )
+    if config.impulse_list.value:
+        return "impulses"
+    if not config.time_blocks.value or config.time_blocks.value <= 0:
+        return "an unlimited number of time_blocks"
+    return None
+
+
+class _WindowView:
+    """
+    The CircularBuffer interface (sum and median) over one replica's row of
+    a batched history window
+    """
+
+    def __init__(self, values):
+        self._values = values
+
+    @property
+    def sum(self):
+        return float(self._values.sum())
+
+    def median(self):
+        if len(self._values) == 0:
+            return 0.0
+        return float(np.median(self._values))
+
+
+class _ReplicaView:
+    """
+    One replica of a BatchedSimulation, presented with the attributes that
+    RideHailSimulationResults reads from a RideHailSimulation. Settings that
+    are shared by all replicas come from the batch's template simulation.
+    """
+
+    def __init__(self, batch, replica):
+        self._template = batch.sim
+        self.block_index = batch.block_index
+        filled = min(batch.block_index, batch.results_window)
+        self.history_results = {
+            stat: _WindowView(batch.history_results[replica, index, :filled])
+            for stat, index in _HISTORY_INDEX.items()
+        }
+        self.trip_completion_history = [
+            (block, wait_time, distance)
+            for block, wait_times, distances in batch.trip_completion_history[replica]
+            for wait_time, distance in zip(wait_times.tolist(), distances.tolist())
+        ]
+        self.trip_wait_time_window = SortedWindow(
+            wait_time for _, wait_time, _ in self.trip_completion_history
+        )
+        self.trip_distance_window = SortedWindow(
+            distance for _, _, distance in self.trip_completion_history
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+
+class BatchedSimulation:
+    """
+    Simulate R replicas of a ridehail configuration at once.
+
+    The state of each replica lives in row r of every array:
+    - vehicle arrays have shape (R, vehicle_count), and locations
+      (R, vehicle_count, 2)
+    - trip arrays have shape (R, trip_capacity); a slot whose phase is
+      INACTIVE is free, and is reused by the next trip request
+    - the results window of each History item has shape
+      (R, len(History), results_window), filled as a ring
+
+    Random numbers come from numpy Generators for the named streams of
+    RandomStreams (demand, movement and dispatch), seeded with the list of
+    replica seeds, so a batch is reproducible from its seeds and batches of
+    different configurations with the same seeds see the same trip requests.
+    """
+
+    def __init__(self, config, seeds):
+        reason = batch_unsupported_reason(config)
+        if reason:
+            raise ValueError(f"The batched engine does not support {reason}")
+        # Imported here to avoid a circular import: simulation imports
+        # results, which this module also needs at import time.
+        from ridehail.simulation import RideHailSimulation
+
+        # A template simulation validates the configuration and converts
+        # units exactly as a single run would. Its settings are shared by
+        # all replicas; its vehicles and trips are not used.
+        self.sim = RideHailSimulation(config)
+        self.seeds = list(seeds)
+        self.replicas = len(self.seeds)
+        streams = RandomStreams.numpy_generators(self.seeds)
+        self.demand_rng = streams["demand"]
+        self.movement_rng = streams["movement"]
+        self.dispatch_rng = streams["dispatch"]
+        self.city_size = self.sim.city_size
+        self.vehicle_count = self.sim.vehicle_count
+        self.request_rate = self.sim.request_rate
+        self.results_window = self.sim.results_window
+        self.smoothing_window = self.sim.smoothing_window
+        self.block_index = 0
+        self._request_capital = 0.0
+        shape = (self.replicas, self.vehicle_count)
+        self.vehicle_location = self._locations(shape, rng=self.movement_rng)
+        self.vehicle_direction = self.movement_rng.integers(0, 4, shape)
+        self.vehicle_phase = np.full(shape, _P1, dtype=np.int8)
+        self.vehicle_trip = np.full(shape, -1)
+        self.vehicle_pickup = np.zeros(shape + (2,), dtype=np.int64)
+        self.vehicle_dropoff = np.zeros(shape + (2,), dtype=np.int64)
+        self.vehicle_countdown = np.full(shape, -1)
+        self._allocate_trips(max(16, 4 * int(self.request_rate + 1)))
+        self.history_results = np.zeros(
+            (self.replicas, len(History), self.results_window)
+        )
+        # The last smoothing_window blocks of History values, and of the
+        # convergence metrics computed over them, each filled as a ring, as
+        # the object engine's history_buffer and ConvergenceTracker hold them
+        self.history_smoothing = np.zeros(
+            (self.replicas, len(History), self.smoothing_window)
+        )
+        self.convergence_measures = np.zeros(
+            (self.replicas, len(DEFAULT_CONVERGENCE_METRICS), self.smoothing_window)
+        )
+        self.rms_residual_max = np.zeros(self.replicas)
+        # Per replica: (block, wait_times, distances) for each block's
+        # completed trips, pruned to the last results_window blocks
+        self.trip_completion_history = [deque() for _ in range(self.replicas)]
+
+    def simulate(self):
+        """
+        Run time_blocks blocks and return a RideHailSimulationResults for
+        each replica. Their get_end_state() gives the R end_states.
+        """
+        for block in range(self.sim.time_blocks):
+            self.next_block(block)
+        return self.results()
+
+    def results(self):
+        return [
+            RideHailSimulationResults(_ReplicaView(self, replica))
+            for replica in range(self.replicas)
+        ]
+
+    def next_block(self, block):
+        """Advance every replica by one block"""
+        # Trips completed in the previous block become inactive, freeing
+        # their slots
+        self.trip_phase[self.trip_phase == _COMPLETED] = _INACTIVE
+        self._move_vehicles()
+        self._update_phases()
+        self._request_trips()
+        self._dispatch_vehicles()
+        self._update_directions()
+        self._update_history(block)
+        self.block_index = block + 1
+
+    def _allocate_trips(self, capacity):
+        shape = (self.replicas, capacity)
+        self.trip_phase = np.full(shape, _INACTIVE, dtype=np.int8)
+        self.trip_origin = np.zeros(shape + (2,), dtype=np.int64)
+        self.trip_destination = np.zeros(shape + (2,), dtype=np.int64)
+        self.trip_distance = np.zeros(shape, dtype=np.int64)
+        self.trip_unassigned_time = np.zeros(shape, dtype=np.int64)
+        self.trip_waiting_time = np.zeros(shape, dtype=np.int64)
+
+    def _grow_trips(self, capacity):
+        """Enlarge the trip arrays, keeping the existing trips in place"""
+        old_arrays = (
+            self.trip_phase,
+            self.trip_origin,
+            self.trip_destination,
+            self.trip_distance,
+            self.trip_unassigned_time,
+            self.trip_waiting_time,
+        )
+        old_capacity = self.trip_phase.shape[1]
+        self._allocate_trips(capacity)
+        new_arrays = (
+            self.trip_phase,
+            self.trip_origin,
+            self.trip_destination,
+            self.trip_distance,
+            self.trip_unassigned_time,
+            self.trip_waiting_time,
+        )
+        for old, new in zip(old_arrays, new_arrays):
+            new[:, :old_capacity] = old
+
+    def _locations(self, shape, is_destination=False, rng=None):
+        """
+        Random locations with the given leading shape, matching
+        City.set_location: uniform, except that a fraction inhomogeneity of
+        origins (and of destinations, if inhomogeneous_destinations) fall in
+        the city core. They are drawn from rng, by default the demand stream.
+        """
+        rng = rng or self.demand_rng
+        city_size = self.city_size
+        locations = rng.integers(0, city_size, shape + (2,))
+        inhomogeneity = self.sim.inhomogeneity
+        if inhomogeneity > 0.0 and (
+            not is_destination or self.sim.inhomogeneous_destinations
+        ):
+            in_core = rng.random(shape) < inhomogeneity
+            two_zone_size = self.sim.city.two_zone_size
+            locations[in_core] = rng.integers(
+                int((city_size - two_zone_size) / 2.0),
+                int((city_size + two_zone_size) / 2.0),
+                (int(in_core.sum()), 2),
+            )
+        return locations
+
+    def _distance(self, location_0, location_1):
+        """Manhattan distance on the torus, as in City.distance"""
+        components = np.abs(location_0 - location_1)
+        return np.minimum(components, self.city_size - components).sum(axis=-1)
+
+    def _move_vehicles(self):
+        phase = self.vehicle_phase
+        idle = (phase == _P1) & (
+            self.movement_rng.random(phase.shape) >= self.sim.idle_vehicles_moving
+        )
+        at_pickup = (phase == _P2) & (
+            self.vehicle_location == self.vehicle_pickup
+        ).all(axis=2)
+        moving = ~(idle | at_pickup)
+        moved = (self.vehicle_location + _STEPS[self.vehicle_direction]) % (
+            self.city_size
+        )
+        self.vehicle_location = np.where(
+            moving[..., np.newaxis], moved, self.vehicle_location
+        )
+
+    def _update_phases(self):
+        """Pick up riders at their origins, and drop them at their destinations"""
+        phase = self.vehicle_phase
+        countdown = self.vehicle_countdown
+        at_pickup = (phase == _P2) & (
+            self.vehicle_location == self.vehicle_pickup
+        ).all(axis=2)
+        at_dropoff = (phase == _P3) & (
+            self.vehicle_location == self.vehicle_dropoff
+        ).all(axis=2)
+        arriving = at_pickup & (countdown < 0)
+        if self.sim.pickup_time > 0:
+            counting = at_pickup & (countdown > 0)
+            countdown[arriving] = self.sim.pickup_time
+            countdown[counting] -= 1
+            picked_up = counting & (countdown == 0)
+        else:
+            picked_up = arriving
+        replicas, vehicles = np.nonzero(picked_up)
+        phase[replicas, vehicles] = _P3
+        countdown[replicas, vehicles] = -1
+        self.trip_phase[replicas, self.vehicle_trip[replicas, vehicles]] = _RIDING
+        replicas, vehicles = np.nonzero(at_dropoff)
+        phase[replicas, vehicles] = _P1
+        self.trip_phase[replicas, self.vehicle_trip[replicas, vehicles]] = _COMPLETED
+        self.vehicle_trip[replicas, vehicles] = -1
+
+    def _request_trips(self):
+        """
+        Add the same number of new trip requests to each replica: the
+        request capital depends only on the request rate.
+        """
+        request_count = int(self._request_capital)
+        if request_count == 0:
+            return
+        free = self.trip_phase == _INACTIVE
+        free_count = int(free.sum(axis=1).min())
+        if free_count < request_count:
+            capacity = self.trip_phase.shape[1]
+            self._grow_trips(
+                max(2 * capacity, capacity + request_count - free_count)
+            )
+            free = self.trip_phase == _INACTIVE
+        # The first request_count free slots of each replica
+        slots = np.argsort(~free, axis=1, kind="stable")[:, :request_count]
+        rows = np.arange(self.replicas)[:, np.newaxis]
+        origins = self._locations((self.replicas, request_count))
+        destinations = self._destinations(origins)
+        self.trip_phase[rows, slots] = _UNASSIGNED
+        self.trip_origin[rows, slots] = origins
+        self.trip_destination[rows, slots] = destinations
+        self.trip_distance[rows, slots] = self._distance(origins, destinations)
+        self.trip_unassigned_time[rows, slots] = 0
+        self.trip_waiting_time[rows, slots] = 0
+
+    def _destinations(self, origins):
+        """Uniform destinations, as in Trip._set_destination_uniform"""
+        city_size = self.city_size
+        effective_max = min(2 * self.sim.mean_trip_distance, city_size)
+        destinations = np.empty_like(origins)
+        redraw = np.ones(origins.shape[:-1], dtype=bool)
+        while redraw.any():
+            redraw_count = int(redraw.sum())
+            if effective_max >= city_size:
+                drawn = self._locations((redraw_count,), is_destination=True)
+            else:
+                delta = self.demand_rng.integers(
+                    self.sim.min_trip_distance,
+                    effective_max + 1,
+                    (redraw_count, 2),
+                )
+                drawn = (
+                    (origins[redraw] - effective_max / 2 + delta) % city_size
+                ).astype(np.int64)
+            destinations[redraw] = drawn
+            redraw = (destinations == origins).all(axis=-1)
+        return destinations
+
+    def _dispatch_vehicles(self):
+        """
+        Dispatch the nearest idle (P1) vehicle to each unassigned trip, taking
+        the trips of each replica in random order and breaking distance ties
+        at random. As in Dispatch, a vehicle already at the origin is not
+        dispatched. The k-th trip of every replica is handled together.
+        """
+        unassigned = self.trip_phase == _UNASSIGNED
+        trip_counts = unassigned.sum(axis=1)
+        if not trip_counts.any():
+            return
+        order_keys = self.dispatch_rng.random(unassigned.shape)
+        order_keys[~unassigned] = np.inf
+        trip_order = np.argsort(order_keys, axis=1)
+        available = self.vehicle_phase == _P1
+        for rank in range(int(trip_counts.max())):
+            replicas = np.nonzero((rank < trip_counts) & available.any(axis=1))[0]
+            if len(replicas) == 0:
+                break
+            trips = trip_order[replicas, rank]
+            origins = self.trip_origin[replicas, trips]
+            distances = self._distance(
+                self.vehicle_location[replicas], origins[:, np.newaxis, :]
+            )
+            # Adding a fraction in [0, 0.5) breaks ties at random without
+            # changing the order of different (integer) distances
+            cost = np.where(
+                available[replicas] & (distances > 0),
+                distances + 0.5 * self.dispatch_rng.random(distances.shape),
+                np.inf,
+            )
+            vehicles = cost.argmin(axis=1)
+            dispatched = np.isfinite(cost[np.arange(len(replicas)), vehicles])
+            replicas = replicas[dispatched]
+            vehicles = vehicles[dispatched]
+            trips = trips[dispatched]
+            self.vehicle_phase[replicas, vehicles] = _P2
+            self.vehicle_trip[replicas, vehicles] = trips
+            self.vehicle_pickup[replicas, vehicles] = self.trip_origin[replicas, trips]
+            self.vehicle_dropoff[replicas, vehicles] = self.trip_destination[
+                replicas, trips
+            ]
+            self.trip_phase[replicas, trips] = _WAITING
+            available[replicas, vehicles] = False
+
+    def _update_directions(self):
+        """
+        Set the direction for the next block, as in Vehicle.update_direction:
+        P1 vehicles turn at random (avoiding most u-turns), P2 and P3
+        vehicles turn towards their pickup or dropoff.
+        """
+        phase = self.vehicle_phase
+        direction = self.vehicle_direction
+        # P1: a random new direction, drawn a second time if the first
+        # would be a u-turn
+        turn = self.movement_rng.integers(0, 4, phase.shape)
+        redraw = turn == (direction + 2) % 4
+        turn[redraw] = self.movement_rng.integers(0, 4, int(redraw.sum()))
+        # P2 and P3: towards the target, choosing at random between the
+        # east-west and north-south candidates when both are needed
+        target = np.where(
+            (phase == _P2)[..., np.newaxis], self.vehicle_pickup, self.vehicle_dropoff
+        )
+        delta = self.vehicle_location - target
+        quadrant_length = self.city_size / 2
+        toward_low = ((delta > 0) & (delta < quadrant_length)) | (
+            (delta < 0) & (delta <= -quadrant_length)
+        )
+        x_direction = np.where(toward_low[..., 0], _WEST, _EAST)
+        y_direction = np.where(toward_low[..., 1], _SOUTH, _NORTH)
+        x_needed = delta[..., 0] != 0
+        y_needed = delta[..., 1] != 0
+        choose_x = x_needed & (
+            ~y_needed | (self.movement_rng.random(phase.shape) < 0.5)
+        )
+        navigate = np.where(
+            choose_x, x_direction, np.where(y_needed, y_direction, direction)
+        )
+        self.vehicle_direction = np.where(phase == _P1, turn, navigate)
+
+    def _push_convergence_measures(self, block):
+        """
+        Compute the convergence metrics over the smoothing window for every
+        replica, as compute_measures does for the live measures, and push
+        them to the convergence ring
+        """
+        sums = self.history_smoothing.sum(axis=2)
+        vehicle_time = sums[:, _HISTORY_INDEX[History.VEHICLE_TIME]]
+        trip_count = sums[:, _HISTORY_INDEX[History.TRIP_COUNT]]
+        trip_distance = sums[:, _HISTORY_INDEX[History.TRIP_DISTANCE]]
+        has_vehicle_time = vehicle_time > 0
+        has_trips = trip_count > 0
+        safe_vehicle_time = np.where(has_vehicle_time, vehicle_time, 1)
+        safe_trip_distance = np.where(has_trips, trip_distance, 1)
+        metrics = {
+            Measure.VEHICLE_MEAN_COUNT: (
+                sums[:, _HISTORY_INDEX[History.VEHICLE_COUNT]] / self.smoothing_window
+            ),
+            Measure.TRIP_MEAN_WAIT_FRACTION: np.where(
+                has_trips,
+                sums[:, _HISTORY_INDEX[History.TRIP_WAIT_TIME]] / safe_trip_distance,
+                0.0,
+            ),
+        }
+        for measure, stat in (
+            (Measure.VEHICLE_FRACTION_P1, History.VEHICLE_TIME_P1),
+            (Measure.VEHICLE_FRACTION_P2, History.VEHICLE_TIME_P2),
+            (Measure.VEHICLE_FRACTION_P3, History.VEHICLE_TIME_P3),
+        ):
+            metrics[measure] = np.where(
+                has_vehicle_time,
+                sums[:, _HISTORY_INDEX[stat]] / safe_vehicle_time,
+                0.0,
+            )
+        self.convergence_measures[:, :, block % self.smoothing_window] = np.stack(
+            [metrics[metric] for metric in DEFAULT_CONVERGENCE_METRICS], axis=1
+        )
+
+    def _max_rms_residual(self, block):
+        """
+        Return the largest RMS residual of the convergence metrics for every
+        replica, recomputed every smoothing_window blocks as
+        ConvergenceTracker.max_rms_residual does, and held in between
+        """
+        chain_length = self.smoothing_window
+        if block % chain_length == 0 and block > chain_length:
+            chains = self.convergence_measures
+            with np.errstate(divide="ignore", invalid="ignore"):
+                chains = chain_length * chains / chains.sum(axis=2, keepdims=True)
+            chain_rmse = np.sqrt(np.var(chains, axis=2, ddof=1))
+            self.rms_residual_max = chain_rmse.max(axis=1)
+        return self.rms_residual_max
+
+    def _update_history(self, block):
+        """
+        Record this block's History values for every replica, as in
+        RideHailSimulation._update_history
+        """
+        values = np.zeros((self.replicas, len(History)))
+        phase = self.vehicle_phase
+        values[:, _HISTORY_INDEX[History.VEHICLE_COUNT]] = self.vehicle_count
+        values[:, _HISTORY_INDEX[History.VEHICLE_TIME]] = self.vehicle_count
+        values[:, _HISTORY_INDEX[History.VEHICLE_TIME_P1]] = (phase == _P1).sum(axis=1)
+        values[:, _HISTORY_INDEX[History.VEHICLE_TIME_P2]] = (phase == _P2).sum(axis=1)
+        values[:, _HISTORY_INDEX[History.VEHICLE_TIME_P3]] = (phase == _P3).sum(axis=1)
+        values[:, _HISTORY_INDEX[History.TRIP_REQUEST_RATE]] = self.request_rate
+        values[:, _HISTORY_INDEX[History.TRIP_PRICE]] = self.sim.price
+        trip_phase = self.trip_phase
+        self.trip_unassigned_time += trip_phase == _UNASSIGNED
+        self.trip_waiting_time += trip_phase == _WAITING
+        values[:, _HISTORY_INDEX[History.TRIP_RIDING_TIME]] = (
+            trip_phase == _RIDING
+        ).sum(axis=1)
+        completed = trip_phase == _COMPLETED
+        wait_time = self.trip_unassigned_time + self.trip_waiting_time
+        completed_count = completed.sum(axis=1)
+        values[:, _HISTORY_INDEX[History.TRIP_COUNT]] = completed_count
+        values[:, _HISTORY_INDEX[History.TRIP_COMPLETED_COUNT]] = completed_count
+        values[:, _HISTORY_INDEX[History.TRIP_DISTANCE]] = np.where(
+            completed, self.trip_distance, 0
+        ).sum(axis=1)
+        values[:, _HISTORY_INDEX[History.TRIP_AWAITING_TIME]] = np.where(
+            completed, self.trip_waiting_time, 0
+        ).sum(axis=1)
+        values[:, _HISTORY_INDEX[History.TRIP_UNASSIGNED_TIME]] = np.where(
+            completed, self.trip_unassigned_time, 0
+        ).sum(axis=1)
+        values[:, _HISTORY_INDEX[History.TRIP_WAIT_TIME]] = np.where(
+            completed, wait_time, 0
+        ).sum(axis=1)
+        if completed_count.any():
+            for replica in np.nonzero(completed_count)[0]:
+                in_replica = completed[replica]
+                self.trip_completion_history[replica].append(
+                    (
+                        block,
+                        wait_time[replica, in_replica],
+                        self.trip_distance[replica, in_replica],
+                    )
+                )
+        for completion_history in self.trip_completion_history:
+            while (
+                completion_history
+                and block - completion_history[0][0] > self.results_window
+            ):
+                completion_history.popleft()
+        self._record_history(block, values)
+        self._request_capital = self._request_capital % 1 + self.request_rate
+
+    def _record_history(self, block, values):
+        """
+        Store this block's History values, an array of shape
+        (R, len(History)), in the results and smoothing windows, and track
+        convergence over the smoothing window
+        """
+        # As in the object engine, the residual recorded for a block is the
+        # one computed before this block's measures are pushed
+        values[:, _HISTORY_INDEX[History.SIM_CONVERGENCE_MAX_RMS_RESIDUAL]] = (
+            self._max_rms_residual(block)
+        )
+        self.history_results[:, :, block % self.results_window] = values
+        self.history_smoothing[:, :, block % self.smoothing_window] = values
+        self._push_convergence_measures(block)
+        if block >= self.smoothing_window:
+            self._max_rms_residual(block)
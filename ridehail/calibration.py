@@ -0,0 +1,450 @@
+"""
+Calibrate a simulation against observed city data: find the values of a few
+free parameters at which the simulation's result measures best match the
+observed ones.
+
+Calibration has been done by hand (see the
+cities/toronto/feb_6_2020_calibration_*.config files): change the config,
+run it, compare it with the observations, and repeat. A calibration instead
+takes its targets and free parameters from the [CALIBRATION] section:
+
+    calibration_targets = TRIP_MEAN_WAIT_TIME=4.5, TRIPS_PER_HOUR=8100
+    calibration_parameters = vehicle_count=1000:7000, inhomogeneity=0:1
+
+Targets are result measure names (see atom.Measure), or TRIPS_PER_HOUR, the
+trips completed per hour of the results window. Free parameters are numeric
+config parameters, each with its lower and upper bound; every other setting
+is taken from the config.
+
+The search is a Nelder-Mead simplex search over the box of the bounds,
+minimizing the sum of the squared relative errors of the targets. Simulations
+are noisy, so each point is evaluated by `replicates` simulations, run in
+parallel processes, and every point uses the same seeds (random_number_seed,
+random_number_seed + 1, ...), so that points are compared under the same
+random numbers and differ by their parameters more than by chance. The
+spread of the replicates gives the standard error of each point's objective,
+and the search stops when the points of the simplex are within noise of each
+other, when the simplex has shrunk to a small fraction of the box, or after
+calibration_evaluations points.
+
+Each simulation is cached by its full configuration. With output files, the
+cache is kept in ./out/<config>-calibration.jsonl, so that a calibration that
+is extended, or run again with other targets, reruns nothing it has already
+run. The fitted config is written to ./out/<config>-calibrated.config.
+"""
+
+import json
+import logging
+import math
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from ridehail.atom import Animation, Measure
+from ridehail.config import config_items
+from ridehail.replicates import aggregate_measures, summarize
+from ridehail.simulation import RideHailSimulation
+
+# A target that is not a result measure: completed trips per hour
+TRIPS_PER_HOUR = "TRIPS_PER_HOUR"
+# Points of the simplex whose objectives are within this many standard
+# errors of each other cannot be told apart
+NOISE_LEVEL = 2.0
+# The search stops when the simplex is this small, as a fraction of the box
+SIMPLEX_TOLERANCE = 0.01
+# The first simplex steps this fraction of the box along each parameter
+INITIAL_STEP = 0.25
+# Nelder-Mead coefficients: reflection, expansion, contraction, shrinkage
+REFLECTION = 1.0
+EXPANSION = 2.0
+CONTRACTION = 0.5
+SHRINKAGE = 0.5
+
+
+def _pairs(text, setting):
+    """The name=value pairs of a comma-separated setting"""
+    pairs = []
+    for item in (text or "").split(","):
+        if not item.strip():
+            continue
+        name, separator, value = item.partition("=")
+        if not separator or not name.strip() or not value.strip():
+            raise ValueError(f"{setting}: expected name=value, not '{item.strip()}'")
+        pairs.append((name.strip(), value.strip()))
+    if not pairs:
+        raise ValueError(f"{setting} is empty")
+    return pairs
+
+
+def parse_targets(text):
+    """
+    Parse calibration_targets into a dict of target name to observed value
+    """
+    targets = {}
+    for name, value in _pairs(text, "calibration_targets"):
+        if name != TRIPS_PER_HOUR and name not in Measure.__members__:
+            raise ValueError(f"calibration_targets: unknown measure {name}")
+        targets[name] = float(value)
+    return targets
+
+
+def parse_parameters(text):
+    """
+    Parse calibration_parameters into a dict of config parameter name to its
+    (lower, upper) bounds
+    """
+    items = config_items()
+    parameters = {}
+    for name, value in _pairs(text, "calibration_parameters"):
+        if name not in items or items[name].type not in (int, float):
+            raise ValueError(
+                f"calibration_parameters: {name} is not a numeric parameter"
+            )
+        lower, separator, upper = value.partition(":")
+        if not separator:
+            raise ValueError(
+                f"calibration_parameters: expected {name}=lower:upper, not {value}"
+            )
+        bounds = (items[name].type(lower), items[name].type(upper))
+        if not bounds[0] < bounds[1]:
+            raise ValueError(
+                f"calibration_parameters: {name} bounds are not increasing"
+            )
+        parameters[name] = bounds
+    return parameters
+
+
+def target_value(measures, name, minutes_per_block=1.0):
+    """The value of a target in a simulation's result measures, or None"""
+    if name == TRIPS_PER_HOUR:
+        count = measures.get(Measure.TRIP_SUM_COUNT.name)
+        blocks = measures.get(Measure.SIM_BLOCKS_ANALYZED.name)
+        if not blocks or not isinstance(count, (int, float)):
+            return None
+        return count / blocks * 60 / minutes_per_block
+    value = measures.get(name)
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def objective(measures, targets, minutes_per_block=1.0):
+    """
+    The sum of the squared relative errors of the targets (absolute, for a
+    target of zero), or infinity if a target could not be measured
+    """
+    total = 0.0
+    for name, observed in targets.items():
+        value = target_value(measures, name, minutes_per_block)
+        if value is None:
+            return math.inf
+        error = value - observed
+        if observed != 0:
+            error /= observed
+        total += error**2
+    return total
+
+
+def _cache_key(config):
+    """
+    The key of a simulation in the cache: its settings, less those of the
+    calibration itself
+    """
+    settings = {
+        name: value
+        for name, value in config.as_dict().items()
+        if not name.startswith("calibrat")
+    }
+    return json.dumps(settings, sort_keys=True, default=str)
+
+
+def _step(centroid, worst, coefficient):
+    """
+    The point at coefficient times the distance from the worst point to the
+    centroid of the others, beyond the centroid, kept within the unit cube
+    """
+    return [
+        min(max(center + coefficient * (center - far), 0.0), 1.0)
+        for center, far in zip(centroid, worst)
+    ]
+
+
+def _run_simulation(config):
+    """Run one simulation in a worker process and return its result measures"""
+    return RideHailSimulation(config).simulate().get_result_measures()
+
+
+class RideHailCalibration:
+    """
+    A calibration of the free parameters of a config against observed targets
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.targets = parse_targets(config.calibration_targets.value)
+        self.parameters = parse_parameters(config.calibration_parameters.value)
+        self.max_evaluations = config.calibration_evaluations.value
+        self.minutes_per_block = config.minutes_per_block.value or 1.0
+        replicate_count = config.replicates.value
+        base_seed = config.random_number_seed.value
+        if not base_seed:
+            base_seed = random.randrange(1, 2**31)
+        self.seeds = [base_seed + index for index in range(replicate_count)]
+        self.processes = min(
+            replicate_count * (len(self.parameters) + 1), os.cpu_count() or 1
+        )
+        self.snapshot = config.snapshot(
+            animation=Animation.NONE,
+            config_file=None,
+            run_sequence=False,
+            replicates=1,
+            calibrate=False,
+        )
+        # The result measures of each simulation run, by _cache_key
+        self.cache = {}
+        self.cache_file = None
+        config_file = config.config_file.value
+        if config_file and config.write_output_files.value:
+            self.config_file_root = os.path.splitext(os.path.basename(config_file))[0]
+            self.cache_file = f"./out/{self.config_file_root}-calibration.jsonl"
+        # Each point evaluated: its parameters, objective and measures
+        self.evaluations = []
+        self.simulations_run = 0
+        self.fitted = None
+        self._executor = None
+
+    def point_parameters(self, point):
+        """The parameter values at a point of the unit cube"""
+        parameters = {}
+        for (name, (lower, upper)), coordinate in zip(self.parameters.items(), point):
+            value = lower + min(max(coordinate, 0.0), 1.0) * (upper - lower)
+            # Whole vehicles, and few enough digits to reuse cached runs
+            value = round(value) if isinstance(lower, int) else round(value, 6)
+            parameters[name] = value
+        return parameters
+
+    def run_calibration(self):
+        """
+        Search for the best fit, then report, write and return it: a dict of
+        the fitted parameters, the objective and the fitted measures
+        """
+        start_time = time.time()
+        self._load_cache()
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            self._executor = executor
+            self._search()
+        self._executor = None
+        self.fitted = min(
+            self.evaluations, key=lambda evaluation: evaluation["objective"]
+        )
+        duration_seconds = time.time() - start_time
+        logging.info(
+            f"Calibrated in {len(self.evaluations)} evaluations and "
+            f"{self.simulations_run} new simulations in {duration_seconds:.1f}s"
+        )
+        self._print_summary()
+        self._write_results(duration_seconds)
+        return self.fitted
+
+    def _search(self):
+        """Nelder-Mead search of the unit cube of the parameters"""
+        dimensions = len(self.parameters)
+        start = [0.5] * dimensions
+        # Start from the config's own values where they lie within the bounds
+        for index, (name, (lower, upper)) in enumerate(self.parameters.items()):
+            value = getattr(self.config, name).value
+            if isinstance(value, (int, float)) and lower <= value <= upper:
+                start[index] = (value - lower) / (upper - lower)
+        simplex = [start]
+        for index in range(dimensions):
+            vertex = list(start)
+            step = INITIAL_STEP if start[index] + INITIAL_STEP <= 1 else -INITIAL_STEP
+            vertex[index] += step
+            simplex.append(vertex)
+        values = self._evaluate(simplex)
+        while len(self.evaluations) < self.max_evaluations:
+            order = sorted(
+                range(len(simplex)), key=lambda index: values[index]["objective"]
+            )
+            simplex = [simplex[index] for index in order]
+            values = [values[index] for index in order]
+            if self._converged(simplex, values):
+                break
+            centroid = [
+                statistics.fmean(vertex[index] for vertex in simplex[:-1])
+                for index in range(dimensions)
+            ]
+
+            best, second_worst, worst = (
+                values[0]["objective"],
+                values[-2]["objective"],
+                values[-1]["objective"],
+            )
+            reflected = _step(centroid, simplex[-1], REFLECTION)
+            (reflected_value,) = self._evaluate([reflected])
+            if reflected_value["objective"] < best:
+                expanded = _step(centroid, simplex[-1], EXPANSION)
+                (expanded_value,) = self._evaluate([expanded])
+                if expanded_value["objective"] < reflected_value["objective"]:
+                    simplex[-1], values[-1] = expanded, expanded_value
+                else:
+                    simplex[-1], values[-1] = reflected, reflected_value
+                continue
+            if reflected_value["objective"] < second_worst:
+                simplex[-1], values[-1] = reflected, reflected_value
+                continue
+            if reflected_value["objective"] < worst:
+                contracted = _step(centroid, simplex[-1], CONTRACTION)
+            else:
+                contracted = _step(centroid, simplex[-1], -CONTRACTION)
+            (contracted_value,) = self._evaluate([contracted])
+            if contracted_value["objective"] < min(
+                worst, reflected_value["objective"]
+            ):
+                simplex[-1], values[-1] = contracted, contracted_value
+                continue
+            # Shrink towards the best point, evaluating the new points together
+            simplex = [simplex[0]] + [
+                [b + SHRINKAGE * (v - b) for b, v in zip(simplex[0], vertex)]
+                for vertex in simplex[1:]
+            ]
+            values = [values[0]] + self._evaluate(simplex[1:])
+
+    def _converged(self, simplex, values):
+        objectives = [value["objective"] for value in values]
+        size = max(
+            abs(coordinate - best)
+            for vertex in simplex[1:]
+            for coordinate, best in zip(vertex, simplex[0])
+        )
+        if size < SIMPLEX_TOLERANCE:
+            logging.info("Calibration stopped: the simplex has converged")
+            return True
+        std_errors = [value["std_error"] for value in values]
+        if math.inf in objectives or None in std_errors:
+            return False
+        noise = math.sqrt(statistics.fmean(error**2 for error in std_errors))
+        if max(objectives) - min(objectives) <= NOISE_LEVEL * noise:
+            logging.info("Calibration stopped: the simplex is within noise")
+            return True
+        return False
+
+    def _evaluate(self, points):
+        """
+        Evaluate points of the unit cube, running the simulations that are
+        not in the cache together in the process pool
+        """
+        point_configs = []
+        for point in points:
+            snapshot = self.snapshot.replace(**self.point_parameters(point))
+            point_configs.append(
+                [snapshot.replace(random_number_seed=seed) for seed in self.seeds]
+            )
+        pending = {}
+        for configs in point_configs:
+            for config in configs:
+                key = _cache_key(config)
+                if key not in self.cache:
+                    pending[key] = config
+        if pending:
+            for key, measures in zip(
+                pending, self._executor.map(_run_simulation, pending.values())
+            ):
+                self.cache[key] = measures
+                self._save_cache(key, measures)
+            self.simulations_run += len(pending)
+        results = []
+        for point, configs in zip(points, point_configs):
+            replicate_measures = [self.cache[_cache_key(config)] for config in configs]
+            objectives = [
+                objective(measures, self.targets, self.minutes_per_block)
+                for measures in replicate_measures
+            ]
+            if math.inf in objectives:
+                summary = {"mean": math.inf, "std_error": None}
+            else:
+                summary = summarize(objectives)
+            aggregate = aggregate_measures(replicate_measures)
+            evaluation = {
+                "parameters": self.point_parameters(point),
+                "objective": summary["mean"],
+                "std_error": summary["std_error"],
+                "targets": {
+                    name: self._mean_target(replicate_measures, name)
+                    for name in self.targets
+                },
+                "measures": {
+                    name: summary["mean"] for name, summary in aggregate.items()
+                },
+            }
+            logging.info(
+                f"Calibration point {evaluation['parameters']}: "
+                f"objective {evaluation['objective']:.4g}"
+            )
+            self.evaluations.append(evaluation)
+            results.append(evaluation)
+        return results
+
+    def _mean_target(self, replicate_measures, name):
+        values = [
+            target_value(measures, name, self.minutes_per_block)
+            for measures in replicate_measures
+        ]
+        values = [value for value in values if value is not None]
+        return statistics.fmean(values) if values else None
+
+    def _load_cache(self):
+        if not (self.cache_file and os.path.exists(self.cache_file)):
+            return
+        with open(self.cache_file) as cache_file_handle:
+            for line in cache_file_handle:
+                record = json.loads(line)
+                self.cache[record["key"]] = record["measures"]
+        logging.info(
+            f"Read {len(self.cache)} cached simulations from {self.cache_file}"
+        )
+
+    def _save_cache(self, key, measures):
+        if not self.cache_file:
+            return
+        if not os.path.exists("./out"):
+            os.makedirs("./out")
+        with open(self.cache_file, "a") as cache_file_handle:
+            cache_file_handle.write(
+                json.dumps({"key": key, "measures": measures}, default=str) + "\n"
+            )
+
+    def _print_summary(self):
+        print(
+            f"Calibration: {len(self.evaluations)} evaluations of "
+            f"{len(self.seeds)} replicates, objective {self.fitted['objective']:.4g}"
+        )
+        for name, value in self.fitted["parameters"].items():
+            lower, upper = self.parameters[name]
+            print(f"  {name} = {value} (bounds {lower}:{upper})")
+        for name, observed in self.targets.items():
+            value = self.fitted["targets"][name]
+            fitted = "-" if value is None else f"{value:.3f}"
+            print(f"  {name}: observed {observed:.3f}, fitted {fitted}")
+
+    def _write_results(self, duration_seconds):
+        """
+        Write the fitted config to ./out/<config>-calibrated.config, with the
+        fitted measures in its [RESULTS] section
+        """
+        if not self.cache_file:
+            return
+        for name, value in self.fitted["parameters"].items():
+            config_item = getattr(self.config, name)
+            config_item.value = value
+            config_item.explicitly_set = True
+        self.config.calibrate.value = False
+        calibrated_file = f"./out/{self.config_file_root}-calibrated.config"
+        self.config._write_config_file(calibrated_file)
+        results = dict(self.fitted["measures"])
+        results["SIM_REPLICATES"] = len(self.seeds)
+        results["SIM_TIMESTAMP"] = datetime.now().isoformat()
+        results["SIM_DURATION_SECONDS"] = round(duration_seconds, 2)
+        self.config.write_results_section(calibrated_file, results)
+        logging.info(f"Wrote the calibrated config to {calibrated_file}")
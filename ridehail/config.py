@@ -1,6 +1,8 @@
 import argparse
 import configparser
+import functools
 import logging
+from collections import namedtuple
 from os import path, rename
 import sys
 from enum import Enum
@@ -11,6 +13,7 @@ from ridehail.atom import (
     Equilibration,
     Measure,
     DispatchMethod,
+    SequenceDesign,
     TripDistribution,
 )
 from ridehail.presets import PRESET_NAMES, get_preset
@@ -226,6 +229,60 @@ class ConfigItem:
                 return False
 
 
+def _to_enum(name, value):
+    """
+    Return the value of config item `name` converted to its enum type. Values
+    that are already enums are returned unchanged. Shared by
+    RideHailConfig._convert_config_values_to_enum and ConfigSnapshot.
+    """
+    if name == "equilibration":
+        if not isinstance(value, Equilibration):
+            for eq_option in list(Equilibration):
+                if value.lower()[0:2] == eq_option.name.lower()[0:2]:
+                    return eq_option
+            logging.error(
+                "equilibration must start with n[one], p[rice], or w[ait_fraction]"
+            )
+    elif name == "animation":
+        if not isinstance(value, Animation):
+            for animation in list(Animation):
+                if value.lower().strip() == animation.value.lower().strip():
+                    return animation
+            return Animation.NONE
+    elif name == "dispatch_method":
+        if not isinstance(value, DispatchMethod):
+            for dispatch_method in list(DispatchMethod):
+                if value.lower()[0:2] == dispatch_method.value.lower()[0:2]:
+                    return dispatch_method
+            return DispatchMethod.DEFAULT
+    elif name == "sequence_design":
+        if not isinstance(value, SequenceDesign):
+            for sequence_design in list(SequenceDesign):
+                if value.lower().strip() == sequence_design.value:
+                    return sequence_design
+            return SequenceDesign.GRID
+    elif name == "trip_distance_distribution":
+        if not isinstance(value, TripDistribution):
+            for trip_distance_distribution in list(TripDistribution):
+                if (
+                    value.lower().strip()
+                    == trip_distance_distribution.value.lower().strip()
+                ):
+                    return trip_distance_distribution
+            return TripDistribution.UNIFORM
+    return value
+
+
+# Config items whose values are held as enums once the config is loaded
+ENUM_CONFIG_ITEMS = (
+    "equilibration",
+    "animation",
+    "dispatch_method",
+    "trip_distance_distribution",
+    "sequence_design",
+)
+
+
 class RideHailConfig:
     """
     Hold the configuration parameters for the simulation, which come from three
@@ -589,6 +646,50 @@ class RideHailConfig:
         "Set the seed to an integer for reproducible simulations.",
         "If None, then each simulation will be different.",
     )
+    replicates = ConfigItem(
+        name="replicates",
+        type=int,
+        default=1,
+        action="store",
+        short_form="rep",
+        metavar="N",
+        config_section="DEFAULT",
+        weight=88,
+        min_value=1,
+        max_value=1000,
+    )
+    replicates.help = (
+        "run N replicates with different seeds and report confidence intervals"
+    )
+    replicates.description = (
+        f"replicates ({replicates.type.__name__}, default {replicates.default})",
+        "If greater than 1, run this many copies of the simulation, each with",
+        "its own random number seed (random_number_seed, random_number_seed + 1,",
+        "...), in parallel processes. Each result measure is reported as the mean",
+        "over the replicates, with its standard error and 95% confidence interval.",
+    )
+    batch_replicates = ConfigItem(
+        name="batch_replicates",
+        type=bool,
+        default=False,
+        action="store_true",
+        short_form="brp",
+        config_section="DEFAULT",
+        weight=87,
+    )
+    batch_replicates.help = (
+        "run replicates in the batched engine, where the configuration allows it"
+    )
+    batch_replicates.description = (
+        f"batch replicates ({batch_replicates.type.__name__}, "
+        f"default {batch_replicates.default})",
+        "If set, and replicates is greater than 1, each process advances its",
+        "share of the replicates together in numpy arrays, which is much faster.",
+        "The batched engine gives statistically the same results, but a",
+        "replicate's seed does not reproduce a single simulation run with that",
+        "seed. Configurations the batched engine does not support (equilibration,",
+        "impulses, other dispatch methods) run as separate simulations.",
+    )
     idle_vehicles_moving = ConfigItem(
         name="idle_vehicles_moving",
         type=float,
@@ -608,6 +709,28 @@ class RideHailConfig:
         "Fraction of blocks in which a P1 (idle) vehicle moves.",
         "1.0 = always moving (default); 0.0 = stationary; 0.5 = half-speed on average.",
     )
+    event_driven = ConfigItem(
+        name="event_driven",
+        type=bool,
+        default=False,
+        action="store_true",
+        short_form="evd",
+        config_section="DEFAULT",
+        weight=86,
+    )
+    event_driven.help = (
+        "advance vehicles on trips by scheduled arrivals rather than block by block"
+    )
+    event_driven.description = (
+        f"event driven ({event_driven.type.__name__}, default {event_driven.default})",
+        "Vehicles heading to a pickup (P2) or carrying a passenger (P3) follow",
+        "shortest paths, so the block in which each arrives is known when it sets",
+        "off. If set, these arrivals (and the end of each pickup) are scheduled",
+        "in a queue, and only idle vehicles and arrivals due are processed each",
+        "block. Results are statistically the same; large cities with long trips",
+        "run faster. Positions of vehicles on trips are filled in only when a map",
+        "is displayed.",
+    )
     results_window = ConfigItem(
         name="results_window",
         type=int,
@@ -647,6 +770,24 @@ class RideHailConfig:
         "If False, only write results summary to config file [RESULTS] section.",
         "For sequences, CSV files contain flattened results for each run.",
     )
+    write_trip_log = ConfigItem(
+        name="write_trip_log",
+        type=bool,
+        default=False,
+        action="store_true",
+        short_form="wtl",
+        config_section="DEFAULT",
+        weight=96,
+    )
+    write_trip_log.help = "write a binary log of every trip to ./out/ directory"
+    write_trip_log.description = (
+        f"write trip log ({write_trip_log.type.__name__}, "
+        f"default {write_trip_log.default})",
+        "If True, create ./out/config-file-timestamp.trips, with one fixed-width",
+        "record for each completed or cancelled trip: its request, dispatch,",
+        "pickup and dropoff blocks, vehicle, origin, destination and distance.",
+        "Read it with ridehail.trip_log.read_trip_log().",
+    )
     log_file = ConfigItem(
         name="log_file",
         type=str,
@@ -698,6 +839,22 @@ class RideHailConfig:
         "If set, configure the sequence in the [SEQUENCE] section with",
         "different vehicle counts or request rates.",
     )
+    calibrate = ConfigItem(
+        name="calibrate",
+        type=bool,
+        default=False,
+        action="store_true",
+        short_form="cal",
+        config_section="DEFAULT",
+        weight=141,
+    )
+    calibrate.help = "fit free parameters to observed targets"
+    calibrate.description = (
+        f"calibrate ({calibrate.type.__name__}, default {calibrate.default})",
+        "If set, search for the values of the free parameters at which the",
+        "simulation best matches the observed targets. Configure the calibration",
+        "in the [CALIBRATION] section.",
+    )
     use_city_scale = ConfigItem(
         name="use_city_scale",
         type=bool,
@@ -843,6 +1000,28 @@ class RideHailConfig:
         "Higher values slow down animation, useful for small cities with few vehicles.",
         "Range: 0.0-10.0 seconds",
     )
+    max_blocks_per_frame = ConfigItem(
+        name="max_blocks_per_frame",
+        type=int,
+        default=100,
+        action="store",
+        short_form="abf",
+        metavar="N",
+        config_section="ANIMATION",
+        weight=28,
+        min_value=1,
+    )
+    max_blocks_per_frame.help = (
+        "most blocks to simulate for each frame drawn, when drawing falls behind"
+    )
+    max_blocks_per_frame.description = (
+        f"max blocks per frame ({max_blocks_per_frame.type.__name__}, "
+        f"default {max_blocks_per_frame.default})",
+        "When drawing each block would slow the simulation down (drawing takes",
+        "longer than the animation delay or, with no delay, most of the run),",
+        "animations simulate several blocks for each frame they draw, up to",
+        "this many. Set to 1 to draw every block.",
+    )
     interpolate = ConfigItem(
         name="interpolate",
         type=int,
@@ -878,6 +1057,49 @@ class RideHailConfig:
         "Supply a file name in which to save the animations",
         "If none is supplied, display animations on the screen only.",
     )
+    animation_render_processes = ConfigItem(
+        name="animation_render_processes",
+        type=int,
+        default=0,
+        action="store",
+        short_form="arp",
+        metavar="N",
+        config_section="ANIMATION",
+        weight=45,
+        min_value=0,
+        max_value=64,
+    )
+    animation_render_processes.help = (
+        "render map or stats output files offline in N worker processes"
+    )
+    animation_render_processes.description = (
+        f"animation render processes ({animation_render_processes.type.__name__}, "
+        f"default {animation_render_processes.default})",
+        "For map and stats animations written to an animation_output_file,",
+        "run the simulation at full speed first, then render the frames in",
+        "this many worker processes and pipe them to ffmpeg.",
+        "If 0, frames are rendered one at a time as the simulation runs.",
+    )
+    web_native_engine = ConfigItem(
+        name="web_native_engine",
+        type=bool,
+        default=False,
+        action="store_true",
+        short_form="wne",
+        config_section="ANIMATION",
+        weight=47,
+    )
+    web_native_engine.help = (
+        "run web_map and web_stats simulations in Python, not in the browser"
+    )
+    web_native_engine.description = (
+        f"web native engine ({web_native_engine.type.__name__}, "
+        f"default {web_native_engine.default})",
+        "For the web_map and web_stats animations, run the simulation here in",
+        "Python and stream each frame to the browser, instead of running it in",
+        "the browser with Pyodide. Use it for large cities, which Pyodide",
+        "cannot simulate at animation speed.",
+    )
     imagemagick_dir = ConfigItem(
         name="imagemagick_dir",
         type=str,
@@ -1048,6 +1270,48 @@ class RideHailConfig:
         "- Positive value (e.g., 5): Traditional fixed-interval mode,",
         "  adjusting every N blocks with constant damping factor.",
     )
+    mean_field_start = ConfigItem(
+        name="mean_field_start",
+        type=bool,
+        default=False,
+        action="store_true",
+        short_form="emf",
+        config_section="EQUILIBRATION",
+        weight=45,
+    )
+    mean_field_start.help = (
+        "start equilibration at the fleet size predicted by the mean-field model"
+    )
+    mean_field_start.description = (
+        f"mean field start ({mean_field_start.type.__name__}, "
+        f"default {mean_field_start.default})",
+        "If set, and equilibration is price or wait_fraction, the simulation",
+        "starts with the equilibrium vehicle count of a mean-field model of the",
+        "steady state (see ridehail/meanfield.py) instead of vehicle_count, so",
+        "that equilibration has only to correct the model's error.",
+    )
+    solve_equilibrium = ConfigItem(
+        name="solve_equilibrium",
+        type=bool,
+        default=False,
+        action="store_true",
+        short_form="esv",
+        config_section="EQUILIBRATION",
+        weight=46,
+    )
+    solve_equilibrium.help = (
+        "find the equilibrium fleet size by root finding before equilibrating"
+    )
+    solve_equilibrium.description = (
+        f"solve equilibrium ({solve_equilibrium.type.__name__}, "
+        f"default {solve_equilibrium.default})",
+        "If set, and equilibration is price or wait_fraction, the fleet size is",
+        "first set by a root finder (see ridehail/equilibrium.py), which measures",
+        "the vehicle utility or wait fraction over short segments of blocks and",
+        "moves the fleet straight to its next estimate of the equilibrium. It",
+        "hands off to the usual equilibration when the estimate is within noise,",
+        "and before the results window at the latest.",
+    )
     reservation_wage = ConfigItem(
         name="reservation_wage",
         type=float,
@@ -1211,6 +1475,210 @@ class RideHailConfig:
         "The maximum value in a sequence of platform commissions",
         "The starting value is 'platform_commission' in the EQUILIBRATION section.",
     )
+    skip_infeasible = ConfigItem(
+        name="skip_infeasible",
+        type=bool,
+        default=False,
+        action="store_true",
+        short_form="ski",
+        config_section="SEQUENCE",
+        weight=130,
+    )
+    skip_infeasible.help = (
+        "skip sequence simulations whose fleet cannot keep up with demand"
+    )
+    skip_infeasible.description = (
+        f"skip infeasible ({skip_infeasible.type.__name__}, "
+        f"default {skip_infeasible.default})",
+        "If set, simulations in a sequence without equilibration are not run if",
+        "a mean-field model of the steady state (see ridehail/meanfield.py) finds",
+        "that their idle vehicles cannot keep up with demand, so that the fleet",
+        "saturates (P1 -> 0) and wait times grow without limit. Their results",
+        "are recorded as missing.",
+    )
+    sequence_design = ConfigItem(
+        name="sequence_design",
+        type=SequenceDesign,
+        default=SequenceDesign.GRID,
+        action="store",
+        short_form="sqd",
+        metavar="design",
+        config_section="SEQUENCE",
+        weight=140,
+    )
+    sequence_design.help = (
+        "the points a sequence simulates: grid, latin_hypercube, or sobol"
+    )
+    sequence_design.description = (
+        f"sequence design ({sequence_design.type.__name__}, "
+        f"default {sequence_design.default.value})",
+        "- grid: every combination of the swept values, from each parameter's",
+        "  start to its maximum in steps of its increment.",
+        "- latin_hypercube: sequence_points points spread over the box from each",
+        "  swept parameter's start to its maximum, one in each of sequence_points",
+        "  equal strata of every parameter.",
+        "- sobol: the first sequence_points points of the Sobol sequence over",
+        "  the same box. Powers of two fill it most evenly.",
+        "A parameter is swept by a latin_hypercube or sobol design if its maximum",
+        "is set; its increment is not used. Either runs only with animation none",
+        "or text, and a quadratic response surface is fitted to the results. With",
+        "write_output_files, the surfaces are written to",
+        "./out/<config>-surfaces.json.",
+    )
+    sequence_points = ConfigItem(
+        name="sequence_points",
+        type=int,
+        default=64,
+        action="store",
+        short_form="sqp",
+        metavar="N",
+        config_section="SEQUENCE",
+        weight=150,
+        min_value=1,
+        max_value=100000,
+    )
+    sequence_points.help = "the number of points in a latin_hypercube or sobol design"
+    sequence_points.description = (
+        f"sequence points ({sequence_points.type.__name__}, "
+        f"default {sequence_points.default})",
+        "The number of simulations in a latin_hypercube or sobol sequence design,",
+        "before refinement.",
+    )
+    sequence_refine_points = ConfigItem(
+        name="sequence_refine_points",
+        type=int,
+        default=0,
+        action="store",
+        short_form="sqr",
+        metavar="N",
+        config_section="SEQUENCE",
+        weight=160,
+        min_value=0,
+        max_value=100000,
+    )
+    sequence_refine_points.help = (
+        "add N points where the sequence results change most steeply"
+    )
+    sequence_refine_points.description = (
+        f"sequence refine points ({sequence_refine_points.type.__name__}, "
+        f"default {sequence_refine_points.default})",
+        "After the design's points have run (with animation none or text), run",
+        "this many more, each midway between two neighbouring points whose",
+        "vehicle phase fractions or wait fraction differ most.",
+    )
+    sequence_fidelity_scale = ConfigItem(
+        name="sequence_fidelity_scale",
+        type=float,
+        default=1.0,
+        action="store",
+        short_form="sqf",
+        metavar="float",
+        config_section="SEQUENCE",
+        weight=170,
+        min_value=0.05,
+        max_value=1.0,
+    )
+    sequence_fidelity_scale.help = (
+        "run the sequence in a city scaled down by this factor first"
+    )
+    sequence_fidelity_scale.description = (
+        f"sequence fidelity scale ({sequence_fidelity_scale.type.__name__}, "
+        f"default {sequence_fidelity_scale.default})",
+        "If less than 1, run every point of the sequence at low fidelity",
+        "first: in a city whose size, mean trip distance, time blocks and",
+        "results window are scaled by this factor, with the fleet scaled by",
+        "its square and demand by the factor itself, so that the busy fraction",
+        "R * L / N is unchanged. Then run sequence_fidelity_points of the",
+        "points again at full fidelity, fit a straight-line correction from",
+        "low to full fidelity for each result, and report the other points'",
+        "corrected low fidelity results. With animation none or text.",
+    )
+    sequence_fidelity_points = ConfigItem(
+        name="sequence_fidelity_points",
+        type=int,
+        default=8,
+        action="store",
+        short_form="sqh",
+        metavar="N",
+        config_section="SEQUENCE",
+        weight=180,
+        min_value=0,
+        max_value=100000,
+    )
+    sequence_fidelity_points.help = (
+        "rerun N points of a low fidelity sequence at full fidelity"
+    )
+    sequence_fidelity_points.description = (
+        f"sequence fidelity points ({sequence_fidelity_points.type.__name__}, "
+        f"default {sequence_fidelity_points.default})",
+        "With a sequence_fidelity_scale below 1, the number of points run again",
+        "at full fidelity: half where the low fidelity phase and wait",
+        "fractions change most steeply, and the rest spread over the design.",
+    )
+
+    # [CALIBRATION]
+    calibration_targets = ConfigItem(
+        name="calibration_targets",
+        type=str,
+        default=None,
+        action="store",
+        short_form="ctg",
+        metavar="list",
+        config_section="CALIBRATION",
+        weight=10,
+    )
+    calibration_targets.help = (
+        "observed values to fit, as MEASURE=value pairs separated by commas"
+    )
+    calibration_targets.description = (
+        f"calibration targets ({calibration_targets.type.__name__}, "
+        f"default {calibration_targets.default})",
+        "The observed values the calibration fits, as comma-separated",
+        "name=value pairs. Names are result measures, such as",
+        "TRIP_MEAN_WAIT_TIME or VEHICLE_FRACTION_P3, or TRIPS_PER_HOUR, the",
+        "trips completed per hour. For example:",
+        "calibration_targets = TRIP_MEAN_WAIT_TIME=4.5, VEHICLE_FRACTION_P3=0.6",
+    )
+    calibration_parameters = ConfigItem(
+        name="calibration_parameters",
+        type=str,
+        default=None,
+        action="store",
+        short_form="cpr",
+        metavar="list",
+        config_section="CALIBRATION",
+        weight=20,
+    )
+    calibration_parameters.help = (
+        "free parameters, as name=lower:upper pairs separated by commas"
+    )
+    calibration_parameters.description = (
+        f"calibration parameters ({calibration_parameters.type.__name__}, "
+        f"default {calibration_parameters.default})",
+        "The numeric parameters the calibration varies, with their bounds, as",
+        "comma-separated name=lower:upper pairs. The search starts from the",
+        "configured value of each where it lies within its bounds. For example:",
+        "calibration_parameters = vehicle_count=1000:7000, inhomogeneity=0:1",
+    )
+    calibration_evaluations = ConfigItem(
+        name="calibration_evaluations",
+        type=int,
+        default=60,
+        action="store",
+        short_form="cev",
+        metavar="N",
+        config_section="CALIBRATION",
+        weight=30,
+        min_value=1,
+        max_value=10000,
+    )
+    calibration_evaluations.help = "the most points the calibration evaluates"
+    calibration_evaluations.description = (
+        f"calibration evaluations ({calibration_evaluations.type.__name__}, "
+        f"default {calibration_evaluations.default})",
+        "The most points the calibration search evaluates. Each point runs",
+        "`replicates` simulations, with the same seeds at every point.",
+    )
 
     # [IMPULSES]
     impulse_list = ConfigItem(
@@ -1416,11 +1884,9 @@ class RideHailConfig:
         Read the configuration file  to set up the parameters
         """
         self.start_time = f"{datetime.now().strftime('%Y-%m-%d-%H-%M')}"
-        for attr in dir(self):
+        for option in config_items().values():
             # assign default values
-            option = getattr(self, attr)
-            if isinstance(option, ConfigItem):
-                option.value = option.default
+            option.value = option.default
 
         if use_config_file:
             # Get the config file from the command line
@@ -1474,6 +1940,21 @@ class RideHailConfig:
             self._write_config_file(self.write_config_file.value)
             sys.exit(0)
 
+    def as_dict(self):
+        """
+        Return a plain dict mapping each config item name to its current value.
+        """
+        return {name: getattr(self, name).value for name in config_items()}
+
+    def snapshot(self, **overrides):
+        """
+        Return an immutable ConfigSnapshot of the current values, with any
+        keyword overrides applied. See ConfigSnapshot.
+        """
+        return ConfigSnapshot(self.as_dict(), start_time=self.start_time).replace(
+            **overrides
+        )
+
     def _safe_config_set(self, config_section, param_name, config_item):
         """
         Safely set a config value from config file, falling back to default if empty or invalid
@@ -1561,16 +2042,9 @@ class RideHailConfig:
                 self.mean_trip_distance.value = new_mean
                 self.mean_trip_distance.explicitly_set = True
 
-        # Iterate through all attributes to find ConfigItems for this section
-        for attr_name in dir(self):
-            # Skip private/protected attributes and methods
-            if attr_name.startswith("_") or callable(getattr(self, attr_name)):
-                continue
-
-            attr = getattr(self, attr_name)
-
-            # Check if this is a ConfigItem that belongs to this section
-            if isinstance(attr, ConfigItem) and attr.config_section == section_name:
+        # Iterate through all ConfigItems to find those for this section
+        for attr in config_items().values():
+            if attr.config_section == section_name:
                 # Check if this option exists in the config file
                 if config.has_option(section_name, attr.name):
                     self._safe_config_set(config_section, attr.name, attr)
@@ -1581,18 +2055,16 @@ class RideHailConfig:
         """
         validation_errors = []
 
-        for attr in dir(self):
-            option = getattr(self, attr)
-            if isinstance(option, ConfigItem):
-                # Re-validate with full config context for dependency checking
-                is_valid, validated_value, error_message = option.validate_value(
-                    option.value, self
-                )
-                if not is_valid:
-                    validation_errors.append(f"{option.name}: {error_message}")
-                else:
-                    # Update with validated value (might have been corrected)
-                    option.value = validated_value
+        for option in config_items().values():
+            # Re-validate with full config context for dependency checking
+            is_valid, validated_value, error_message = option.validate_value(
+                option.value, self
+            )
+            if not is_valid:
+                validation_errors.append(f"{option.name}: {error_message}")
+            else:
+                # Update with validated value (might have been corrected)
+                option.value = validated_value
 
         if validation_errors:
             error_msg = "Configuration validation failed:\n" + "\n".join(
@@ -1655,6 +2127,8 @@ class RideHailConfig:
             self._set_equilibration_section_options(config)
         if self.run_sequence.value and config.has_section("SEQUENCE"):
             self._set_sequence_section_options(config)
+        if config.has_section("CALIBRATION"):
+            self._set_calibration_section_options(config)
         if config.has_section("IMPULSES"):
             self._set_impulses_section_options(config)
         if config.has_section("CITY_SCALE"):
@@ -1698,6 +2172,14 @@ class RideHailConfig:
         """
         self._load_config_section(config, "SEQUENCE")
 
+    def _set_calibration_section_options(self, config):
+        """
+        Load all CALIBRATION section options using introspection.
+
+        Uses the generic _load_config_section() helper.
+        """
+        self._load_config_section(config, "CALIBRATION")
+
     def _set_impulses_section_options(self, config):
         """
         Load IMPULSES section with special handling for impulse_list.
@@ -1786,52 +2268,9 @@ class RideHailConfig:
         """
         For options that are supposed to be enum values, make them so.
         """
-        # Set the equilibration value to an enum
-        if not isinstance(self.equilibration.value, Equilibration):
-            for eq_option in list(Equilibration):
-                if self.equilibration.value.lower()[0:2] == eq_option.name.lower()[0:2]:
-                    self.equilibration.value = eq_option
-                    break
-            if self.equilibration.value not in list(Equilibration):
-                logging.error(
-                    "equilibration must start with n[one], p[rice], or w[ait_fraction]"
-                )
-
-        # set animation style to an enum
-        if not isinstance(self.animation.value, Animation):
-            for animation in list(Animation):
-                if (
-                    self.animation.value.lower().strip()
-                    == animation.value.lower().strip()
-                ):
-                    self.animation.value = animation
-                    break
-            if self.animation.value not in list(Animation):
-                self.animation.value = Animation.NONE
-
-        # set dispatch method to an enum
-        if not isinstance(self.dispatch_method.value, DispatchMethod):
-            for dispatch_method in list(DispatchMethod):
-                if (
-                    self.dispatch_method.value.lower()[0:2]
-                    == dispatch_method.value.lower()[0:2]
-                ):
-                    self.dispatch_method.value = dispatch_method
-                    break
-            if self.dispatch_method.value not in list(DispatchMethod):
-                self.dispatch_method.value = DispatchMethod.DEFAULT
-
-        # set trip distance distribution to an enum
-        if not isinstance(self.trip_distance_distribution.value, TripDistribution):
-            for trip_distance_distribution in list(TripDistribution):
-                if (
-                    self.trip_distance_distribution.value.lower().strip()
-                    == trip_distance_distribution.value.lower().strip()
-                ):
-                    self.trip_distance_distribution.value = trip_distance_distribution
-                    break
-            if self.trip_distance_distribution.value not in list(TripDistribution):
-                self.trip_distance_distribution.value = TripDistribution.UNIFORM
+        for name in ENUM_CONFIG_ITEMS:
+            item = getattr(self, name)
+            item.value = _to_enum(name, item.value)
 
     def _set_parameter_defaults(self):
         """
@@ -1896,6 +2335,7 @@ class RideHailConfig:
             "ANIMATION",
             "EQUILIBRATION",
             "SEQUENCE",
+            "CALIBRATION",
             "IMPULSES",
             "CITY_SCALE",
             "ADVANCED_DISPATCH",
@@ -2128,6 +2568,9 @@ class RideHailConfig:
             "SIM_TIMESTAMP",
             "SIM_RIDEHAIL_VERSION",
             "SIM_DURATION_SECONDS",
+            # Written only for replicates (see ridehail/replicates.py)
+            "SIM_REPLICATES",
+            "SIM_REPLICATE_ENGINE",
             Measure.SIM_BLOCKS_SIMULATED.name,
             Measure.SIM_BLOCKS_ANALYZED.name,
         ]
@@ -2206,6 +2649,7 @@ class RideHailConfig:
             ("ANIMATION", "Animation Options"),
             ("EQUILIBRATION", "Equilibration Options"),
             ("SEQUENCE", "Sequence Options"),
+            ("CALIBRATION", "Calibration Options"),
             ("CITY_SCALE", "City Scale Options"),
             ("ADVANCED_DISPATCH", "Advanced Dispatch Options"),
         ]
@@ -2295,6 +2739,171 @@ class RideHailConfig:
         return parser
 
 
+@functools.cache
+def config_items():
+    """
+    Return a dict mapping each RideHailConfig ConfigItem name to the item,
+    in the same (alphabetical) order as dir().
+
+    ConfigItems are class attributes, so the map is built once and shared,
+    rather than walking dir() each time a config or simulation is created.
+    """
+    return {
+        name: attr
+        for name, attr in sorted(vars(RideHailConfig).items())
+        if isinstance(attr, ConfigItem)
+    }
+
+
+# Read-only stand-in for a ConfigItem, so that code written against
+# RideHailConfig (config.city_size.value, config.city_size.default) also
+# works with a ConfigSnapshot.
+ConfigValue = namedtuple("ConfigValue", ["value", "default"])
+
+# Parameters whose default is computed from other parameters when they are
+# missing or None (see RideHailConfig._set_parameter_defaults)
+SMART_DEFAULT_ITEMS = ("mean_trip_distance", "base_demand")
+
+
+class ConfigSnapshot:
+    """
+    An immutable, dict-backed set of configuration values.
+
+    RideHailConfig reads the command line and a config file, and validates
+    every item each time it is created. Programmatic callers (the web worker,
+    sequences, scripts that run many short simulations) can instead build a
+    ConfigSnapshot from a plain mapping, derive variants cheaply with
+    replace(), and pass it straight to RideHailSimulation:
+
+        base = ConfigSnapshot.from_mapping({"city_size": 8, "vehicle_count": 6})
+        for vehicle_count in range(4, 12):
+            sim = RideHailSimulation(base.replace(vehicle_count=vehicle_count))
+
+    Only supplied values are validated; defaults are taken as they are.
+    Values are read as attributes with a .value, just like RideHailConfig
+    items (snapshot.city_size.value), or by key (snapshot["city_size"]).
+    """
+
+    __slots__ = ("_values", "start_time", "_derived")
+
+    def __init__(self, values, start_time=None, derived=()):
+        object.__setattr__(self, "_values", dict(values))
+        object.__setattr__(
+            self,
+            "start_time",
+            start_time or f"{datetime.now().strftime('%Y-%m-%d-%H-%M')}",
+        )
+        # The smart-default items that were not supplied, and so follow the
+        # values they are derived from
+        object.__setattr__(self, "_derived", frozenset(derived))
+
+    @classmethod
+    def from_mapping(cls, mapping=None, **overrides):
+        """
+        Create a snapshot from default values, updated by mapping and then by
+        keyword overrides. Parameters with a smart default (mean_trip_distance,
+        base_demand) get it if they are not supplied, or are supplied as None,
+        and keep following it through replace().
+
+        Raises:
+            ConfigValidationError: for an unknown parameter or an invalid value
+        """
+        supplied = {**(mapping or {}), **overrides}
+        for name in SMART_DEFAULT_ITEMS:
+            if name in supplied and supplied[name] is None:
+                del supplied[name]
+        values = {name: item.default for name, item in config_items().items()}
+        derived = [name for name in SMART_DEFAULT_ITEMS if name not in supplied]
+        snapshot = cls(values, derived=derived)
+        snapshot._update(supplied)
+        values = snapshot._values
+        for name in ENUM_CONFIG_ITEMS:
+            values[name] = _to_enum(name, values[name])
+        return snapshot
+
+    def replace(self, **overrides):
+        """
+        Return a new snapshot with the given values replaced. The values
+        dict is copied, not the config items, so this is cheap.
+        """
+        overrides = dict(overrides)
+        derived = set(self._derived)
+        for name in SMART_DEFAULT_ITEMS:
+            if name in overrides:
+                if overrides[name] is None:
+                    del overrides[name]
+                    derived.add(name)
+                else:
+                    derived.discard(name)
+        snapshot = ConfigSnapshot(
+            self._values, start_time=self.start_time, derived=derived
+        )
+        snapshot._update(overrides)
+        return snapshot
+
+    def as_dict(self):
+        """
+        Return a plain dict mapping each config item name to its value.
+        """
+        return dict(self._values)
+
+    def _update(self, supplied):
+        """
+        Validate supplied values (in config item order, so that city_size is
+        settled before mean_trip_distance is checked against it) and store
+        them, then recompute the smart defaults that were not supplied. Only
+        used while a new snapshot is being built.
+        """
+        items = config_items()
+        for name in supplied:
+            if name not in items:
+                raise ConfigValidationError(name, "unknown configuration parameter")
+        for name, item in items.items():
+            if name not in supplied:
+                continue
+            value = supplied[name]
+            if name in ENUM_CONFIG_ITEMS:
+                value = _to_enum(name, value)
+            is_valid, validated_value, error_message = item.validate_value(
+                value, self
+            )
+            if not is_valid:
+                raise ConfigValidationError(name, error_message)
+            self._values[name] = validated_value
+        # Smart defaults, as in RideHailConfig._set_parameter_defaults, for
+        # the items that were not supplied
+        values = self._values
+        if "mean_trip_distance" in self._derived:
+            values["mean_trip_distance"] = values["city_size"] // 2
+        if "base_demand" in self._derived:
+            values["base_demand"] = values["vehicle_count"] / values["city_size"]
+
+    def __getattr__(self, name):
+        try:
+            return ConfigValue(self._values[name], config_items()[name].default)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ConfigSnapshot is immutable: use replace()")
+
+    def __reduce__(self):
+        # Pickle/deepcopy through __init__, as __setattr__ is disabled
+        return (ConfigSnapshot, (self._values, self.start_time, self._derived))
+
+    def __repr__(self):
+        return f"ConfigSnapshot({self._values!r})"
+
+    # Writing a [RESULTS] section only reads config values, so a snapshot
+    # can share RideHailConfig's implementation.
+    write_results_section = RideHailConfig.write_results_section
+    _remove_results_section = RideHailConfig._remove_results_section
+    _format_results_section = RideHailConfig._format_results_section
+
+
 class WritableConfig:
     def __init__(self, config):
         """
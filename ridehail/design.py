@@ -0,0 +1,255 @@
+"""
+Experimental designs for sequences: the points at which the swept
+parameters are simulated, and a response surface fitted to the results.
+
+A grid design simulates every combination of the swept values, so its size
+multiplies with each parameter swept. The space-filling designs instead
+spread a fixed number of points over the same box:
+
+- latin_hypercube: each parameter's range is split into as many equal strata
+  as there are points, each stratum holds one point, and the strata of the
+  parameters are paired at random.
+- sobol: the first points of the (unscrambled) Sobol low-discrepancy
+  sequence, which fill the box evenly however many are taken; powers of two
+  are the most even.
+
+refine() adds points where the results change most steeply between
+neighbouring points, and select() picks out points to simulate again: at
+the ends of those steep stretches, and spread out. ResponseSurface fits a
+quadratic to the results, which can be evaluated on a grid for plotting,
+and fit_correction() relates results simulated at two fidelities.
+
+Points are held in the unit cube, one coordinate for each swept parameter;
+RideHailSimulationSequence maps them onto the parameter ranges.
+"""
+
+import itertools
+
+import numpy as np
+
+# The Sobol direction numbers of Joe and Kuo for the dimensions after the
+# first: the degree s and coefficients a of a primitive polynomial, and the
+# initial direction numbers m
+SOBOL_DIRECTIONS = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+)
+SOBOL_BITS = 30
+
+
+def latin_hypercube(count, dimensions, rng=None):
+    """count points of a Latin hypercube in the unit cube"""
+    rng = np.random.default_rng(rng)
+    points = (np.arange(count)[:, None] + rng.random((count, dimensions))) / count
+    for dimension in range(dimensions):
+        points[:, dimension] = rng.permutation(points[:, dimension])
+    return points
+
+
+def _sobol_directions(dimension):
+    """The direction numbers of a dimension, scaled by 2**SOBOL_BITS"""
+    if dimension == 0:
+        return [1 << (SOBOL_BITS - bit) for bit in range(1, SOBOL_BITS + 1)]
+    degree, coefficients, initial = SOBOL_DIRECTIONS[dimension - 1]
+    directions = [m << (SOBOL_BITS - bit) for bit, m in enumerate(initial, start=1)]
+    for bit in range(degree, SOBOL_BITS):
+        direction = directions[bit - degree]
+        direction ^= direction >> degree
+        for term in range(1, degree):
+            if (coefficients >> (degree - 1 - term)) & 1:
+                direction ^= directions[bit - term]
+        directions.append(direction)
+    return directions
+
+
+def sobol(count, dimensions):
+    """The first count points of the Sobol sequence in the unit cube"""
+    if dimensions > len(SOBOL_DIRECTIONS) + 1:
+        raise ValueError(
+            f"Sobol designs have at most {len(SOBOL_DIRECTIONS) + 1} dimensions"
+        )
+    directions = [_sobol_directions(dimension) for dimension in range(dimensions)]
+    points = np.zeros((count, dimensions))
+    state = [0] * dimensions
+    for index in range(1, count):
+        # Gray code order: flip the direction of the lowest zero bit
+        bit = ((index - 1) ^ index).bit_length() - 1
+        for dimension in range(dimensions):
+            state[dimension] ^= directions[dimension][bit]
+            points[index, dimension] = state[dimension] / (1 << SOBOL_BITS)
+    return points
+
+
+def _steepest_pairs(points, values):
+    """
+    The pairs of indexes of neighbouring points with known values, the pair
+    between which the responses change most steeply first
+    """
+    known = np.flatnonzero(~np.isnan(values).any(axis=1))
+    if len(known) < 2:
+        return []
+    # Each point's nearest neighbours, two for each dimension
+    neighbours = min(2 * points.shape[1], len(known) - 1)
+    distances = np.linalg.norm(
+        points[known, None, :] - points[None, known, :], axis=-1
+    )
+    np.fill_diagonal(distances, np.inf)
+    pairs = set()
+    for index, row in enumerate(distances):
+        for neighbour in np.argsort(row)[:neighbours]:
+            pairs.add((min(index, neighbour), max(index, neighbour)))
+    # The steepest: the largest change in a response per unit distance
+    pairs = sorted(
+        pairs,
+        key=lambda pair: (
+            np.abs(values[known[pair[0]]] - values[known[pair[1]]]).max()
+            / distances[pair]
+        ),
+        reverse=True,
+    )
+    return [(known[first], known[second]) for first, second in pairs]
+
+
+def refine(points, values, count):
+    """
+    Up to count new points, at the midpoints of the pairs of neighbouring
+    points between which the responses change most steeply.
+
+    Args:
+        points: An (n, d) array of points in the unit cube.
+        values: An (n, k) array of the k responses at each point, each
+            scaled so that their changes are comparable. Points with a
+            missing (NaN) response are left out.
+        count: The number of points to add.
+    """
+    points = np.asarray(points, dtype=float)
+    values = np.asarray(values, dtype=float).reshape(len(points), -1)
+    new_points = []
+    for first, second in _steepest_pairs(points, values):
+        if len(new_points) >= count:
+            break
+        midpoint = (points[first] + points[second]) / 2
+        if any(np.allclose(midpoint, point) for point in new_points):
+            continue
+        new_points.append(midpoint)
+    return np.array(new_points).reshape(-1, points.shape[1])
+
+
+def select(points, values, count):
+    """
+    The indexes of up to count of the points worth simulating again more
+    carefully. Half are at the ends of the pairs of neighbouring points
+    between which the responses change most steeply; the rest are spread
+    out, each as far as possible from those already chosen, so that a
+    correction fitted to the chosen points covers the whole design.
+    Arguments are as for refine().
+    """
+    points = np.asarray(points, dtype=float)
+    values = np.asarray(values, dtype=float).reshape(len(points), -1)
+    selected = []
+    for pair in _steepest_pairs(points, values):
+        for index in pair:
+            if index not in selected and len(selected) < (count + 1) // 2:
+                selected.append(int(index))
+    known = np.flatnonzero(~np.isnan(values).any(axis=1))
+    while known.size and len(selected) < min(count, known.size):
+        if selected:
+            distances = np.linalg.norm(
+                points[known, None, :] - points[None, selected, :], axis=-1
+            ).min(axis=1)
+        else:
+            distances = np.zeros(known.size)
+        distances[np.isin(known, selected)] = -1
+        selected.append(int(known[np.argmax(distances)]))
+    return sorted(selected)
+
+
+def fit_correction(low, high):
+    """
+    The (intercept, slope) of the straight line through the pairs of low
+    and high fidelity values of a result, fitted by least squares, that
+    corrects a low fidelity value to a high fidelity one. With too few
+    distinct low fidelity values to fit a slope, the slope is 1 and only
+    the mean difference is corrected. Missing (NaN) values are left out.
+    """
+    low = np.asarray(low, dtype=float)
+    high = np.asarray(high, dtype=float)
+    known = ~(np.isnan(low) | np.isnan(high))
+    low, high = low[known], high[known]
+    if len(low) == 0:
+        return 0.0, 1.0
+    if len(low) < 3 or np.ptp(low) == 0:
+        return float((high - low).mean()), 1.0
+    slope, intercept = np.polyfit(low, high, 1)
+    return float(intercept), float(slope)
+
+
+class ResponseSurface:
+    """
+    A quadratic response surface, fitted by least squares to the values of
+    a result at points of the unit cube. Missing (NaN) values are left out.
+    """
+
+    def __init__(self, points, values):
+        points = np.asarray(points, dtype=float)
+        values = np.asarray(values, dtype=float)
+        known = ~np.isnan(values)
+        self.dimensions = points.shape[1]
+        features = self._features(points[known])
+        self.coefficients, *_ = np.linalg.lstsq(features, values[known], rcond=None)
+        residuals = values[known] - features @ self.coefficients
+        spread = ((values[known] - values[known].mean()) ** 2).sum()
+        self.r_squared = (
+            1 - (residuals**2).sum() / spread if spread > 0 else float("nan")
+        )
+
+    def _features(self, points):
+        """The constant, linear and quadratic terms of each point"""
+        columns = [np.ones(len(points))]
+        columns.extend(points[:, index] for index in range(self.dimensions))
+        columns.extend(
+            points[:, first] * points[:, second]
+            for first, second in itertools.combinations_with_replacement(
+                range(self.dimensions), 2
+            )
+        )
+        return np.column_stack(columns)
+
+    def terms(self, names):
+        """
+        The name of the term each coefficient multiplies, given the names of
+        the dimensions: "1", each name, then each product of two names
+        """
+        return [
+            "1",
+            *names,
+            *(
+                f"{first}*{second}"
+                for first, second in itertools.combinations_with_replacement(
+                    names, 2
+                )
+            ),
+        ]
+
+    def __call__(self, points):
+        """The fitted values at an (n, d) array of points"""
+        points = np.asarray(points, dtype=float).reshape(-1, self.dimensions)
+        return self._features(points) @ self.coefficients
+
+    def grid(self, axes=(0, 1), resolution=50, fixed=0.5):
+        """
+        The fitted values on a grid over two dimensions of the unit cube,
+        with the others held at fixed, for contour plots: the coordinates of
+        each axis and a (resolution, resolution) array of values.
+        """
+        axis = np.linspace(0, 1, resolution)
+        first, second = np.meshgrid(axis, axis, indexing="ij")
+        points = np.full((resolution * resolution, self.dimensions), fixed)
+        points[:, axes[0]] = first.ravel()
+        points[:, axes[1]] = second.ravel()
+        return axis, axis, self(points).reshape(resolution, resolution)
@@ -11,15 +11,22 @@ class Dispatch:
     """
 
     def __init__(
-        self, dispatch_method=DispatchMethod.DEFAULT, forward_dispatch_bias=0.0
+        self,
+        dispatch_method=DispatchMethod.DEFAULT,
+        forward_dispatch_bias=0.0,
+        rng=random,
     ):
         self.dispatch_method = dispatch_method
         self.forward_dispatch_bias = forward_dispatch_bias
+        # The dispatch stream: shuffles and tie-breaking choices
+        self.rng = rng
 
     def dispatch_vehicles(self, unassigned_trips, city, vehicles):
         """
         All trips without an assigned vehicle make a request.
         Dispatch a vehicle to each trip.
+        Returns a list of (trip, vehicle) pairs, one for each trip that was
+        dispatched.
         """
         dispatcher = self._get_dispatch_function()
         return dispatcher(unassigned_trips, city, vehicles)
@@ -77,29 +84,34 @@ class Dispatch:
         dispatchable_vehicles_list = [
             vehicle for vehicle in vehicles if vehicle.phase == VehiclePhase.P1
         ]
-        random.shuffle(dispatchable_vehicles_list)
-
+        self.rng.shuffle(dispatchable_vehicles_list)
+        dispatched = []
         if self._use_sparse_search(
             len(unassigned_trips), len(dispatchable_vehicles_list), city.city_size
         ):
             # Use vehicle-loop algorithm (like p1_legacy but with early termination)
             for trip in unassigned_trips:
-                self._dispatch_vehicle_sparse(
+                vehicle = self._dispatch_vehicle_sparse(
                     trip, city, dispatchable_vehicles_list, vehicles
                 )
+                if vehicle:
+                    dispatched.append((trip, vehicle))
         else:
             # Use location-ring algorithm.
             # Convert to set for O(1) membership testing and removal
             dispatchable_vehicles_set = set(dispatchable_vehicles_list)
             vehicles_at_location = self._build_location_grid(dispatchable_vehicles_list)
             for trip in unassigned_trips:
-                self._dispatch_vehicle_dense(
+                vehicle = self._dispatch_vehicle_dense(
                     trip,
                     city,
                     vehicles_at_location,
                     dispatchable_vehicles_set,
                     vehicles,
                 )
+                if vehicle:
+                    dispatched.append((trip, vehicle))
+        return dispatched
 
     def _dispatch_vehicles_forward_dispatch(self, unassigned_trips, city, vehicles):
         dispatchable_vehicles = [
@@ -113,12 +125,16 @@ class Dispatch:
                 )
             )
         ]
-        random.shuffle(dispatchable_vehicles)
+        self.rng.shuffle(dispatchable_vehicles)
         vehicles_at_location = self._build_location_grid(dispatchable_vehicles)
+        dispatched = []
         for trip in unassigned_trips:
-            self._dispatch_vehicle_forward_dispatch(
+            vehicle = self._dispatch_vehicle_forward_dispatch(
                 trip, city, vehicles_at_location, dispatchable_vehicles, vehicles
             )
+            if vehicle:
+                dispatched.append((trip, vehicle))
+        return dispatched
 
     @staticmethod
     def _build_location_grid(dispatchable_vehicles):
@@ -142,19 +158,29 @@ class Dispatch:
         dispatchable_vehicles = [
             vehicle for vehicle in vehicles if vehicle.phase == VehiclePhase.P1
         ]
-        random.shuffle(dispatchable_vehicles)
+        self.rng.shuffle(dispatchable_vehicles)
+        dispatched = []
         for trip in unassigned_trips:
-            self._dispatch_vehicle_p1_legacy(
+            vehicle = self._dispatch_vehicle_p1_legacy(
                 trip, city, dispatchable_vehicles, vehicles
             )
+            if vehicle:
+                dispatched.append((trip, vehicle))
+        return dispatched
 
     def _dispatch_vehicles_random(self, unassigned_trips, city, vehicles):
         dispatchable_vehicles = [
             vehicle for vehicle in vehicles if vehicle.phase == VehiclePhase.P1
         ]
-        random.shuffle(dispatchable_vehicles)
+        self.rng.shuffle(dispatchable_vehicles)
+        dispatched = []
         for trip in unassigned_trips:
-            self._dispatch_vehicle_random(dispatchable_vehicles, vehicles)
+            vehicle = self._dispatch_vehicle_random(
+                trip, dispatchable_vehicles, vehicles
+            )
+            if vehicle:
+                dispatched.append((trip, vehicle))
+        return dispatched
 
     def _dispatch_vehicle_sparse(
         self, trip, city, dispatchable_vehicles_list, vehicles
@@ -233,10 +259,9 @@ class Dispatch:
                     if not cell:
                         continue
                     for vehicle_index in cell:
-                        try:
-                            vehicle = vehicles[vehicle_index]
-                        except IndexError:
-                            continue
+                        # The grid is built from the fleet on each call, so
+                        # every id in it is current: a stale id raises
+                        vehicle = vehicles[vehicle_index]
                         # O(1) set membership check instead of O(n) list search
                         if vehicle not in dispatchable_vehicles_set:
                             continue
@@ -262,7 +287,7 @@ class Dispatch:
         # Select a vehicle at random from the candidate list and return it
         if len(current_candidate_vehicle_indexes) > 0:
             dispatch_vehicle = vehicles[
-                random.choice(current_candidate_vehicle_indexes)
+                self.rng.choice(current_candidate_vehicle_indexes)
             ]
             # As a vehicle has been dispatched, the trip phase now changes to WAITING
             trip.update_phase(to_phase=TripPhase.WAITING)
@@ -305,10 +330,9 @@ class Dispatch:
                     if not cell:
                         continue
                     for vehicle_index in cell:
-                        try:
-                            vehicle = vehicles[vehicle_index]
-                        except IndexError:
-                            continue
+                        # The grid is built from the fleet on each call, so
+                        # every id in it is current: a stale id raises
+                        vehicle = vehicles[vehicle_index]
                         dispatch_distance = city.dispatch_distance(
                             location_from=vehicle.location,
                             current_direction=vehicle.direction,
@@ -334,7 +358,7 @@ class Dispatch:
         # Select a vehicle at random from the candidate list and return it
         if len(current_candidate_vehicle_indexes) > 0:
             dispatch_vehicle = vehicles[
-                random.choice(current_candidate_vehicle_indexes)
+                self.rng.choice(current_candidate_vehicle_indexes)
             ]
             # As a vehicle has been dispatched, the trip phase now changes to WAITING
             trip.update_phase(to_phase=TripPhase.WAITING)
@@ -400,7 +424,7 @@ class Dispatch:
         Dispatch a vehicle by choosing one at random from the list of p1 vehicles.
         """
         if len(dispatchable_vehicles) > 0:
-            dispatch_vehicle = random.choice(dispatchable_vehicles)
+            dispatch_vehicle = self.rng.choice(dispatchable_vehicles)
         else:
             dispatch_vehicle = None
         if dispatch_vehicle:
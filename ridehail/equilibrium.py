@@ -0,0 +1,247 @@
+"""
+A direct solver for the fleet size at which PRICE or WAIT_FRACTION
+equilibration settles.
+
+The usual equilibration (RideHailSimulation._equilibrate_supply) walks the
+fleet towards equilibrium in damped steps of no more than a tenth of the
+fleet, each driven by a few blocks of measurements, so that a fleet far
+from equilibrium, or a noisy one near it, can take thousands of blocks to
+settle. EquilibriumSolver instead treats the equilibrium as the root of a
+residual that falls as the fleet grows:
+
+- PRICE: the vehicle utility, price * (1 - platform_commission) * P3 less
+  the reservation wage.
+- WAIT_FRACTION: the wait fraction W / (W + L) less its target.
+
+It holds the fleet at one size for a segment of blocks, lets it settle for
+the first part, measures the residual over the rest (only until it is
+clearly not zero, in a large city), and moves the fleet straight to the
+next estimate of the root. The estimates are secant steps in x = 1 / N:
+with the number of busy vehicles fixed by demand (N * P3 = R * L), P3 is
+proportional to 1 / N, so the PRICE residual is linear in x and its root is
+found in a single step. An infinite fleet (x = 0) is never busy and never
+keeps anyone waiting, so its residual is known without measurement (minus
+the reservation wage, or minus the target wait fraction): it is the other
+point of the secant until a residual of each sign has been measured, and
+one end of the interval known to hold the root. Steps that would leave
+that interval are replaced by bisection, and no step more than doubles the
+fleet or cuts it by more than a third.
+
+The solver stops when a measured residual is within noise of zero (two
+standard errors, estimated from batch means over the segment), when the
+next estimate is within a vehicle of the current fleet, or when it runs out
+of segments or of blocks before the results window. The usual equilibration
+then takes over from the solver's estimate for the rest of the run, so that
+results are still measured under the model's own dynamics.
+"""
+
+import math
+import statistics
+
+from ridehail.atom import Equilibration, History
+
+# A segment lets the fleet settle for half as many blocks as the city is
+# wide (about a mean trip), then measures for MIN_MEASURE_BLOCKS or more:
+# until the residual is clearly not zero, and for at most twice the width
+# of the city
+MIN_MEASURE_BLOCKS = 20
+# The measured blocks are split into this many batches, whose spread gives
+# the standard error of the residual
+BATCHES = 5
+# A residual within this many standard errors of zero is taken to be zero
+NOISE_LEVEL = 2.0
+MAX_SEGMENTS = 8
+# The most the fleet grows or shrinks by in one step. A fleet cut too far
+# leaves a backlog of requests that keeps waits long after it is restored,
+# so it is cut more cautiously than it is grown.
+MAX_GROWTH = 2.0
+MAX_CUT = 1.5
+
+
+class EquilibriumSolver:
+    """
+    Find the equilibrium fleet size of a simulation by root finding.
+
+    Call record() with the History values of each block. After each block,
+    vehicle_count is the fleet size the simulation should have, until done
+    is True, after which the simulation equilibrates as usual.
+    """
+
+    def __init__(
+        self,
+        equilibration,
+        vehicle_count,
+        city_size,
+        price=1.0,
+        platform_commission=0.0,
+        reservation_wage=0.0,
+        wait_fraction=0.0,
+        block_limit=None,
+    ):
+        if equilibration not in (Equilibration.PRICE, Equilibration.WAIT_FRACTION):
+            raise ValueError(f"No equilibrium solver for {equilibration}")
+        self.equilibration = equilibration
+        self.price = price
+        self.platform_commission = platform_commission
+        self.reservation_wage = reservation_wage
+        self.wait_fraction = wait_fraction
+        self.settle_blocks = city_size // 2
+        self.measure_blocks = max(2 * city_size, MIN_MEASURE_BLOCKS)
+        # The solver gives up the fleet to the usual equilibration by this
+        # block at the latest
+        self.block_limit = block_limit
+        self.vehicle_count = vehicle_count
+        self.done = False
+        self.segments = 0
+        # The (x, residual) of each measured segment, where x = 1 / N
+        self.points = []
+        # The interval of x known to hold the root: the residual is negative
+        # at low and positive at high (None until a positive one is measured)
+        self.infinite_fleet = (0.0, self._infinite_fleet_residual())
+        self.low = self.infinite_fleet
+        self.high = None
+        self._segment_block = 0
+        self._values = []
+
+    @classmethod
+    def for_simulation(cls, sim):
+        """A solver for a simulation's settings, starting from its fleet"""
+        return cls(
+            sim.equilibration,
+            len(sim.vehicles),
+            sim.city_size,
+            price=sim.price,
+            platform_commission=sim.platform_commission,
+            reservation_wage=sim.reservation_wage,
+            wait_fraction=sim.wait_fraction,
+            block_limit=(
+                sim.time_blocks - sim.results_window if sim.time_blocks else None
+            ),
+        )
+
+    def record(self, block, values):
+        """
+        Record the History values of a block, and at the end of a segment
+        move vehicle_count to the next estimate of the equilibrium
+        """
+        if self.done:
+            return
+        self._segment_block += 1
+        if self._segment_block <= self.settle_blocks:
+            return
+        self._values.append(values)
+        measured = len(self._values)
+        if measured < self.measure_blocks and not (
+            measured >= MIN_MEASURE_BLOCKS
+            and measured % BATCHES == 0
+            and self._significant(self._values)
+        ):
+            return
+        self._end_segment(block)
+
+    def _end_segment(self, block):
+        values, self._values = self._values, []
+        self._segment_block = 0
+        self.segments += 1
+        residual = self._residual(values)
+        vehicle_count = statistics.fmean(
+            value[History.VEHICLE_COUNT] for value in values
+        )
+        if residual is None or vehicle_count <= 0:
+            # No trips were completed: nothing to go on
+            self.done = True
+            return
+        x = 1 / vehicle_count
+        self.points.append((x, residual))
+        if residual < 0:
+            self.low = max(self.low, (x, residual))
+        elif self.high is None or x < self.high[0]:
+            self.high = (x, residual)
+        estimate = round(1 / self._next_x(x, residual))
+        estimate = max(1, estimate)
+        if not self._significant(values):
+            # Within noise of equilibrium: stay
+            self.done = True
+            return
+        self.vehicle_count = estimate
+        remaining = None if self.block_limit is None else self.block_limit - block
+        if (
+            abs(estimate - vehicle_count) <= 1
+            or self.segments >= MAX_SEGMENTS
+            or (
+                remaining is not None
+                and remaining < self.settle_blocks + self.measure_blocks
+            )
+        ):
+            self.done = True
+
+    def _next_x(self, x, residual):
+        """
+        The secant estimate of the root: through the other end of the
+        interval known to hold it once both ends have been measured, and
+        through the infinite fleet before that. A step that leaves the
+        interval, or that grows or cuts the fleet by more than MAX_GROWTH or
+        MAX_CUT, is replaced by bisection (in log N) or by the largest step.
+        """
+        if residual > 0:
+            other_x, other_residual = self.low
+        elif self.high is not None:
+            other_x, other_residual = self.high
+        else:
+            other_x, other_residual = self.infinite_fleet
+        if residual != other_residual:
+            root = x - residual * (x - other_x) / (residual - other_residual)
+        else:
+            root = math.nan
+        low_x = self.low[0]
+        high_x = self.high[0] if self.high else math.inf
+        if not low_x < root < high_x:
+            if low_x > 0 and high_x < math.inf:
+                root = math.sqrt(low_x * high_x)
+            else:
+                root = x / MAX_GROWTH if residual > 0 else MAX_CUT * x
+        return min(max(root, x / MAX_GROWTH), MAX_CUT * x)
+
+    def _infinite_fleet_residual(self):
+        if self.equilibration == Equilibration.PRICE:
+            return -self.reservation_wage
+        return -self.wait_fraction
+
+    def _residual(self, values):
+        """The residual over a list of blocks' History values, or None"""
+        if self.equilibration == Equilibration.PRICE:
+            vehicle_time = sum(value[History.VEHICLE_TIME] for value in values)
+            if vehicle_time <= 0:
+                return None
+            busy_fraction = (
+                sum(value[History.VEHICLE_TIME_P3] for value in values) / vehicle_time
+            )
+            return (
+                self.price * (1 - self.platform_commission) * busy_fraction
+                - self.reservation_wage
+            )
+        wait_time = sum(value[History.TRIP_WAIT_TIME] for value in values)
+        distance = sum(value[History.TRIP_DISTANCE] for value in values)
+        if wait_time + distance <= 0:
+            return None
+        return wait_time / (wait_time + distance) - self.wait_fraction
+
+    def _significant(self, values):
+        """True if the residual over values is clearly not zero"""
+        residual = self._residual(values)
+        return residual is not None and abs(
+            residual
+        ) >= NOISE_LEVEL * self._standard_error(values)
+
+    def _standard_error(self, values):
+        """The standard error of the residual, from batch means"""
+        size = len(values) // BATCHES
+        residuals = [
+            self._residual(values[index * size : (index + 1) * size])
+            for index in range(BATCHES)
+        ]
+        residuals = [residual for residual in residuals if residual is not None]
+        if size == 0 or len(residuals) < 2:
+            # Unknown: no residual is within noise
+            return 0.0
+        return statistics.stdev(residuals) / math.sqrt(len(residuals))
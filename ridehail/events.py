@@ -0,0 +1,83 @@
+"""
+Trip lifecycle events: a publish/subscribe hook on the changes of phase of
+trips, and of the vehicles that serve them.
+
+A trip is requested, dispatched (its vehicle goes from P1 to P2, or is
+forward dispatched while in P3), picked up (P2 to P3) and completed (P3 to
+P1), or it is cancelled while unassigned. The simulation publishes each of
+these changes as it happens, and delivers the block's events to each
+subscriber in one batch at the end of the block, so a consumer such as a
+histogram or an exporter does work in proportion to the number of events
+rather than scanning every trip, every block.
+"""
+
+import enum
+from collections import namedtuple
+
+
+class LifecycleEvent(enum.Enum):
+    TRIP_REQUESTED = "requested"
+    TRIP_DISPATCHED = "dispatched"
+    TRIP_PICKED_UP = "picked_up"
+    TRIP_COMPLETED = "completed"
+    TRIP_CANCELLED = "cancelled"
+
+
+# One change of phase. vehicle is None for requests and cancellations.
+TripEvent = namedtuple("TripEvent", ["kind", "block", "trip", "vehicle"])
+
+
+class EventBus:
+    """
+    Collect the lifecycle events of a block, and deliver them in a batch.
+
+    Subscribers are called as callback(block, events), in the order in
+    which they subscribed, with the events of the kinds they asked for in
+    the order they happened. A subscriber is not called for a block with
+    no events of its kinds. When there are no subscribers, publish() keeps
+    nothing, so an unobserved simulation pays only for a test per event.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._events = []
+
+    def subscribe(self, callback, kinds=None):
+        """
+        Call callback(block, events) at the end of each block. kinds is an
+        iterable of LifecycleEvent, or None for every kind. Returns callback,
+        so that it can be passed to unsubscribe().
+        """
+        self._subscribers.append(
+            (callback, None if kinds is None else frozenset(kinds))
+        )
+        return callback
+
+    def unsubscribe(self, callback):
+        """Stop calling callback; raise ValueError if it is not subscribed"""
+        for position, (subscriber, _) in enumerate(self._subscribers):
+            if subscriber == callback:
+                del self._subscribers[position]
+                return
+        raise ValueError(f"{callback} is not subscribed")
+
+    def publish(self, kind, block, trip, vehicle=None):
+        if self._subscribers:
+            self._events.append(TripEvent(kind, block, trip, vehicle))
+
+    def flush(self, block):
+        """Deliver the events published since the last flush"""
+        events, self._events = self._events, []
+        if not events:
+            return
+        for callback, kinds in list(self._subscribers):
+            if kinds is None:
+                callback(block, events)
+            else:
+                selected = [event for event in events if event.kind in kinds]
+                if selected:
+                    callback(block, selected)
+
+    def clear(self):
+        """Drop any events not yet delivered"""
+        self._events = []
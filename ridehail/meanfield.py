@@ -0,0 +1,348 @@
+"""
+A mean-field model of the steady state of a ridehail simulation.
+
+In a steady state, Little's law ties the time the fleet spends in each
+phase to the flow of trips. With N vehicles, a request rate R, a mean ride
+time L and a mean wait time W (all in blocks):
+
+    N * P3 = R * L        (the SIM_CHECK_NP3_OVER_RL check in results.py)
+    N * P2 = R * W        (the SIM_CHECK_NP2_OVER_RW check)
+    P1 = 1 - P2 - P3
+
+The model closes these identities with a wait time: each request is met by
+the nearest of the N * P1 idle vehicles, taken to be spread uniformly over
+the city, and the rider then takes pickup_time blocks to board. The number
+of idle vehicles n then follows from
+
+    N = n + R * (L + W(n))
+
+The right-hand side falls and then rises as n grows, so the equation has
+two solutions or none. The model takes the one with more idle vehicles; the
+other is the "wild goose chase", in which vehicles spend so long reaching
+distant riders that few are ever idle. With no solution the idle vehicles
+cannot keep up with demand: the fleet saturates (P1 -> 0), wait times grow
+without limit, and the configuration is infeasible.
+
+Equilibration fixes a different quantity, from which the fleet follows:
+
+- PRICE: vehicles enter until vehicle_utility is zero, which fixes
+  P3 = reservation_wage / (price * (1 - platform_commission)), and so
+  N = R * L / P3, whatever the wait time. If the idle vehicles of that
+  fleet cannot keep up with demand, the model takes it to be saturated,
+  with P1 = 0 and the rest of its time in P2.
+- WAIT_FRACTION: vehicles enter until W / (W + L) is wait_fraction, which
+  fixes W, and so the number of idle vehicles.
+
+The model assumes a homogeneous city and the default dispatch, and leaves
+out the fluctuations of a simulation, so it is a first estimate rather than
+a result: inhomogeneity, in particular, lengthens waits beyond what it
+predicts. It is used to start equilibration at the predicted fleet size
+(mean_field_start), to skip infeasible configurations in a sequence
+(skip_infeasible), and to report, in the end state of a simulation, how far
+the simulation is from it.
+"""
+
+import math
+
+from ridehail.atom import Equilibration, Measure, TripDistribution
+
+# The measures the model predicts, in end-state order
+MEAN_FIELD_MEASURES = (
+    Measure.VEHICLE_MEAN_COUNT,
+    Measure.VEHICLE_FRACTION_P1,
+    Measure.VEHICLE_FRACTION_P2,
+    Measure.VEHICLE_FRACTION_P3,
+    Measure.TRIP_MEAN_REQUEST_RATE,
+    Measure.TRIP_MEAN_WAIT_TIME,
+    Measure.TRIP_MEAN_RIDE_TIME,
+    Measure.TRIP_MEAN_WAIT_FRACTION_TOTAL,
+)
+# Iterations of the golden-section and bisection searches, each of which
+# narrows the interval by at least a factor of 1.6
+SEARCH_ITERATIONS = 60
+# Near the edge of feasibility the model is a few percent out either way, so
+# a configuration counts as infeasible only if a fleet this much larger
+# would be too
+INFEASIBLE_MARGIN = 0.1
+
+
+def _axis_distance_distribution(city_size, offsets):
+    """
+    The distribution of the distance along one axis of the torus, for
+    offsets (from the origin) that are equally likely
+    """
+    counts = {}
+    for offset in offsets:
+        coordinate = int(offset % city_size)
+        component = min(coordinate, city_size - coordinate)
+        counts[component] = counts.get(component, 0) + 1
+    total = sum(counts.values())
+    return {component: count / total for component, count in counts.items()}
+
+
+def mean_ride_time(
+    city_size,
+    mean_trip_distance=None,
+    min_trip_distance=0,
+    trip_distance_distribution=TripDistribution.UNIFORM,
+):
+    """
+    The expected trip distance, and so ride time in blocks, of the trips
+    that Trip draws for these settings.
+    """
+    mean = mean_trip_distance or city_size // 2
+    if trip_distance_distribution == TripDistribution.UNIFORM:
+        # As Trip._set_destination_uniform: the two axis offsets are
+        # independent, and a destination at the origin is drawn again
+        effective_max = min(2 * mean, city_size)
+        if effective_max >= city_size:
+            offsets = range(city_size)
+        else:
+            offsets = [
+                delta - effective_max / 2
+                for delta in range(min_trip_distance, effective_max + 1)
+            ]
+        axis = _axis_distance_distribution(city_size, offsets)
+        axis_mean = sum(component * p for component, p in axis.items())
+        return 2 * axis_mean / (1 - axis.get(0, 0.0) ** 2)
+    # As Trip._set_destination_sampled: the distance is the integer part of
+    # a draw, redrawn until it lies between min_distance and city_size
+    if trip_distance_distribution == TripDistribution.EXPONENTIAL:
+
+        def cdf(x):
+            return 1 - math.exp(-x / mean)
+
+    elif trip_distance_distribution == TripDistribution.GAMMA:
+        scale = mean / 2
+
+        def cdf(x):
+            return 1 - math.exp(-x / scale) * (1 + x / scale)
+
+    else:
+        sigma = mean / math.sqrt(math.pi / 2)
+
+        def cdf(x):
+            return 1 - math.exp(-(x**2) / (2 * sigma**2))
+
+    weights = {
+        distance: cdf(distance + 1) - cdf(distance)
+        for distance in range(max(min_trip_distance, 1), city_size + 1)
+    }
+    total = sum(weights.values())
+    if total <= 0:
+        return float(mean)
+    return sum(distance * weight for distance, weight in weights.items()) / total
+
+
+def mean_pickup_distance(idle_count, city_size):
+    """
+    The expected distance from a request to the nearest of idle_count idle
+    vehicles spread uniformly over the city.
+
+    On a square lattice of A = city_size ** 2 points, 2r^2 - 2r + 1 points
+    lie within a distance r - 1 of the request, so the nearest vehicle is
+    at least r away with probability (1 - (2r^2 - 2r + 1) / A) ** idle_count.
+    The expected distance is the sum of those probabilities.
+    """
+    area = city_size**2
+    distance = 0.0
+    for r in range(1, city_size + 1):
+        within = 2 * r * r - 2 * r + 1
+        if within >= area:
+            break
+        distance += (1 - within / area) ** idle_count
+    return distance
+
+
+def _golden_section_minimum(function, low, high):
+    """The point in [low, high] at which a convex function is smallest"""
+    ratio = (math.sqrt(5) - 1) / 2
+    for _ in range(SEARCH_ITERATIONS):
+        left = high - ratio * (high - low)
+        right = low + ratio * (high - low)
+        if function(left) <= function(right):
+            high = right
+        else:
+            low = left
+    return (low + high) / 2
+
+
+def _bisect(function, low, high):
+    """A root of function in [low, high], where it changes sign"""
+    low_sign = function(low) > 0
+    for _ in range(SEARCH_ITERATIONS):
+        middle = (low + high) / 2
+        if (function(middle) > 0) == low_sign:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+class MeanFieldModel:
+    """
+    The mean-field steady state of a configuration, from its request rate,
+    trip lengths and economics (all per block, as a simulation holds them).
+
+    The steady states are returned as dicts of Measure name to value, as in
+    the results of a simulation (see MEAN_FIELD_MEASURES), or None if the
+    configuration is infeasible.
+    """
+
+    def __init__(
+        self,
+        city_size,
+        request_rate,
+        ride_time,
+        pickup_time=0,
+        price=1.0,
+        platform_commission=0.0,
+        reservation_wage=0.0,
+        wait_fraction=0.0,
+    ):
+        self.city_size = city_size
+        self.request_rate = request_rate
+        self.ride_time = ride_time
+        self.pickup_time = pickup_time
+        self.price = price
+        self.platform_commission = platform_commission
+        self.reservation_wage = reservation_wage
+        self.wait_fraction = wait_fraction
+
+    @classmethod
+    def from_simulation(cls, sim):
+        """
+        The model of a simulation's current settings, after any city-scale
+        conversion to blocks (a RideHailSimulation, or a view of one)
+        """
+        return cls(
+            city_size=sim.city_size,
+            request_rate=sim.request_rate,
+            ride_time=mean_ride_time(
+                sim.city_size,
+                sim.mean_trip_distance,
+                sim.min_trip_distance,
+                sim.trip_distance_distribution,
+            ),
+            pickup_time=sim.pickup_time,
+            price=sim.price,
+            platform_commission=sim.platform_commission,
+            reservation_wage=sim.reservation_wage,
+            wait_fraction=sim.wait_fraction,
+        )
+
+    def wait_time(self, idle_count):
+        """The mean wait of a request when idle_count vehicles are idle"""
+        return mean_pickup_distance(idle_count, self.city_size) + self.pickup_time
+
+    def steady_state(self, equilibration, vehicle_count):
+        """
+        The steady state of a simulation with this equilibration, which
+        starts with vehicle_count vehicles
+        """
+        if equilibration in (Equilibration.PRICE, Equilibration.WAIT_FRACTION):
+            return self.equilibrium(equilibration)
+        return self.fixed_fleet(vehicle_count)
+
+    def fixed_fleet(self, vehicle_count):
+        """The steady state of a fleet of vehicle_count vehicles"""
+        if vehicle_count <= 0:
+            return None
+        # The vehicles that are not carrying riders: idle, or on their way
+        # to a pickup
+        available = vehicle_count - self.request_rate * self.ride_time
+        if available <= 0:
+            return None
+        if self.request_rate <= 0:
+            return self._state(vehicle_count, available)
+
+        def excess(idle_count):
+            wait_time = self.wait_time(idle_count)
+            return idle_count + self.request_rate * wait_time - available
+
+        # excess is convex, and positive when every available vehicle is idle
+        fewest = _golden_section_minimum(excess, 0.0, available)
+        if excess(fewest) > 0:
+            return None
+        return self._state(vehicle_count, _bisect(excess, fewest, available))
+
+    def infeasible(self, vehicle_count, margin=INFEASIBLE_MARGIN):
+        """
+        True if a fleet of vehicle_count vehicles, and one margin larger,
+        cannot keep up with demand
+        """
+        return self.fixed_fleet(vehicle_count * (1 + margin)) is None
+
+    def equilibrium(self, equilibration):
+        """The steady state that the equilibration moves the fleet towards"""
+        if equilibration == Equilibration.PRICE:
+            driver_price = self.price * (1 - self.platform_commission)
+            if driver_price <= 0:
+                return None
+            busy_fraction = self.reservation_wage / driver_price
+            if not 0 < busy_fraction < 1 or self.request_rate <= 0:
+                return None
+            vehicle_count = self.request_rate * self.ride_time / busy_fraction
+            return self.fixed_fleet(vehicle_count) or self._saturated(vehicle_count)
+        if equilibration == Equilibration.WAIT_FRACTION:
+            if not 0 < self.wait_fraction < 1:
+                return None
+            wait_time = self.ride_time * self.wait_fraction / (1 - self.wait_fraction)
+            pickup_distance = wait_time - self.pickup_time
+            if pickup_distance <= 0:
+                return None
+
+            def excess(idle_count):
+                return (
+                    mean_pickup_distance(idle_count, self.city_size) - pickup_distance
+                )
+
+            if excess(0.0) <= 0:
+                idle_count = 0.0
+            else:
+                most = 1.0
+                while excess(most) > 0:
+                    most *= 2
+                idle_count = _bisect(excess, 0.0, most)
+            vehicle_count = idle_count + self.request_rate * (
+                self.ride_time + wait_time
+            )
+            return self._state(vehicle_count, idle_count)
+        return None
+
+    def _saturated(self, vehicle_count):
+        """A fleet with no idle vehicles, which serves every request"""
+        busy_count = self.request_rate * self.ride_time
+        return self._state(
+            vehicle_count, 0.0, (vehicle_count - busy_count) / self.request_rate
+        )
+
+    def _state(self, vehicle_count, idle_count, wait_time=None):
+        if wait_time is None:
+            wait_time = self.wait_time(idle_count)
+        p2 = self.request_rate * wait_time / vehicle_count
+        p3 = self.request_rate * self.ride_time / vehicle_count
+        return {
+            Measure.VEHICLE_MEAN_COUNT.name: vehicle_count,
+            Measure.VEHICLE_FRACTION_P1.name: 1 - p2 - p3,
+            Measure.VEHICLE_FRACTION_P2.name: p2,
+            Measure.VEHICLE_FRACTION_P3.name: p3,
+            Measure.TRIP_MEAN_REQUEST_RATE.name: self.request_rate,
+            Measure.TRIP_MEAN_WAIT_TIME.name: wait_time,
+            Measure.TRIP_MEAN_RIDE_TIME.name: self.ride_time,
+            Measure.TRIP_MEAN_WAIT_FRACTION_TOTAL.name: (
+                wait_time / (wait_time + self.ride_time)
+            ),
+        }
+
+
+def residuals(estimate, measures):
+    """
+    The simulated less the estimated value of each measure of a mean-field
+    estimate, for which the simulation has a value
+    """
+    return {
+        name: measures[name] - value
+        for name, value in estimate.items()
+        if isinstance(measures.get(name), (int, float))
+    }
@@ -9,8 +9,6 @@ with the returned dict afterward (live convergence tracking vs. end-of-run
 validation checks and bookkeeping fields).
 """
 
-import statistics
-
 from ridehail.atom import CityScaleUnit, DispatchMethod, History, Measure
 
 
@@ -22,8 +20,8 @@ def compute_measures(sim, history, window):
     Args:
         sim: a RideHailSimulation instance. Only read: price,
             platform_commission, dispatch_method, use_city_scale, city_size,
-            per_km_ops_cost, trip_completion_history, vehicle_utility(),
-            convert_units().
+            per_km_ops_cost, trip_wait_time_window, trip_distance_window,
+            vehicle_utility(), convert_units().
         history: dict[History, CircularBuffer] -- either sim.history_buffer
             (smoothing_window-sized, live stats) or sim.history_results
             (results_window-sized, end-of-run results).
@@ -106,13 +104,11 @@ def compute_measures(sim, history, window):
             measures[Measure.TRIP_MEAN_RIDE_TIME.name]
             + measures[Measure.TRIP_MEAN_WAIT_TIME.name]
         )
-        if sim.trip_completion_history:
-            wait_times = [w for (_, w, _) in sim.trip_completion_history]
-            distances = [d for (_, _, d) in sim.trip_completion_history]
-            measures[Measure.TRIP_MEDIAN_WAIT_TIME.name] = statistics.median(
-                wait_times
+        if len(sim.trip_wait_time_window) > 0:
+            measures[Measure.TRIP_MEDIAN_WAIT_TIME.name] = (
+                sim.trip_wait_time_window.median()
             )
-            median_ride_time = statistics.median(distances)
+            median_ride_time = sim.trip_distance_window.median()
             if median_ride_time > 0:
                 measures[Measure.TRIP_MEDIAN_WAIT_FRACTION.name] = (
                     measures[Measure.TRIP_MEDIAN_WAIT_TIME.name] / median_ride_time
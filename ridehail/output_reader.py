@@ -0,0 +1,172 @@
+"""
+Streaming readers for the jsonl files written by simulations and sequences.
+
+A jsonl output file holds one json document per line, most of them tagged
+with a "type": "metadata", "config", "block" or "end_state". The files of
+long runs and sweeps run to gigabytes, so these readers never hold the file
+in memory:
+
+- iter_records() yields one parsed record at a time, and skips the lines
+  of other types by looking at the start of the line rather than parsing it.
+- read_columns() gathers selected fields of the records straight into numpy
+  arrays, one per field, without keeping the records.
+
+Fields are named by their path through the record, with dots between the
+keys:
+
+    columns = read_columns(
+        "out/city.jsonl",
+        ["block", "measures.VEHICLE_FRACTION_P3"],
+        record_type="block",
+        cache=True,
+    )
+    p3 = columns["measures.VEHICLE_FRACTION_P3"]
+
+With cache=True the columns are also saved next to the file (for example
+out/city.jsonl.block.npz), and later calls read them from there until the
+jsonl file changes.
+"""
+
+import array
+import json
+import os
+
+import numpy as np
+
+# The leading characters of a line written by json.dumps for a record whose
+# first key is "type"
+TYPE_PREFIX = '{"type": "'
+CACHE_SOURCE_KEY = "__source__"
+
+
+def iter_records(file_name, types=None):
+    """
+    Yield the records of a jsonl file, in order, as dictionaries.
+
+    types is an iterable of record types (e.g. ["block"]), or None for every
+    record. Records without a "type" key, as in older output files, are
+    included only when types is None. Lines that are not valid json, such as
+    a final line cut short by an interrupted run, are skipped.
+    """
+    if types is not None:
+        types = frozenset(types)
+    start = len(TYPE_PREFIX)
+    with open(file_name) as jsonl_file:
+        for line in jsonl_file:
+            if types is not None and line.startswith(TYPE_PREFIX):
+                # The type can be read without parsing the line
+                if line[start : line.find('"', start)] not in types:
+                    continue
+            try:
+                record = json.loads(line)
+            except json.decoder.JSONDecodeError:
+                continue
+            if types is None or record.get("type") in types:
+                yield record
+
+
+class _Column:
+    """
+    The values of one field. Numbers are kept in a compact array of doubles,
+    with nan for records that lack the field; a column that holds a string
+    switches to a list of strings, with "" for the missing values.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.keys = path.split(".")
+        self.numbers = array.array("d")
+        self.strings = None
+        self.all_int = True
+
+    def append(self, record):
+        value = record
+        for key in self.keys:
+            if not isinstance(value, dict) or key not in value:
+                value = None
+                break
+            value = value[key]
+        if isinstance(value, (dict, list)):
+            raise ValueError(f"Field {self.path} is not a number or a string")
+        if self.strings is not None:
+            self.strings.append("" if value is None else str(value))
+        elif isinstance(value, str):
+            self.strings = [
+                "" if np.isnan(number) else str(number) for number in self.numbers
+            ]
+            self.strings.append(value)
+        elif value is None:
+            self.all_int = False
+            self.numbers.append(np.nan)
+        else:
+            self.all_int = self.all_int and isinstance(value, int)
+            self.numbers.append(value)
+
+    def to_array(self):
+        if self.strings is not None:
+            return np.array(self.strings, dtype=str)
+        numbers = np.frombuffer(self.numbers, dtype=np.float64)
+        if self.all_int:
+            return numbers.astype(np.int64)
+        # Copy, so the array does not pin the array.array buffer
+        return numbers.copy()
+
+
+def _cache_file_name(file_name, record_type):
+    return f"{os.fspath(file_name)}.{record_type or 'all'}.npz"
+
+
+def _source_stamp(file_name):
+    stat = os.stat(file_name)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def _read_cache(cache_file_name, stamp):
+    """The cached columns, or {} if there are none for this version of the file"""
+    try:
+        with np.load(cache_file_name) as cache:
+            if not np.array_equal(cache.get(CACHE_SOURCE_KEY), stamp):
+                return {}
+            return {
+                key: cache[key] for key in cache.files if key != CACHE_SOURCE_KEY
+            }
+    except (OSError, ValueError):
+        return {}
+
+
+def read_columns(file_name, fields, record_type=None, cache=False):
+    """
+    Read fields of the records of a jsonl file into numpy arrays.
+
+    Returns a dictionary of one array per field, each with one element for
+    each record of record_type (or each record, if record_type is None). A
+    field whose values are all integers gives an int64 array; other numeric
+    fields give float64 arrays with nan where a record lacks the field;
+    string fields give str arrays with "" where a record lacks the field.
+
+    With cache=True, the columns are read from the sidecar cache file if it
+    was written from this version of the jsonl file, and any fields not
+    already in the cache are read from the jsonl file and added to it.
+    """
+    fields = list(dict.fromkeys(fields))
+    columns = {}
+    if cache:
+        cache_file_name = _cache_file_name(file_name, record_type)
+        stamp = _source_stamp(file_name)
+        columns = _read_cache(cache_file_name, stamp)
+    missing = [_Column(field) for field in fields if field not in columns]
+    if missing:
+        types = None if record_type is None else [record_type]
+        for record in iter_records(file_name, types=types):
+            for column in missing:
+                column.append(record)
+        for column in missing:
+            columns[column.path] = column.to_array()
+        if cache:
+            # Write a new file and move it into place, so that an interrupted
+            # write cannot leave a damaged cache
+            temporary_file_name = f"{cache_file_name}.tmp"
+            with open(temporary_file_name, "wb") as cache_file:
+                np.savez(cache_file, **{CACHE_SOURCE_KEY: stamp}, **columns)
+            os.replace(temporary_file_name, cache_file_name)
+    return {field: columns[field] for field in fields}
@@ -0,0 +1,257 @@
+"""
+Run replicates of a simulation: copies of one configuration with different
+random number seeds, run in parallel, combined into a mean with a
+confidence interval for each result measure.
+
+By default each replicate is a RideHailSimulation of its own, so that its
+seed reproduces a single run. With batch_replicates set, and where the
+configuration allows it, each worker process instead runs its share of the
+replicates together in a BatchedSimulation. The engine used is recorded
+with the results.
+"""
+
+import json
+import logging
+import math
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from ridehail.atom import Animation
+from ridehail.batch import BatchedSimulation, batch_unsupported_reason
+from ridehail.config import WritableConfig
+from ridehail.simulation import RideHailSimulation
+
+CONFIDENCE_LEVEL = 0.95
+# Names of the engines that run replicates
+OBJECT_ENGINE = "object"
+BATCH_ENGINE = "batch"
+
+
+def _critical_value(confidence, degrees_of_freedom):
+    """
+    Two-sided critical value of Student's t distribution, or of the normal
+    distribution if scipy is not installed.
+    """
+    probability = 0.5 + confidence / 2
+    try:
+        from scipy import stats
+
+        return float(stats.t.ppf(probability, degrees_of_freedom))
+    except ImportError:
+        return statistics.NormalDist().inv_cdf(probability)
+
+
+def summarize(values, confidence=CONFIDENCE_LEVEL):
+    """
+    Mean, standard error and confidence interval of a list of replicate
+    values. With a single value the spread is unknown, and the standard
+    error and interval bounds are None.
+    """
+    mean = statistics.fmean(values)
+    summary = {
+        "mean": mean,
+        "std_error": None,
+        "ci_lower": None,
+        "ci_upper": None,
+    }
+    if len(values) > 1:
+        std_error = statistics.stdev(values) / math.sqrt(len(values))
+        half_width = _critical_value(confidence, len(values) - 1) * std_error
+        summary["std_error"] = std_error
+        summary["ci_lower"] = mean - half_width
+        summary["ci_upper"] = mean + half_width
+    return summary
+
+
+def aggregate_measures(replicate_measures, confidence=CONFIDENCE_LEVEL):
+    """
+    Combine the get_result_measures() dicts of several replicates into
+    a dict of summarize() results, one for each numeric measure.
+    Non-numeric measures (timestamps, version, convergence metric name)
+    are left out. A measure that is None (or absent) in some replicates is
+    summarized over the others, and the number left out is its "missing"
+    count.
+    """
+    names = {}
+    for measures in replicate_measures:
+        names.update(dict.fromkeys(measures))
+    aggregate = {}
+    for name in names:
+        values = [
+            float(measures[name])
+            for measures in replicate_measures
+            if isinstance(measures.get(name), (int, float))
+        ]
+        if values:
+            aggregate[name] = summarize(values, confidence)
+            aggregate[name]["missing"] = len(replicate_measures) - len(values)
+    return aggregate
+
+
+def _run_replicate(config):
+    """Run one replicate in a worker process and return its result measures"""
+    sim = RideHailSimulation(config)
+    results = sim.simulate()
+    return results.get_result_measures()
+
+
+def _run_replicate_batch(config, seeds):
+    """
+    Run a batch of replicates in a worker process with the batched engine
+    and return the result measures of each
+    """
+    batch = BatchedSimulation(config, seeds)
+    return [results.get_result_measures() for results in batch.simulate()]
+
+
+class RideHailSimulationReplicates:
+    """
+    Replicates of a single simulation configuration
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.replicate_count = config.replicates.value
+        base_seed = config.random_number_seed.value
+        if not base_seed:
+            base_seed = random.randrange(1, 2**31)
+        self.seeds = [base_seed + index for index in range(self.replicate_count)]
+        self.processes = min(self.replicate_count, os.cpu_count() or 1)
+        self.engine = OBJECT_ENGINE
+        if config.batch_replicates.value:
+            reason = batch_unsupported_reason(config)
+            if reason is None:
+                self.engine = BATCH_ENGINE
+            else:
+                logging.info(f"Replicates run as separate simulations: {reason}")
+        self.replicate_measures = []
+        self.aggregate = {}
+
+    def replicate_configs(self):
+        """
+        The config of each replicate: a snapshot of the shared config with its
+        own seed. Replicates do not animate or write output files: the
+        combined results are written by run_replicates.
+        """
+        snapshot = self.config.snapshot(
+            animation=Animation.NONE,
+            config_file=None,
+            run_sequence=False,
+            replicates=1,
+        )
+        return [snapshot.replace(random_number_seed=seed) for seed in self.seeds]
+
+    def run_replicates(self):
+        """
+        Run the replicates in a process pool, then write and return the
+        aggregate of their result measures.
+        """
+        start_time = time.time()
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            if self.engine == BATCH_ENGINE:
+                # Each process advances its share of the replicates together
+                snapshot = self.replicate_configs()[0]
+                seed_batches = [
+                    self.seeds[index :: self.processes]
+                    for index in range(self.processes)
+                ]
+                batch_measures = list(
+                    executor.map(
+                        _run_replicate_batch,
+                        [snapshot] * self.processes,
+                        seed_batches,
+                    )
+                )
+                # Restore the order of self.seeds
+                self.replicate_measures = [
+                    batch_measures[index % self.processes][index // self.processes]
+                    for index in range(self.replicate_count)
+                ]
+            else:
+                self.replicate_measures = list(
+                    executor.map(_run_replicate, self.replicate_configs())
+                )
+        self.aggregate = aggregate_measures(self.replicate_measures)
+        duration_seconds = time.time() - start_time
+        logging.info(
+            f"Ran {self.replicate_count} replicates with the {self.engine} engine "
+            f"in {self.processes} processes in {duration_seconds:.1f}s"
+        )
+        self._print_summary()
+        self._write_jsonl(duration_seconds)
+        self._write_results(duration_seconds)
+        return self.aggregate
+
+    def _print_summary(self):
+        print(
+            f"{self.replicate_count} replicates, "
+            f"{CONFIDENCE_LEVEL:.0%} confidence intervals:"
+        )
+        for name, summary in self.aggregate.items():
+            if summary["std_error"] is None:
+                print(f"  {name}: {summary['mean']:.3f}")
+            else:
+                print(
+                    f"  {name}: {summary['mean']:.3f} "
+                    f"[{summary['ci_lower']:.3f}, {summary['ci_upper']:.3f}]"
+                )
+
+    def _write_jsonl(self, duration_seconds):
+        """
+        Write the config, one record per replicate and the aggregate to
+        ./out/<config>-<start_time>-replicates.jsonl
+        """
+        config_file = self.config.config_file.value
+        if not (config_file and self.config.write_output_files.value):
+            return
+        config_file_root = os.path.splitext(os.path.split(config_file)[1])[0]
+        if not os.path.exists("./out"):
+            os.makedirs("./out")
+        jsonl_file = (
+            f"./out/{config_file_root}-{self.config.start_time}-replicates.jsonl"
+        )
+        with open(jsonl_file, "a") as jsonl_file_handle:
+            config_record = {"type": "config"}
+            config_record.update(WritableConfig(self.config).__dict__)
+            jsonl_file_handle.write(json.dumps(config_record, default=str) + "\n")
+            for index, (seed, measures) in enumerate(
+                zip(self.seeds, self.replicate_measures)
+            ):
+                replicate_record = {
+                    "type": "replicate",
+                    "replicate": index,
+                    "random_number_seed": seed,
+                    "engine": self.engine,
+                    "measures": measures,
+                }
+                jsonl_file_handle.write(json.dumps(replicate_record) + "\n")
+            aggregate_record = {
+                "type": "aggregate",
+                "replicates": self.replicate_count,
+                "engine": self.engine,
+                "confidence_level": CONFIDENCE_LEVEL,
+                "duration_seconds": round(duration_seconds, 2),
+                "measures": self.aggregate,
+            }
+            jsonl_file_handle.write(json.dumps(aggregate_record) + "\n")
+
+    def _write_results(self, duration_seconds):
+        """
+        Write the replicate means to the [RESULTS] section of the config
+        file, in place of the results of a single simulation.
+        """
+        config_file = self.config.config_file.value
+        if not config_file:
+            return
+        results = dict(self.replicate_measures[0])
+        for name, summary in self.aggregate.items():
+            results[name] = summary["mean"]
+        results["SIM_REPLICATES"] = self.replicate_count
+        results["SIM_REPLICATE_ENGINE"] = self.engine
+        results["SIM_TIMESTAMP"] = datetime.now().isoformat()
+        results["SIM_DURATION_SECONDS"] = round(duration_seconds, 2)
+        self.config.write_results_section(config_file, results)
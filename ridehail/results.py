@@ -4,10 +4,21 @@ from ridehail.atom import (
     Measure,
     History,
 )
+from ridehail.meanfield import MeanFieldModel, residuals
 from ridehail.measures import compute_measures
 from datetime import datetime
 import logging
 
+# The mean-field measures in the end state, and their end-state keys
+MEAN_FIELD_END_STATE = {
+    Measure.VEHICLE_MEAN_COUNT.name: "mean_count",
+    Measure.VEHICLE_FRACTION_P1.name: "fraction_p1",
+    Measure.VEHICLE_FRACTION_P2.name: "fraction_p2",
+    Measure.VEHICLE_FRACTION_P3.name: "fraction_p3",
+    Measure.TRIP_MEAN_WAIT_TIME.name: "mean_wait_time",
+    Measure.TRIP_MEAN_WAIT_FRACTION_TOTAL.name: "mean_wait_fraction_total",
+}
+
 
 class RideHailSimulationResults:
     """
@@ -160,6 +171,27 @@ class RideHailSimulationResults:
             measures["SIM_DURATION_SECONDS"] = round(duration_seconds, 2)
         return measures
 
+    def get_mean_field(self, measures):
+        """
+        The steady state that a mean-field model predicts (see meanfield.py),
+        and the residual (simulated less predicted) of each of its measures,
+        for the end state. A fixed fleet is modelled at its mean count.
+        """
+        estimate = MeanFieldModel.from_simulation(self.sim).steady_state(
+            self.sim.equilibration, measures[Measure.VEHICLE_MEAN_COUNT.name]
+        )
+        if estimate is None:
+            return {"feasible": False}
+        mean_field = {"feasible": True}
+        for name, key in MEAN_FIELD_END_STATE.items():
+            mean_field[key] = round(estimate[name], 3)
+        for name, residual in residuals(estimate, measures).items():
+            if name in MEAN_FIELD_END_STATE:
+                mean_field[f"residual_{MEAN_FIELD_END_STATE[name]}"] = round(
+                    residual, 3
+                )
+        return mean_field
+
     def get_end_state(self, timestamp=None):
         """
         The end_state dict is a more readable representation of the final
@@ -264,6 +296,7 @@ class RideHailSimulationResults:
                             3,
                         ),
                     },
+                    "mean_field": self.get_mean_field(measures),
                 }
             else:
                 logging.warning(
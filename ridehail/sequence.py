@@ -2,10 +2,42 @@
 Control a sequence of simulations
 """
 
+import itertools
+import json
 import logging
 import copy
+import os
+
+import numpy as np
+
+from ridehail.config import ConfigSnapshot
+from ridehail.design import (
+    ResponseSurface,
+    fit_correction,
+    latin_hypercube,
+    refine,
+    select,
+    sobol,
+)
+from ridehail.meanfield import MeanFieldModel
 from ridehail.simulation import RideHailSimulation
-from ridehail.atom import Animation, DispatchMethod
+from ridehail.atom import Animation, DispatchMethod, Equilibration, SequenceDesign
+
+# The sequence results a response surface is fitted to
+RESPONSES = (
+    "vehicle_p1_fraction",
+    "vehicle_p2_fraction",
+    "vehicle_p3_fraction",
+    "mean_vehicle_count",
+    "trip_wait_fraction",
+)
+# The results whose changes between neighbouring points guide refinement:
+# fractions, so that their changes are comparable
+REFINE_RESPONSES = (
+    "vehicle_p1_fraction",
+    "vehicle_p3_fraction",
+    "trip_wait_fraction",
+)
 
 
 class RideHailSimulationSequence:
@@ -62,13 +94,29 @@ class RideHailSimulationSequence:
                     int(1000 * config.commission_increment.value),
                 )
             ]
-        # Check if this is a valid sequence
-        # Horribly inelegant at the moment
-        # test_sequence = (
-        # len(self.request_rates),
-        # len(self.vehicle_counts),
-        # len(self.inhomogeneities),
-        # )
+        # The points of the sequence's design, each a dict of the arguments
+        # of _next_sim, and their coordinates in the unit cube of the swept
+        # ranges
+        self.design = config.sequence_design.value
+        self.refine_points = config.sequence_refine_points.value
+        self.design_ranges = self._design_ranges(config)
+        self.design_points, self.design_coordinates = self._design(config)
+        self.response_surfaces = {}
+        # The fitted surfaces are written to ./out/<config>-surfaces.json
+        self.surface_file = None
+        config_file = config.config_file.value
+        if config_file and config.write_output_files.value:
+            config_file_root = os.path.splitext(os.path.basename(config_file))[0]
+            self.surface_file = f"./out/{config_file_root}-surfaces.json"
+        # Multi-fidelity sequences: the low fidelity results of each point,
+        # the indexes of the points run again at full fidelity, and the
+        # (intercept, slope) correction from low to full fidelity of each
+        # result
+        self.fidelity_scale = config.sequence_fidelity_scale.value
+        self.fidelity_points = config.sequence_fidelity_points.value
+        self.low_fidelity = {}
+        self.high_fidelity_indexes = []
+        self.fidelity_corrections = {}
         # Create lists to hold the sequence plot data
         self.trip_wait_fraction = []
         self.vehicle_p1_fraction = []
@@ -76,15 +124,13 @@ class RideHailSimulationSequence:
         self.vehicle_p3_fraction = []
         self.mean_vehicle_count = []
         self.forward_dispatch_fraction = []
-        self.frame_count = (
-            len(self.vehicle_counts)
-            * len(self.request_rates)
-            * len(self.inhomogeneities)
-            * len(self.commissions)
-        )
+        self.frame_count = len(self.design_points)
         # Set the dispatch_method to a string holding the method
         self.dispatch_method = config.dispatch_method.value.value
         self.plot_count = 1
+        # Config snapshot shared by the simulations in the sequence
+        self._snapshot = None
+        self._snapshot_source = None
 
     def run_sequence(self, config):
         """
@@ -94,51 +140,24 @@ class RideHailSimulationSequence:
         # output_file_handle.write(
         # json.dumps(rh_config.WritableConfig(config).__dict__) + "\n")
         # output_file_handle.close()
-        if config.animation.value == Animation.NONE:
-            # Iterate over models
-            for request_rate in self.request_rates:
-                for vehicle_count in self.vehicle_counts:
-                    for inhomogeneity in self.inhomogeneities:
-                        for commission in self.commissions:
-                            self._next_sim(
-                                request_rate=request_rate,
-                                vehicle_count=vehicle_count,
-                                inhomogeneity=inhomogeneity,
-                                commission=commission,
-                                config=config,
-                            )
-        elif config.animation.value == Animation.TEXT:
-            # Iterate over models with text output (one line per simulation)
-            from ridehail.animation.text import TextAnimation
-
-            for request_rate in self.request_rates:
-                for vehicle_count in self.vehicle_counts:
-                    for inhomogeneity in self.inhomogeneities:
-                        for commission in self.commissions:
-                            # Create config for this simulation
-                            runconfig = copy.deepcopy(config)
-                            runconfig.base_demand.value = request_rate
-                            runconfig.vehicle_count.value = vehicle_count
-                            runconfig.inhomogeneity.value = inhomogeneity
-                            runconfig.platform_commission.value = commission
-                            # Individual simulations in sequence should not have run_sequence set
-                            runconfig.run_sequence.value = False
-                            # Prevent config file writing for individual simulations in sequence
-                            runconfig.config_file.value = None
-
-                            # Create simulation and text animation
-                            sim = RideHailSimulation(runconfig)
-                            text_animation = TextAnimation(
-                                sim,
-                                print_results_table=False,
-                                enable_keyboard=False
-                            )
-
-                            # Run simulation through animation (handles block loop internally)
-                            results = text_animation.animate()
-
-                            # Collect results for sequence tracking
-                            self._collect_sim_results(results)
+        if config.animation.value in (Animation.NONE, Animation.TEXT):
+            # Iterate over the points of the design, then over the points
+            # added where the results are steepest
+            if self.fidelity_scale and self.fidelity_scale < 1:
+                self._run_multi_fidelity(config)
+            else:
+                for point in self.design_points:
+                    self._run_point(point, config)
+            self._refine(config)
+            self._fit_response_surfaces()
+        elif self.design != SequenceDesign.GRID:
+            # The sequence animations plot each result against one swept
+            # parameter, which only a grid design steps through
+            logging.error(
+                f"\n\tA '{self.design.value}' sequence design runs only with "
+                f"the animation\n\tset to '{Animation.TEXT.value}' or "
+                f"'{Animation.NONE.value}', not '{config.animation.value.value}'."
+            )
         elif config.animation.value == Animation.SEQUENCE:
             # Use matplotlib sequence animation
             try:
@@ -210,6 +229,378 @@ class RideHailSimulationSequence:
                 "result of a typo)."
             )
 
+    def _design_ranges(self, config):
+        """
+        The (start, maximum) range of each parameter a space-filling design
+        sweeps: those whose maximum is set above their start
+        """
+        ranges = {}
+        for name, start, maximum in (
+            ("request_rate", config.base_demand.value, config.request_rate_max.value),
+            (
+                "vehicle_count",
+                config.vehicle_count.value,
+                config.vehicle_count_max.value,
+            ),
+            (
+                "inhomogeneity",
+                config.inhomogeneity.value,
+                config.inhomogeneity_max.value,
+            ),
+            (
+                "commission",
+                config.platform_commission.value,
+                config.commission_max.value,
+            ),
+        ):
+            if maximum is not None and maximum > start:
+                ranges[name] = (start, maximum)
+        return ranges
+
+    def _design(self, config):
+        """
+        The points of the sequence's design, and their coordinates in the
+        unit cube of the swept ranges
+        """
+        if self.design == SequenceDesign.GRID:
+            # Every combination, in the order the sequence has always run
+            points = [
+                {
+                    "request_rate": request_rate,
+                    "vehicle_count": vehicle_count,
+                    "inhomogeneity": inhomogeneity,
+                    "commission": commission,
+                }
+                for request_rate, vehicle_count, inhomogeneity, commission in (
+                    itertools.product(
+                        self.request_rates,
+                        self.vehicle_counts,
+                        self.inhomogeneities,
+                        self.commissions,
+                    )
+                )
+            ]
+            coordinates = np.array(
+                [
+                    [
+                        (point[name] - start) / (maximum - start)
+                        for name, (start, maximum) in self.design_ranges.items()
+                    ]
+                    for point in points
+                ]
+            ).reshape(len(points), len(self.design_ranges))
+            return points, coordinates
+        count = config.sequence_points.value
+        dimensions = len(self.design_ranges)
+        if dimensions == 0:
+            logging.warning(
+                f"A {self.design.value} design needs a parameter maximum "
+                "(such as vehicle_count_max) to sweep: running one simulation"
+            )
+            count = 1
+        if self.design == SequenceDesign.SOBOL:
+            coordinates = sobol(count, dimensions)
+        else:
+            coordinates = latin_hypercube(
+                count, dimensions, rng=config.random_number_seed.value
+            )
+        return [self._design_point(point) for point in coordinates], coordinates
+
+    def _design_point(self, coordinates):
+        """The _next_sim arguments at a point of the unit cube"""
+        point = {
+            "request_rate": self.request_rates[0],
+            "vehicle_count": self.vehicle_counts[0],
+            "inhomogeneity": self.inhomogeneities[0],
+            "commission": self.commissions[0],
+        }
+        for (name, (start, maximum)), coordinate in zip(
+            self.design_ranges.items(), coordinates
+        ):
+            value = start + coordinate * (maximum - start)
+            # Whole vehicles; other values to three decimal places, like
+            # the grid's
+            if name == "vehicle_count":
+                point[name] = round(value)
+            else:
+                point[name] = round(float(value), 3)
+        return point
+
+    def _run_point(self, point, config):
+        """Run the simulation at a point of the design"""
+        if config.animation.value == Animation.NONE:
+            self._next_sim(config=config, **point)
+            return
+        # Text output: one line per simulation
+        from ridehail.animation.text import TextAnimation
+
+        # Create config for this simulation.
+        # Individual simulations in sequence should not have
+        # run_sequence set, and should not write to the
+        # config file.
+        runconfig = self._base_snapshot(config).replace(
+            base_demand=point["request_rate"],
+            vehicle_count=point["vehicle_count"],
+            inhomogeneity=point["inhomogeneity"],
+            platform_commission=point["commission"],
+            run_sequence=False,
+            config_file=None,
+        )
+
+        # Create simulation and text animation
+        sim = RideHailSimulation(runconfig)
+        if self._skip(sim):
+            self._collect_skipped(sim)
+            return
+        text_animation = TextAnimation(
+            sim, print_results_table=False, enable_keyboard=False
+        )
+
+        # Run simulation through animation (handles block loop internally)
+        results = text_animation.animate()
+
+        # Collect results for sequence tracking
+        self._collect_sim_results(results)
+
+    def _run_multi_fidelity(self, config):
+        """
+        Run every point of the design at low fidelity, then the points where
+        the low fidelity results change most steeply again at full fidelity.
+        The sequence results are the full fidelity results where there are
+        any, and elsewhere the low fidelity results, corrected by a straight
+        line fitted to the points run at both fidelities. select() chooses
+        the points: half where the results are least certain, and half
+        spread out to fit the correction over the whole design.
+        """
+        for point in self.design_points:
+            self._run_low_fidelity_point(point, config)
+        names = self._result_names()
+        self.low_fidelity = {name: getattr(self, name) for name in names}
+        for name in names:
+            setattr(self, name, [])
+        responses = np.column_stack(
+            [self.low_fidelity[name] for name in REFINE_RESPONSES]
+        )
+        self.high_fidelity_indexes = select(
+            self.design_coordinates, responses, self.fidelity_points
+        )
+        for index in self.high_fidelity_indexes:
+            self._run_point(self.design_points[index], config)
+        for name in names:
+            low = self.low_fidelity[name]
+            high = dict(zip(self.high_fidelity_indexes, getattr(self, name)))
+            intercept, slope = fit_correction(
+                [low[index] for index in high], list(high.values())
+            )
+            self.fidelity_corrections[name] = (intercept, slope)
+            logging.info(
+                f"Fidelity correction of {name}: "
+                f"full = {intercept:.3f} + {slope:.3f} * low"
+            )
+            corrected = intercept + slope * np.array(low)
+            # Fractions stay fractions, and counts are not negative
+            corrected = np.clip(
+                corrected, 0.0, 1.0 if name.endswith("fraction") else None
+            )
+            setattr(
+                self,
+                name,
+                [high.get(index, float(corrected[index])) for index in range(len(low))],
+            )
+
+    def _run_low_fidelity_point(self, point, config):
+        """
+        Run the simulation at a point of the design in a city scaled down by
+        sequence_fidelity_scale. Lengths and times (in blocks) are scaled by
+        the factor s: the city is s times as wide and trips s times as long,
+        so a run of s times as many blocks covers as many trips. The fleet
+        is scaled by s**2, keeping vehicles as far apart in blocks, and
+        demand by s, keeping the busy fraction R * L / N. The mean vehicle
+        count is scaled back to the full fleet.
+        """
+        snapshot = self._base_snapshot(config)
+        city_size = 2 * max(1, round(self.fidelity_scale * snapshot["city_size"] / 2))
+        # The scale actually used, after rounding to an even city size
+        scale = city_size / snapshot["city_size"]
+        vehicle_count = max(1, round(point["vehicle_count"] * scale**2))
+        overrides = {
+            "animation": Animation.NONE,
+            "city_size": city_size,
+            "base_demand": point["request_rate"] * scale,
+            "vehicle_count": vehicle_count,
+            "inhomogeneity": point["inhomogeneity"],
+            "platform_commission": point["commission"],
+            "run_sequence": False,
+            "config_file": None,
+        }
+        for name in ("mean_trip_distance", "time_blocks", "results_window"):
+            if snapshot[name]:
+                overrides[name] = max(1, round(snapshot[name] * scale))
+        sim = RideHailSimulation(snapshot.replace(**overrides))
+        if self._skip(sim):
+            self._collect_skipped(sim)
+            return
+        self._collect_sim_results(sim.simulate())
+        self.mean_vehicle_count[-1] *= point["vehicle_count"] / vehicle_count
+
+    def _result_names(self):
+        """The names of the lists of sequence results"""
+        names = list(RESPONSES)
+        if self.dispatch_method == DispatchMethod.FORWARD_DISPATCH.value:
+            names.append("forward_dispatch_fraction")
+        return names
+
+    def _refine(self, config):
+        """
+        Run sequence_refine_points more simulations, midway between the
+        neighbouring points whose results differ most
+        """
+        if not self.refine_points or not self.design_ranges:
+            return
+        responses = np.column_stack(
+            [getattr(self, name) for name in REFINE_RESPONSES]
+        )
+        coordinates = refine(self.design_coordinates, responses, self.refine_points)
+        for point_coordinates in coordinates:
+            point = self._design_point(point_coordinates)
+            self.design_points.append(point)
+            self._run_point(point, config)
+        self.design_coordinates = np.vstack([self.design_coordinates, coordinates])
+        self.frame_count = len(self.design_points)
+        logging.info(f"Refined the sequence with {len(coordinates)} points")
+
+    def _fit_response_surfaces(self):
+        """Fit a ResponseSurface to each of the RESPONSES"""
+        if not self.design_ranges or len(self.design_points) < 2:
+            return
+        for name in RESPONSES:
+            surface = ResponseSurface(self.design_coordinates, getattr(self, name))
+            self.response_surfaces[name] = surface
+            logging.info(f"Response surface of {name}: R^2 = {surface.r_squared:.3f}")
+        self._write_response_surfaces()
+
+    def _write_response_surfaces(self, resolution=21):
+        """
+        Write the fitted response surfaces to ./out/<config>-surfaces.json:
+        the ranges of the swept parameters, the design points and their
+        results, and for each response its R^2, its coefficients (of
+        coordinates scaled to the unit interval over each range) and its
+        fitted values on a grid over the first two swept parameters, or
+        along the only one, for plotting
+        """
+        if not self.surface_file or not self.response_surfaces:
+            return
+        names = list(self.design_ranges)
+        surfaces = {}
+        for name, surface in self.response_surfaces.items():
+            if len(names) >= 2:
+                first, second, values = self.response_grid(
+                    name, resolution=resolution
+                )
+                grid = {
+                    "axes": names[:2],
+                    names[0]: first.tolist(),
+                    names[1]: second.tolist(),
+                    "values": values.tolist(),
+                }
+            else:
+                coordinates = np.linspace(0, 1, resolution)
+                start, maximum = self.design_ranges[names[0]]
+                grid = {
+                    "axes": names,
+                    names[0]: (start + coordinates * (maximum - start)).tolist(),
+                    "values": surface(coordinates).tolist(),
+                }
+            surfaces[name] = {
+                "r_squared": surface.r_squared,
+                "terms": surface.terms(names),
+                "coefficients": surface.coefficients.tolist(),
+                "grid": grid,
+            }
+        if not os.path.exists("./out"):
+            os.makedirs("./out")
+        with open(self.surface_file, "w") as surface_file_handle:
+            json.dump(
+                {
+                    "ranges": self.design_ranges,
+                    "points": self.design_points,
+                    "results": {
+                        name: getattr(self, name) for name in self._result_names()
+                    },
+                    "surfaces": surfaces,
+                },
+                surface_file_handle,
+                indent=2,
+                default=float,
+            )
+        logging.info(f"Wrote the response surfaces to {self.surface_file}")
+
+    def response_grid(self, name, axes=None, resolution=50):
+        """
+        The fitted response surface of one of the RESPONSES on a grid over two
+        swept parameters (by default the first two), with the others at the
+        middle of their ranges, for contour plots: the values of each parameter
+        and a (resolution, resolution) array of fitted values.
+        """
+        names = list(self.design_ranges)
+        axes = axes or names[:2]
+        indexes = [names.index(axis) for axis in axes]
+        first, second, values = self.response_surfaces[name].grid(
+            axes=indexes, resolution=resolution
+        )
+        (first_start, first_max), (second_start, second_max) = (
+            self.design_ranges[axis] for axis in axes
+        )
+        return (
+            first_start + first * (first_max - first_start),
+            second_start + second * (second_max - second_start),
+            values,
+        )
+
+    def _base_snapshot(self, config):
+        """
+        Return an immutable snapshot of the sequence config, taken once, from
+        which each simulation's config is derived with
+        ConfigSnapshot.replace(). This is much cheaper than deep-copying and
+        then editing the RideHailConfig for every simulation.
+        """
+        if isinstance(config, ConfigSnapshot):
+            return config
+        if self._snapshot is None or self._snapshot_source is not config:
+            self._snapshot = config.snapshot()
+            self._snapshot_source = config
+        return self._snapshot
+
+    def _skip(self, sim):
+        """
+        With skip_infeasible, True if the fleet of a simulation without
+        equilibration cannot keep up with demand, according to the
+        mean-field model, so that it is not worth running
+        """
+        return (
+            sim.skip_infeasible
+            and sim.equilibration == Equilibration.NONE
+            and MeanFieldModel.from_simulation(sim).infeasible(sim.vehicle_count)
+        )
+
+    def _collect_skipped(self, sim):
+        """
+        Record a skipped simulation's results as missing (NaN), which the
+        sequence plots leave out
+        """
+        logging.info(
+            f"Skipped infeasible simulation: Nv={sim.vehicle_count:d}, "
+            f"R={sim.request_rate:.02f}"
+        )
+        missing = float("nan")
+        self.vehicle_p1_fraction.append(missing)
+        self.vehicle_p2_fraction.append(missing)
+        self.vehicle_p3_fraction.append(missing)
+        self.mean_vehicle_count.append(missing)
+        self.trip_wait_fraction.append(missing)
+        if self.dispatch_method == DispatchMethod.FORWARD_DISPATCH.value:
+            self.forward_dispatch_fraction.append(missing)
+
     def _collect_sim_results(self, results):
         """
         After a simulation, collect the results for plotting etc
@@ -255,13 +646,17 @@ class RideHailSimulationSequence:
         # Set configuration parameters
         # For now, say we can't draw simulation-level plots
         # if we are running a sequence
-        runconfig = copy.deepcopy(config)
-        runconfig.animation.value = Animation.NONE
-        runconfig.base_demand.value = request_rate
-        runconfig.vehicle_count.value = vehicle_count
-        runconfig.inhomogeneity.value = inhomogeneity
-        runconfig.platform_commission.value = commission
+        runconfig = self._base_snapshot(config).replace(
+            animation=Animation.NONE,
+            base_demand=request_rate,
+            vehicle_count=vehicle_count,
+            inhomogeneity=inhomogeneity,
+            platform_commission=commission,
+        )
         sim = RideHailSimulation(runconfig)
+        if self._skip(sim):
+            self._collect_skipped(sim)
+            return None
         results = sim.simulate()
         self._collect_sim_results(results)
         s = (
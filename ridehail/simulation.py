@@ -5,7 +5,9 @@ A simulation
 import logging
 import random
 import json
-from collections import deque
+import heapq
+from collections import Counter, deque
+from itertools import count
 from os import path, makedirs
 import sys
 import select
@@ -24,6 +26,7 @@ except ImportError:
     termios = None
     tty = None
     TERMIOS_AVAILABLE = False
+from ridehail.config import ConfigSnapshot, config_items
 from ridehail.dispatch import Dispatch
 from ridehail.measures import compute_measures
 from ridehail.atom import (
@@ -31,25 +34,118 @@ from ridehail.atom import (
     CircularBuffer,
     City,
     CityScaleUnit,
+    Direction,
     DispatchMethod,
     Equilibration,
     History,
     Measure,
+    RandomStreams,
+    SortedWindow,
     Trip,
     TripPhase,
     Vehicle,
     VehiclePhase,
+    VehicleRegistry,
 )
 from ridehail.keyboard_mappings import (
     get_mapping_for_key,
     generate_help_text,
 )
 from ridehail.convergence import ConvergenceTracker, DEFAULT_CONVERGENCE_METRICS
+from ridehail.events import EventBus, LifecycleEvent
+from ridehail.equilibrium import EquilibriumSolver
+from ridehail.meanfield import MeanFieldModel
 
 
 GARBAGE_COLLECTION_INTERVAL = 50  # Reduced from 200 for better performance
 # Log the block every LOG_INTERVAL blocks
 LOG_INTERVAL = 10
+# The phase whose time a trip lifecycle event closes, and the History items
+# filled from each block's lifecycle events
+CLOSED_TRIP_PHASE = {
+    LifecycleEvent.TRIP_DISPATCHED: TripPhase.UNASSIGNED,
+    LifecycleEvent.TRIP_PICKED_UP: TripPhase.WAITING,
+    LifecycleEvent.TRIP_COMPLETED: TripPhase.RIDING,
+    LifecycleEvent.TRIP_CANCELLED: TripPhase.UNASSIGNED,
+}
+TRIP_EVENT_HISTORY = (
+    History.TRIP_COUNT,
+    History.TRIP_COMPLETED_COUNT,
+    History.TRIP_DISTANCE,
+    History.TRIP_AWAITING_TIME,
+    History.TRIP_UNASSIGNED_TIME,
+    History.TRIP_WAIT_TIME,
+    History.TRIP_FORWARD_DISPATCH_COUNT,
+)
+# Animations that draw vehicle positions, which event-driven simulations
+# must bring up to date after each block
+MAP_ANIMATIONS = (
+    Animation.ALL,
+    Animation.MAP,
+    Animation.TERMINAL_MAP,
+    Animation.WEB_MAP,
+)
+# Kinds of scheduled vehicle event in event-driven simulations
+_ARRIVE_AT_PICKUP, _PICKUP_COMPLETE, _ARRIVE_AT_DROPOFF = range(3)
+# The direction of a step along an axis (0 for x, 1 for y) and a sign
+_STEP_DIRECTIONS = {
+    (0, 1): Direction.EAST,
+    (0, -1): Direction.WEST,
+    (1, 1): Direction.NORTH,
+    (1, -1): Direction.SOUTH,
+}
+# Inputs to the price and reservation wage of city-scale simulations
+CITY_SCALE_INPUTS = frozenset(
+    (
+        "use_city_scale",
+        "per_hour_opportunity_cost",
+        "per_km_ops_cost",
+        "per_minute_price",
+        "per_km_price",
+        "base_fare",
+        "mean_trip_distance",
+        "minutes_per_block",
+        "mean_vehicle_speed",
+        "price",
+        "reservation_wage",
+    )
+)
+# Inputs to the request rate (see _demand)
+DEMAND_INPUTS = frozenset(
+    ("base_demand", "price", "demand_elasticity", "equilibration", "use_city_scale")
+)
+
+
+class TargetState(dict):
+    """
+    The values that simulation parameters are to take at the start of the
+    next block. Records which keys have been written since the last call
+    to pop_changes, so that only those need to be applied. The initial
+    contents are taken to be in effect already, and are not recorded.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.changed = set()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.changed.add(key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop_changes(self):
+        """Return the keys written since the last call, and forget them"""
+        changed = self.changed
+        self.changed = set()
+        return changed
 
 
 class KeyboardHandler:
@@ -317,19 +413,22 @@ class RideHailSimulation:
         # simulation, so making a copy makes sense rather than referencing
         # the self.config.attr_name throughout. The two things are logically
         # distinct.
-        # self.attr_name = config.attr_name.value for each item in the config
-        for attr_name in dir(config):
-            attr = getattr(config, attr_name)
-            if hasattr(attr, "value") and not attr_name.startswith("_"):
-                setattr(self, attr_name, attr.value)
+        # self.attr_name = config.attr_name.value for each item in the config.
+        # Both RideHailConfig and ConfigSnapshot provide the values as a dict,
+        # which avoids walking dir(config).
+        self.__dict__.update(config.as_dict())
         # special cases
         self.config_file = config.config_file.value or None
         self.start_time = config.start_time
 
+        # Demand, vehicle movement and dispatch each draw from their own
+        # stream, so that simulations sharing a seed see the same trips.
+        self.streams = RandomStreams(self.random_number_seed)
         self.city = City(
             self.city_size,
             inhomogeneity=self.inhomogeneity,
             inhomogeneous_destinations=self.inhomogeneous_destinations,
+            rng=self.streams.demand,
         )
         self._set_output_files()
         self._validate_options()
@@ -341,23 +440,36 @@ class RideHailSimulation:
             self.base_demand = self.convert_units(
                 self.base_demand, CityScaleUnit.PER_MINUTE, CityScaleUnit.PER_BLOCK
             )
-        self.target_state = {}
-        for attr in dir(self):
-            option = getattr(self, attr)
-            if callable(option) or attr.startswith("__"):
-                continue
-            # Skip read-only properties: they are computed from other attributes
-            # and cannot be setattr targets for live updates.
-            cls_attr = getattr(type(self), attr, None)
-            if isinstance(cls_attr, property) and cls_attr.fset is None:
-                continue
-            if attr not in ("target_state",):
-                self.target_state[attr] = option
+        # Every instance attribute set so far is a candidate for live updates.
+        # Read-only properties (display_base_demand) live on the class, so
+        # copying vars(self) rather than walking dir(self) skips them too.
+        self.target_state = TargetState(
+            (attr, option)
+            for attr, option in vars(self).items()
+            if not callable(option)
+        )
+        self._impulse_schedule = self._compile_impulses()
+        # Trips completed or cancelled in the last block, to be set inactive
+        # at the start of the next
+        self._finished_trips = []
+        # Trip lifecycle events. The simulation is the first subscriber: its
+        # trip History values and completion history are built from them.
+        self.events = EventBus()
+        self.events.subscribe(self._record_trip_events)
+        self._riding_trip_count = 0
+        self._trip_block_values = dict.fromkeys(TRIP_EVENT_HISTORY, 0)
         # Following items not set in config
-        if config.random_number_seed.value:
-            random.seed(config.random_number_seed.value)
+        if self.random_number_seed:
+            random.seed(self.random_number_seed)
         self.block_index = 0
+        if self.use_city_scale:
+            self._set_city_scale_economics()
         self.request_rate = self._demand()
+        if self.mean_field_start and self.equilibration in (
+            Equilibration.PRICE,
+            Equilibration.WAIT_FRACTION,
+        ):
+            self._start_at_mean_field_equilibrium()
         self.trips = {}
         self.next_trip_id = 0
         # (block, wait_time, distance) tuples for recently completed trips,
@@ -366,13 +478,27 @@ class RideHailSimulation:
         # wait-time statistics (a true per-trip median isn't recoverable
         # from the block-summed History buffers).
         self.trip_completion_history = deque()
-        self.vehicles = [
-            Vehicle(i, self.city, self.idle_vehicles_moving)
+        # The same wait times and distances in sorted order, kept in step
+        # with trip_completion_history so the median measures do not sort
+        # the whole window every block
+        self.trip_wait_time_window = SortedWindow()
+        self.trip_distance_window = SortedWindow()
+        self.vehicles = VehicleRegistry(
+            Vehicle(
+                i, self.city, self.idle_vehicles_moving, rng=self.streams.movement
+            )
             for i in range(self.vehicle_count)
-        ]
+        )
+        # Event-driven simulations: a heap of scheduled vehicle events,
+        # (block due, sequence, event token, kind, vehicle)
+        self._vehicle_events = []
+        self._event_sequence = count()
+        self._track_vehicle_phases()
         self.changed_plotstat_flag = False
         self._request_capital = 0.0
-        self._dispatcher = Dispatch(self.dispatch_method, self.forward_dispatch_bias)
+        self._dispatcher = Dispatch(
+            self.dispatch_method, self.forward_dispatch_bias, rng=self.streams.dispatch
+        )
         # If we change a simulation parameter interactively, the new value
         # is stored in self.target_state, and the new values of the
         # actual parameters are updated at the beginning of the next block.
@@ -421,6 +547,41 @@ class RideHailSimulation:
             chain_length=self.smoothing_window,
             convergence_windows=int(self.results_window / self.smoothing_window) + 1,
         )
+        self.equilibrium_solver = self._equilibrium_solver()
+
+    def _start_at_mean_field_equilibrium(self):
+        """
+        Start with the fleet that a mean-field model predicts the
+        equilibration will reach, so that it has less far to go.
+        """
+        equilibrium = MeanFieldModel.from_simulation(self).equilibrium(
+            self.equilibration
+        )
+        if equilibrium is None:
+            logging.info(
+                "No mean-field equilibrium: starting with "
+                f"{self.vehicle_count} vehicles"
+            )
+            return
+        self.vehicle_count = max(
+            1, round(equilibrium[Measure.VEHICLE_MEAN_COUNT.name])
+        )
+        self.target_state["vehicle_count"] = self.vehicle_count
+        logging.info(
+            f"Starting with the mean-field equilibrium of {self.vehicle_count} vehicles"
+        )
+
+    def _equilibrium_solver(self):
+        """
+        The EquilibriumSolver that holds the fleet at the start of a price or
+        wait-fraction equilibration, if solve_equilibrium is set
+        """
+        if self.solve_equilibrium and self.equilibration in (
+            Equilibration.PRICE,
+            Equilibration.WAIT_FRACTION,
+        ):
+            return EquilibriumSolver.for_simulation(self)
+        return None
 
     def convert_units(
         self, in_value: float, from_unit: CityScaleUnit, to_unit: CityScaleUnit
@@ -510,44 +671,51 @@ class RideHailSimulation:
             self.mean_trip_distance = self.city_size // 2
         # use_city_scale overwrites reservation_wage and price
         if self.use_city_scale:
-            self.reservation_wage = round(
-                (
-                    self.convert_units(
-                        self.per_hour_opportunity_cost,
-                        CityScaleUnit.PER_HOUR,
-                        CityScaleUnit.PER_BLOCK,
-                    )
-                    + self.convert_units(
-                        self.per_km_ops_cost,
-                        CityScaleUnit.PER_KM,
-                        CityScaleUnit.PER_BLOCK,
-                    )
-                ),
-                2,
-            )
-            self.price = round(
-                (
-                    self.convert_units(
-                        self.per_minute_price,
-                        CityScaleUnit.PER_MINUTE,
-                        CityScaleUnit.PER_BLOCK,
-                    )
-                    + self.convert_units(
-                        self.per_km_price, CityScaleUnit.PER_KM, CityScaleUnit.PER_BLOCK
-                    )
-                    # A base fare is collected once per trip. A busy (P3) vehicle
-                    # completes 1/mean_trip_distance trips per block, so the base
-                    # fare adds base_fare / mean_trip_distance to the per-block
-                    # price. Folding it in here keeps the equilibration utility
-                    # and every income measure (which all use self.price) correct.
-                    + (
-                        self.base_fare / self.mean_trip_distance
-                        if self.mean_trip_distance
-                        else 0.0
-                    )
-                ),
-                2,
-            )
+            self._set_city_scale_economics()
+
+    def _set_city_scale_economics(self):
+        """
+        In a city-scale simulation the reservation wage and price follow from
+        the per-hour, per-km and per-minute costs and prices.
+        """
+        self.reservation_wage = round(
+            (
+                self.convert_units(
+                    self.per_hour_opportunity_cost,
+                    CityScaleUnit.PER_HOUR,
+                    CityScaleUnit.PER_BLOCK,
+                )
+                + self.convert_units(
+                    self.per_km_ops_cost,
+                    CityScaleUnit.PER_KM,
+                    CityScaleUnit.PER_BLOCK,
+                )
+            ),
+            2,
+        )
+        self.price = round(
+            (
+                self.convert_units(
+                    self.per_minute_price,
+                    CityScaleUnit.PER_MINUTE,
+                    CityScaleUnit.PER_BLOCK,
+                )
+                + self.convert_units(
+                    self.per_km_price, CityScaleUnit.PER_KM, CityScaleUnit.PER_BLOCK
+                )
+                # A base fare is collected once per trip. A busy (P3) vehicle
+                # completes 1/mean_trip_distance trips per block, so the base
+                # fare adds base_fare / mean_trip_distance to the per-block
+                # price. Folding it in here keeps the equilibration utility
+                # and every income measure (which all use self.price) correct.
+                + (
+                    self.base_fare / self.mean_trip_distance
+                    if self.mean_trip_distance
+                    else 0.0
+                )
+            ),
+            2,
+        )
 
     def _create_metadata_record(self):
         """
@@ -592,23 +760,33 @@ class RideHailSimulation:
         """
         Restart the simulation from the beginning, reinitializing all state.
         """
-        # Reset block index
+        # Reset block index and restart the random number streams
         self.block_index = 0
+        self.streams.seed(self.random_number_seed)
 
         # Reinitialize vehicles
-        self.vehicles = [
-            Vehicle(i, self.city, self.idle_vehicles_moving)
+        self.vehicles = VehicleRegistry(
+            Vehicle(
+                i, self.city, self.idle_vehicles_moving, rng=self.streams.movement
+            )
             for i in range(self.vehicle_count)
-        ]
+        )
 
         # Clear trips
         self.trips = {}
         self.next_trip_id = 0
         self.trip_completion_history.clear()
+        self.trip_wait_time_window = SortedWindow()
+        self.trip_distance_window = SortedWindow()
+        self._vehicle_events = []
+        self._track_vehicle_phases()
         self._request_capital = 0.0
 
         # Reset request rate
         self.request_rate = self._demand()
+        self._finished_trips = []
+        self.events.clear()
+        self._riding_trip_count = 0
 
         # Reset adaptive equilibration parameters
         self.damping_factor = 0.5
@@ -638,6 +816,7 @@ class RideHailSimulation:
             chain_length=self.smoothing_window,
             convergence_windows=int(self.results_window / self.smoothing_window) + 1,
         )
+        self.equilibrium_solver = self._equilibrium_solver()
 
     def simulate(self):
         """
@@ -668,44 +847,10 @@ class RideHailSimulation:
         if block % LOG_INTERVAL == 0:
             pass
         self._init_block(block)
-        for vehicle in self.vehicles:
-            # Move vehicles
-            vehicle.update_location()
-        for vehicle in self.vehicles:
-            # Update vehicle and trip phases, as needed
-            if vehicle.trip_index is not None:
-                # If the vehicle arrives at a pickup or dropoff location,
-                # update the vehicle and trip phases
-                trip = self.trips[vehicle.trip_index]
-                if (
-                    vehicle.phase == VehiclePhase.P2
-                    and vehicle.location == vehicle.pickup_location
-                ):
-                    # the vehicle has arrived at the pickup spot
-                    if vehicle.pickup_countdown is None:
-                        # First arrival at pickup location
-                        if self.pickup_time > 0:
-                            vehicle.pickup_countdown = self.pickup_time
-                        else:
-                            # Instant pickup (backward compatibility)
-                            vehicle.update_phase(to_phase=VehiclePhase.P3)
-                            trip.update_phase(to_phase=TripPhase.RIDING)
-                    elif vehicle.pickup_countdown > 0:
-                        # Decrement countdown each block
-                        vehicle.pickup_countdown -= 1
-                        if vehicle.pickup_countdown == 0:
-                            # Pickup complete, transition phases
-                            vehicle.update_phase(to_phase=VehiclePhase.P3)
-                            trip.update_phase(to_phase=TripPhase.RIDING)
-                            vehicle.pickup_countdown = None
-                elif (
-                    vehicle.phase == VehiclePhase.P3
-                    and vehicle.location == vehicle.dropoff_location
-                ):
-                    # The vehicle has arrived at the dropoff and the trip ends.
-                    # Update vehicle and trip phase to reflect the completion
-                    vehicle.update_phase(to_phase=VehiclePhase.P1)
-                    trip.update_phase(to_phase=TripPhase.COMPLETED)
+        if self.event_driven:
+            self._advance_vehicles_event_driven(block)
+        else:
+            self._advance_vehicles(block)
         # Using the history from the previous block,
         # equilibrate the supply and/or demand of rides
         if self.equilibration in (
@@ -721,24 +866,46 @@ class RideHailSimulation:
             trip for trip in self.trips.values() if trip.phase == TripPhase.UNASSIGNED
         ]
         if len(unassigned_trips) != 0:
-            random.shuffle(unassigned_trips)
-            self._dispatcher.dispatch_vehicles(
+            self.streams.dispatch.shuffle(unassigned_trips)
+            if (
+                self.event_driven
+                and self.dispatch_method == DispatchMethod.FORWARD_DISPATCH
+            ):
+                # Forward dispatch measures from the locations of P3 vehicles
+                self._locate_vehicles(block)
+            for trip, vehicle in self._dispatcher.dispatch_vehicles(
                 unassigned_trips, self.city, self.vehicles
-            )
+            ):
+                self._trip_event(LifecycleEvent.TRIP_DISPATCHED, block, trip, vehicle)
         # Cancel any requests that have been open too long
-        self._cancel_requests(max_wait_time=None)
+        self._cancel_requests(block, max_wait_time=None)
         # Update history for everything that has happened in this block
-        for vehicle in self.vehicles:
-            # Change direction: this is the direction that will be used in the
-            # NEXT block's call to update_location, and so should reflect the
-            # phase that the vehicle is now in, and the assignments made in
-            # this block.
-            # Note: you might think the direction could better be set at the
-            # beginning of the next block, but it must be set *before* the next
-            # block, so that the interpolated steps in map animations go along
-            # the right path.
-            vehicle.update_direction()
+        # Change direction: this is the direction that will be used in the
+        # NEXT block's call to update_location, and so should reflect the
+        # phase that the vehicle is now in, and the assignments made in
+        # this block.
+        # Note: you might think the direction could better be set at the
+        # beginning of the next block, but it must be set *before* the next
+        # block, so that the interpolated steps in map animations go along
+        # the right path.
+        if self.event_driven:
+            # Only the vehicles that were idle at dispatch need attention
+            for vehicle in list(self._idle_vehicles.values()):
+                if vehicle.phase == VehiclePhase.P1:
+                    vehicle.update_direction()
+                else:
+                    # Dispatched in this block: schedule its arrival at the
+                    # pickup
+                    self._vehicle_phase_changed(vehicle, VehiclePhase.P1)
+                    self._schedule_vehicle_event(vehicle, block)
+        else:
+            for vehicle in self.vehicles:
+                vehicle.update_direction()
         self._update_history(block)
+        if self.event_driven and (
+            return_values == "map" or self.animation in MAP_ANIMATIONS
+        ):
+            self._locate_vehicles(block)
         # Some arrays hold information for each trip:
         # compress these as needed to avoid a growing set
         # of completed or cancelled (dead) trips
@@ -804,6 +971,239 @@ class RideHailSimulation:
         # return self.block_index
         return state_dict
 
+    def _advance_vehicles(self, block):
+        """
+        Move every vehicle one step, then update the phases of vehicles that
+        have reached a pickup or dropoff location.
+        """
+        for vehicle in self.vehicles:
+            # Move vehicles
+            vehicle.update_location()
+        for vehicle in self.vehicles:
+            # Update vehicle and trip phases, as needed
+            if vehicle.trip_index is not None:
+                # If the vehicle arrives at a pickup or dropoff location,
+                # update the vehicle and trip phases
+                trip = self.trips[vehicle.trip_index]
+                if (
+                    vehicle.phase == VehiclePhase.P2
+                    and vehicle.location == vehicle.pickup_location
+                ):
+                    # the vehicle has arrived at the pickup spot
+                    if vehicle.pickup_countdown is None:
+                        # First arrival at pickup location
+                        if self.pickup_time > 0:
+                            vehicle.pickup_countdown = self.pickup_time
+                        else:
+                            # Instant pickup (backward compatibility)
+                            vehicle.update_phase(to_phase=VehiclePhase.P3)
+                            trip.update_phase(to_phase=TripPhase.RIDING)
+                            self._trip_event(
+                                LifecycleEvent.TRIP_PICKED_UP, block, trip, vehicle
+                            )
+                    elif vehicle.pickup_countdown > 0:
+                        # Decrement countdown each block
+                        vehicle.pickup_countdown -= 1
+                        if vehicle.pickup_countdown == 0:
+                            # Pickup complete, transition phases
+                            vehicle.update_phase(to_phase=VehiclePhase.P3)
+                            trip.update_phase(to_phase=TripPhase.RIDING)
+                            vehicle.pickup_countdown = None
+                            self._trip_event(
+                                LifecycleEvent.TRIP_PICKED_UP, block, trip, vehicle
+                            )
+                elif (
+                    vehicle.phase == VehiclePhase.P3
+                    and vehicle.location == vehicle.dropoff_location
+                ):
+                    # The vehicle has arrived at the dropoff and the trip ends.
+                    # Update vehicle and trip phase to reflect the completion
+                    vehicle.update_phase(to_phase=VehiclePhase.P1)
+                    trip.update_phase(to_phase=TripPhase.COMPLETED)
+                    self._trip_event(
+                        LifecycleEvent.TRIP_COMPLETED, block, trip, vehicle
+                    )
+
+    def _advance_vehicles_event_driven(self, block):
+        """
+        The event-driven counterpart of _advance_vehicles. Only idle (P1)
+        vehicles are moved. Vehicles on a trip follow a shortest path, one
+        block per step, so the block in which each reaches its pickup or
+        dropoff was scheduled when it set off: handle the events due now.
+        """
+        for vehicle in self._idle_vehicles.values():
+            vehicle.update_location()
+        events = self._vehicle_events
+        while events and events[0][0] <= block:
+            _, _, token, kind, vehicle = heapq.heappop(events)
+            if token != vehicle.event_token:
+                # Superseded by a later schedule
+                continue
+            vehicle.event_block = None
+            trip = self.trips[vehicle.trip_index]
+            if kind == _ARRIVE_AT_PICKUP:
+                vehicle.direction = (
+                    self._path_direction(
+                        vehicle.location, vehicle.pickup_location, last=True
+                    )
+                    or vehicle.direction
+                )
+                vehicle.location = list(vehicle.pickup_location)
+                vehicle.located_block = block
+                if self.pickup_time > 0:
+                    vehicle.pickup_countdown = self.pickup_time
+                    self._schedule_vehicle_event(vehicle, block)
+                    continue
+            from_phase = vehicle.phase
+            if kind in (_ARRIVE_AT_PICKUP, _PICKUP_COMPLETE):
+                vehicle.update_phase(to_phase=VehiclePhase.P3)
+                trip.update_phase(to_phase=TripPhase.RIDING)
+                vehicle.pickup_countdown = None
+                self._trip_event(LifecycleEvent.TRIP_PICKED_UP, block, trip, vehicle)
+                self._vehicle_phase_changed(vehicle, from_phase)
+                self._schedule_vehicle_event(vehicle, block)
+            else:
+                vehicle.direction = (
+                    self._path_direction(
+                        vehicle.location, vehicle.dropoff_location, last=True
+                    )
+                    or vehicle.direction
+                )
+                vehicle.location = list(vehicle.dropoff_location)
+                vehicle.located_block = block
+                vehicle.update_phase(to_phase=VehiclePhase.P1)
+                trip.update_phase(to_phase=TripPhase.COMPLETED)
+                self._trip_event(LifecycleEvent.TRIP_COMPLETED, block, trip, vehicle)
+                self._vehicle_phase_changed(vehicle, from_phase)
+                if vehicle.phase == VehiclePhase.P2:
+                    # The vehicle had been forward dispatched to another trip
+                    self._schedule_vehicle_event(vehicle, block)
+
+    def _track_vehicle_phases(self):
+        """
+        For an event-driven simulation, collect the idle (P1) vehicles, keyed
+        by id, and count the vehicles in each phase. Both are then kept up to
+        date as vehicles change phase, so that a block visits only the idle
+        vehicles and those with an event due, not the whole fleet.
+        """
+        self._idle_vehicles = {
+            vehicle.index: vehicle
+            for vehicle in self.vehicles
+            if vehicle.phase == VehiclePhase.P1
+        }
+        self._phase_counts = Counter(vehicle.phase for vehicle in self.vehicles)
+
+    def _vehicle_phase_changed(self, vehicle, from_phase):
+        """Record a change of phase in _idle_vehicles and _phase_counts"""
+        self._phase_counts[from_phase] -= 1
+        self._phase_counts[vehicle.phase] += 1
+        if vehicle.phase == VehiclePhase.P1:
+            self._idle_vehicles[vehicle.index] = vehicle
+        elif from_phase == VehiclePhase.P1:
+            del self._idle_vehicles[vehicle.index]
+
+    def _schedule_vehicle_event(self, vehicle, block):
+        """
+        Schedule the next event for a P2 or P3 vehicle whose location is
+        up to date at this block: its arrival at the pickup or dropoff, or
+        the end of the pickup countdown if it is already at the pickup.
+        A vehicle standing at its pickup without a countdown arrives in the
+        next block, as it would when stepped.
+        """
+        if vehicle.phase == VehiclePhase.P2:
+            if vehicle.pickup_countdown is not None:
+                kind = _PICKUP_COMPLETE
+                due = block + vehicle.pickup_countdown
+            else:
+                kind = _ARRIVE_AT_PICKUP
+                target = vehicle.pickup_location
+        else:
+            kind = _ARRIVE_AT_DROPOFF
+            target = vehicle.dropoff_location
+        if kind != _PICKUP_COMPLETE:
+            distance = self.city.distance(
+                vehicle.location, target, threshold=self.city.city_size
+            )
+            due = block + max(distance, 1)
+        vehicle.event_token += 1
+        vehicle.event_block = due
+        vehicle.located_block = block
+        heapq.heappush(
+            self._vehicle_events,
+            (due, next(self._event_sequence), vehicle.event_token, kind, vehicle),
+        )
+
+    def _locate_vehicles(self, block):
+        """
+        Bring the locations, directions and pickup countdowns of vehicles on
+        a trip up to date at this block, in an event-driven simulation. Each
+        walks the steps of its path (see _path_direction) taken since it was
+        last located. The path draws no random numbers, so locating vehicles
+        for a map does not change the course of the simulation.
+        """
+        city_size = self.city.city_size
+        for vehicle in self.vehicles:
+            if vehicle.phase == VehiclePhase.P1 or vehicle.located_block is None:
+                continue
+            if vehicle.pickup_countdown is not None:
+                # Standing at the pickup
+                vehicle.pickup_countdown = vehicle.event_block - block
+            else:
+                target = (
+                    vehicle.pickup_location
+                    if vehicle.phase == VehiclePhase.P2
+                    else vehicle.dropoff_location
+                )
+                for _ in range(block - vehicle.located_block):
+                    direction = self._path_direction(vehicle.location, target)
+                    if direction is None:
+                        break
+                    vehicle.direction = direction
+                    vehicle.location = [
+                        (vehicle.location[i] + direction.value[i]) % city_size
+                        for i in (0, 1)
+                    ]
+                vehicle.direction = (
+                    self._path_direction(vehicle.location, target)
+                    or vehicle.direction
+                )
+            vehicle.located_block = block
+
+    def _path_direction(self, location, target, last=False):
+        """
+        The direction of the next step, or with last of the final step, of
+        the path an event-driven vehicle on a trip follows from location to
+        target (the vehicle's direction if it is already there). The path is
+        a shortest one that steps along the axis with further to go, x on a
+        tie, so it depends only on where the vehicle is: arriving vehicles
+        take the same direction whether or not they were located on the way.
+        """
+        city_size = self.city.city_size
+        remaining = []
+        for i in (0, 1):
+            offset = (target[i] - location[i]) % city_size
+            if offset <= city_size / 2:
+                remaining.append((offset, 1))
+            else:
+                remaining.append((city_size - offset, -1))
+        (x_remaining, _), (y_remaining, _) = remaining
+        if x_remaining == y_remaining == 0:
+            return None
+        if last:
+            axis = 1 if y_remaining else 0
+        else:
+            axis = 0 if x_remaining >= y_remaining else 1
+        return _STEP_DIRECTIONS[(axis, remaining[axis][1])]
+
+    def _reschedule_vehicles(self, block):
+        """
+        Replace the scheduled events of all vehicles on a trip, from their
+        locations at this block. Needed when the city size changes.
+        """
+        for vehicle in self.vehicles:
+            if vehicle.phase != VehiclePhase.P1:
+                self._schedule_vehicle_event(vehicle, block)
+
     def vehicle_utility(self, busy_fraction):
         """
         Vehicle utility per block
@@ -835,7 +1235,15 @@ class RideHailSimulation:
         # Always initialize these attributes to avoid AttributeError
         self.jsonl_file = None
         self.csv_file = None
+        self.trip_log_file = None
 
+        if self.config_file and self.write_trip_log and not self.run_sequence:
+            self.config_file_root = path.splitext(path.split(self.config_file)[1])[0]
+            if not path.exists("./out"):
+                makedirs("./out")
+            self.trip_log_file = (
+                f"./out/{self.config_file_root}-{self.start_time}.trips"
+            )
         if self.config_file and self.write_output_files:
             # Only create output files if write_output_files is True
             self.config_file_dir = path.dirname(self.config_file)
@@ -860,14 +1268,18 @@ class RideHailSimulation:
             self.city_size = city_size
             # Keep the config in sync so dependent validators (below) see the
             # corrected value.
-            self.config.city_size.value = city_size
+            if isinstance(self.config, ConfigSnapshot):
+                self.config = self.config.replace(city_size=city_size)
+            else:
+                self.config.city_size.value = city_size
         # Re-apply the authoritative mean_trip_distance constraint rather than
         # duplicating a clamp here. The single source of truth is
         # config.py::_validate_mean_trip_distance, which caps a value in the
         # band (city_size // 2, city_size] at city_size // 2 and rejects
         # anything above city_size. This also picks up any city_size correction
         # made above.
-        is_valid, validated_value, _ = self.config.mean_trip_distance.validate_value(
+        mean_trip_distance_item = config_items()["mean_trip_distance"]
+        is_valid, validated_value, _ = mean_trip_distance_item.validate_value(
             self.mean_trip_distance, self.config
         )
         if is_valid:
@@ -879,7 +1291,7 @@ class RideHailSimulation:
             # range. Reaching here means the value was set through a path that
             # bypassed config validation. Derive the cap from the same relation
             # the validator uses so the rule lives in exactly one place.
-            relation = self.config.mean_trip_distance.max_relation
+            relation = mean_trip_distance_item.max_relation
             base_value = getattr(self, relation["param"])
             self.mean_trip_distance = int(base_value * relation["fraction"])
 
@@ -986,8 +1398,9 @@ class RideHailSimulation:
             # This sets the trip to TripPhase.UNASSIGNED
             # as no vehicle is assigned here
             trip.update_phase(TripPhase.UNASSIGNED)
+            self._trip_event(LifecycleEvent.TRIP_REQUESTED, block, trip)
 
-    def _cancel_requests(self, max_wait_time=None):
+    def _cancel_requests(self, block, max_wait_time=None):
         """
         If a request has been waiting too long, cancel it.
         """
@@ -998,87 +1411,148 @@ class RideHailSimulation:
                 if trip.phase == TripPhase.UNASSIGNED
             ]
             for trip in unassigned_trips:
-                if trip.phase_time[TripPhase.UNASSIGNED] >= max_wait_time:
+                if block - trip.phase_block >= max_wait_time:
                     trip.update_phase(to_phase=TripPhase.CANCELLED)
+                    self._trip_event(LifecycleEvent.TRIP_CANCELLED, block, trip)
+
+    def _trip_event(self, kind, block, trip, vehicle=None):
+        """
+        A trip has just changed phase, in this block. Close the time it spent
+        in its previous phase, and publish the change.
+
+        Each block the trip spends in a phase, up to the block in which it
+        leaves, counts towards its phase_time. A completed or cancelled trip
+        is set inactive at the start of the next block, so it spends one
+        block in its last phase.
+        """
+        if kind in CLOSED_TRIP_PHASE:
+            trip.phase_time[CLOSED_TRIP_PHASE[kind]] = block - trip.phase_block
+        if trip.phase in (TripPhase.COMPLETED, TripPhase.CANCELLED):
+            trip.phase_time[trip.phase] = 1
+        trip.phase_block = block
+        self.events.publish(kind, block, trip, vehicle)
+
+    def _record_trip_events(self, block, events):
+        """
+        The simulation's own subscriber to trip lifecycle events: count the
+        trips riding, and record each completed or cancelled trip in this
+        block's trip History values and in the completion history.
+        """
+        values = self._trip_block_values
+        for event in events:
+            trip = event.trip
+            if event.kind == LifecycleEvent.TRIP_PICKED_UP:
+                self._riding_trip_count += 1
+            elif event.kind == LifecycleEvent.TRIP_COMPLETED:
+                self._riding_trip_count -= 1
+                self._finished_trips.append(trip)
+                values[History.TRIP_COUNT] += 1
+                values[History.TRIP_COMPLETED_COUNT] += 1
+                values[History.TRIP_DISTANCE] += trip.distance
+                values[History.TRIP_AWAITING_TIME] += trip.phase_time[
+                    TripPhase.WAITING
+                ]
+                values[History.TRIP_UNASSIGNED_TIME] += trip.phase_time[
+                    TripPhase.UNASSIGNED
+                ]
+                # Bad name: WAIT_TIME = WAITING + UNASSIGNED
+                trip_wait_time = (
+                    trip.phase_time[TripPhase.UNASSIGNED]
+                    + trip.phase_time[TripPhase.WAITING]
+                )
+                values[History.TRIP_WAIT_TIME] += trip_wait_time
+                self.trip_completion_history.append(
+                    (block, trip_wait_time, trip.distance)
+                )
+                self.trip_wait_time_window.add(trip_wait_time)
+                self.trip_distance_window.add(trip.distance)
+                if (
+                    self.dispatch_method == DispatchMethod.FORWARD_DISPATCH
+                    and trip.forward_dispatch
+                ):
+                    values[History.TRIP_FORWARD_DISPATCH_COUNT] += 1
+            elif event.kind == LifecycleEvent.TRIP_CANCELLED:
+                # Cancelled trips are still counted as trips,
+                # just not as completed trips
+                self._finished_trips.append(trip)
+                values[History.TRIP_COUNT] += 1
+
+    def _compile_impulses(self):
+        """
+        Index the impulse_list by block: {block: [(key, value), ...]}
+        """
+        schedule = {}
+        for impulse_dict in self.impulse_list or []:
+            if "block" in impulse_dict:
+                schedule.setdefault(impulse_dict["block"], []).extend(
+                    (key, val) for key, val in impulse_dict.items() if key != "block"
+                )
+        return schedule
 
     def _init_block(self, block):
         """
         - If needed, update simulations settings from user input
           (self.target_state values).
         - Initialize values for the "block" item of each array.
+
+        Only the target_state keys written since the last block are applied,
+        and values derived from them are recomputed only when they change.
         """
         # Target state changes come from key events or from config.impulse_list
-        # Apply any impulses in self.impulse_list settings
         self.changed_plotstat_flag = False
-        if self.impulse_list:
-            for impulse_dict in self.impulse_list:
-                if "block" in impulse_dict and block == impulse_dict["block"]:
-                    for key, val in impulse_dict.items():
-                        self.target_state[key] = val
-        # Apply the target_state values. Iterate the staged intents directly
-        # rather than scanning every attribute via dir(self). The hasattr guard
-        # preserves the previous behaviour of ignoring target_state keys that are
-        # not simulation attributes (e.g. the "block" key carried in impulse_list
-        # entries).
-        for key, target_value in self.target_state.items():
+        for key, val in self._impulse_schedule.get(block, ()):
+            self.target_state[key] = val
+        # Keys that are not simulation attributes are ignored
+        changed = set()
+        for key in self.target_state.pop_changes():
             if not hasattr(self, key):
                 continue
+            target_value = self.target_state[key]
             if getattr(self, key) != target_value:
                 setattr(self, key, target_value)
-                if key == "equilibration":
-                    self.changed_plotstat_flag = True
-                if key == "idle_vehicles_moving":
-                    for vehicle in self.vehicles:
-                        vehicle.idle_vehicles_moving = target_value
+                changed.add(key)
+        if "equilibration" in changed:
+            self.changed_plotstat_flag = True
+        if "idle_vehicles_moving" in changed:
+            for vehicle in self.vehicles:
+                vehicle.idle_vehicles_moving = self.idle_vehicles_moving
+        if "inhomogeneity" in changed:
+            self.city.inhomogeneity = self.inhomogeneity
+        if self.use_city_scale and changed & CITY_SCALE_INPUTS:
+            self._set_city_scale_economics()
+        if changed & (DEMAND_INPUTS | CITY_SCALE_INPUTS):
+            self.request_rate = self._demand()
+        if self.city.city_size != self.city_size:
+            self._resize_city(block)
+        # Set trips that were completed last move to be 'inactive' for
+        # the beginning of this one
+        for trip in self._finished_trips:
+            trip.phase = TripPhase.INACTIVE
+        self._finished_trips = []
+        # Add or remove vehicles and requests
+        # for non-equilibrating simulations only
+        if self.equilibration == Equilibration.NONE:
+            # Update the request rate to reflect the base demand
+            old_vehicle_count = len(self.vehicles)
+            vehicle_diff = self.vehicle_count - old_vehicle_count
+            if vehicle_diff > 0:
+                self._add_vehicles(vehicle_diff)
+            elif vehicle_diff < 0:
+                self._remove_vehicles(-vehicle_diff)
 
-        # Additional actions to accommodate new values
+    def _resize_city(self, block):
+        """
+        Apply a new city_size, repositioning vehicles and active trips
+        within the new city boundaries.
+        """
+        if self.event_driven:
+            # Scheduled arrivals are in the old city: locate the vehicles at
+            # the end of the previous block, before they are wrapped below
+            self._locate_vehicles(block - 1)
         self.city.city_size = self.city_size
-        self.city.inhomogeneity = self.inhomogeneity
-        if self.use_city_scale:
-            # This code cot and pasted from validate_options
-            # Recalculate the reservation wage and price
-            self.reservation_wage = round(
-                (
-                    self.convert_units(
-                        self.per_hour_opportunity_cost,
-                        CityScaleUnit.PER_HOUR,
-                        CityScaleUnit.PER_BLOCK,
-                    )
-                    + self.convert_units(
-                        self.per_km_ops_cost,
-                        CityScaleUnit.PER_KM,
-                        CityScaleUnit.PER_BLOCK,
-                    )
-                ),
-                2,
-            )
-            self.price = round(
-                (
-                    self.convert_units(
-                        self.per_minute_price,
-                        CityScaleUnit.PER_MINUTE,
-                        CityScaleUnit.PER_BLOCK,
-                    )
-                    + self.convert_units(
-                        self.per_km_price, CityScaleUnit.PER_KM, CityScaleUnit.PER_BLOCK
-                    )
-                    # Base fare amortized over the mean trip length (see the
-                    # matching computation in validate_options / __init__).
-                    + (
-                        self.base_fare / self.mean_trip_distance
-                        if self.mean_trip_distance
-                        else 0.0
-                    )
-                ),
-                2,
-            )
-        self.request_rate = self._demand()
-        # Reposition the vehicles within the city boundaries
         for vehicle in self.vehicles:
             for i in [0, 1]:
                 vehicle.location[i] = vehicle.location[i] % self.city_size
-        # Likewise for trips: reposition origins and destinations
-        # within the city boundaries
         # PERFORMANCE: Only process active trips (skip COMPLETED/CANCELLED/INACTIVE)
         for trip in self.trips.values():
             if trip.phase in (
@@ -1090,26 +1564,8 @@ class RideHailSimulation:
             for i in [0, 1]:
                 trip.origin[i] = trip.origin[i] % self.city_size
                 trip.destination[i] = trip.destination[i] % self.city_size
-        # Add or remove vehicles and requests
-        # for non-equilibrating simulations only
-        if self.equilibration == Equilibration.NONE:
-            # Update the request rate to reflect the base demand
-            old_vehicle_count = len(self.vehicles)
-            vehicle_diff = self.vehicle_count - old_vehicle_count
-            if vehicle_diff > 0:
-                for d in range(vehicle_diff):
-                    self.vehicles.append(
-                        Vehicle(
-                            old_vehicle_count + d, self.city, self.idle_vehicles_moving
-                        )
-                    )
-            elif vehicle_diff < 0:
-                self._remove_vehicles(-vehicle_diff)
-        # Set trips that were completed last move to be 'inactive' for
-        # the beginning of this one
-        for trip in self.trips.values():
-            if trip.phase in (TripPhase.COMPLETED, TripPhase.CANCELLED):
-                trip.phase = TripPhase.INACTIVE
+        if self.event_driven:
+            self._reschedule_vehicles(block - 1)
 
     def _update_history(self, block):
         """
@@ -1124,9 +1580,10 @@ class RideHailSimulation:
           Fortunately, animation does not use it - I think it is just written
           out in end_state.
 
-        All averaging and smoothing is done in the animation function
-        Animation._update_plot_arrays, which uses History functions over
-        the smoothing_window (sometimes differences, sometimes sums).
+        All averaging and smoothing is done in measures.compute_measures,
+        which uses the running sums of the History buffers over the
+        smoothing_window. Animations plot those measures rather than
+        recomputing them.
         """
         # vehicle count and request rate are filled in anew each block
         this_block_value = {}
@@ -1142,7 +1599,17 @@ class RideHailSimulation:
         # history[History.REQUEST_CAPITAL] = (
         # (history[History.REQUEST_CAPITAL][block - 1] % 1) +
         # self.request_rate)
-        if len(self.vehicles) > 0:
+        if self.event_driven:
+            # Phase counts are kept up to date as vehicles change phase
+            this_block_value[History.VEHICLE_TIME] = len(self.vehicles)
+            this_block_value[History.VEHICLE_TIME_P1] = len(self._idle_vehicles)
+            this_block_value[History.VEHICLE_TIME_P2] = self._phase_counts[
+                VehiclePhase.P2
+            ]
+            this_block_value[History.VEHICLE_TIME_P3] = self._phase_counts[
+                VehiclePhase.P3
+            ]
+        elif len(self.vehicles) > 0:
             for vehicle in self.vehicles:
                 this_block_value[History.VEHICLE_TIME] += 1
                 if vehicle.phase == VehiclePhase.P1:
@@ -1156,58 +1623,22 @@ class RideHailSimulation:
                         f"Invalid phase {vehicle.phase}: All vehicles must "
                         "be in phase P1, P2, or P3"
                     )
-        if self.trips:
-            # PERFORMANCE: Only process active trips (skip INACTIVE
-            #  to avoid iterating over dead trips)
-            for trip in self.trips.values():
-                phase = trip.phase
-                if phase == TripPhase.INACTIVE:
-                    continue
-                trip.phase_time[phase] += 1
-                if phase == TripPhase.UNASSIGNED:
-                    pass
-                elif phase == TripPhase.WAITING:
-                    pass
-                elif phase == TripPhase.RIDING:
-                    this_block_value[History.TRIP_RIDING_TIME] += 1
-                elif phase == TripPhase.COMPLETED:
-                    # Many trip statistics are evaluated at completion.
-                    # As the trip is deleted following the block in which
-                    # it is completed, each trip should be in the phase
-                    # TripPhase.COMPLETED for only one block
-                    this_block_value[History.TRIP_COUNT] += 1
-                    this_block_value[History.TRIP_COMPLETED_COUNT] += 1
-                    this_block_value[History.TRIP_DISTANCE] += trip.distance
-                    this_block_value[History.TRIP_AWAITING_TIME] += trip.phase_time[
-                        TripPhase.WAITING
-                    ]
-                    this_block_value[History.TRIP_UNASSIGNED_TIME] += trip.phase_time[
-                        TripPhase.UNASSIGNED
-                    ]
-                    # Bad name: WAIT_TIME = WAITING + UNASSIGNED
-                    trip_wait_time = (
-                        trip.phase_time[TripPhase.UNASSIGNED]
-                        + trip.phase_time[TripPhase.WAITING]
-                    )
-                    this_block_value[History.TRIP_WAIT_TIME] += trip_wait_time
-                    self.trip_completion_history.append(
-                        (block, trip_wait_time, trip.distance)
-                    )
-                    if self.dispatch_method == DispatchMethod.FORWARD_DISPATCH:
-                        if trip.forward_dispatch:
-                            this_block_value[History.TRIP_FORWARD_DISPATCH_COUNT] += 1
-                elif phase == TripPhase.CANCELLED:
-                    # Cancelled trips are still counted as trips,
-                    # just not as completed trips
-                    this_block_value[History.TRIP_COUNT] += 1
-                # Note: INACTIVE trips are skipped at loop start (line 1223)
+        # The trip values come from this block's lifecycle events, delivered
+        # now to _record_trip_events and any other subscribers, rather than
+        # from a scan of every trip
+        self._trip_block_values = dict.fromkeys(TRIP_EVENT_HISTORY, 0)
+        self.events.flush(block)
+        this_block_value.update(self._trip_block_values)
+        this_block_value[History.TRIP_RIDING_TIME] = self._riding_trip_count
         # Evict trip_completion_history entries older than results_window
         # blocks, even on blocks where no trip completed.
         while (
             self.trip_completion_history
             and block - self.trip_completion_history[0][0] > self.results_window
         ):
-            self.trip_completion_history.popleft()
+            _, wait_time, distance = self.trip_completion_history.popleft()
+            self.trip_wait_time_window.remove(wait_time)
+            self.trip_distance_window.remove(distance)
         # Update the rolling averages as well
         for stat in list(History):
             self.history_buffer[stat].push(this_block_value[stat])
@@ -1215,6 +1646,8 @@ class RideHailSimulation:
             self.history_results[stat].push(this_block_value[stat])
         for stat in list(History):
             self.history_equilibration[stat].push(this_block_value[stat])
+        if self.equilibrium_solver is not None:
+            self.equilibrium_solver.record(block, this_block_value)
 
     def _collect_garbage(self, block):
         """
@@ -1238,16 +1671,29 @@ class RideHailSimulation:
         Only removes P1 (idle) vehicles.
         Returns the number of vehicles actually removed.
         """
-        p1_vehicles = [v for v in self.vehicles if v.phase == VehiclePhase.P1]
-        non_p1_vehicles = [v for v in self.vehicles if v.phase != VehiclePhase.P1]
-
-        # Determine how many P1 vehicles we can actually remove
-        vehicles_to_remove = int(min(number_to_remove, len(p1_vehicles)))
-
-        # Keep all non-P1 vehicles and only the P1 vehicles we're not removing
-        self.vehicles = non_p1_vehicles + p1_vehicles[vehicles_to_remove:]
-
-        return vehicles_to_remove
+        removed = self.vehicles.remove_idle(int(number_to_remove))
+        if removed and self.event_driven:
+            for index in removed:
+                del self._idle_vehicles[index]
+            self._phase_counts[VehiclePhase.P1] -= len(removed)
+        return len(removed)
+
+    def _add_vehicles(self, number_to_add):
+        """
+        Add 'number_to_add' new P1 vehicles at random locations, with ids
+        that have not been used before.
+        """
+        for _ in range(number_to_add):
+            vehicle = Vehicle(
+                self.vehicles.next_index,
+                self.city,
+                self.idle_vehicles_moving,
+                rng=self.streams.movement,
+            )
+            self.vehicles.add(vehicle)
+            if self.event_driven:
+                self._idle_vehicles[vehicle.index] = vehicle
+                self._phase_counts[VehiclePhase.P1] += 1
 
     def _equilibrate_supply(self, block):
         """
@@ -1259,7 +1705,18 @@ class RideHailSimulation:
         - Adaptively adjusts damping factor to prevent oscillations
         - Detects and responds to oscillatory behavior
         - Uses gain scheduling for state-dependent control (Phase 2)
+
+        With solve_equilibrium, the EquilibriumSolver sets the vehicle count
+        instead until it is done.
         """
+        solver = self.equilibrium_solver
+        if solver is not None and not solver.done:
+            change = solver.vehicle_count - len(self.vehicles)
+            if change > 0:
+                self._add_vehicles(change)
+            elif change < 0:
+                self._remove_vehicles(-change)
+            return
         # Determine effective equilibration interval
         # equilibration_interval == 0 enables adaptive mode
         if self.equilibration_interval == 0:
@@ -1399,12 +1856,7 @@ class RideHailSimulation:
                 # Cap at 10% of vehicle count, but allow at least 1 vehicle change
                 max_increment = max(1, round(0.1 * old_vehicle_count))
                 vehicle_increment = min(vehicle_increment, max_increment)
-                self.vehicles += [
-                    Vehicle(i, self.city, self.idle_vehicles_moving)
-                    for i in range(
-                        old_vehicle_count, old_vehicle_count + vehicle_increment
-                    )
-                ]
+                self._add_vehicles(vehicle_increment)
             elif vehicle_increment < 0:
                 # Cap at -10% of vehicle count, but allow at least -1 vehicle change
                 min_increment = min(-1, -round(0.1 * old_vehicle_count))
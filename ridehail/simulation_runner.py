@@ -15,6 +15,7 @@ from typing import Optional, Callable
 
 from ridehail.config import WritableConfig
 from ridehail.results import RideHailSimulationResults
+from ridehail.trip_log import TripLogWriter
 
 
 def write_results_to_config(
@@ -66,7 +67,7 @@ class SimulationRunner:
     - Keyboard input polling
     - Pause/step/quit control
     - Animation delay with responsive keyboard checking
-    - File I/O (JSONL/CSV)
+    - File I/O (JSONL/CSV, and the binary trip log)
     - Results collection and writing
     """
 
@@ -82,6 +83,7 @@ class SimulationRunner:
         self.jsonl_file_handle = None
         self.csv_file_handle = None
         self.csv_exists = False
+        self.trip_log_writer = None
 
     def run(
         self,
@@ -218,6 +220,8 @@ class SimulationRunner:
         else:
             self.jsonl_file_handle = None
             self.csv_file_handle = None
+        if self.sim.trip_log_file:
+            self.trip_log_writer = TripLogWriter(self.sim, self.sim.trip_log_file)
 
     def _write_initial_records(self):
         """Write metadata and config records to output files"""
@@ -301,5 +305,8 @@ class SimulationRunner:
         if self.csv_file_handle:
             self.csv_file_handle.close()
 
+        if self.trip_log_writer:
+            self.trip_log_writer.close()
+
         # Write results to config file [RESULTS] section using shared helper
         write_results_to_config(self.sim, simulation_results, duration_seconds)
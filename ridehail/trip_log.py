@@ -0,0 +1,134 @@
+"""
+A compact, append-only binary log of trips, and a memory-mapped reader.
+
+The jsonl and csv outputs record block-level aggregates only. With
+write_trip_log set, a run also writes one fixed-width record for each trip
+as it is completed or cancelled: the blocks of its request, dispatch,
+pickup and dropoff, its vehicle, origin, destination and distance, and
+whether it was forward dispatched. Per-trip statistics, such as the full
+distribution of wait times, can then be computed offline from the log
+rather than by rerunning the simulation.
+
+The file is a short header followed by the records, in the order the
+trips finished. read_trip_log() maps it into memory as a numpy structured
+array, so that a log of many millions of trips can be read column by
+column without loading it:
+
+    log = read_trip_log("out/city-2025-01-01-12-00-00.trips")
+    completed = log[log["phase"] == TripPhase.COMPLETED.value]
+    wait_times = completed["pickup_block"] - completed["request_block"]
+"""
+
+import numpy as np
+
+from ridehail.atom import TripPhase
+from ridehail.events import LifecycleEvent
+
+MAGIC = b"RHTRIPLG"
+VERSION = 1
+# The block or vehicle id of a step that a trip never took, such as the
+# pickup of a cancelled trip
+MISSING = -1
+
+TRIP_RECORD = np.dtype(
+    [
+        ("trip_id", "<i8"),
+        ("request_block", "<i4"),
+        ("dispatch_block", "<i4"),
+        ("pickup_block", "<i4"),
+        ("dropoff_block", "<i4"),
+        ("vehicle_id", "<i4"),
+        ("distance", "<i4"),
+        ("origin", "<i4", (2,)),
+        ("destination", "<i4", (2,)),
+        # TripPhase.COMPLETED or TripPhase.CANCELLED
+        ("phase", "u1"),
+        ("forward_dispatch", "?"),
+    ]
+)
+# magic, version and record size
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("record_size", "<u4")])
+
+
+class TripLogWriter:
+    """
+    Append a record to a trip log for each trip a simulation completes or
+    cancels. The writer subscribes to the simulation's lifecycle events, and
+    writes each block's records in one call.
+    """
+
+    def __init__(self, sim, file_name):
+        self.sim = sim
+        self.file_name = file_name
+        self._file = open(file_name, "wb")
+        header = np.array([(MAGIC, VERSION, TRIP_RECORD.itemsize)], dtype=HEADER)
+        self._file.write(header.tobytes())
+        self.records_written = 0
+        sim.events.subscribe(
+            self.write_events,
+            kinds=[LifecycleEvent.TRIP_COMPLETED, LifecycleEvent.TRIP_CANCELLED],
+        )
+
+    def write_events(self, block, events):
+        records = np.zeros(len(events), dtype=TRIP_RECORD)
+        for record, event in zip(records, events):
+            trip = event.trip
+            phase_time = trip.phase_time
+            record["trip_id"] = trip.index
+            record["distance"] = trip.distance
+            record["origin"] = trip.origin
+            record["destination"] = trip.destination
+            record["phase"] = trip.phase.value
+            record["forward_dispatch"] = trip.forward_dispatch
+            if event.kind == LifecycleEvent.TRIP_COMPLETED:
+                pickup_block = block - phase_time[TripPhase.RIDING]
+                dispatch_block = pickup_block - phase_time[TripPhase.WAITING]
+                record["request_block"] = (
+                    dispatch_block - phase_time[TripPhase.UNASSIGNED]
+                )
+                record["dispatch_block"] = dispatch_block
+                record["pickup_block"] = pickup_block
+                record["dropoff_block"] = block
+                record["vehicle_id"] = event.vehicle.index
+            else:
+                record["request_block"] = block - phase_time[TripPhase.UNASSIGNED]
+                record["dispatch_block"] = MISSING
+                record["pickup_block"] = MISSING
+                record["dropoff_block"] = MISSING
+                record["vehicle_id"] = MISSING
+        self._file.write(records.tobytes())
+        self.records_written += len(records)
+
+    def close(self):
+        """Stop recording and close the file"""
+        self.sim.events.unsubscribe(self.write_events)
+        self._file.close()
+
+
+def read_trip_log(file_name):
+    """
+    Map a trip log into memory, read-only, as a structured array of
+    TRIP_RECORD. Raise ValueError if the file is not a trip log of this
+    version.
+    """
+    header = np.fromfile(file_name, dtype=HEADER, count=1)
+    if (
+        len(header) == 0
+        or header["magic"][0] != MAGIC
+        or header["version"][0] != VERSION
+        or header["record_size"][0] != TRIP_RECORD.itemsize
+    ):
+        raise ValueError(f"{file_name} is not a version {VERSION} trip log")
+    with open(file_name, "rb") as log_file:
+        log_file.seek(0, 2)
+        size = log_file.tell() - HEADER.itemsize
+    if size == 0:
+        # np.memmap cannot map an empty region
+        return np.zeros(0, dtype=TRIP_RECORD)
+    return np.memmap(
+        file_name,
+        dtype=TRIP_RECORD,
+        mode="r",
+        offset=HEADER.itemsize,
+        shape=(size // TRIP_RECORD.itemsize,),
+    )
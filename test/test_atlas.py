@@ -0,0 +1,99 @@
+"""
+Tests for the steady-state atlas of the presets.
+"""
+
+import numpy as np
+import pytest
+
+from ridehail import atlas
+from ridehail.atlas import SteadyStateAtlas, build_atlas, estimate, load_atlases
+from ridehail.config import ConfigSnapshot
+from ridehail.presets import get_preset
+
+
+def small_atlas():
+    """An atlas of two measures, linear in each of its two axes"""
+    vehicle_counts = [4, 8, 12]
+    base_demands = [0.5, 1.0]
+    values = np.array(
+        [
+            [
+                [count + 10 * demand, np.nan if count == 12 else 1.0]
+                for demand in base_demands
+            ]
+            for count in vehicle_counts
+        ]
+    )
+    return SteadyStateAtlas(
+        preset="village",
+        regime="fixed_fleet",
+        settings={"city_size": 8, "equilibration": "none"},
+        axes={"vehicle_count": vehicle_counts, "base_demand": base_demands},
+        measures=["VEHICLE_MEAN_COUNT", "TRIP_MEAN_WAIT_TIME"],
+        values=values,
+        build={},
+    )
+
+
+def params(**overrides):
+    return {
+        "city_size": 8,
+        "equilibration": "none",
+        "vehicle_count": 8,
+        "base_demand": 1.0,
+        **overrides,
+    }
+
+
+def test_estimate_at_grid_points_and_between():
+    table = small_atlas()
+    assert table.estimate(params())["VEHICLE_MEAN_COUNT"] == pytest.approx(18)
+    result = table.estimate(params(vehicle_count=6, base_demand=0.75))
+    assert result["VEHICLE_MEAN_COUNT"] == pytest.approx(13.5)
+    assert result["TRIP_MEAN_WAIT_TIME"] == pytest.approx(1.0)
+    # A neighbour that could not compute a measure leaves it unknown
+    result = table.estimate(params(vehicle_count=10))
+    assert result["TRIP_MEAN_WAIT_TIME"] is None
+
+
+def test_configurations_the_atlas_does_not_cover():
+    table = small_atlas()
+    assert table.estimate(params(vehicle_count=13)) is None
+    assert table.estimate(params(city_size=10)) is None
+    assert table.estimate(params(equilibration="price")) is None
+    incomplete = params()
+    del incomplete["city_size"]
+    assert table.estimate(incomplete) is None
+
+
+def test_save_and_load(tmp_path):
+    table = small_atlas()
+    table.save(tmp_path / "village-fixed_fleet.npz")
+    (loaded,) = load_atlases(tmp_path)
+    assert loaded.settings == table.settings
+    assert loaded.measures == table.measures
+    assert list(loaded.axes) == ["vehicle_count", "base_demand"]
+    assert estimate(params(vehicle_count=6), tmp_path) == pytest.approx(
+        table.estimate(params(vehicle_count=6)), nan_ok=True
+    )
+    assert estimate(params(city_size=10), tmp_path) is None
+
+
+def test_build_atlas_covers_its_preset(monkeypatch):
+    monkeypatch.setitem(atlas.ATLAS_RUNS, "village", (20, 10))
+    monkeypatch.setitem(
+        atlas.REGIMES,
+        "fixed_fleet",
+        {
+            "settings": {"equilibration": "none"},
+            "axes": {"vehicle_count": (0.5, 1.0), "base_demand": (1.0, 2.0)},
+        },
+    )
+    table = build_atlas("village", "fixed_fleet", processes=1)
+    assert table.axes["vehicle_count"].tolist() == [3, 6]
+    assert table.values.shape == (2, 2, len(atlas.ATLAS_MEASURES))
+    config = ConfigSnapshot.from_mapping(get_preset("village"))
+    result = table.estimate(config.as_dict())
+    assert result["VEHICLE_MEAN_COUNT"] == pytest.approx(6)
+    # Another city is not the village
+    assert table.estimate(config.replace(city_size=10).as_dict()) is None
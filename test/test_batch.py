@@ -0,0 +1,118 @@
+"""
+Tests for the batched multi-replica simulation engine.
+"""
+
+import statistics
+
+import numpy as np
+import pytest
+
+from ridehail.atom import Equilibration, History, Measure
+from ridehail.batch import BatchedSimulation, batch_unsupported_reason
+from ridehail.config import RideHailConfig
+from ridehail.simulation import RideHailSimulation
+
+
+def make_config():
+    config = RideHailConfig(use_config_file=False)
+    config.city_size.value = 8
+    config.vehicle_count.value = 6
+    config.base_demand.value = 0.5
+    config.mean_trip_distance.value = 4
+    config.time_blocks.value = 120
+    config.results_window.value = 60
+    return config
+
+
+def test_end_state_for_each_replica():
+    results = BatchedSimulation(make_config(), [1, 2, 3]).simulate()
+    assert len(results) == 3
+    for replica_results in results:
+        end_state = replica_results.get_end_state()
+        assert end_state["vehicles"]["mean_count"] == 6
+        assert end_state["validation"]["check_p1_p2_p3"] == pytest.approx(1.0)
+        assert end_state["simulation"]["blocks_simulated"] == 120
+
+
+def test_seeds_reproduce_results():
+    config = make_config()
+    first = [
+        results.get_result_measures()["TRIP_MEAN_WAIT_TIME"]
+        for results in BatchedSimulation(config, [4, 5]).simulate()
+    ]
+    second = [
+        results.get_result_measures()["TRIP_MEAN_WAIT_TIME"]
+        for results in BatchedSimulation(config, [4, 5]).simulate()
+    ]
+    assert first == second
+    assert first[0] != first[1]
+
+
+def test_trips_are_conserved():
+    batch = BatchedSimulation(make_config(), [7, 8])
+    for block in range(50):
+        batch.next_block(block)
+        # Every P2 or P3 vehicle holds exactly one waiting or riding trip
+        busy = batch.vehicle_trip >= 0
+        assert (busy == (batch.vehicle_phase > 0)).all()
+        assert busy.sum() == ((batch.trip_phase == 2) | (batch.trip_phase == 3)).sum()
+
+
+def test_unsupported_configuration():
+    config = make_config()
+    assert batch_unsupported_reason(config) is None
+    config.equilibration.value = Equilibration.PRICE
+    assert batch_unsupported_reason(config) == "equilibration"
+    with pytest.raises(ValueError):
+        BatchedSimulation(config, [1])
+
+
+def test_convergence_residual_matches_object_engine():
+    # Feed the object engine's History values, block by block, to the
+    # batched history: the residuals recorded must be the same
+    config = make_config()
+    config.random_number_seed.value = 3
+    sim = RideHailSimulation(config)
+    batch = BatchedSimulation(config, [3])
+    residual = History.SIM_CONVERGENCE_MAX_RMS_RESIDUAL
+    for block in range(config.time_blocks.value):
+        sim.next_block()
+        values = np.array(
+            [[sim.history_buffer[stat]._get_tail() for stat in History]]
+        )
+        batch._record_history(block, values)
+        batch.block_index = block + 1
+        assert values[0, list(History).index(residual)] == pytest.approx(
+            sim.history_buffer[residual]._get_tail()
+        )
+    measures = batch.results()[0].get_result_measures()
+    assert measures[Measure.SIM_CONVERGENCE_MAX_RMS_RESIDUAL.name] > 0.0
+
+
+def test_results_agree_with_object_engine():
+    # The engines use different random streams, so compare the means over
+    # many seeds: the difference should be within sampling error
+    config = make_config()
+    config.time_blocks.value = 400
+    config.results_window.value = 300
+    seeds = range(1, 33)
+    batched = [
+        results.get_result_measures()
+        for results in BatchedSimulation(config, seeds).simulate()
+    ]
+    single = []
+    for seed in seeds:
+        config.random_number_seed.value = seed
+        single.append(RideHailSimulation(config).simulate().get_result_measures())
+    for measure in (
+        Measure.VEHICLE_FRACTION_P2,
+        Measure.VEHICLE_FRACTION_P3,
+        Measure.TRIP_MEAN_WAIT_TIME,
+        Measure.SIM_CONVERGENCE_MAX_RMS_RESIDUAL,
+    ):
+        a = [measures[measure.name] for measures in single]
+        b = [measures[measure.name] for measures in batched]
+        standard_error = (
+            (statistics.variance(a) + statistics.variance(b)) / len(seeds)
+        ) ** 0.5
+        assert abs(statistics.fmean(a) - statistics.fmean(b)) < 4 * standard_error
@@ -0,0 +1,87 @@
+"""
+Tests for calibration against observed targets.
+"""
+
+import pytest
+
+from ridehail.calibration import (
+    TRIPS_PER_HOUR,
+    RideHailCalibration,
+    objective,
+    parse_parameters,
+    parse_targets,
+    target_value,
+)
+from ridehail.config import RideHailConfig
+
+
+def test_parse_targets_and_parameters():
+    targets = parse_targets("TRIP_MEAN_WAIT_TIME=4.5, TRIPS_PER_HOUR = 8100")
+    assert targets == {"TRIP_MEAN_WAIT_TIME": 4.5, TRIPS_PER_HOUR: 8100.0}
+    parameters = parse_parameters("vehicle_count=10:20, inhomogeneity=0:1")
+    assert parameters == {"vehicle_count": (10, 20), "inhomogeneity": (0.0, 1.0)}
+    assert isinstance(parameters["inhomogeneity"][0], float)
+
+
+@pytest.mark.parametrize(
+    "targets, parameters",
+    [
+        ("NOT_A_MEASURE=1", "vehicle_count=1:2"),
+        ("", "vehicle_count=1:2"),
+        ("TRIP_MEAN_WAIT_TIME=1", "animation=1:2"),
+        ("TRIP_MEAN_WAIT_TIME=1", "vehicle_count=20:10"),
+        ("TRIP_MEAN_WAIT_TIME=1", "vehicle_count=10"),
+    ],
+)
+def test_parse_errors(targets, parameters):
+    with pytest.raises(ValueError):
+        parse_targets(targets)
+        parse_parameters(parameters)
+
+
+def test_objective():
+    measures = {
+        "TRIP_MEAN_WAIT_TIME": 5.0,
+        "TRIP_SUM_COUNT": 300.0,
+        "SIM_BLOCKS_ANALYZED": 100,
+    }
+    assert target_value(measures, TRIPS_PER_HOUR, minutes_per_block=0.5) == 360
+    targets = {"TRIP_MEAN_WAIT_TIME": 4.0, TRIPS_PER_HOUR: 180}
+    assert objective(measures, targets) == pytest.approx(0.25**2)
+    assert objective(measures, {"VEHICLE_FRACTION_P3": 0.5}) == float("inf")
+
+
+def make_config(tmp_path):
+    config = RideHailConfig(use_config_file=False)
+    config.config_file.value = str(tmp_path / "village.config")
+    config.write_output_files.value = True
+    config.city_size.value = 8
+    config.mean_trip_distance.value = 4
+    config.base_demand.value = 1.0
+    config.vehicle_count.value = 16
+    config.time_blocks.value = 120
+    config.results_window.value = 80
+    config.random_number_seed.value = 7
+    config.replicates.value = 2
+    config.calibrate.value = True
+    # The busy fraction of about 10 vehicles: R * L / N = 1.0 * 4 / 10
+    config.calibration_targets.value = "VEHICLE_FRACTION_P3=0.4"
+    config.calibration_parameters.value = "vehicle_count=4:24"
+    config.calibration_evaluations.value = 16
+    return config
+
+
+def test_calibration_finds_and_caches_the_fit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calibration = RideHailCalibration(make_config(tmp_path))
+    fitted = calibration.run_calibration()
+    assert 8 <= fitted["parameters"]["vehicle_count"] <= 12
+    assert fitted["targets"]["VEHICLE_FRACTION_P3"] == pytest.approx(0.4, abs=0.05)
+    assert calibration.simulations_run > 0
+    calibrated = (tmp_path / "out" / "village-calibrated.config").read_text()
+    assert f"vehicle_count = {fitted['parameters']['vehicle_count']}" in calibrated
+    assert "[RESULTS]" in calibrated
+    # The same search again runs nothing new
+    again = RideHailCalibration(make_config(tmp_path))
+    assert again.run_calibration()["parameters"] == fitted["parameters"]
+    assert again.simulations_run == 0
@@ -0,0 +1,122 @@
+"""
+Tests for ConfigSnapshot, the immutable config used by programmatic callers
+(web worker, sequences) in place of a fully parsed RideHailConfig.
+"""
+
+import copy
+import pickle
+
+import pytest
+
+from ridehail.atom import Animation, Equilibration
+from ridehail.config import ConfigSnapshot, ConfigValidationError, RideHailConfig
+from ridehail.simulation import RideHailSimulation
+
+
+def make_config():
+    config = RideHailConfig(use_config_file=False)
+    config.animation.value = Animation.NONE
+    config.random_number_seed.value = 3
+    config.time_blocks.value = 100
+    config.city_size.value = 12
+    config.vehicle_count.value = 20
+    config.base_demand.value = 1.0
+    return config
+
+
+class TestFromMapping:
+    def test_defaults_and_smart_defaults(self):
+        snapshot = ConfigSnapshot.from_mapping({"city_size": 8, "vehicle_count": 6})
+        assert snapshot.city_size.value == 8
+        assert snapshot["vehicle_count"] == 6
+        # Smart defaults, as in RideHailConfig._set_parameter_defaults
+        assert snapshot.mean_trip_distance.value == 4
+        assert snapshot.base_demand.value == pytest.approx(0.75)
+
+    def test_explicit_none_gets_smart_default(self):
+        snapshot = ConfigSnapshot.from_mapping(
+            {
+                "city_size": 8,
+                "vehicle_count": 8,
+                "mean_trip_distance": None,
+                "base_demand": None,
+            }
+        )
+        assert snapshot.mean_trip_distance.value == 4
+        assert snapshot.base_demand.value == pytest.approx(1.0)
+
+    def test_items_have_defaults(self):
+        snapshot = ConfigSnapshot.from_mapping({"animation_delay": 0.5})
+        assert snapshot.animation_delay.value == 0.5
+        assert (
+            snapshot.animation_delay.default
+            == RideHailConfig.animation_delay.default
+        )
+
+    def test_enum_conversion(self):
+        snapshot = ConfigSnapshot.from_mapping(animation="none", equilibration="price")
+        assert snapshot.animation.value == Animation.NONE
+        assert snapshot.equilibration.value == Equilibration.PRICE
+
+    def test_invalid_value_raises(self):
+        with pytest.raises(ConfigValidationError, match="city_size"):
+            ConfigSnapshot.from_mapping({"city_size": -4})
+
+    def test_unknown_parameter_raises(self):
+        with pytest.raises(ConfigValidationError, match="unknown"):
+            ConfigSnapshot.from_mapping({"city_sise": 8})
+
+    def test_validation_corrects_values(self):
+        snapshot = ConfigSnapshot.from_mapping(city_size=9, mean_trip_distance=8)
+        assert snapshot.city_size.value == 8
+        assert snapshot.mean_trip_distance.value == 4
+
+
+class TestSnapshotCopies:
+    def test_replace_returns_new_snapshot(self):
+        base = ConfigSnapshot.from_mapping({"vehicle_count": 6})
+        variant = base.replace(vehicle_count=10)
+        assert base.vehicle_count.value == 6
+        assert variant.vehicle_count.value == 10
+        assert variant.start_time == base.start_time
+
+    def test_replace_recomputes_smart_defaults(self):
+        base = ConfigSnapshot.from_mapping({"city_size": 8, "vehicle_count": 8})
+        variant = base.replace(city_size=40)
+        expected = ConfigSnapshot.from_mapping({"city_size": 40, "vehicle_count": 8})
+        assert variant["mean_trip_distance"] == expected["mean_trip_distance"] == 20
+        assert variant["base_demand"] == pytest.approx(expected["base_demand"])
+        # Values the caller set are kept, until set back to None
+        fixed = base.replace(mean_trip_distance=2).replace(city_size=40)
+        assert fixed["mean_trip_distance"] == 2
+        assert fixed.replace(mean_trip_distance=None)["mean_trip_distance"] == 20
+        # The derived items survive pickling
+        restored = pickle.loads(pickle.dumps(base))
+        assert restored.replace(city_size=40)["mean_trip_distance"] == 20
+
+    def test_immutable(self):
+        snapshot = ConfigSnapshot.from_mapping()
+        with pytest.raises(AttributeError):
+            snapshot.city_size = 10
+        with pytest.raises(AttributeError):
+            snapshot.city_size.value = 10
+
+    def test_pickle_and_deepcopy(self):
+        snapshot = ConfigSnapshot.from_mapping({"vehicle_count": 7})
+        assert pickle.loads(pickle.dumps(snapshot)).vehicle_count.value == 7
+        assert copy.deepcopy(snapshot).as_dict() == snapshot.as_dict()
+
+
+class TestSimulationFromSnapshot:
+    def test_matches_config(self):
+        config = make_config()
+        from_config = RideHailSimulation(config).simulate().get_end_state()
+        from_snapshot = RideHailSimulation(config.snapshot()).simulate().get_end_state()
+        assert from_config == from_snapshot
+
+    def test_snapshot_overrides(self):
+        config = make_config()
+        sim = RideHailSimulation(config.snapshot(vehicle_count=5))
+        assert len(sim.vehicles) == 5
+        # The RideHailConfig itself is untouched
+        assert config.vehicle_count.value == 20
@@ -0,0 +1,173 @@
+"""
+Tests for space-filling sequence designs and response surfaces.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from ridehail.atom import Animation, SequenceDesign
+from ridehail.config import RideHailConfig
+from ridehail.design import (
+    ResponseSurface,
+    fit_correction,
+    latin_hypercube,
+    refine,
+    select,
+    sobol,
+)
+from ridehail.sequence import RideHailSimulationSequence
+
+
+def test_sobol_points():
+    points = sobol(8, 3)
+    assert points[:4].tolist() == [
+        [0.0, 0.0, 0.0],
+        [0.5, 0.5, 0.5],
+        [0.75, 0.25, 0.25],
+        [0.25, 0.75, 0.75],
+    ]
+    assert points[7].tolist() == [0.125, 0.625, 0.375]
+    # Every one of the first 2**k points is in its own 1/2**k interval
+    assert sorted((sobol(16, 4) * 16).astype(int)[:, 3]) == list(range(16))
+    with pytest.raises(ValueError):
+        sobol(4, 9)
+
+
+def test_latin_hypercube_fills_every_stratum():
+    points = latin_hypercube(10, 3, rng=1)
+    for column in points.T:
+        assert sorted((column * 10).astype(int)) == list(range(10))
+
+
+def test_refine_adds_points_where_the_response_is_steep():
+    points = np.array([[0.0], [0.25], [0.5], [0.75], [1.0]])
+    values = np.array([0.0, 0.0, 0.1, 0.9, 1.0])
+    assert refine(points, values, 1).tolist() == [[0.625]]
+    # A missing result is left out
+    values[3] = np.nan
+    assert refine(points, values, 1).tolist() == [[0.75]]
+
+
+def test_select_picks_steep_and_spread_out_points():
+    points = np.array([[0.0], [0.25], [0.5], [0.75], [1.0]])
+    values = np.array([0.0, 0.0, 0.1, 0.9, 1.0])
+    assert select(points, values, 3) == [0, 2, 3]
+    assert select(points, values, 10) == [0, 1, 2, 3, 4]
+    values[0] = np.nan
+    assert select(points, values, 3) == [1, 2, 3]
+
+
+def test_fit_correction():
+    assert fit_correction([0.1, 0.2, 0.3], [0.3, 0.5, 0.7]) == pytest.approx(
+        (0.1, 2.0)
+    )
+    # Too few points for a slope: only the offset is corrected
+    assert fit_correction([0.1, 0.2, np.nan], [0.3, 0.5, 0.7]) == pytest.approx(
+        (0.25, 1.0)
+    )
+    assert fit_correction([], []) == (0.0, 1.0)
+
+
+def test_response_surface_fits_a_quadratic():
+    points = np.random.default_rng(0).random((30, 2))
+    values = 1 + 2 * points[:, 0] - points[:, 1] ** 2 + points[:, 0] * points[:, 1]
+    values[0] = np.nan
+    surface = ResponseSurface(points, values)
+    assert surface.r_squared == pytest.approx(1)
+    assert surface([[0.5, 0.5]]) == pytest.approx([2.0])
+    first, second, grid = surface.grid(resolution=3)
+    assert grid.shape == (3, 3)
+    assert grid[2, 0] == pytest.approx(3.0)
+
+
+def test_sequence_with_a_sobol_design(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = RideHailConfig(use_config_file=False)
+    config.config_file.value = str(tmp_path / "sweep.config")
+    config.write_output_files.value = True
+    config.animation.value = Animation.NONE
+    config.random_number_seed.value = 3
+    config.time_blocks.value = 40
+    config.results_window.value = 20
+    config.city_size.value = 8
+    config.mean_trip_distance.value = 4
+    config.base_demand.value = 0.5
+    config.request_rate_max.value = 2.0
+    config.vehicle_count.value = 2
+    config.vehicle_count_max.value = 20
+    config.sequence_design.value = SequenceDesign.SOBOL
+    config.sequence_points.value = 8
+    config.sequence_refine_points.value = 2
+    sequence = RideHailSimulationSequence(config)
+    assert sequence.design_points[1] == {
+        "request_rate": 1.25,
+        "vehicle_count": 11,
+        "inhomogeneity": 0.0,
+        "commission": 0.0,
+    }
+    sequence.run_sequence(config)
+    assert sequence.frame_count == len(sequence.vehicle_p3_fraction) == 10
+    request_rates, vehicle_counts, values = sequence.response_grid(
+        "mean_vehicle_count", resolution=3
+    )
+    assert request_rates.tolist() == [0.5, 1.25, 2.0]
+    assert vehicle_counts.tolist() == [2, 11, 20]
+    # The fleet does not change without equilibration
+    assert values[1] == pytest.approx([2, 11, 20], rel=0.1)
+    # The surfaces are written out for plotting
+    with open(tmp_path / "out" / "sweep-surfaces.json") as surface_file:
+        written = json.load(surface_file)
+    assert written["ranges"] == {"request_rate": [0.5, 2.0], "vehicle_count": [2, 20]}
+    assert len(written["points"]) == len(written["results"]["vehicle_p3_fraction"])
+    surface = written["surfaces"]["mean_vehicle_count"]
+    assert surface["terms"][:3] == ["1", "request_rate", "vehicle_count"]
+    assert len(surface["coefficients"]) == 6
+    assert surface["grid"]["vehicle_count"][0] == 2
+    assert len(surface["grid"]["values"]) == 21
+
+
+def test_sequence_animations_need_a_grid_design(capsys):
+    config = RideHailConfig(use_config_file=False)
+    config.animation.value = Animation.SEQUENCE
+    config.vehicle_count.value = 2
+    config.vehicle_count_max.value = 20
+    config.sequence_design.value = SequenceDesign.LATIN_HYPERCUBE
+    sequence = RideHailSimulationSequence(config)
+    sequence.run_sequence(config)
+    assert "'latin_hypercube' sequence design" in capsys.readouterr().err
+    assert sequence.vehicle_p3_fraction == []
+
+
+def test_multi_fidelity_sequence():
+    config = RideHailConfig(use_config_file=False)
+    config.animation.value = Animation.NONE
+    config.random_number_seed.value = 3
+    config.time_blocks.value = 60
+    config.results_window.value = 30
+    config.city_size.value = 16
+    config.mean_trip_distance.value = 8
+    config.base_demand.value = 2.0
+    config.vehicle_count.value = 8
+    config.vehicle_count_max.value = 40
+    config.vehicle_count_increment.value = 8
+    config.sequence_fidelity_scale.value = 0.5
+    config.sequence_fidelity_points.value = 3
+    sequence = RideHailSimulationSequence(config)
+    sequence.run_sequence(config)
+    assert len(sequence.high_fidelity_indexes) == 3
+    assert len(sequence.vehicle_p3_fraction) == len(sequence.design_points) == 5
+    # The low fidelity fleets are a quarter of the size, scaled back up
+    assert sequence.low_fidelity["mean_vehicle_count"] == pytest.approx(
+        [8, 16, 24, 32, 40]
+    )
+    assert set(sequence.fidelity_corrections) == {
+        "vehicle_p1_fraction",
+        "vehicle_p2_fraction",
+        "vehicle_p3_fraction",
+        "mean_vehicle_count",
+        "trip_wait_fraction",
+    }
+    for fraction in sequence.vehicle_p1_fraction:
+        assert 0 <= fraction <= 1
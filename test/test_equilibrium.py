@@ -0,0 +1,92 @@
+"""
+Tests for the direct equilibrium solver.
+"""
+
+import pytest
+
+from ridehail.atom import Animation, Equilibration, History
+from ridehail.config import ConfigSnapshot
+from ridehail.equilibrium import EquilibriumSolver
+from ridehail.presets import get_preset
+from ridehail.simulation import RideHailSimulation
+
+
+def block_values(vehicle_count, busy_count):
+    """The History values of a block with busy_count vehicles in P3"""
+    values = dict.fromkeys(History, 0.0)
+    values[History.VEHICLE_COUNT] = vehicle_count
+    values[History.VEHICLE_TIME] = vehicle_count
+    values[History.VEHICLE_TIME_P3] = busy_count
+    return values
+
+
+def run_solver(solver, busy_count, blocks=1000):
+    """Feed a solver blocks in which demand keeps busy_count vehicles busy"""
+    for block in range(blocks):
+        if solver.done:
+            return block
+        solver.record(block, block_values(solver.vehicle_count, busy_count))
+    return blocks
+
+
+def test_price_root_is_found_in_one_step():
+    # P3 = 60 / N, and the utility 1.2 * 0.75 * P3 - 0.35 is zero at N = 154.3
+    solver = EquilibriumSolver(
+        Equilibration.PRICE,
+        120,
+        city_size=24,
+        price=1.2,
+        platform_commission=0.25,
+        reservation_wage=0.35,
+    )
+    blocks = run_solver(solver, busy_count=60)
+    assert solver.vehicle_count == 154
+    assert solver.segments == 2
+    # Noise-free residuals are clearly not zero after the shortest measurement
+    assert blocks == 2 * (12 + 20)
+
+
+def test_steps_are_limited_and_the_block_budget_is_kept():
+    solver = EquilibriumSolver(
+        Equilibration.PRICE,
+        10,
+        city_size=10,
+        price=1.0,
+        reservation_wage=0.1,
+        block_limit=45,
+    )
+    # Every vehicle busy: the root is at 100, but a step may only double the
+    # fleet
+    for block in range(25):
+        solver.record(block, block_values(10, 10))
+    assert solver.vehicle_count == 20
+    # Too few blocks are left for another segment
+    assert solver.done
+
+
+def test_only_equilibrated_simulations_are_solved():
+    with pytest.raises(ValueError):
+        EquilibriumSolver(Equilibration.NONE, 10, city_size=8)
+
+
+def test_simulation_hands_off_near_equilibrium():
+    config = ConfigSnapshot.from_mapping(
+        {
+            **get_preset("town"),
+            "animation": Animation.NONE,
+            "inhomogeneity": 0.0,
+            "equilibration": Equilibration.PRICE,
+            "vehicle_count": 300,
+            "time_blocks": 400,
+            "results_window": 100,
+            "random_number_seed": 5,
+            "solve_equilibrium": True,
+        }
+    )
+    sim = RideHailSimulation(config)
+    # A few segments of at most 60 blocks each
+    for block in range(240):
+        sim.next_block(block=block)
+    assert sim.equilibrium_solver.done
+    # The damped equilibration settles at about 153 vehicles
+    assert 140 <= len(sim.vehicles) <= 170
@@ -0,0 +1,156 @@
+"""
+Tests for the event-driven simulation: vehicles on a trip are not stepped,
+but arrive at the blocks scheduled when they set off.
+"""
+
+import statistics
+from collections import Counter
+
+import pytest
+
+from ridehail.atom import DispatchMethod, Measure, TripPhase, VehiclePhase
+from ridehail.config import RideHailConfig
+from ridehail.simulation import RideHailSimulation
+
+
+def make_sim(
+    event_driven,
+    seed=3,
+    blocks=600,
+    pickup_time=0,
+    idle_vehicles_moving=1.0,
+    dispatch_method=DispatchMethod.DEFAULT,
+):
+    config = RideHailConfig(use_config_file=False)
+    config.dispatch_method.value = dispatch_method
+    config.city_size.value = 16
+    config.vehicle_count.value = 40
+    config.base_demand.value = 1.2
+    config.pickup_time.value = pickup_time
+    config.idle_vehicles_moving.value = idle_vehicles_moving
+    config.time_blocks.value = blocks
+    config.results_window.value = blocks // 2
+    config.random_number_seed.value = seed
+    config.event_driven.value = event_driven
+    return RideHailSimulation(config)
+
+
+def test_trips_are_completed():
+    sim = make_sim(event_driven=True, blocks=200, pickup_time=1)
+    completed = set()
+    for block in range(200):
+        sim.next_block()
+        completed.update(
+            trip_id
+            for trip_id, trip in sim.trips.items()
+            if trip.phase == TripPhase.COMPLETED
+        )
+        riding = [
+            vehicle for vehicle in sim.vehicles if vehicle.phase == VehiclePhase.P3
+        ]
+        assert all(vehicle.event_block > block for vehicle in riding)
+    assert len(completed) > 100
+
+
+def test_map_locations_match_schedule():
+    sim = make_sim(event_driven=True, blocks=100)
+    for block in range(100):
+        sim.next_block(return_values="map")
+        for vehicle in sim.vehicles:
+            if vehicle.phase == VehiclePhase.P1:
+                continue
+            assert vehicle.located_block == block
+            if vehicle.pickup_countdown is None:
+                target = (
+                    vehicle.pickup_location
+                    if vehicle.phase == VehiclePhase.P2
+                    else vehicle.dropoff_location
+                )
+                remaining = sim.city.distance(vehicle.location, target)
+                assert vehicle.event_block - block == max(remaining, 1)
+
+
+@pytest.mark.parametrize(
+    "dispatch_method", [DispatchMethod.DEFAULT, DispatchMethod.FORWARD_DISPATCH]
+)
+def test_drawing_the_map_does_not_change_results(dispatch_method):
+    results = []
+    for return_values in (None, "map"):
+        sim = make_sim(
+            event_driven=True, blocks=200, dispatch_method=dispatch_method
+        )
+        for block in range(200):
+            sim.next_block(return_values=return_values)
+        results.append(
+            (
+                [(trip.phase, trip.origin) for trip in sim.trips.values()],
+                sorted(
+                    (vehicle.index, vehicle.phase, vehicle.trip_index)
+                    for vehicle in sim.vehicles
+                ),
+            )
+        )
+    assert results[0] == results[1]
+
+
+def test_results_agree_with_stepped_simulation():
+    measures = (Measure.VEHICLE_FRACTION_P3, Measure.TRIP_MEAN_WAIT_TIME)
+    results = {}
+    for event_driven in (False, True):
+        runs = [
+            make_sim(event_driven, seed=seed).simulate().get_result_measures()
+            for seed in range(1, 5)
+        ]
+        results[event_driven] = [
+            statistics.fmean(run[measure.name] for run in runs) for measure in measures
+        ]
+    for stepped, evented in zip(results[False], results[True]):
+        assert abs(stepped - evented) < 0.1 * stepped
+
+
+def trip_timelines(sim, blocks):
+    """The blocks at which each trip is picked up and dropped off"""
+    timelines = {}
+    for block in range(blocks):
+        sim.next_block()
+        for trip_id, trip in sim.trips.items():
+            if trip.phase in (TripPhase.RIDING, TripPhase.COMPLETED):
+                timeline = timelines.setdefault(trip_id, [block, None])
+                if trip.phase == TripPhase.COMPLETED and timeline[1] is None:
+                    timeline[1] = block
+    return timelines
+
+
+def test_trip_timelines_match_stepped_simulation():
+    # Idle vehicles that stand still are in the same places in both
+    # simulations, whatever turns the movement stream draws, so every trip
+    # is dispatched to the same vehicle and must arrive at the same blocks
+    for pickup_time in (0, 2):
+        timelines = {}
+        for event_driven in (False, True):
+            sim = make_sim(
+                event_driven,
+                blocks=300,
+                pickup_time=pickup_time,
+                idle_vehicles_moving=0.0,
+            )
+            timelines[event_driven] = trip_timelines(sim, 300)
+        assert len(timelines[False]) > 100
+        assert timelines[True] == timelines[False]
+
+
+def test_phase_counts_follow_the_fleet():
+    sim = make_sim(event_driven=True, blocks=100)
+    for block in range(100):
+        if block == 30:
+            sim.target_state["vehicle_count"] = 50
+        elif block == 60:
+            sim.target_state["vehicle_count"] = 30
+        sim.next_block()
+        phases = [vehicle.phase for vehicle in sim.vehicles]
+        assert sim._phase_counts == Counter(phases)
+        assert set(sim._idle_vehicles) == {
+            vehicle.index
+            for vehicle in sim.vehicles
+            if vehicle.phase == VehiclePhase.P1
+        }
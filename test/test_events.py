@@ -0,0 +1,89 @@
+"""
+Tests for the trip lifecycle event bus.
+"""
+
+import pytest
+
+from ridehail.atom import DispatchMethod, History, TripPhase
+from ridehail.config import RideHailConfig
+from ridehail.events import EventBus, LifecycleEvent
+from ridehail.simulation import RideHailSimulation
+
+
+def make_sim(**values):
+    config = RideHailConfig(use_config_file=False)
+    config.city_size.value = 12
+    config.vehicle_count.value = 20
+    config.base_demand.value = 1.5
+    config.time_blocks.value = 200
+    config.random_number_seed.value = 4
+    for name, value in values.items():
+        getattr(config, name).value = value
+    return RideHailSimulation(config)
+
+
+def test_bus_delivers_batches_by_kind():
+    bus = EventBus()
+    bus.publish(LifecycleEvent.TRIP_REQUESTED, 0, "unobserved")
+    received = []
+    everything = bus.subscribe(lambda block, events: received.append((block, events)))
+    completions = []
+    bus.subscribe(
+        lambda block, events: completions.append(events),
+        kinds=[LifecycleEvent.TRIP_COMPLETED],
+    )
+    bus.flush(0)
+    assert received == [] and completions == []
+    bus.publish(LifecycleEvent.TRIP_REQUESTED, 1, "a")
+    bus.publish(LifecycleEvent.TRIP_COMPLETED, 1, "b", "vehicle")
+    bus.flush(1)
+    assert [event.trip for event in received[0][1]] == ["a", "b"]
+    assert [event.trip for event in completions[0]] == ["b"]
+    bus.unsubscribe(everything)
+    bus.publish(LifecycleEvent.TRIP_REQUESTED, 2, "c")
+    bus.flush(2)
+    assert len(received) == 1 and len(completions) == 1
+    with pytest.raises(ValueError):
+        bus.unsubscribe(everything)
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {},
+        {"event_driven": True, "pickup_time": 1},
+        {"dispatch_method": DispatchMethod.RANDOM},
+    ],
+)
+def test_lifecycle_of_each_trip(values):
+    sim = make_sim(**values)
+    lifecycles = {}
+
+    def record(block, events):
+        assert all(event.block == block for event in events)
+        for event in events:
+            lifecycles.setdefault(event.trip.index, []).append(event)
+
+    sim.events.subscribe(record)
+    completed_count = 0
+    for _ in range(200):
+        sim.next_block()
+        completed_count += sim.history_buffer[History.TRIP_COMPLETED_COUNT]._get_tail()
+    completed = [
+        events
+        for events in lifecycles.values()
+        if events[-1].kind == LifecycleEvent.TRIP_COMPLETED
+    ]
+    assert len(completed) == completed_count > 50
+    for requested, dispatched, picked_up, done in completed:
+        assert [event.kind for event in (requested, dispatched, picked_up)] == [
+            LifecycleEvent.TRIP_REQUESTED,
+            LifecycleEvent.TRIP_DISPATCHED,
+            LifecycleEvent.TRIP_PICKED_UP,
+        ]
+        assert requested.vehicle is None
+        assert dispatched.vehicle is picked_up.vehicle is done.vehicle
+        phase_time = done.trip.phase_time
+        assert phase_time[TripPhase.UNASSIGNED] == dispatched.block - requested.block
+        assert phase_time[TripPhase.WAITING] == picked_up.block - dispatched.block
+        assert phase_time[TripPhase.RIDING] == done.block - picked_up.block
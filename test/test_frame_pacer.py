@@ -0,0 +1,114 @@
+"""
+Tests for FramePacer, which decides how many blocks to step per animation frame.
+"""
+
+import pytest
+
+from ridehail.animation.pacing import FramePacer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_frames(pacer, clock, frames, step, render, wait=0.0):
+    """Drive a frame-driven pacer: returns the blocks asked for in each frame"""
+    asked = []
+    for _ in range(frames):
+        blocks = pacer.begin_frame()
+        asked.append(blocks)
+        clock.now += step * blocks
+        pacer.end_steps(blocks)
+        clock.now += render + wait
+    return asked
+
+
+class TestFrameDriven:
+    def test_one_block_per_frame_until_costs_are_known(self):
+        clock = FakeClock()
+        pacer = FramePacer(max_blocks_per_frame=100, clock=clock)
+        assert run_frames(pacer, clock, 1, step=0.01, render=0.2) == [1]
+
+    def test_no_delay_limits_the_share_of_drawing(self):
+        clock = FakeClock()
+        pacer = FramePacer(wait=0.05, max_blocks_per_frame=100, clock=clock)
+        run_frames(pacer, clock, 3, step=0.01, render=0.2, wait=0.05)
+        # 80 blocks of 0.01s for each 0.2s frame: drawing is 20% of the run
+        assert pacer.blocks_per_frame == pytest.approx(80, abs=1)
+
+    def test_skipping_is_limited(self):
+        clock = FakeClock()
+        pacer = FramePacer(max_blocks_per_frame=5, clock=clock)
+        run_frames(pacer, clock, 3, step=0.01, render=0.2)
+        assert pacer.blocks_per_frame == 5
+
+    def test_display_that_keeps_up_with_the_delay_draws_every_block(self):
+        clock = FakeClock()
+        pacer = FramePacer(delay=0.1, max_blocks_per_frame=100, clock=clock)
+        asked = run_frames(pacer, clock, 5, step=0.01, render=0.05, wait=0.1)
+        assert asked == [1] * 5
+
+    def test_slow_display_keeps_to_the_pace_of_the_delay(self):
+        clock = FakeClock()
+        pacer = FramePacer(delay=0.1, max_blocks_per_frame=100, clock=clock)
+        run_frames(pacer, clock, 3, step=0.01, render=0.3, wait=0.1)
+        # Four blocks of 0.1s take as long as stepping them and drawing once
+        assert pacer.blocks_per_frame == 4
+
+    def test_maps_draw_every_block_without_a_delay(self):
+        clock = FakeClock()
+        pacer = FramePacer(max_blocks_per_frame=100, render_share=None, clock=clock)
+        assert run_frames(pacer, clock, 5, step=0.01, render=0.2) == [1] * 5
+        pacer = FramePacer(
+            delay=0.1, max_blocks_per_frame=100, render_share=None, clock=clock
+        )
+        run_frames(pacer, clock, 3, step=0.01, render=0.3, wait=0.1)
+        assert pacer.blocks_per_frame == 4
+
+    def test_pause_is_not_a_cost(self):
+        clock = FakeClock()
+        pacer = FramePacer(max_blocks_per_frame=100, clock=clock)
+        run_frames(pacer, clock, 3, step=0.01, render=0.001)
+        assert pacer.blocks_per_frame == 1
+        pacer.interrupt()
+        clock.now += 3.0
+        assert pacer.begin_frame() == 1
+        assert pacer.render_seconds == pytest.approx(0.001)
+
+
+class TestBlockDriven:
+    def test_frame_is_due_every_few_blocks(self):
+        clock = FakeClock()
+        pacer = FramePacer(max_blocks_per_frame=100, clock=clock)
+        due = []
+        for _ in range(20):
+            clock.now += 0.01
+            due.append(pacer.block_stepped())
+            if due[-1]:
+                clock.now += 0.01
+                pacer.end_render()
+        # Drawing costs as much as a block, so a frame is due every 4 blocks
+        assert due[:3] == [True, True, False]
+        assert pacer.blocks_per_frame == 4
+        assert due[-4:].count(True) == 1
+
+
+def test_telemetry():
+    clock = FakeClock()
+    pacer = FramePacer(max_blocks_per_frame=2, clock=clock)
+    assert pacer.telemetry() == "0.0 blocks/s, 0.0 frames/s"
+    for _ in range(10):
+        pacer.begin_frame()
+        pacer.end_steps(2)
+        clock.now += 0.1
+    assert pacer.blocks_per_second == pytest.approx(20)
+    assert pacer.frames_per_second == pytest.approx(10)
+    assert pacer.telemetry() == "20.0 blocks/s, 10.0 frames/s"
+    assert pacer.telemetry_due()
+    assert not pacer.telemetry_due()
+    clock.now += 0.5
+    assert pacer.telemetry_due()
@@ -0,0 +1,235 @@
+"""
+Tests for the web lab's native simulation engine.
+"""
+
+import functools
+import gzip
+import http.client
+import json
+import queue
+import threading
+from pathlib import Path
+
+import pytest
+
+from ridehail.animation.lab_server import (
+    EVENTS_PATH,
+    MESSAGE_PATH,
+    LabRequestHandler,
+    NativeLabSession,
+    WebSettings,
+    encode_event,
+    load_lab_worker,
+)
+from ridehail.animation.web_browser import ReusableTCPServer
+
+LAB_DIR = Path(__file__).parent.parent / "docs" / "lab"
+TIMEOUT = 10
+
+
+@pytest.fixture(scope="module")
+def worker():
+    return load_lab_worker(LAB_DIR)
+
+
+def lab_settings(action, chart_type="stats", time_blocks=4, frame_index=0):
+    """The settings the lab UI sends, as in docs/lab/js/config.js"""
+    return {
+        "name": "labSimSettings",
+        "action": action,
+        "frameIndex": frame_index,
+        "chartType": chart_type,
+        "citySize": 8,
+        "vehicleCount": 10,
+        "requestRate": 1.0,
+        "meanTripDistance": 4,
+        "minTripDistance": 0,
+        "inhomogeneity": 0.0,
+        "inhomogeneousDestinations": False,
+        "idleVehiclesMoving": 1.0,
+        "randomNumberSeed": 3,
+        "verbosity": 0,
+        "equilibration": "none",
+        "equilibrationInterval": 5,
+        "demandElasticity": 0.0,
+        "useCostsAndIncomes": False,
+        "price": 1.0,
+        "perKmPrice": 0.8,
+        "perMinutePrice": 0.2,
+        "perKmOpsCost": 0.2,
+        "perHourOpportunityCost": 10.0,
+        "platformCommission": 0.25,
+        "reservationWage": 0.35,
+        "timeBlocks": time_blocks,
+        "meanVehicleSpeed": 30.0,
+        "minutesPerBlock": 1.0,
+        "smoothingWindow": 4,
+        "animationDelay": 0,
+        "pickupTime": 1,
+    }
+
+
+def test_session_waits_for_each_frame_ack(worker):
+    session = NativeLabSession(worker)
+    outbox = session.connect()
+    ready = outbox.get(timeout=TIMEOUT)
+    assert ready["text"] == "Pyodide loaded" and ready["engine"] == "native"
+    session.post(lab_settings("play_arrow", chart_type="map"))
+    frames = [outbox.get(timeout=TIMEOUT)]
+    while True:
+        # Backpressure: nothing more until the frame is acknowledged
+        with pytest.raises(queue.Empty):
+            outbox.get(timeout=0.2)
+        session.post({"action": "frameAck"})
+        try:
+            frames.append(outbox.get(timeout=1))
+        except queue.Empty:
+            break
+    # Two frames per block (real and interpolated) for a small city map, and
+    # the loop stops, as in webworker.js, once the frame reaches the limit
+    assert [frame["frame"] for frame in frames] == list(range(9))
+    assert all(frame["chartType"] == "map" for frame in frames)
+    assert "vehicles" in frames[0]
+    session.post({"action": "getResults"})
+    assert outbox.get(timeout=TIMEOUT)["action"] == "results"
+
+
+def test_session_reports_errors(worker):
+    session = NativeLabSession(worker)
+    outbox = session.connect()
+    outbox.get(timeout=TIMEOUT)
+    settings = lab_settings("play_arrow")
+    del settings["citySize"]
+    session.post(settings)
+    error = outbox.get(timeout=TIMEOUT)
+    assert error["error"] == "simulation" and "citySize" in error["message"]
+
+
+def test_sweep_run_to_completion(worker):
+    worker.init_simulation(WebSettings(lab_settings("runToCompletion", "whatif", 6)))
+    results = worker.sim.run_to_completion()
+    assert results["block"] == results["frame"] == 5
+    assert worker.sim.sim.block_index == 6
+    assert 0 <= results["VEHICLE_FRACTION_P1"] <= 1
+
+
+def test_events_are_valid_json():
+    event = encode_event({"a": float("nan"), "b": {"c": float("inf")}, "d": [1.5]})
+    assert json.loads(event) == {"a": None, "b": {"c": None}, "d": [1.5]}
+
+
+def test_server_streams_frames(worker):
+    session = NativeLabSession(worker)
+    handler = type("Handler", (LabRequestHandler,), {"session": session})
+    server = ReusableTCPServer(("localhost", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    try:
+        stream = http.client.HTTPConnection("localhost", port, timeout=TIMEOUT)
+        stream.request("GET", EVENTS_PATH)
+        response = stream.getresponse()
+        assert response.getheader("Content-Type") == "text/event-stream"
+
+        def next_event():
+            line = response.readline()
+            assert response.readline() == b"\n"
+            assert line.startswith(b"data: ")
+            return json.loads(line[len(b"data: ") :])
+
+        def post(message):
+            connection = http.client.HTTPConnection("localhost", port, timeout=TIMEOUT)
+            connection.request("POST", MESSAGE_PATH, body=json.dumps(message))
+            assert connection.getresponse().status == 204
+            connection.close()
+
+        assert next_event()["text"] == "Pyodide loaded"
+        post(lab_settings("play_arrow", time_blocks=3))
+        blocks = [next_event()["block"]]
+        for _ in range(2):
+            post({"action": "frameAck"})
+            blocks.append(next_event()["block"])
+        assert blocks == [0, 1, 2]
+        stream.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def static_server(tmp_path):
+    (tmp_path / "pyodide").mkdir()
+    (tmp_path / "dist").mkdir()
+    (tmp_path / "app.js").write_text("const x = 1;\n" * 1000)
+    (tmp_path / "pyodide" / "pyodide.asm.wasm").write_bytes(bytes(range(256)) * 40)
+    (tmp_path / "dist" / "manifest.json").write_text('{"wheel": "x.whl"}')
+    handler = functools.partial(LabRequestHandler, directory=str(tmp_path))
+    server = ReusableTCPServer(("localhost", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def get(path, **headers):
+        connection = http.client.HTTPConnection(
+            "localhost", server.server_address[1], timeout=TIMEOUT
+        )
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        return response, body
+
+    yield tmp_path, get
+    server.shutdown()
+    server.server_close()
+
+
+def test_static_files_are_compressed_and_revalidated(static_server):
+    lab_dir, get = static_server
+    source = (lab_dir / "app.js").read_bytes()
+    response, body = get("/app.js", **{"Accept-Encoding": "gzip, br;q=0"})
+    assert response.status == 200
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("Cache-Control") == "no-cache"
+    assert response.getheader("Vary") == "Accept-Encoding"
+    assert gzip.decompress(body) == source
+    etag = response.getheader("ETag")
+    response, body = get("/app.js", **{"Accept-Encoding": "gzip"})
+    assert response.getheader("ETag") == etag
+    response, body = get(
+        "/app.js", **{"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert response.status == 304 and body == b""
+    # An identity response is a different representation
+    response, body = get("/app.js", **{"If-None-Match": etag})
+    assert response.status == 200 and body == source
+    assert response.getheader("Content-Encoding") is None
+    # A precompressed sibling is preferred, if it is up to date
+    (lab_dir / "app.js.br").write_bytes(b"brotli bytes")
+    response, body = get("/app.js", **{"Accept-Encoding": "gzip, br"})
+    assert response.getheader("Content-Encoding") == "br" and body == b"brotli bytes"
+
+
+def test_cache_control_of_versioned_files(static_server):
+    _, get = static_server
+    response, _ = get("/pyodide/pyodide.asm.wasm")
+    assert response.getheader("Cache-Control") == "public, max-age=31536000, immutable"
+    assert response.getheader("Content-Type") == "application/wasm"
+    response, _ = get("/dist/manifest.json")
+    assert response.getheader("Cache-Control") == "no-cache"
+    response, _ = get("/missing.js")
+    assert response.status == 404
+
+
+def test_byte_ranges(static_server):
+    lab_dir, get = static_server
+    source = (lab_dir / "pyodide" / "pyodide.asm.wasm").read_bytes()
+    response, body = get("/pyodide/pyodide.asm.wasm", Range="bytes=10-19")
+    assert response.status == 206 and body == source[10:20]
+    assert response.getheader("Content-Range") == f"bytes 10-19/{len(source)}"
+    response, body = get("/pyodide/pyodide.asm.wasm", Range="bytes=-5")
+    assert response.status == 206 and body == source[-5:]
+    response, body = get("/pyodide/pyodide.asm.wasm", Range=f"bytes={len(source)}-")
+    assert response.status == 416
+    # A range is ignored if the file has changed since it was read
+    response, body = get(
+        "/pyodide/pyodide.asm.wasm", Range="bytes=10-19", **{"If-Range": '"stale"'}
+    )
+    assert response.status == 200 and body == source
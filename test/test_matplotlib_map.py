@@ -0,0 +1,67 @@
+"""
+Tests for the matplotlib map: persistent artists updated in place.
+"""
+
+import pytest
+
+# The matplotlib animation registers pandas converters on import
+pytest.importorskip("pandas")
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+from ridehail.animation.matplotlib import MatplotlibAnimation  # noqa: E402
+from ridehail.atom import Animation  # noqa: E402
+from ridehail.config import RideHailConfig  # noqa: E402
+from ridehail.simulation import RideHailSimulation  # noqa: E402
+
+
+def make_animation():
+    config = RideHailConfig(use_config_file=False)
+    config.animation.value = Animation.MAP
+    config.random_number_seed.value = 5
+    config.city_size.value = 10
+    config.vehicle_count.value = 30
+    config.base_demand.value = 2.0
+    config.time_blocks.value = 20
+    return MatplotlibAnimation(RideHailSimulation(config))
+
+
+def vehicle_offsets(animation):
+    return np.concatenate(
+        [scatter.get_offsets() for scatter in animation._map_vehicle_scatters]
+    )
+
+
+def test_map_artists_are_created_once_and_moved():
+    animation = make_animation()
+    figure, ax = plt.subplots()
+    try:
+        animation._plot_map(0, ax)
+        artists = list(animation._map_artists)
+        collections = list(ax.collections)
+        assert len(artists) == 6
+        assert vehicle_offsets(animation).shape == (30, 2)
+        figure.canvas.draw()
+        previous = vehicle_offsets(animation)
+        moved = 0
+        for block in range(5):
+            animation.sim.next_block()
+            animation._plot_map(block + 1, ax)
+            figure.canvas.draw()
+            # The same artists, updated in place
+            assert animation._map_artists == artists
+            assert list(ax.collections) == collections
+            offsets = vehicle_offsets(animation)
+            assert offsets.shape == (30, 2)
+            moved += not np.array_equal(
+                np.sort(offsets, axis=0), np.sort(previous, axis=0)
+            )
+            previous = offsets
+        assert moved > 0
+    finally:
+        plt.close(figure)
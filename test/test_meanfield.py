@@ -0,0 +1,122 @@
+"""
+Tests for the mean-field model of the steady state.
+"""
+
+import math
+
+import pytest
+
+from ridehail.atom import Animation, Equilibration, Measure, TripDistribution
+from ridehail.config import ConfigSnapshot, RideHailConfig
+from ridehail.meanfield import MeanFieldModel, mean_pickup_distance, mean_ride_time
+from ridehail.presets import get_preset
+from ridehail.sequence import RideHailSimulationSequence
+from ridehail.simulation import RideHailSimulation
+
+
+def village(**overrides):
+    return ConfigSnapshot.from_mapping(
+        {**get_preset("village"), "animation": Animation.NONE, **overrides}
+    )
+
+
+def test_mean_ride_time_of_uniform_trips():
+    # Destinations anywhere but the origin of a 4x4 torus: the mean distance
+    # is 2 per axis over 16 points, less the origin
+    assert mean_ride_time(4) == pytest.approx(32 / 15)
+    assert mean_ride_time(24, 12) == pytest.approx(12.02, abs=0.01)
+
+
+@pytest.mark.parametrize("distribution", list(TripDistribution))
+def test_mean_ride_time_is_near_the_mean(distribution):
+    assert mean_ride_time(100, 10, 0, distribution) == pytest.approx(10, abs=1)
+
+
+def test_pickup_distance_falls_as_idle_vehicles_increase():
+    distances = [mean_pickup_distance(n, 16) for n in (0.5, 1, 4, 16, 64)]
+    assert distances == sorted(distances, reverse=True)
+    # One vehicle is about as far away as a random point
+    assert mean_pickup_distance(1, 16) == pytest.approx(8, abs=0.5)
+
+
+def test_fixed_fleet_satisfies_the_phase_identities():
+    model = MeanFieldModel(
+        city_size=24, request_rate=5.0, ride_time=12.0, pickup_time=1
+    )
+    state = model.fixed_fleet(120)
+    count = state[Measure.VEHICLE_MEAN_COUNT.name]
+    wait_time = state[Measure.TRIP_MEAN_WAIT_TIME.name]
+    assert count * state[Measure.VEHICLE_FRACTION_P3.name] == pytest.approx(60)
+    assert count * state[Measure.VEHICLE_FRACTION_P2.name] == pytest.approx(
+        5.0 * wait_time
+    )
+    idle_count = count * state[Measure.VEHICLE_FRACTION_P1.name]
+    assert wait_time == pytest.approx(model.wait_time(idle_count))
+    # More vehicles, more of them idle and shorter waits
+    larger = model.fixed_fleet(200)
+    assert larger[Measure.TRIP_MEAN_WAIT_TIME.name] < wait_time
+    # Too few to keep up with demand, but only clearly so with fewer still
+    assert model.fixed_fleet(90) is None
+    assert not model.infeasible(90)
+    assert model.infeasible(80)
+
+
+def test_equilibria():
+    model = MeanFieldModel(
+        city_size=24,
+        request_rate=5.0,
+        ride_time=12.0,
+        pickup_time=1,
+        price=1.2,
+        platform_commission=0.25,
+        reservation_wage=0.36,
+        wait_fraction=0.25,
+    )
+    state = model.equilibrium(Equilibration.PRICE)
+    # The busy fraction at which the vehicle utility is zero
+    assert state[Measure.VEHICLE_FRACTION_P3.name] == pytest.approx(0.4)
+    assert state[Measure.VEHICLE_MEAN_COUNT.name] == pytest.approx(150)
+    state = model.equilibrium(Equilibration.WAIT_FRACTION)
+    assert state[Measure.TRIP_MEAN_WAIT_FRACTION_TOTAL.name] == pytest.approx(0.25)
+    assert model.steady_state(Equilibration.NONE, 120) == model.fixed_fleet(120)
+    model.reservation_wage = 1.0
+    assert model.equilibrium(Equilibration.PRICE) is None
+
+
+def test_simulation_residuals_are_small():
+    sim = RideHailSimulation(
+        village(time_blocks=1000, results_window=500, random_number_seed=3)
+    )
+    mean_field = sim.simulate().get_end_state()["mean_field"]
+    assert mean_field["feasible"]
+    assert mean_field["residual_mean_count"] == 0
+    assert abs(mean_field["residual_fraction_p1"]) < 0.1
+    assert abs(mean_field["residual_fraction_p3"]) < 0.05
+
+
+def test_mean_field_start():
+    config = village(equilibration=Equilibration.PRICE, vehicle_count=20)
+    assert len(RideHailSimulation(config).vehicles) == 20
+    sim = RideHailSimulation(config.replace(mean_field_start=True))
+    # R * L / P3 = 0.5 * 4.06 / (0.35 / (1.2 * 0.75))
+    assert len(sim.vehicles) == sim.vehicle_count == 5
+
+
+def test_sequence_skips_infeasible_simulations():
+    config = RideHailConfig(use_config_file=False)
+    config.animation.value = Animation.NONE
+    config.random_number_seed.value = 3
+    config.time_blocks.value = 40
+    config.results_window.value = 20
+    config.city_size.value = 8
+    config.mean_trip_distance.value = 4
+    config.base_demand.value = 1.0
+    config.vehicle_count.value = 2
+    config.vehicle_count_increment.value = 8
+    config.vehicle_count_max.value = 10
+    config.skip_infeasible.value = True
+    sequence = RideHailSimulationSequence(config)
+    sequence.run_sequence(config)
+    # Two vehicles can't carry a request a block of four-block trips
+    assert math.isnan(sequence.vehicle_p1_fraction[0])
+    assert not math.isnan(sequence.vehicle_p1_fraction[1])
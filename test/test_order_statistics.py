@@ -0,0 +1,85 @@
+"""
+Tests for the incremental order statistics of sliding windows.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from ridehail.atom import CircularBuffer, QuantileSketch, SortedWindow
+
+
+def test_sorted_window_matches_numpy():
+    rng = random.Random(3)
+    window = SortedWindow()
+    values = []
+    for _ in range(3000):
+        value = rng.randint(0, 40)
+        window.add(value)
+        values.append(value)
+        if len(values) > 700:
+            window.remove(values.pop(0))
+        for q in (0.1, 0.5, 0.9):
+            assert window.quantile(q) == pytest.approx(np.quantile(values, q))
+
+
+def test_sorted_window_remove_missing():
+    window = SortedWindow([1, 2, 3])
+    with pytest.raises(ValueError):
+        window.remove(5)
+    window.remove(2)
+    assert window.median() == 2.0
+
+
+def test_circular_buffer_median_slides():
+    buffer = CircularBuffer(5)
+    assert buffer.median() == 0.0
+    for value in (5, 1, 4):
+        buffer.push(value)
+    assert buffer.median() == 4.0
+    for value in (2, 3, 9, 8):
+        buffer.push(value)
+    # The window is now 4, 2, 3, 9, 8
+    assert buffer.median() == 4.0
+    assert buffer.quantile(1.0) == 9.0
+
+
+def test_quantile_sketch_relative_accuracy():
+    rng = random.Random(4)
+    values = [rng.expovariate(0.1) for _ in range(20000)]
+    sketch = QuantileSketch(values, relative_accuracy=0.01)
+    for value in values[:5000]:
+        sketch.remove(value)
+    exact = np.quantile(values[5000:], 0.5)
+    assert sketch.median() == pytest.approx(exact, rel=0.011)
+    assert len(sketch) == 15000
+
+
+def test_sorted_window_with_values_removed_in_any_order():
+    rng = random.Random(5)
+    values = [
+        rng.choice((-2.5, 0.0, 1.0, 7.25)) + rng.randint(0, 3) for _ in range(2000)
+    ]
+    window = SortedWindow(values)
+    rng.shuffle(values)
+    while len(values) > 10:
+        window.remove(values.pop())
+        if len(values) % 97 == 0:
+            assert window.quantile(0.3) == pytest.approx(np.quantile(values, 0.3))
+    assert [window._value_at(i) for i in range(len(window))] == sorted(values)
+
+
+def test_quantile_sketch_with_negative_and_zero_values():
+    rng = random.Random(6)
+    values = [rng.uniform(-100, 50) for _ in range(5000)] + [0.0] * 1000
+    sketch = QuantileSketch(values, relative_accuracy=0.01)
+    for q in (0.05, 0.3, 0.5, 0.8, 0.99):
+        exact = np.quantile(values, q, method="lower")
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011, abs=1e-9)
+    with pytest.raises(ValueError):
+        sketch.remove(1e9)
+    for value in values:
+        sketch.remove(value)
+    assert len(sketch) == 0
+    assert sketch.median() == 0.0
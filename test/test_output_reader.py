@@ -0,0 +1,82 @@
+"""
+Tests for the streaming jsonl output readers.
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from ridehail.output_reader import iter_records, read_columns
+
+
+def write_output(file_name, block_count=5):
+    lines = [
+        {"type": "metadata", "version": "0.0.0"},
+        {"type": "config", "city_size": 8, "dispatch_method": "default"},
+    ]
+    for block in range(block_count):
+        measures = {"VEHICLE_FRACTION_P3": block / 10}
+        if block % 2 == 0:
+            measures["TRIP_MEAN_WAIT_TIME"] = 2.5
+        lines.append({"type": "block", "block": block, "measures": measures})
+    lines.append({"type": "end_state", "blocks": block_count})
+    with open(file_name, "w") as output_file:
+        for line in lines:
+            output_file.write(json.dumps(line) + "\n")
+        # A final line cut short by an interrupted run
+        output_file.write('{"type": "block", "block": ')
+
+
+def test_iter_records_filters_by_type(tmp_path):
+    file_name = tmp_path / "run.jsonl"
+    write_output(file_name)
+    assert [record["type"] for record in iter_records(file_name)] == (
+        ["metadata", "config"] + ["block"] * 5 + ["end_state"]
+    )
+    blocks = list(iter_records(file_name, types=["block"]))
+    assert [record["block"] for record in blocks] == list(range(5))
+    assert [
+        record["type"] for record in iter_records(file_name, ["config", "end_state"])
+    ] == ["config", "end_state"]
+
+
+def test_read_columns(tmp_path):
+    file_name = tmp_path / "run.jsonl"
+    write_output(file_name)
+    columns = read_columns(
+        file_name,
+        ["block", "measures.VEHICLE_FRACTION_P3", "measures.TRIP_MEAN_WAIT_TIME"],
+        record_type="block",
+    )
+    assert columns["block"].dtype == np.int64
+    assert columns["block"].tolist() == list(range(5))
+    assert np.allclose(columns["measures.VEHICLE_FRACTION_P3"], np.arange(5) / 10)
+    wait_time = columns["measures.TRIP_MEAN_WAIT_TIME"]
+    assert np.isnan(wait_time).tolist() == [False, True, False, True, False]
+    config = read_columns(file_name, ["dispatch_method"], record_type="config")
+    assert config["dispatch_method"].tolist() == ["default"]
+    with pytest.raises(ValueError):
+        read_columns(file_name, ["measures"], record_type="block")
+
+
+def test_cache_is_reused_until_the_file_changes(tmp_path):
+    file_name = tmp_path / "run.jsonl"
+    write_output(file_name)
+    fields = ["block", "measures.VEHICLE_FRACTION_P3"]
+    first = read_columns(file_name, fields, record_type="block", cache=True)
+    cache_file_name = f"{file_name}.block.npz"
+    assert os.path.isfile(cache_file_name)
+    # Read the cached columns, not the jsonl file
+    with np.load(cache_file_name) as cache:
+        np.savez(cache_file_name, **dict(cache), extra=np.arange(5))
+    cached = read_columns(file_name, fields + ["extra"], "block", cache=True)
+    assert cached["extra"].tolist() == list(range(5))
+    for field in fields:
+        assert np.array_equal(cached[field], first[field])
+    # A new version of the file replaces the cache
+    write_output(file_name, block_count=7)
+    os.utime(file_name, ns=(0, os.stat(file_name).st_mtime_ns + 1))
+    columns = read_columns(file_name, fields, record_type="block", cache=True)
+    assert columns["block"].tolist() == list(range(7))
@@ -0,0 +1,35 @@
+"""
+Tests for PlotSeries, the bounded per-block ring used for animation plot arrays.
+"""
+
+import numpy as np
+import pytest
+
+from ridehail.animation.base import PlotSeries
+
+
+class TestPlotSeries:
+    def test_index_by_block(self):
+        series = PlotSeries(5)
+        for block in range(12):
+            series[block] = block * 10
+        assert series[11] == 110
+        assert series[7] == 70
+
+    def test_slice_in_block_order_across_wrap(self):
+        series = PlotSeries(5)
+        for block in range(12):
+            series[block] = block
+        np.testing.assert_array_equal(series[8:12], [8, 9, 10, 11])
+        np.testing.assert_array_equal(series[7:12], [7, 8, 9, 10, 11])
+
+    def test_slice_longer_than_capacity_raises(self):
+        series = PlotSeries(5)
+        with pytest.raises(IndexError):
+            series[0:6]
+
+    def test_unbounded_run_does_not_grow(self):
+        series = PlotSeries(4)
+        for block in range(10000):
+            series[block] = 1.0
+        assert len(series) == 4
@@ -0,0 +1,45 @@
+"""
+Tests for the named random number streams: seeded simulations that differ
+in supply see the same trip requests (common random numbers).
+"""
+
+from ridehail.atom import RandomStreams
+from ridehail.config import RideHailConfig
+from ridehail.simulation import RideHailSimulation
+
+
+def trip_requests(vehicle_count, seed=17, blocks=40):
+    config = RideHailConfig(use_config_file=False)
+    config.city_size.value = 12
+    config.base_demand.value = 1.5
+    config.vehicle_count.value = vehicle_count
+    config.random_number_seed.value = seed
+    config.time_blocks.value = blocks
+    sim = RideHailSimulation(config)
+    requests = {}
+    for block in range(blocks):
+        sim.next_block()
+        for trip_id, trip in sim.trips.items():
+            requests.setdefault(trip_id, (list(trip.origin), trip.destination))
+    return requests
+
+
+def test_same_trips_for_different_fleets():
+    small_fleet = trip_requests(vehicle_count=4)
+    large_fleet = trip_requests(vehicle_count=30)
+    assert small_fleet == large_fleet
+
+
+def test_seed_changes_trips():
+    assert trip_requests(vehicle_count=4) != trip_requests(vehicle_count=4, seed=18)
+
+
+def test_streams_are_independent_and_reseedable():
+    streams = RandomStreams(5)
+    demand = streams.demand
+    first = [demand.random() for _ in range(3)]
+    assert first != [streams.movement.random() for _ in range(3)]
+    streams.seed(5)
+    # Reseeding keeps the same stream objects
+    assert streams.demand is demand
+    assert [demand.random() for _ in range(3)] == first
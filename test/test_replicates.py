@@ -0,0 +1,72 @@
+"""
+Tests for running replicates of a simulation and combining their results.
+"""
+
+import pytest
+
+from ridehail.config import RideHailConfig
+from ridehail.replicates import (
+    BATCH_ENGINE,
+    OBJECT_ENGINE,
+    RideHailSimulationReplicates,
+    aggregate_measures,
+    summarize,
+)
+
+
+def test_summarize_interval():
+    summary = summarize([1.0, 2.0, 3.0])
+    assert summary["mean"] == pytest.approx(2.0)
+    assert summary["std_error"] == pytest.approx(1 / 3**0.5)
+    # t(0.975, 2) = 4.303
+    assert summary["ci_upper"] - summary["mean"] == pytest.approx(
+        4.303 / 3**0.5, rel=1e-3
+    )
+
+
+def test_summarize_single_value():
+    summary = summarize([4.0])
+    assert summary["mean"] == 4.0
+    assert summary["ci_lower"] is None
+
+
+def test_aggregate_skips_non_numeric():
+    aggregate = aggregate_measures(
+        [{"A": 1, "B": "x"}, {"A": 3, "B": "y"}],
+    )
+    assert list(aggregate) == ["A"]
+    assert aggregate["A"]["mean"] == 2.0
+
+
+def test_aggregate_skips_missing_values():
+    aggregate = aggregate_measures([{"A": 1.0}, {"A": None}, {"A": 3.0}, {}])
+    assert aggregate["A"]["mean"] == 2.0
+    assert aggregate["A"]["missing"] == 2
+
+
+def make_config(batch_replicates=False):
+    config = RideHailConfig(use_config_file=False)
+    config.city_size.value = 8
+    config.vehicle_count.value = 10
+    config.base_demand.value = 1.0
+    config.time_blocks.value = 40
+    config.random_number_seed.value = 11
+    config.replicates.value = 3
+    config.batch_replicates.value = batch_replicates
+    return config
+
+
+def test_engine_is_opt_in():
+    assert RideHailSimulationReplicates(make_config()).engine == OBJECT_ENGINE
+    batched = RideHailSimulationReplicates(make_config(batch_replicates=True))
+    assert batched.engine == BATCH_ENGINE
+
+
+def test_run_replicates():
+    replicates = RideHailSimulationReplicates(make_config())
+    assert replicates.seeds == [11, 12, 13]
+    aggregate = replicates.run_replicates()
+    assert len(replicates.replicate_measures) == 3
+    summary = aggregate["VEHICLE_FRACTION_P3"]
+    assert summary["ci_lower"] <= summary["mean"] <= summary["ci_upper"]
+    assert "SIM_TIMESTAMP" not in aggregate
@@ -0,0 +1,60 @@
+"""
+Tests for the change-driven application of target_state and impulses at the
+start of each block.
+"""
+
+from ridehail.config import RideHailConfig
+from ridehail.simulation import RideHailSimulation, TargetState
+
+
+def make_sim(**values):
+    config = RideHailConfig(use_config_file=False)
+    config.city_size.value = 12
+    config.vehicle_count.value = 10
+    config.base_demand.value = 1.0
+    config.time_blocks.value = 50
+    config.random_number_seed.value = 11
+    for name, value in values.items():
+        getattr(config, name).value = value
+    return RideHailSimulation(config)
+
+
+def test_target_state_records_changes():
+    target_state = TargetState(a=1, b=2)
+    assert target_state.pop_changes() == set()
+    target_state["a"] += 1
+    target_state.setdefault("c", 3)
+    target_state.setdefault("a", 0)
+    assert target_state.pop_changes() == {"a", "c"}
+    assert target_state.pop_changes() == set()
+    assert target_state == {"a": 2, "b": 2, "c": 3}
+
+
+def test_changes_and_impulses_are_applied():
+    sim = make_sim(impulse_list=[{"block": 3, "base_demand": 2.0, "city_size": 8}])
+    sim.target_state["vehicle_count"] = 14
+    sim.next_block()
+    assert len(sim.vehicles) == 14
+    for _ in range(3):
+        sim.next_block()
+    assert sim.base_demand == 2.0
+    assert sim.request_rate == 2.0
+    assert sim.city.city_size == 8
+    assert all(0 <= x < 8 for vehicle in sim.vehicles for x in vehicle.location)
+
+
+def test_city_scale_economics_recomputed_only_on_change(monkeypatch):
+    sim = make_sim(use_city_scale=True)
+    calls = []
+    original = sim._set_city_scale_economics
+    monkeypatch.setattr(
+        sim, "_set_city_scale_economics", lambda: calls.append(1) or original()
+    )
+    for _ in range(5):
+        sim.next_block()
+    assert calls == []
+    price = sim.price
+    sim.target_state["per_km_price"] = sim.per_km_price * 2
+    sim.next_block()
+    assert calls == [1]
+    assert sim.price > price
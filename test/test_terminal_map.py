@@ -0,0 +1,145 @@
+"""
+Tests for BatchedMapLayer, the single-pass terminal map renderer for large fleets.
+"""
+
+import asyncio
+
+from textual.app import App
+
+from ridehail.atom import Animation
+from ridehail.config import RideHailConfig
+from ridehail.simulation import RideHailSimulation
+from ridehail.animation.terminal_map import (
+    BATCHED_MAP_HYSTERESIS,
+    BATCHED_MAP_VEHICLE_COUNT,
+    BatchedMapLayer,
+    MapContainer,
+    location_to_offset,
+)
+
+
+def make_sim(vehicle_count=300):
+    config = RideHailConfig(use_config_file=False)
+    config.animation.value = Animation.NONE
+    config.random_number_seed.value = 7
+    config.city_size.value = 16
+    config.vehicle_count.value = vehicle_count
+    config.base_demand.value = 5.0
+    config.time_blocks.value = 20
+    return RideHailSimulation(config)
+
+
+class MapApp(App):
+    def __init__(self, layer):
+        super().__init__()
+        self.layer = layer
+
+    def compose(self):
+        yield self.layer
+
+
+def run_with_layer(sim, check):
+    layer = BatchedMapLayer(sim.city.city_size)
+
+    async def run():
+        app = MapApp(layer)
+        async with app.run_test(size=(100, 60)) as pilot:
+            await pilot.pause()
+            check(layer)
+
+    asyncio.run(run())
+
+
+def test_markers_drawn_in_cells():
+    sim = make_sim()
+    sim.next_block()
+
+    def check(layer):
+        layer.update_markers(sim.vehicles, sim.trips, 0)
+        spacing = layer._calculate_spacing()
+        vehicle = sim.vehicles[0]
+        offset = location_to_offset(
+            vehicle.location[0], vehicle.location[1], layer.map_size, *spacing
+        )
+        text = layer.render_line(offset.y).text
+        assert text[offset.x] in "⬆➡⬇⬅●"
+        assert layer.get_vehicle_count() == len(sim.vehicles)
+
+    run_with_layer(sim, check)
+
+
+def vehicle_cells(layer):
+    """The (column, row) of every vehicle character that is drawn"""
+    characters = set(BatchedMapLayer.VEHICLE_CHARS.values())
+    characters.add(BatchedMapLayer.PICKUP_CHARACTER)
+    return [
+        (column, row)
+        for row in range(layer.size.height)
+        for column, character in enumerate(layer.render_line(row).text)
+        if character in characters
+    ]
+
+
+def test_moving_vehicle_redrawn():
+    sim = make_sim(vehicle_count=1)
+    sim.next_block()
+
+    def check(layer):
+        layer.update_markers(sim.vehicles, {}, 0)
+        at_intersection = vehicle_cells(layer)
+        assert len(at_intersection) == 1
+        # An unchanged frame draws the same map
+        layer.update_markers(sim.vehicles, {}, 0)
+        assert vehicle_cells(layer) == at_intersection
+        # At the midpoint the vehicle is drawn once, in a new place
+        layer.update_markers(sim.vehicles, {}, 1)
+        at_midpoint = vehicle_cells(layer)
+        assert len(at_midpoint) == 1
+        assert at_midpoint != at_intersection
+
+    run_with_layer(sim, check)
+
+
+def test_container_switches_mode_with_fleet_size():
+    sim = make_sim(vehicle_count=BATCHED_MAP_VEHICLE_COUNT + 10)
+    sim.next_block()
+    container = MapContainer(sim)
+
+    async def run():
+        app = MapApp(container)
+        async with app.run_test(size=(100, 60)) as pilot:
+            await pilot.pause()
+            assert container.batched
+            assert list(container.children) == [container.map_layer]
+            # Within the hysteresis band the mode is kept
+            sim._remove_vehicles(15)
+            container.update_map(0)
+            await pilot.pause()
+            assert container.batched
+            sim._remove_vehicles(BATCHED_MAP_HYSTERESIS)
+            container.update_map(0)
+            await pilot.pause()
+            assert not container.batched
+            assert len(container.children) == 3
+            sim._add_vehicles(BATCHED_MAP_HYSTERESIS + 20)
+            container.update_map(0)
+            await pilot.pause()
+            assert container.batched
+            assert list(container.children) == [container.map_layer]
+
+    asyncio.run(run())
+
+
+def test_vehicle_at_location():
+    sim = make_sim()
+    sim.next_block()
+
+    def check(layer):
+        layer.update_markers(sim.vehicles, sim.trips, 0)
+        vehicle = sim.vehicles[0]
+        found = layer.get_vehicle_at_location(
+            vehicle.location[0] + 0.2, vehicle.location[1] - 0.2
+        )
+        assert tuple(found.location) == tuple(vehicle.location)
+
+    run_with_layer(sim, check)
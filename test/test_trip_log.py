@@ -0,0 +1,55 @@
+"""
+Tests for the binary trip log and its memory-mapped reader.
+"""
+
+import numpy as np
+import pytest
+
+from ridehail.atom import History, TripPhase
+from ridehail.config import RideHailConfig
+from ridehail.simulation import RideHailSimulation
+from ridehail.trip_log import MISSING, TripLogWriter, read_trip_log
+
+
+def make_sim():
+    config = RideHailConfig(use_config_file=False)
+    config.city_size.value = 12
+    config.vehicle_count.value = 20
+    config.base_demand.value = 1.5
+    config.pickup_time.value = 1
+    config.time_blocks.value = 150
+    config.random_number_seed.value = 9
+    return RideHailSimulation(config)
+
+
+def test_log_records_completed_trips(tmp_path):
+    sim = make_sim()
+    file_name = tmp_path / "run.trips"
+    writer = TripLogWriter(sim, file_name)
+    wait_time = completed_count = 0
+    for _ in range(150):
+        sim.next_block()
+        wait_time += sim.history_buffer[History.TRIP_WAIT_TIME]._get_tail()
+        completed_count += sim.history_buffer[History.TRIP_COMPLETED_COUNT]._get_tail()
+    writer.close()
+    log = read_trip_log(file_name)
+    assert isinstance(log, np.memmap)
+    assert len(log) == writer.records_written == completed_count > 50
+    assert (log["phase"] == TripPhase.COMPLETED.value).all()
+    assert (log["pickup_block"] - log["request_block"]).sum() == wait_time
+    assert (log["request_block"] <= log["dispatch_block"]).all()
+    assert (log["pickup_block"] - log["dispatch_block"] >= 1).all()
+    assert (log["dropoff_block"] - log["pickup_block"] == log["distance"]).all()
+    assert (log["vehicle_id"] != MISSING).all()
+    assert len(np.unique(log["trip_id"])) == len(log)
+
+
+def test_empty_and_foreign_files(tmp_path):
+    sim = make_sim()
+    file_name = tmp_path / "empty.trips"
+    TripLogWriter(sim, file_name).close()
+    assert len(read_trip_log(file_name)) == 0
+    foreign = tmp_path / "foreign.trips"
+    foreign.write_bytes(b"not a trip log at all")
+    with pytest.raises(ValueError):
+        read_trip_log(foreign)
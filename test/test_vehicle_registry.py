@@ -0,0 +1,89 @@
+"""
+Tests for the vehicle registry: stable ids, O(1) add and remove, and
+dispatch after vehicles have been removed.
+"""
+
+import random
+
+import pytest
+
+from ridehail.atom import (
+    City,
+    Trip,
+    TripPhase,
+    Vehicle,
+    VehiclePhase,
+    VehicleRegistry,
+)
+from ridehail.dispatch import Dispatch
+
+
+def make_registry(count, city_size=10):
+    city = City(city_size, rng=random.Random(1))
+    rng = random.Random(2)
+    return city, VehicleRegistry(Vehicle(i, city, rng=rng) for i in range(count))
+
+
+def test_add_and_lookup():
+    city, vehicles = make_registry(5)
+    assert len(vehicles) == 5
+    assert vehicles.next_index == 5
+    assert [vehicle.index for vehicle in vehicles] == [0, 1, 2, 3, 4]
+    assert vehicles[3].index == 3
+    with pytest.raises(ValueError):
+        vehicles.add(Vehicle(3, city))
+
+
+def test_remove_idle_keeps_busy_vehicles():
+    _, vehicles = make_registry(6)
+    for index in (1, 5):
+        vehicles[index].phase = VehiclePhase.P3
+    assert sorted(vehicles.remove_idle(10)) == [0, 2, 3, 4]
+    assert sorted(vehicle.index for vehicle in vehicles) == [1, 5]
+    # Every remaining vehicle is found under its own id
+    assert all(vehicles[vehicle.index] is vehicle for vehicle in vehicles)
+    with pytest.raises(KeyError):
+        vehicles[0]
+    assert vehicles.get(0) is None
+
+
+def test_re_add_reuses_positions_not_ids():
+    city, vehicles = make_registry(4)
+    removed = vehicles[1]
+    vehicles.remove(removed)
+    assert removed not in vehicles
+    # The last vehicle fills the freed position
+    assert [vehicle.index for vehicle in vehicles] == [0, 3, 2]
+    vehicles.add(Vehicle(vehicles.next_index, city))
+    assert [vehicle.index for vehicle in vehicles] == [0, 3, 2, 4]
+    assert vehicles.get(1) is None
+
+
+@pytest.mark.parametrize("vehicle_count", [3, 60])
+def test_dispatch_after_removal(vehicle_count):
+    # 3 vehicles in a 10-block city uses the sparse search, 60 the dense one
+    city, vehicles = make_registry(vehicle_count)
+    vehicles.remove_idle(vehicle_count // 3)
+    trips = [Trip(i, city, rng=random.Random(i)) for i in range(2)]
+    for trip in trips:
+        trip.phase = TripPhase.UNASSIGNED
+    Dispatch(rng=random.Random(3)).dispatch_vehicles(trips, city, vehicles)
+    dispatched = [vehicle for vehicle in vehicles if vehicle.phase == VehiclePhase.P2]
+    assert len(dispatched) == 2
+    assert {vehicle.trip_index for vehicle in dispatched} == {0, 1}
+
+
+def test_stale_ids_in_the_dispatch_grid_fail_loudly():
+    city, vehicles = make_registry(60)
+    dispatch = Dispatch(rng=random.Random(3))
+    dispatchable = list(vehicles)
+    grid = dispatch._build_location_grid(dispatchable)
+    # A grid built before a vehicle left the fleet is a bug, not a miss
+    vehicles.remove(dispatchable[0])
+    trip = Trip(0, city, rng=random.Random(0))
+    trip.origin = dispatchable[0].location
+    trip.phase = TripPhase.UNASSIGNED
+    with pytest.raises(KeyError):
+        dispatch._dispatch_vehicle_dense(
+            trip, city, grid, set(dispatchable), vehicles
+        )
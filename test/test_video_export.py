@@ -0,0 +1,77 @@
+"""
+Tests for the offline video export: recording block states and rendering frames.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ridehail.atom import Animation
+from ridehail.config import RideHailConfig
+from ridehail.simulation import RideHailSimulation
+from ridehail.animation import create_animation
+from ridehail.animation import video
+from ridehail.animation.video import VideoExportAnimation
+
+
+def make_export(animation):
+    config = RideHailConfig(use_config_file=False)
+    config.animation.value = animation
+    config.random_number_seed.value = 5
+    config.city_size.value = 10
+    config.vehicle_count.value = 30
+    config.base_demand.value = 2.0
+    config.time_blocks.value = 12
+    config.animation_output_file.value = "export.mp4"
+    config.animation_render_processes.value = 2
+    return create_animation(animation, RideHailSimulation(config))
+
+
+def test_factory_selects_export():
+    assert isinstance(make_export(Animation.MAP), VideoExportAnimation)
+
+
+def test_record_and_map_frames():
+    export = make_export(Animation.MAP)
+    block_states = export.record()
+    assert len(block_states) == 12
+    assert block_states[-1].vehicle_locations.shape == (30, 2)
+    assert export.sim.results is not None
+    tasks = list(export.block_tasks(block_states))
+    # One task per block, drawing every interpolated frame of the block
+    assert len(tasks) == 12
+    video._start_renderer(
+        Animation.MAP,
+        export.title,
+        export.color_palette,
+        export.display_fringe,
+        export.measures,
+    )
+    width, height = (size * video._DPI for size in video._FIGURE_SIZE[Animation.MAP])
+    frames = video._render_block(tasks[1])
+    assert len(frames) == export.interpolation_points + 1
+    assert all(len(frame) == width * height * 4 for frame in frames)
+
+
+def test_stats_frames_window():
+    export = make_export(Animation.STATS)
+    block_states = export.record()
+    tasks = list(export.block_tasks(block_states))
+    assert len(tasks) == 12
+    state, (window,) = tasks[-1]
+    assert window.shape == (12, len(export.measures))
+    assert (window[-1] == state.measures).all()
+
+
+def test_map_bounded_limits_work_in_flight():
+    consumed = []
+
+    def arguments():
+        for argument in range(20):
+            consumed.append(argument)
+            yield argument
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = video.map_bounded(executor, lambda x: x * x, arguments(), 3)
+        assert next(results) == 0
+        # Only the window, and the next argument, have been taken
+        assert len(consumed) == 4
+        assert list(results) == [x * x for x in range(1, 20)]